@@ -1,9 +1,17 @@
 """Google ADK based content generation agent."""
 
+from collections.abc import AsyncIterator
+
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 from config import settings
+from common_tools import tracing
+from hybrid_components.adk_runtime import AdkRuntime
+from hybrid_components.llm_cache import get_default_llm_cache
+from hybrid_components.prompt_prefix import build_prefix
+from hybrid_components.streaming import DONE, ERROR, AgentEvent, cached_events, stream_adk_events
 from .tools.research_tool import perform_web_research
+from .tools.style_analyzer import analyze_style
 
 # Expose the research function so the agent's LLM can invoke it when needed.
 research_tool_adk = FunctionTool(
@@ -12,11 +20,32 @@ research_tool_adk = FunctionTool(
     description="Performs web research for a given query and returns summaries of top results.",
 )
 
+style_analyzer_adk = FunctionTool(
+    fn=analyze_style,
+    name="StyleAnalyzer",
+    description=(
+        "Reports readability, sentence-length and voice metrics of a draft and, given a "
+        "reference profile name, how closely it matches that style."
+    ),
+)
+
+# Built once per process so the prompt prefix stays byte-identical across
+# runs; the topic and content type only ever appear in the user message.
+INSTRUCTIONS = "You are a creative content writer. Use tools to research topics and analyze style."
+TOOLS = (research_tool_adk, style_analyzer_adk)
+PREFIX = build_prefix("ContentAgentGoogleADK", INSTRUCTIONS, TOOLS)
+
 
 class ContentAgentGoogleADK:
     """Agent capable of producing content using either Gemini or OpenAI models."""
 
-    def __init__(self, model_name: str | None = None, use_openai_model: bool = False) -> None:
+    def __init__(
+        self,
+        model_name: str | None = None,
+        use_openai_model: bool = False,
+        session_service=None,
+        use_llm_cache: bool = True,
+    ) -> None:
         llm_provider = None
         if use_openai_model:
             from google.adk.llms.litellm import LiteLlm
@@ -24,25 +53,87 @@ class ContentAgentGoogleADK:
         else:
             llm_provider = model_name or settings.DEFAULT_GOOGLE_GEMINI_MODEL
 
+        self.prefix = PREFIX
         self.agent = Agent(
             name="GoogleADKContentAgent",
             llm=llm_provider,
-            instructions="You are a creative content writer. Use tools to research topics and analyze style.",
-            tools=[research_tool_adk],
+            instructions=PREFIX.instructions,
+            tools=list(TOOLS),
         )
+        self.model_name = str(getattr(llm_provider, "model", llm_provider))
+        self.llm_cache = get_default_llm_cache() if use_llm_cache else None
+        self._cache_scope = (self.model_name, PREFIX.instructions, PREFIX.tool_names)
+        self.runtime = AdkRuntime("ContentAgentApp", self.agent, session_service)
 
-    def generate_content(self, topic: str, content_type: str = "blog_post_outline") -> str:
-        """Generate a piece of content using the configured ADK agent."""
+    def generate_content(
+        self,
+        topic: str,
+        content_type: str = "blog_post_outline",
+        user_id: str = "user123",
+        session_id: str | None = None,
+    ) -> str:
+        """Generate a piece of content using the configured ADK agent.
 
-        from google.adk.runners import Runner
-        from google.adk.sessions.in_memory_session_service import InMemorySessionService
+        Reuse a ``session_id`` to ask for revisions of an earlier draft.  New
+        conversations are served from the response cache when possible.
+        """
 
-        session_service = InMemorySessionService()
-        session = session_service.create_session(user_id="user123", app_name="ContentAgentApp")
-        runner = Runner(app_name="ContentAgentApp", agent=self.agent, session_service=session_service)
         query = f"Create a {content_type} about {topic}."
-        events = list(runner.run_once(session_id=session.session_id, query=query))
-        final_response = "".join(
-            e.content for e in events if e.type == "TEXT" and e.source.type == "MODEL"
-        )
-        return final_response
+        use_cache = self.llm_cache is not None and session_id is None
+        with tracing.span(
+            "agent.ContentAgentGoogleADK", "agent", agent="ContentAgentGoogleADK", model=self.model_name
+        ) as run_span:
+            if use_cache:
+                hit = self.llm_cache.lookup("ContentAgentGoogleADK", *self._cache_scope, query)
+                run_span.set(cache_status=hit.tier if hit else "miss")
+                if hit is not None:
+                    return hit.response
+
+            session_id = self.runtime.ensure_session(user_id, session_id)
+            parts = []
+            with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                for e in self.runtime.run_once(session_id=session_id, query=query):
+                    tracing.record_adk_usage(llm_span, e)
+                    if e.type == "TEXT" and e.source.type == "MODEL":
+                        parts.append(e.content)
+            final_response = "".join(parts)
+            if use_cache:
+                self.llm_cache.store(*self._cache_scope, query, final_response)
+            return final_response
+
+    async def astream_content(
+        self,
+        topic: str,
+        content_type: str = "blog_post_outline",
+        user_id: str = "user123",
+        session_id: str | None = None,
+    ) -> AsyncIterator[AgentEvent]:
+        """Stream the draft as it is written; see :mod:`hybrid_components.streaming`.
+
+        Events carry the ``session_id`` to reuse when asking for a revision
+        (``None`` for a draft served from the cache).
+        """
+
+        query = f"Create a {content_type} about {topic}."
+        use_cache = self.llm_cache is not None and session_id is None
+        with tracing.span(
+            "agent.ContentAgentGoogleADK", "agent", agent="ContentAgentGoogleADK", model=self.model_name, streamed=True
+        ) as run_span:
+            if use_cache:
+                hit = self.llm_cache.lookup("ContentAgentGoogleADK", *self._cache_scope, query)
+                run_span.set(cache_status=hit.tier if hit else "miss")
+                if hit is not None:
+                    for event in cached_events(hit.response):
+                        yield event
+                    return
+            session_id = self.runtime.ensure_session(user_id, session_id)
+            try:
+                with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                    events = self.runtime.run_once(session_id=session_id, query=query)
+                    async for event in stream_adk_events(events, session_id, collect=use_cache, span=llm_span):
+                        if event.type == DONE and use_cache:
+                            self.llm_cache.store(*self._cache_scope, query, event.payload)
+                        yield event
+            except Exception as e:  # pragma: no cover - runtime diagnostics
+                run_span.status, run_span.error = "error", str(e)
+                yield AgentEvent(ERROR, text=str(e), session_id=session_id)
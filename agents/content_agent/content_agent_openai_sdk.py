@@ -1,8 +1,15 @@
 """Content creation agent built with the OpenAI Agents SDK."""
 
+from collections.abc import AsyncIterator
+
 from openai_agents import Agent, Runner, function_tool
 from config import settings
+from common_tools import tracing
+from hybrid_components.llm_cache import get_default_llm_cache
+from hybrid_components.prompt_prefix import build_prefix
+from hybrid_components.streaming import DONE, ERROR, AgentEvent, cached_events, stream_openai_run
 from .tools.research_tool import perform_web_research
+from .tools.style_analyzer import analyze_style
 
 
 @function_tool
@@ -12,20 +19,85 @@ def research_tool_openai(query: str, num_results: int = 3) -> list:
     return perform_web_research(query, num_results)
 
 
+@function_tool
+def style_analyzer_openai(text: str, reference: str | None = None) -> dict:
+    """Readability, sentence-length and voice metrics of a draft.
+
+    Pass ``reference`` (e.g. ``"brand"``) to score the draft against a saved
+    style profile.
+    """
+
+    return analyze_style(text, reference)
+
+
+# Built once per process so the prompt prefix stays byte-identical across
+# runs; the topic and content type only ever appear in the user message.
+INSTRUCTIONS = "You are a creative content writer using OpenAI SDK."
+TOOLS = (research_tool_openai, style_analyzer_openai)
+PREFIX = build_prefix("ContentAgentOpenAISDK", INSTRUCTIONS, TOOLS)
+
 class ContentAgentOpenAISDK:
-    def __init__(self, model_name: str = settings.DEFAULT_OPENAI_MODEL):
-        """Initialize the content agent with the desired OpenAI model."""
+    def __init__(self, model_name: str = settings.DEFAULT_OPENAI_MODEL, use_llm_cache: bool = True, runner=None):
+        """Initialize the content agent with the desired OpenAI model.
+
+        ``runner`` defaults to the SDK's ``Runner``; pass a stand-in such as
+        :class:`hybrid_components.stub_model.StubRunner` to run offline.
+        """
 
+        self.runner = runner or Runner
+        self.model_name = model_name
+        self.prefix = PREFIX
         self.agent = Agent(
             name="OpenAIContentAgent",
-            instructions="You are a creative content writer using OpenAI SDK.",
+            instructions=PREFIX.instructions,
             model=model_name,
-            tools=[research_tool_openai],
+            tools=list(TOOLS),
         )
+        self.llm_cache = get_default_llm_cache() if use_llm_cache else None
+        self._cache_scope = (model_name, PREFIX.instructions, PREFIX.tool_names)
+
+    def _lookup_cached(self, query: str, run_span: tracing.Span):
+        if self.llm_cache is None:
+            return None
+        hit = self.llm_cache.lookup("ContentAgentOpenAISDK", *self._cache_scope, query)
+        run_span.set(cache_status=hit.tier if hit else "miss")
+        return hit
 
     def generate_content(self, topic: str, content_type: str = "blog_post_outline"):
         """Generate content for the given topic."""
 
         query = f"Create a {content_type} about {topic}."
-        result = Runner.run_sync(self.agent, query)
-        return result.final_output
+        with tracing.span(
+            "agent.ContentAgentOpenAISDK", "agent", agent="ContentAgentOpenAISDK", model=self.model_name
+        ) as run_span:
+            hit = self._lookup_cached(query, run_span)
+            if hit is not None:
+                return hit.response
+            with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                result = self.runner.run_sync(self.agent, query)
+                tracing.record_openai_usage(llm_span, result)
+            if self.llm_cache is not None:
+                self.llm_cache.store(*self._cache_scope, query, result.final_output)
+            return result.final_output
+
+    async def astream_content(self, topic: str, content_type: str = "blog_post_outline") -> AsyncIterator[AgentEvent]:
+        """Stream the draft as it is written; see :mod:`hybrid_components.streaming`."""
+
+        query = f"Create a {content_type} about {topic}."
+        with tracing.span(
+            "agent.ContentAgentOpenAISDK", "agent", agent="ContentAgentOpenAISDK", model=self.model_name, streamed=True
+        ) as run_span:
+            hit = self._lookup_cached(query, run_span)
+            if hit is not None:
+                for event in cached_events(hit.response):
+                    yield event
+                return
+            try:
+                with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                    async for event in stream_openai_run(self.runner, self.agent, query, llm_span):
+                        if event.type == DONE and self.llm_cache is not None:
+                            self.llm_cache.store(*self._cache_scope, query, event.payload)
+                        yield event
+            except Exception as e:  # pragma: no cover - runtime diagnostics
+                run_span.status, run_span.error = "error", str(e)
+                yield AgentEvent(ERROR, text=str(e))
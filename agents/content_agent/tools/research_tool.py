@@ -1,11 +1,91 @@
-"""Simple research tool used by content agents."""
+"""Research tool used by content agents.
 
+``perform_web_research`` delegates to a pluggable :class:`ResearchBackend`.
+The default, selected with ``RESEARCH_BACKEND`` in :mod:`config.settings`, is
+the local BM25 index of :mod:`.search_index`, fed with pages fetched by the web
+prospector and internal documents, so research calls need no network.  The
+``mock`` backend returns the canned results used before the index existed.
+"""
+
+import logging
+import threading
+from typing import Protocol
+
+from common_tools.tracing import traced
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchBackend(Protocol):
+    """Anything that can return the ``k`` most relevant results for a query."""
+
+    def search(self, query: str, k: int) -> list[dict]:
+        """Return up to ``k`` ``{"title", "snippet", "url"}`` dicts, best first."""
+
+
+class MockResearchBackend:
+    """Canned results, for demos and offline agent runs without an index."""
+
+    def search(self, query: str, k: int) -> list[dict]:
+        mock_results = [
+            {"title": f"Result 1 for {query}", "snippet": "This is a summary of the first search result.", "url": "http://example.com/result1"},
+            {"title": f"Result 2 for {query}", "snippet": "Detailed information can be found here regarding {query}.", "url": "http://example.com/result2"},
+            {"title": f"Result 3 for {query}", "snippet": "Another perspective on {query}.", "url": "http://example.com/result3"},
+        ]
+        return mock_results[:k]
+
+
+class LocalIndexBackend:
+    """Top-k retrieval from a :class:`~.search_index.SearchIndex`."""
+
+    def __init__(self, index) -> None:
+        self.index = index
+
+    def search(self, query: str, k: int) -> list[dict]:
+        return [hit.to_dict() for hit in self.index.search(query, k)]
+
+
+_default_backend: ResearchBackend | None = None
+_default_backend_lock = threading.Lock()
+
+
+def get_default_backend() -> ResearchBackend:
+    """Return the process-wide backend configured in :mod:`config.settings`."""
+
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            if settings.RESEARCH_BACKEND == "mock":
+                _default_backend = MockResearchBackend()
+            elif settings.RESEARCH_BACKEND == "local":
+                # Imported here so agents using the mock backend do not need NumPy.
+                from .search_index import SearchIndex
+
+                _default_backend = LocalIndexBackend(SearchIndex(settings.RESEARCH_INDEX_PATH))
+            else:
+                raise ValueError(
+                    f"Unknown RESEARCH_BACKEND {settings.RESEARCH_BACKEND!r}; expected 'local' or 'mock'"
+                )
+        return _default_backend
+
+
+def set_default_backend(backend: ResearchBackend | None) -> None:
+    """Replace the backend used by :func:`perform_web_research` (``None`` resets it)."""
+
+    global _default_backend
+    with _default_backend_lock:
+        _default_backend = backend
+
+
+@traced()
 def perform_web_research(query: str, num_results: int = 3) -> list:
-    """Mock web search returning a list of result summaries."""
-    print(f"Performing research for: {query} (mocked, returning {num_results} results)")
-    mock_results = [
-        {"title": f"Result 1 for {query}", "snippet": "This is a summary of the first search result.", "url": "http://example.com/result1"},
-        {"title": f"Result 2 for {query}", "snippet": "Detailed information can be found here regarding {query}.", "url": "http://example.com/result2"},
-        {"title": f"Result 3 for {query}", "snippet": "Another perspective on {query}.", "url": "http://example.com/result3"},
-    ]
-    return mock_results[:num_results]
+    """Search the research corpus and return the top ``num_results`` results.
+
+    Each result is a dict with ``title``, ``snippet`` (query terms
+    highlighted) and ``url``.
+    """
+
+    results = get_default_backend().search(query, num_results)
+    logger.info("Research for %r returned %d of %d requested results", query, len(results), num_results)
+    return results
@@ -0,0 +1,632 @@
+"""Local full-text search engine backing the research tool.
+
+:class:`SearchIndex` is a small segment-based inverted index with BM25
+ranking, built for corpora far larger than memory:
+
+* Documents are added incrementally and buffered in memory.  Every
+  ``segment_docs`` documents (or on :meth:`SearchIndex.commit`) the buffer is
+  written as an immutable *segment*: two flat binary files holding, term by
+  term, the ascending document ids (``uint32``) and term frequencies
+  (``uint16``) of its postings.
+* Segments are memory-mapped, so only the pages holding the postings of the
+  queried terms are ever read, and the operating system's page cache decides
+  what stays resident.
+* The lexicon (term -> segment, offset, count), the document text and the
+  collection statistics live in SQLite next to the segments.
+* Re-adding a document with the same key replaces it; the old version is
+  masked out at query time and dropped the next time segments are merged.
+
+Scoring accumulates BM25 contributions for every posting of the query terms
+into a dense array with NumPy, then selects the top ``k``, which keeps a query
+over a million documents in the low milliseconds.  Results carry a snippet
+around the densest cluster of query terms with the matches highlighted.
+
+The index can be fed from the command line::
+
+    python -m agents.content_agent.tools.search_index ingest-dir docs/
+    python -m agents.content_agent.tools.search_index ingest-prospector-cache
+    python -m agents.content_agent.tools.search_index query "email deliverability"
+"""
+
+import argparse
+import html
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    source TEXT,
+    body BLOB NOT NULL,
+    length INTEGER NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lexicon (
+    term TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term, segment)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS segments (
+    segment INTEGER PRIMARY KEY,
+    doc_count INTEGER NOT NULL,
+    postings INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deleted (doc_id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+# Words too common to help ranking; dropping them also keeps the largest
+# posting lists out of the index.
+STOPWORDS = frozenset(
+    """a about an and are as at be but by for from has have how i if in into is it its
+    of on or our that the their there these this to was we were what when which who
+    will with you your""".split()
+)
+
+_TOKEN = re.compile(r"[^\W_]+")
+_MAX_TERM_LENGTH = 64
+_MAX_TF = 0xFFFF
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens of ``text`` without stopwords."""
+
+    return [
+        token
+        for token in _TOKEN.findall(text.lower())
+        if token not in STOPWORDS and len(token) <= _MAX_TERM_LENGTH
+    ]
+
+
+_SCRIPT_STYLE = re.compile(r"<(script|style|noscript)\b.*?</\1\s*>|<!--.*?-->", re.I | re.S)
+_TITLE = re.compile(r"<title[^>]*>(.*?)</title\s*>", re.I | re.S)
+_BLOCK_TAG = re.compile(r"</?(p|div|br|li|h[1-6]|tr|section|article)\b[^>]*>", re.I)
+_TAG = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def html_to_text(markup: str) -> tuple[str, str]:
+    """Return ``(title, visible_text)`` of an HTML page without parsing a tree."""
+
+    match = _TITLE.search(markup)
+    title = html.unescape(_SPACES.sub(" ", match.group(1))).strip() if match else ""
+    text = _SCRIPT_STYLE.sub(" ", markup)
+    text = _BLOCK_TAG.sub("\n", text)
+    text = html.unescape(_TAG.sub(" ", text))
+    text = _BLANK_LINES.sub("\n", _SPACES.sub(" ", text)).strip()
+    return title, text
+
+
+# ---------------------------------------------------------------------------
+# Snippets
+# ---------------------------------------------------------------------------
+# Only the beginning of very long documents is scanned for a snippet.
+_SNIPPET_SCAN_CHARS = 200_000
+
+
+def make_snippet(
+    text: str, terms: Iterable[str], width: int = 240, highlight: tuple[str, str] = ("**", "**")
+) -> str:
+    """Extract about ``width`` characters around the densest cluster of ``terms``.
+
+    The window holding the most distinct query terms (then the most matches)
+    wins.  Matches are wrapped in ``highlight``; an ellipsis marks text cut off
+    on either side.
+    """
+
+    terms = sorted(set(terms), key=len, reverse=True)
+    text = text[:_SNIPPET_SCAN_CHARS]
+    if not text or not terms:
+        return text[:width]
+    pattern = re.compile(
+        r"(?<![^\W_])(?:" + "|".join(map(re.escape, terms)) + r")(?![^\W_])", re.IGNORECASE
+    )
+    matches = [(m.start(), m.group().lower()) for m in pattern.finditer(text)]
+
+    # Two-pointer scan over the matches for the best window of ``width`` chars.
+    best_start, best_score = 0, (0, 0)
+    window: Counter = Counter()
+    left = 0
+    for position, term in matches:
+        window[term] += 1
+        while position - matches[left][0] > width // 2:
+            window[matches[left][1]] -= 1
+            if not window[matches[left][1]]:
+                del window[matches[left][1]]
+            left += 1
+        score = (len(window), sum(window.values()))
+        if score > best_score:
+            best_start, best_score = matches[left][0], score
+
+    # Centre the cluster in the window and cut at word boundaries.
+    start = max(0, best_start - width // 4)
+    if start:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < best_start else start
+    end = min(len(text), start + width)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+
+    opening, closing = highlight
+    snippet = pattern.sub(lambda m: f"{opening}{m.group()}{closing}", " ".join(text[start:end].split()))
+    if start > 0:
+        snippet = "… " + snippet
+    if end < len(text):
+        snippet += " …"
+    return snippet
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+@dataclass
+class SearchHit:
+    doc_id: int
+    key: str
+    title: str
+    source: str | None
+    score: float
+    snippet: str
+
+    def to_dict(self) -> dict:
+        # Same shape as the research tool's results.
+        return {"title": self.title, "snippet": self.snippet, "url": self.key, "score": round(self.score, 4)}
+
+
+class _Segment:
+    """Memory-mapped postings of one flushed segment."""
+
+    def __init__(self, directory: Path, number: int) -> None:
+        self.number = number
+        self.ids_path = directory / f"seg_{number:06d}.ids"
+        self.tfs_path = directory / f"seg_{number:06d}.tfs"
+        self.ids = np.memmap(self.ids_path, dtype=np.uint32, mode="r")
+        self.tfs = np.memmap(self.tfs_path, dtype=np.uint16, mode="r")
+
+
+class SearchIndex:
+    """Incrementally updated BM25 index stored in ``directory``.
+
+    Parameters
+    ----------
+    directory:
+        Folder holding ``index.sqlite``, the segment files and the
+        document-length array.  Created if missing.
+    segment_docs:
+        Buffered documents that trigger writing a new segment.
+    max_segments:
+        Segments beyond this count are merged into one after a flush.
+    k1, b:
+        BM25 term-frequency saturation and length normalisation.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_docs: int = 20_000,
+        max_segments: int = 16,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_docs = segment_docs
+        self.max_segments = max_segments
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            self.directory / "index.sqlite", check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._buffer: dict[str, tuple[str, str, str | None]] = {}
+
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self._next_doc_id = meta.get("next_doc_id", 1)
+        self._live_docs = meta.get("live_docs", 0)
+        self._total_length = meta.get("total_length", 0)
+        self._next_segment = meta.get("next_segment", 1)
+
+        # Document lengths indexed by doc id (slot 0 unused), memory-mapped for
+        # BM25 length normalisation.  A flush appends its lengths before its
+        # transaction commits; anything past the committed ``next_doc_id``
+        # belongs to a flush that never committed and is cut off here.
+        self._lengths_path = self.directory / "doclens.u32"
+        if not self._lengths_path.exists():
+            self._lengths_path.write_bytes(bytes(4))
+        self._truncate_lengths(self._next_doc_id)
+        self._segments = {
+            number: _Segment(self.directory, number)
+            for (number,) in self._conn.execute("SELECT segment FROM segments WHERE postings > 0")
+        }
+        self._deleted = np.fromiter(
+            (doc_id for (doc_id,) in self._conn.execute("SELECT doc_id FROM deleted")), dtype=np.int64
+        )
+        self._map_lengths()
+
+    def _map_lengths(self) -> None:
+        self._lengths = np.memmap(self._lengths_path, dtype=np.uint32, mode="r")
+
+    def _truncate_lengths(self, doc_count: int) -> None:
+        if self._lengths_path.stat().st_size > 4 * doc_count:
+            with open(self._lengths_path, "r+b") as lengths_file:
+                lengths_file.truncate(4 * doc_count)
+
+    def close(self) -> None:
+        with self._lock:
+            self.commit()
+            self._conn.close()
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": self._live_docs,
+                "buffered": len(self._buffer),
+                "segments": len(self._segments),
+                "deleted_pending_merge": int(self._deleted.size),
+                "average_length": self._total_length / self._live_docs if self._live_docs else 0.0,
+            }
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+    def add(self, key: str, text: str, title: str = "", source: str | None = None) -> None:
+        """Add or replace the document identified by ``key`` (usually its URL).
+
+        Documents become searchable once their segment is written, either
+        when the buffer fills up or on :meth:`commit`.
+        """
+
+        with self._lock:
+            self._buffer[key] = (title, text, source)
+            if len(self._buffer) >= self.segment_docs:
+                self._flush_locked()
+
+    def add_many(self, documents: Iterable[dict]) -> int:
+        """Add ``{"key", "text", "title", "source"}`` dicts; returns the count."""
+
+        count = 0
+        for document in documents:
+            self.add(document["key"], document["text"], document.get("title", ""), document.get("source"))
+            count += 1
+        return count
+
+    def commit(self) -> None:
+        """Write buffered documents to a new segment so they become searchable."""
+
+        with self._lock:
+            if self._buffer:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        documents = list(self._buffer.items())
+        self._buffer.clear()
+        first_id = self._next_doc_id
+        segment = self._next_segment
+
+        postings: dict[str, array] = {}
+        frequencies: dict[str, array] = {}
+        lengths = array("I")
+        rows = []
+        now = time.time()
+        for offset, (key, (title, text, source)) in enumerate(documents):
+            doc_id = first_id + offset
+            tokens = tokenize(f"{title}\n{text}")
+            for term, tf in Counter(tokens).items():
+                if term not in postings:
+                    postings[term], frequencies[term] = array("I"), array("H")
+                postings[term].append(doc_id)
+                frequencies[term].append(min(tf, _MAX_TF))
+            lengths.append(len(tokens))
+            rows.append((doc_id, key, title, source, zlib.compress(text.encode("utf-8")), len(tokens), now))
+
+        lexicon = []
+        position = 0
+        ids_path = self.directory / f"seg_{segment:06d}.ids"
+        tfs_path = self.directory / f"seg_{segment:06d}.tfs"
+        with open(f"{ids_path}.tmp", "wb") as ids_file, open(f"{tfs_path}.tmp", "wb") as tfs_file:
+            for term in sorted(postings):
+                postings[term].tofile(ids_file)
+                frequencies[term].tofile(tfs_file)
+                lexicon.append((term, segment, position, len(postings[term])))
+                position += len(postings[term])
+        os.replace(f"{ids_path}.tmp", ids_path)
+        os.replace(f"{tfs_path}.tmp", tfs_path)
+        with open(self._lengths_path, "ab") as lengths_file:
+            lengths.tofile(lengths_file)
+
+        keys = [key for key, _ in documents]
+        replaced = []
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            replaced += self._conn.execute(
+                f"SELECT doc_id, length FROM documents WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+
+        counters = (self._next_doc_id, self._next_segment, self._live_docs, self._total_length)
+        self._conn.execute("BEGIN")
+        try:
+            if replaced:
+                self._conn.executemany("DELETE FROM documents WHERE doc_id = ?", [(d,) for d, _ in replaced])
+                self._conn.executemany("INSERT INTO deleted VALUES (?)", [(d,) for d, _ in replaced])
+            self._conn.executemany("INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany("INSERT INTO lexicon VALUES (?, ?, ?, ?)", lexicon)
+            self._conn.execute("INSERT INTO segments VALUES (?, ?, ?)", (segment, len(documents), position))
+            self._next_doc_id = first_id + len(documents)
+            self._next_segment = segment + 1
+            self._live_docs += len(documents) - len(replaced)
+            self._total_length += sum(lengths) - sum(length for _, length in replaced)
+            self._write_meta_locked()
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            self._next_doc_id, self._next_segment, self._live_docs, self._total_length = counters
+            self._truncate_lengths(first_id)
+            raise
+
+        if position:
+            self._segments[segment] = _Segment(self.directory, segment)
+        if replaced:
+            self._deleted = np.concatenate([self._deleted, np.array([d for d, _ in replaced], dtype=np.int64)])
+        self._map_lengths()
+        if len(self._segments) > self.max_segments:
+            self._merge_locked()
+
+    def _write_meta_locked(self) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+            [
+                ("next_doc_id", self._next_doc_id),
+                ("live_docs", self._live_docs),
+                ("total_length", self._total_length),
+                ("next_segment", self._next_segment),
+            ],
+        )
+
+    def merge(self) -> None:
+        """Merge every segment into one and drop replaced documents' postings."""
+
+        with self._lock:
+            self.commit()
+            if len(self._segments) > 1 or self._deleted.size:
+                self._merge_locked()
+
+    def _merge_locked(self) -> None:
+        old = dict(self._segments)
+        segment = self._next_segment
+        ids_path = self.directory / f"seg_{segment:06d}.ids"
+        tfs_path = self.directory / f"seg_{segment:06d}.tfs"
+        deleted = np.sort(self._deleted)
+        lexicon = []
+        position = 0
+
+        # Terms come out of the lexicon in order and, within a term, segments
+        # in creation order, so concatenating keeps doc ids ascending.
+        cursor = self._conn.execute("SELECT term, segment, offset, count FROM lexicon ORDER BY term, segment")
+        with open(f"{ids_path}.tmp", "wb") as ids_file, open(f"{tfs_path}.tmp", "wb") as tfs_file:
+            current, id_parts, tf_parts = None, [], []
+
+            def emit() -> None:
+                nonlocal position
+                ids = np.concatenate(id_parts)
+                tfs = np.concatenate(tf_parts)
+                if deleted.size:
+                    keep = ~np.isin(ids, deleted, assume_unique=True)
+                    ids, tfs = ids[keep], tfs[keep]
+                if ids.size:
+                    ids.tofile(ids_file)
+                    tfs.tofile(tfs_file)
+                    lexicon.append((current, segment, position, int(ids.size)))
+                    position += int(ids.size)
+
+            for term, number, offset, count in cursor:
+                if term != current and id_parts:
+                    emit()
+                    id_parts, tf_parts = [], []
+                current = term
+                source = old[number]
+                id_parts.append(source.ids[offset:offset + count])
+                tf_parts.append(source.tfs[offset:offset + count])
+            if id_parts:
+                emit()
+        os.replace(f"{ids_path}.tmp", ids_path)
+        os.replace(f"{tfs_path}.tmp", tfs_path)
+
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("DELETE FROM lexicon")
+            self._conn.execute("DELETE FROM segments")
+            self._conn.execute("DELETE FROM deleted")
+            self._conn.executemany("INSERT INTO lexicon VALUES (?, ?, ?, ?)", lexicon)
+            self._conn.execute("INSERT INTO segments VALUES (?, ?, ?)", (segment, self._live_docs, position))
+            self._next_segment = segment + 1
+            self._write_meta_locked()
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        self._segments = {segment: _Segment(self.directory, segment)} if position else {}
+        self._deleted = np.empty(0, dtype=np.int64)
+        for source in old.values():
+            # Open maps (e.g. of a concurrent query) stay valid after unlinking.
+            source.ids_path.unlink(missing_ok=True)
+            source.tfs_path.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def search(self, query: str, k: int = 10, highlight: tuple[str, str] = ("**", "**")) -> list[SearchHit]:
+        """Return the ``k`` best BM25 matches for ``query``, best first."""
+
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or k <= 0:
+            return []
+        with self._lock:
+            if not self._live_docs:
+                return []
+            rows = self._conn.execute(
+                f"SELECT term, segment, offset, count FROM lexicon WHERE term IN ({','.join('?' * len(terms))})",
+                terms,
+            ).fetchall()
+            segments = self._segments
+            lengths = self._lengths
+            deleted = self._deleted
+            doc_count = self._live_docs
+            average_length = self._total_length / doc_count
+
+        document_frequency = Counter()
+        for term, _, _, count in rows:
+            document_frequency[term] += count
+        k1, b = self.k1, self.b
+        doc_ids, contributions = [], []
+        for term, number, offset, count in rows:
+            df = document_frequency[term]
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            ids = segments[number].ids[offset:offset + count]
+            tf = segments[number].tfs[offset:offset + count].astype(np.float32)
+            norm = k1 * (1 - b + b * lengths[ids] / average_length)
+            doc_ids.append(ids)
+            contributions.append(idf * tf * (k1 + 1) / (tf + norm))
+        if not doc_ids:
+            return []
+
+        if sum(ids.size for ids in doc_ids) * 8 < len(lengths):
+            # Few postings: aggregate them directly rather than touching an
+            # accumulator the size of the whole collection.
+            candidates, inverse = np.unique(np.concatenate(doc_ids), return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate(contributions))
+            if deleted.size:
+                totals[np.isin(candidates, deleted)] = 0
+        else:
+            scores = np.zeros(len(lengths), dtype=np.float32)
+            for ids, contribution in zip(doc_ids, contributions):
+                scores[ids] += contribution
+            if deleted.size:
+                scores[deleted] = 0
+            candidates = np.flatnonzero(scores)
+            totals = scores[candidates]
+
+        keep = totals > 0
+        candidates, totals = candidates[keep], totals[keep]
+        if candidates.size > k:
+            top = np.argpartition(totals, -k)[-k:]
+            candidates, totals = candidates[top], totals[top]
+        order = np.argsort(-totals, kind="stable")
+        ranked, ranked_scores = candidates[order], totals[order]
+        if not ranked.size:
+            return []
+
+        with self._lock:
+            found = {
+                doc_id: (key, title, source, body)
+                for doc_id, key, title, source, body in self._conn.execute(
+                    f"SELECT doc_id, key, title, source, body FROM documents WHERE doc_id IN "
+                    f"({','.join('?' * len(ranked))})",
+                    [int(doc_id) for doc_id in ranked],
+                )
+            }
+        hits = []
+        for doc_id, score in zip(ranked.tolist(), ranked_scores.tolist()):
+            if doc_id not in found:
+                continue
+            key, title, source, body = found[doc_id]
+            text = zlib.decompress(body).decode("utf-8")
+            snippet = make_snippet(text, terms, highlight=highlight)
+            hits.append(SearchHit(doc_id, key, title, source, score, snippet))
+        return hits
+
+
+# ---------------------------------------------------------------------------
+# Document sources
+# ---------------------------------------------------------------------------
+TEXT_SUFFIXES = (".md", ".txt", ".rst", ".html", ".htm")
+
+
+def documents_from_directory(directory: str, suffixes: tuple[str, ...] = TEXT_SUFFIXES) -> Iterator[dict]:
+    """Internal documents under ``directory`` (recursively), keyed by path."""
+
+    for path in sorted(Path(directory).rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in suffixes:
+            continue
+        content = path.read_text(encoding="utf-8", errors="replace")
+        if path.suffix.lower() in (".html", ".htm"):
+            title, text = html_to_text(content)
+        else:
+            title, text = path.stem.replace("_", " ").replace("-", " "), content
+        yield {"key": path.resolve().as_uri(), "title": title, "text": text, "source": "docs"}
+
+
+def documents_from_prospector_cache(cache, since: float = 0.0) -> Iterator[dict]:
+    """Pages kept by the web prospector's response cache, keyed by URL."""
+
+    for url, extracted, body in cache.iter_pages(since=since):
+        title, text = html_to_text(body.decode("utf-8", errors="replace"))
+        yield {"key": url, "title": extracted.get("title") or title, "text": text, "source": "crawl"}
+
+
+def main() -> None:
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="Manage the local research index.")
+    parser.add_argument("--index", default=None, help="index directory (defaults to RESEARCH_INDEX_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_dir = commands.add_parser("ingest-dir", help="index .md/.txt/.rst/.html files")
+    ingest_dir.add_argument("directory")
+    ingest_cache = commands.add_parser("ingest-prospector-cache", help="index pages fetched by the prospector")
+    ingest_cache.add_argument("--since", type=float, default=0.0, help="only pages fetched after this epoch time")
+    query = commands.add_parser("query")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=5)
+    commands.add_parser("merge", help="merge segments and drop replaced documents")
+    commands.add_parser("stats")
+    args = parser.parse_args()
+
+    with SearchIndex(args.index or settings.RESEARCH_INDEX_PATH) as index:
+        if args.command == "ingest-dir":
+            print(f"Indexed {index.add_many(documents_from_directory(args.directory))} documents")
+        elif args.command == "ingest-prospector-cache":
+            from agents.lead_agent.tools.crawler import get_default_engine
+
+            cache = get_default_engine().cache
+            count = index.add_many(documents_from_prospector_cache(cache, args.since)) if cache else 0
+            print(f"Indexed {count} cached pages")
+        elif args.command == "query":
+            start = time.perf_counter()
+            hits = index.search(args.text, args.k)
+            print(f"{len(hits)} results in {(time.perf_counter() - start) * 1000:.1f} ms")
+            for hit in hits:
+                print(f"{hit.score:7.3f}  {hit.title or hit.key}\n         {hit.key}\n         {hit.snippet}")
+        elif args.command == "merge":
+            index.merge()
+        print(index.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 """Implementation of the lead generation agent using Google ADK."""
 
+import logging
+from collections.abc import AsyncIterator
+
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 from config import settings
+from common_tools import tracing
+from hybrid_components.adk_runtime import AdkRuntime
+from hybrid_components.llm_cache import CacheHit, get_default_llm_cache
+from hybrid_components.prompt_prefix import build_prefix
+from hybrid_components.run_record import RunRecord
+from hybrid_components.streaming import DONE, ERROR, AgentEvent, cached_events, stream_adk_events
+from .tools.crm_connector import get_contact_details
+from .tools.lead_store import get_default_lead_store
 from .tools.web_prospector import prospect_website
 
+logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # Tool definitions
@@ -16,13 +28,54 @@ web_prospector_adk_tool = FunctionTool(
     name="WebProspector",
     description="Scrapes a website URL to find potential lead information like company title and emails.",
 )
+crm_connector_adk_tool = FunctionTool(
+    fn=get_contact_details,
+    name="CRMConnector",
+    description="Looks up an existing company (by name) or contact (by ID) in the CRM.",
+)
+
+# Built once per process so the prompt prefix stays byte-identical across
+# runs and the provider's prompt cache applies.
+INSTRUCTIONS = (
+    "You are a lead generation specialist. Your goal is to identify and qualify potential leads. "
+    "Use available tools to research companies and individuals. "
+    "Provide a structured summary of your findings, including contact information, company details, "
+    "and an initial qualification assessment based on predefined criteria (e.g., company size, industry)."
+)
+TOOLS = (web_prospector_adk_tool, crm_connector_adk_tool)
+PREFIX = build_prefix("LeadAgentGoogleADK", INSTRUCTIONS, TOOLS)
+
+
+def _results_store():
+    # Imported only when enabled: pyarrow is slow to import.
+    if not settings.RESULTS_STORE_PATH:
+        return None
+    from .tools.results_store import get_default_results_store
+
+    return get_default_results_store()
 
 
 class LeadAgentGoogleADK:
     """Lead generation agent built with the Google Agent Development Kit."""
 
-    def __init__(self, model_name: str | None = None, use_openai_model: bool = False) -> None:
-        """Create the agent and configure the underlying language model."""
+    def __init__(
+        self,
+        model_name: str | None = None,
+        use_openai_model: bool = False,
+        session_service=None,
+        use_llm_cache: bool = True,
+        use_lead_store: bool = True,
+        use_results_store: bool = True,
+    ) -> None:
+        """Create the agent and configure the underlying language model.
+
+        ``session_service`` defaults to the shared SQLite-backed service from
+        :mod:`hybrid_components.adk_runtime`.  ``use_llm_cache`` enables the
+        shared response cache for requests that start a new session, and
+        ``use_lead_store`` answers a repeated request about a recently seen
+        lead from the lead store.  ``use_results_store`` appends every answer
+        to the columnar results store.
+        """
 
         llm_provider = None
         if use_openai_model:
@@ -32,64 +85,154 @@ class LeadAgentGoogleADK:
             from google.adk.llms.litellm import LiteLlm
 
             llm_provider = LiteLlm(model=model_name or f"openai/{settings.DEFAULT_OPENAI_MODEL}")
-            print(
-                f"Google ADK Agent configured to attempt using OpenAI model: {model_name or settings.DEFAULT_OPENAI_MODEL} via LiteLLM"
+            logger.info(
+                "Google ADK Agent configured to attempt using OpenAI model: %s via LiteLLM",
+                model_name or settings.DEFAULT_OPENAI_MODEL,
             )
         else:
             # Default to using one of the Gemini models on Google Cloud.
             llm_provider = model_name or settings.DEFAULT_GOOGLE_GEMINI_MODEL
-            print(f"Google ADK Agent configured with Google model: {llm_provider}")
+            logger.info("Google ADK Agent configured with Google model: %s", llm_provider)
 
         # ------------------------------------------------------------------
         # Construct the ADK Agent
         # ------------------------------------------------------------------
+        self.prefix = PREFIX
         self.agent = Agent(
             name="GoogleADKLeadAgent",
             llm=llm_provider,
-            instructions=(
-                "You are a lead generation specialist. Your goal is to identify and qualify potential leads. "
-                "Use available tools to research companies and individuals. "
-                "Provide a structured summary of your findings, including contact information, company details, "
-                "and an initial qualification assessment based on predefined criteria (e.g., company size, industry)."
-            ),
-            tools=[web_prospector_adk_tool],
+            instructions=PREFIX.instructions,
+            tools=list(TOOLS),
         )
-        print("LeadAgentGoogleADK initialized.")
+        # LiteLlm instances are identified by their model string in cache keys
+        # and traces.
+        self.model_name = str(getattr(llm_provider, "model", llm_provider))
+        self.llm_cache = get_default_llm_cache() if use_llm_cache else None
+        self._cache_scope = (self.model_name, PREFIX.instructions, PREFIX.tool_names)
+        self.lead_store = get_default_lead_store() if use_lead_store else None
+        self.results_store = _results_store() if use_results_store else None
+        # One runner and session service for the agent's lifetime, so sessions
+        # survive between calls and the setup cost is paid only once.
+        self.runtime = AdkRuntime("LeadAgentApp", self.agent, session_service)
+        logger.info("LeadAgentGoogleADK initialized.")
+
+    def _lookup_cached(self, task_description: str, run_span: tracing.Span):
+        if self.lead_store is not None:
+            known = self.lead_store.find_for_task(task_description)
+            if known is not None:
+                run_span.set(cache_status="lead", lead_id=known.lead.lead_id)
+                return CacheHit(known.lead.answer_for(task_description), "lead")
+        if self.llm_cache is None:
+            return None
+        hit = self.llm_cache.lookup("LeadAgentGoogleADK", *self._cache_scope, task_description)
+        run_span.set(cache_status=hit.tier if hit else "miss")
+        return hit
+
+    def _remember(self, task_description: str, final_response) -> None:
+        if self.llm_cache is not None:
+            self.llm_cache.store(*self._cache_scope, task_description, final_response)
+        if self.lead_store is not None:
+            self.lead_store.record_task(task_description, final_response)
+
+    def _store_run(self, task_description: str, final_output, status: str = "success") -> None:
+        if self.results_store is not None:
+            self.results_store.append_run("LeadAgentGoogleADK", task_description, final_output, status)
 
     def process_lead_request(self, task_description: str, user_id: str = "user123", session_id: str | None = None):
-        """Run the agent for a single lead generation task."""
-
-        from google.adk.runners import Runner
-        from google.adk.sessions.in_memory_session_service import InMemorySessionService
-
-        # Session service manages conversational state between invocations.
-        session_service = InMemorySessionService()
-        if session_id:
-            session = session_service.get_session(user_id=user_id, session_id=session_id)
-            if not session:
-                session = session_service.create_session(user_id=user_id, session_id=session_id, app_name="LeadAgentApp")
-        else:
-            session = session_service.create_session(user_id=user_id, app_name="LeadAgentApp")
-            session_id = session.session_id
-
-        runner = Runner(app_name="LeadAgentApp", agent=self.agent, session_service=session_service)
-
-        print(f"\nProcessing lead request with Google ADK Agent (Session: {session_id}): '{task_description}'")
-        try:
-            response_events = list(runner.run_once(session_id=session_id, query=task_description))
-            final_response = ""
-            for event in response_events:
-                if event.type == "TEXT" and event.source.type == "MODEL":
-                    final_response += event.content
-                elif event.type == "TOOL_CALL":
-                    print(f"  ADK Tool call requested: {event.tool_name} with args {event.tool_input}")
-                elif event.type == "TOOL_OUTPUT":
-                    print(f"  ADK Tool output received for {event.tool_name}")
-            print(f"Google ADK Agent final response:\n{final_response}")
-            return final_response, session_id
-        except Exception as e:  # pragma: no cover - runtime diagnostics
-            print(f"Error processing with Google ADK Agent: {e}")
-            return f"Error: {e}", session_id
+        """Run the agent for a single lead generation task.
+
+        Passing the ``session_id`` returned by an earlier call continues that
+        conversation with its stored context.  Only requests that start a new
+        conversation are answered from the response cache, since a follow-up
+        turn depends on the session's history.  A cached answer comes back
+        with ``None`` as its session id: no session is created for it.
+        """
+
+        use_cache = session_id is None and (self.llm_cache is not None or self.lead_store is not None)
+        with tracing.span(
+            "agent.LeadAgentGoogleADK", "agent", agent="LeadAgentGoogleADK", model=self.model_name
+        ) as run_span:
+            # Cached answers have no conversation behind them, so no session
+            # is created for them.
+            if use_cache:
+                hit = self._lookup_cached(task_description, run_span)
+                if hit is not None:
+                    logger.info("Google ADK Agent response served from cache (%s match).", hit.tier)
+                    return hit.response, None
+            # Session service manages conversational state between invocations.
+            session_id = self.runtime.ensure_session(user_id, session_id)
+
+            logger.info(
+                "Processing lead request with Google ADK Agent (Session: %s): %r", session_id, task_description
+            )
+            try:
+                # Events are handled one at a time; tool payloads only survive
+                # in capped form in the run record.
+                parts = []
+                record = RunRecord.start("LeadAgentGoogleADK", task_description)
+                with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                    for event in self.runtime.run_once(session_id=session_id, query=task_description):
+                        tracing.record_adk_usage(llm_span, event)
+                        if event.type == "TEXT" and event.source.type == "MODEL":
+                            parts.append(event.content)
+                        elif event.type == "TOOL_CALL":
+                            record.tool_called(event.tool_name, getattr(event, "tool_input", None))
+                        elif event.type == "TOOL_OUTPUT":
+                            record.tool_returned(event.tool_name, getattr(event, "tool_output", None))
+                run_span.set(**record.summary())
+                final_response = "".join(parts)
+                logger.debug("Google ADK Agent final response:\n%s", final_response)
+                self._store_run(task_description, final_response)
+                if use_cache:
+                    self._remember(task_description, final_response)
+                return final_response, session_id
+            except Exception as e:  # pragma: no cover - runtime diagnostics
+                run_span.status, run_span.error = "error", str(e)
+                logger.exception("Error processing with Google ADK Agent: %s", e)
+                self._store_run(task_description, str(e), "failure")
+                return f"Error: {e}", session_id
+
+    async def astream_lead_request(
+        self, task_description: str, user_id: str = "user123", session_id: str | None = None
+    ) -> AsyncIterator[AgentEvent]:
+        """Streaming variant of :meth:`process_lead_request`.
+
+        Every event carries the ``session_id`` to pass back for a follow-up
+        turn (``None`` for an answer served from the cache).  The final
+        answer is only assembled (for the ``done`` payload and the response
+        cache) when the request is cacheable.
+        """
+
+        use_cache = session_id is None and (self.llm_cache is not None or self.lead_store is not None)
+        with tracing.span(
+            "agent.LeadAgentGoogleADK", "agent", agent="LeadAgentGoogleADK", model=self.model_name, streamed=True
+        ) as run_span:
+            if use_cache:
+                hit = self._lookup_cached(task_description, run_span)
+                if hit is not None:
+                    for event in cached_events(hit.response):
+                        yield event
+                    return
+            session_id = self.runtime.ensure_session(user_id, session_id)
+            record = RunRecord.start("LeadAgentGoogleADK", task_description)
+            try:
+                with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                    events = self.runtime.run_once(session_id=session_id, query=task_description)
+                    async for event in stream_adk_events(events, session_id, collect=use_cache, span=llm_span):
+                        record.observe(event)
+                        if event.type == DONE:
+                            if use_cache:
+                                self._remember(task_description, event.payload)
+                            # Uncached follow-up turns are not assembled.
+                            if event.payload is not None:
+                                self._store_run(task_description, event.payload)
+                        yield event
+            except Exception as e:  # pragma: no cover - runtime diagnostics
+                run_span.status, run_span.error = "error", str(e)
+                self._store_run(task_description, str(e), "failure")
+                yield AgentEvent(ERROR, text=str(e), session_id=session_id)
+            finally:
+                run_span.set(**record.summary())
 
 
 if __name__ == '__main__':
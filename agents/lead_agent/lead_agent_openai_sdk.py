@@ -1,12 +1,29 @@
 """Implementation of the lead generation agent using the OpenAI SDK."""
 
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterable
+
 from openai_agents import Agent, Runner, function_tool, ModelSettings
 from config import settings
+from common_tools import tracing
+from common_tools.batch_runner import TaskOutcome, run_batch
+from hybrid_components.llm_cache import CacheHit, get_default_llm_cache
+from hybrid_components.prompt_prefix import build_prefix
+from hybrid_components.run_record import RunRecord
+from hybrid_components.streaming import DONE, ERROR, AgentEvent, cached_events, run_blocking, stream_openai_run
+from .tools.crm_connector import get_contact_details
+from .tools.lead_store import get_default_lead_store
 from .tools.web_prospector import prospect_website
 
+logger = logging.getLogger(__name__)
+
 
+# The tools are coroutines: the SDK calls synchronous tools directly on the
+# event loop, which would stall every other run of a batch while one crawls or
+# waits for the CRM.  The blocking work runs in a worker thread instead.
 @function_tool
-def web_prospector_openai_tool(url: str) -> dict:
+async def web_prospector_openai_tool(url: str) -> dict:
     """Tool wrapper for :func:`prospect_website`.
 
     The ``@function_tool`` decorator exposes the Python function to the OpenAI
@@ -14,66 +31,278 @@ def web_prospector_openai_tool(url: str) -> dict:
     tool fetches the target website and extracts e-mail addresses.
     """
 
-    return prospect_website(url)
+    return await asyncio.to_thread(prospect_website, url)
+
+
+@function_tool
+async def crm_lookup_openai_tool(company_name: str | None = None, contact_id: str | None = None) -> dict:
+    """Tool wrapper for :func:`get_contact_details`.
+
+    Looks up a company or contact in the CRM.  Several lookups requested in
+    the same turn are sent to the CRM as one batched request.
+    """
+
+    return await asyncio.to_thread(get_contact_details, company_name, contact_id)
+
+
+# The static head of every prompt: built once per process and never
+# interpolated, so it is byte-identical across runs and the provider's prompt
+# cache applies.  Per-request data goes in the task (the user message).
+INSTRUCTIONS = (
+    "You are a highly efficient lead generation specialist. "
+    "Your primary goal is to identify, research, and qualify "
+    "potential leads based on the user's request. Utilize the "
+    "available tools to gather information from websites and CRMs. "
+    "Present findings in a structured summary including company "
+    "details, key contacts, and email addresses. If a website URL is "
+    "provided, always call `web_prospector_openai_tool` first."
+)
+TOOLS = (web_prospector_openai_tool, crm_lookup_openai_tool)
+PREFIX = build_prefix("LeadAgentOpenAISDK", INSTRUCTIONS, TOOLS)
+
+
+def _span_tokens(span: tracing.Span) -> int | None:
+    """Total tokens recorded on a model-call span, if the run reported usage."""
+
+    if "prompt_tokens" not in span.attributes and "completion_tokens" not in span.attributes:
+        return None
+    return span.attributes.get("prompt_tokens", 0) + span.attributes.get("completion_tokens", 0)
+
+
+def _results_store():
+    # Imported only when enabled: pyarrow is slow to import.
+    if not settings.RESULTS_STORE_PATH:
+        return None
+    from .tools.results_store import get_default_results_store
+
+    return get_default_results_store()
 
 
 class LeadAgentOpenAISDK:
     """Lead generation agent built with the OpenAI Agents SDK."""
 
-    def __init__(self, model_name: str = settings.DEFAULT_OPENAI_MODEL) -> None:
+    def __init__(
+        self,
+        model_name: str = settings.DEFAULT_OPENAI_MODEL,
+        runner=None,
+        use_llm_cache: bool = True,
+        use_lead_store: bool = True,
+        use_results_store: bool = True,
+    ) -> None:
+        # ``runner`` defaults to the SDK's ``Runner``; a local stand-in such as
+        # :class:`hybrid_components.stub_model.StubRunner` can be passed to run
+        # the agent offline.
+        self.runner = runner or Runner
+
         # Ensure an API key is configured before trying to instantiate the agent.
-        if not settings.OPENAI_API_KEY:
+        if runner is None and not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY must be set in the environment.")
 
         # ``Agent`` encapsulates the model instructions and available tools.  We
         # can optionally pass ``ModelSettings`` to tune parameters (temperature,
         # top_p, etc.).
+        self.model_name = model_name
+        self.prefix = PREFIX
         self.agent = Agent(
             name="OpenAILeadAgent",
-            instructions=(
-                "You are a highly efficient lead generation specialist. "
-                "Your primary goal is to identify, research, and qualify "
-                "potential leads based on the user's request. Utilize the "
-                "available tools to gather information from websites and CRMs. "
-                "Present findings in a structured summary including company "
-                "details, key contacts, and email addresses. If a website URL is "
-                "provided, always call `web_prospector_openai_tool` first."
-            ),
+            instructions=PREFIX.instructions,
             model=model_name,
-            tools=[web_prospector_openai_tool],
+            tools=list(TOOLS),
         )
-        print(f"LeadAgentOpenAISDK initialized with model: {model_name}")
+
+        # Identical requests to the same model/instructions/tools are answered
+        # from the shared response cache instead of a new model run.
+        self.llm_cache = get_default_llm_cache() if use_llm_cache else None
+        self._cache_scope = (model_name, PREFIX.instructions, PREFIX.tool_names)
+        # A task already answered for the same lead within
+        # ``LEAD_DEDUP_WINDOW`` is answered from the lead store without
+        # running the agent.
+        self.lead_store = get_default_lead_store() if use_lead_store else None
+        self.results_store = _results_store() if use_results_store else None
+        logger.info("LeadAgentOpenAISDK initialized with model: %s", model_name)
+
+    def _lookup_cached(self, task_description: str, run_span: tracing.Span):
+        if self.lead_store is not None:
+            known = self.lead_store.find_for_task(task_description)
+            if known is not None:
+                run_span.set(cache_status="lead", lead_id=known.lead.lead_id)
+                return CacheHit(known.lead.answer_for(task_description), "lead")
+        if self.llm_cache is None:
+            return None
+        hit = self.llm_cache.lookup("LeadAgentOpenAISDK", *self._cache_scope, task_description)
+        run_span.set(cache_status=hit.tier if hit else "miss")
+        return hit
+
+    def _remember(self, task_description: str, final_output) -> None:
+        if self.llm_cache is not None:
+            self.llm_cache.store(*self._cache_scope, task_description, final_output)
+        if self.lead_store is not None:
+            self.lead_store.record_task(task_description, final_output)
+
+    def _store_run(self, task_description: str, final_output, status: str = "success") -> None:
+        if self.results_store is not None:
+            self.results_store.append_run("LeadAgentOpenAISDK", task_description, final_output, status)
+
+    def _finish_run(self, task_description: str, final_output) -> bool:
+        """Record a finished run; return whether it failed.
+
+        A run whose output is an ``{"error": ...}`` dict is stored as a
+        failure and is neither cached nor attached to the lead, so the next
+        identical request runs the agent again.
+        """
+
+        failed = isinstance(final_output, dict) and "error" in final_output
+        self._store_run(task_description, final_output, "failure" if failed else "success")
+        if not failed:
+            self._remember(task_description, final_output)
+        return failed
 
     def process_lead_request(self, task_description: str):
-        """Run the agent on a single lead-generation task."""
-
-        print(f"\nProcessing lead request with OpenAI SDK Agent: '{task_description}'")
-        try:
-            # ``Runner.run_sync`` executes the agent until it produces a final
-            # answer, internally handling any tool calls required.
-            result = Runner.run_sync(self.agent, task_description)
-
-            final_output = result.final_output
-            if isinstance(final_output, dict) and "error" in final_output:
-                print(f"  OpenAI Tool execution might have resulted in an error: {final_output}")
-            elif result.run_context and result.run_context.history:
-                print("  OpenAI Agent execution trace:")
-                for msg in result.run_context.history:
-                    if msg.role == "tool":
-                        print(
-                            f"    Tool: {msg.name}, Args: {msg.tool_calls[0].function.arguments if msg.tool_calls else 'N/A'}"
-                        )
-                        print(
-                            f"    Tool Output: {msg.tool_calls[0].function.output if msg.tool_calls else 'N/A'}"
-                        )
-                    else:
-                        print(f"    {msg.role.capitalize()}: {msg.content}")
-
-            print(f"OpenAI SDK Agent final response:\n{final_output}")
-            return final_output
-        except Exception as e:  # pragma: no cover - runtime diagnostics
-            print(f"Error processing with OpenAI SDK Agent: {e}")
-            return f"Error: {e}"
+        """Run the agent on a single lead-generation task.
+
+        Safe to call from code that already runs an event loop (a notebook, a
+        web handler); the run then happens on a worker thread and this call
+        blocks until it finishes.  Async callers should prefer
+        :meth:`astream_lead_request`.
+        """
+
+        logger.info("Processing lead request with OpenAI SDK Agent: %r", task_description)
+        with tracing.span(
+            "agent.LeadAgentOpenAISDK", "agent", agent="LeadAgentOpenAISDK", model=self.model_name
+        ) as run_span:
+            hit = self._lookup_cached(task_description, run_span)
+            if hit is not None:
+                logger.info("OpenAI SDK Agent response served from cache (%s match).", hit.tier)
+                return hit.response
+            try:
+                # The run is consumed as a stream: tool calls and outputs are
+                # folded into a size-capped record as they happen, so nothing
+                # retains the transcript or raw tool outputs.
+                record = RunRecord.start("LeadAgentOpenAISDK", task_description)
+                with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                    final_output = run_blocking(self._run_recorded(task_description, llm_span, record))
+                run_span.set(**record.summary())
+
+                logger.debug("OpenAI SDK Agent final response:\n%s", final_output)
+                if self._finish_run(task_description, final_output):
+                    logger.warning("OpenAI Tool execution might have resulted in an error: %s", final_output)
+                return final_output
+            except Exception as e:  # pragma: no cover - runtime diagnostics
+                run_span.status, run_span.error = "error", str(e)
+                logger.exception("Error processing with OpenAI SDK Agent: %s", e)
+                self._store_run(task_description, str(e), "failure")
+                return f"Error: {e}"
+
+    async def _run_recorded(self, task_description: str, llm_span: tracing.Span, record: RunRecord):
+        final_output = None
+        async for event in stream_openai_run(self.runner, self.agent, task_description, llm_span):
+            record.observe(event)
+            if event.type == DONE:
+                final_output = event.payload
+        return final_output
+
+    async def astream_lead_request(self, task_description: str) -> AsyncIterator[AgentEvent]:
+        """Streaming variant of :meth:`process_lead_request`.
+
+        Yields :class:`~hybrid_components.streaming.AgentEvent` objects: text
+        deltas and tool calls/results as the run produces them, then a single
+        ``done`` event whose payload is the final output (or an ``error``
+        event if the run fails).
+        """
+
+        with tracing.span(
+            "agent.LeadAgentOpenAISDK", "agent", agent="LeadAgentOpenAISDK", model=self.model_name, streamed=True
+        ) as run_span:
+            hit = self._lookup_cached(task_description, run_span)
+            if hit is not None:
+                for event in cached_events(hit.response):
+                    yield event
+                return
+            record = RunRecord.start("LeadAgentOpenAISDK", task_description)
+            try:
+                with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                    async for event in stream_openai_run(self.runner, self.agent, task_description, llm_span):
+                        record.observe(event)
+                        if event.type == DONE:
+                            self._finish_run(task_description, event.payload)
+                        yield event
+            except Exception as e:  # pragma: no cover - runtime diagnostics
+                run_span.status, run_span.error = "error", str(e)
+                self._store_run(task_description, str(e), "failure")
+                yield AgentEvent(ERROR, text=str(e))
+            finally:
+                run_span.set(**record.summary())
+
+    async def _run_for_batch(self, task_description: str) -> TaskOutcome:
+        # Errors propagate so the batch runner can tell rate limiting apart
+        # from other failures.
+        with tracing.span(
+            "agent.LeadAgentOpenAISDK", "agent", agent="LeadAgentOpenAISDK", model=self.model_name
+        ) as run_span:
+            hit = self._lookup_cached(task_description, run_span)
+            if hit is not None:
+                return TaskOutcome(output=hit.response, tokens=0)
+            record = RunRecord.start("LeadAgentOpenAISDK", task_description)
+            with tracing.span("model.run", "model", model=self.model_name, prefix=self.prefix.digest) as llm_span:
+                final_output = await self._run_recorded(task_description, llm_span, record)
+            run_span.set(**record.summary())
+            if self._finish_run(task_description, final_output):
+                # Recorded as an error, so a resumed batch runs it again.
+                raise RuntimeError(f"Agent run failed: {final_output['error']}")
+            return TaskOutcome(output=final_output, tokens=_span_tokens(llm_span))
+
+    async def aprocess_lead_batch(
+        self,
+        tasks: Iterable[str | tuple[str, str]],
+        output_path: str,
+        concurrency: int | None = None,
+        tokens_per_minute: int | None = None,
+    ) -> dict:
+        """Async variant of :meth:`process_lead_batch`."""
+
+        return await run_batch(
+            tasks,
+            self._run_for_batch,
+            output_path,
+            concurrency=concurrency or settings.LEAD_BATCH_CONCURRENCY,
+            tokens_per_minute=tokens_per_minute or settings.OPENAI_TOKENS_PER_MINUTE,
+        )
+
+    def process_lead_batch(
+        self,
+        tasks: Iterable[str | tuple[str, str]],
+        output_path: str,
+        concurrency: int | None = None,
+        tokens_per_minute: int | None = None,
+    ) -> dict:
+        """Run many lead-generation tasks concurrently.
+
+        Parameters
+        ----------
+        tasks:
+            Task descriptions, or ``(task_id, task_description)`` pairs.
+        output_path:
+            JSONL file that receives one record per finished task.  Calling
+            this again with the same file resumes the batch, skipping tasks
+            that already succeeded.
+        concurrency:
+            Maximum number of agent runs in flight.  Lowered automatically
+            while the provider is returning ``429`` responses.  Defaults to
+            ``LEAD_BATCH_CONCURRENCY``.
+        tokens_per_minute:
+            Optional token budget shared by all concurrent runs.  Defaults to
+            ``OPENAI_TOKENS_PER_MINUTE``.
+
+        Returns
+        -------
+        dict
+            Counts of succeeded, failed, skipped and rate-limited tasks.
+        """
+
+        logger.info("Processing lead batch with OpenAI SDK Agent -> %s", output_path)
+        stats = run_blocking(self.aprocess_lead_batch(tasks, output_path, concurrency, tokens_per_minute))
+        logger.info("OpenAI SDK Agent batch finished: %s", stats)
+        return stats
 
 
 if __name__ == '__main__':
@@ -0,0 +1,785 @@
+"""Concurrent multi-page crawl engine used by the web prospector.
+
+Contact details rarely live on a company's homepage; they are usually one click
+away on ``/contact``, ``/about`` or ``/team``.  :class:`CrawlEngine` takes a
+list of seed domains and follows same-site links up to a configurable depth and
+page budget, fetching pages on a bounded thread pool that shares one pooled,
+keep-alive :class:`requests.Session`.  When a :class:`~.http_cache.ResponseCache`
+is attached, fresh pages are served from disk and stale ones are revalidated
+with conditional requests.  Pages are scanned by the tree-free
+:class:`~.extractor.StreamingExtractor`, which lets leaf pages stop downloading
+as soon as the data we are after has been seen.
+
+Scheduling happens on the calling thread: it decides which page to fetch next
+so the politeness rules (see :mod:`.politeness`) and the global in-flight limit
+are enforced in one place, while the worker threads only perform the blocking
+HTTP calls.  Domains wait in a priority queue ordered by when their host may
+next be contacted, so requests interleave across hosts: overall throughput
+comes from crawling many sites at once, not from hitting one site hard.  A
+domain's result is yielded as soon as its last page finishes, so callers can
+stream results for thousands of domains without waiting for the whole batch.
+"""
+
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import requests
+
+from common_tools import tracing
+from config import settings
+from .extractor import ALL_FIELDS, Extraction, StreamingExtractor, extract_with_soup
+from .http_cache import CachedResponse, ResponseCache
+from .politeness import (
+    BLOCK_STATUSES,
+    THROTTLE_STATUSES,
+    DnsCache,
+    DnsCachingAdapter,
+    HostLimiter,
+    RobotsCache,
+    origin_of,
+    parse_retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+class _LookUp:
+    """Type of :data:`_LOOK_UP`, so ``cache_entry`` can be annotated precisely."""
+
+
+# Default of ``fetch_page(cache_entry=...)``: look the URL up in the cache.
+_LOOK_UP = _LookUp()
+
+
+# Paths containing these fragments are crawled before any other link because
+# that is where contact e-mails are most often published.
+PRIORITY_PATH_HINTS = ("contact", "about", "team", "people", "staff", "impressum")
+
+
+@dataclass
+class CrawlConfig:
+    """Tuning knobs for :class:`CrawlEngine`.
+
+    Parameters
+    ----------
+    max_depth:
+        How many links away from the seed page to follow.  ``0`` only fetches
+        the seed itself.
+    max_pages_per_domain:
+        Page budget per seed domain, including the seed page.
+    per_host_concurrency:
+        Maximum number of simultaneous requests sent to a single host.
+    host_rate:
+        Requests per second sent to a single host, across all crawls of the
+        engine.  ``0`` disables rate limiting (robots.txt delays still apply).
+    host_burst:
+        Requests a host may receive back to back after being idle.
+    respect_robots:
+        Fetch each origin's robots.txt first, skip disallowed pages and honour
+        its ``Crawl-delay``.
+    robots_ttl:
+        Seconds a fetched robots.txt is reused.
+    dns_ttl:
+        Seconds a resolved host address is reused.
+    throttle_retries:
+        How often a page answered with ``429`` or ``503`` is retried, after
+        pausing its host for the response's ``Retry-After``.
+    max_pause:
+        Upper bound on a single ``Retry-After`` pause, in seconds.
+    max_in_flight:
+        Global cap on simultaneous requests across all hosts.  This is also the
+        size of the worker pool.
+    max_active_domains:
+        How many seed domains are crawled at once.  Seeds are consumed lazily
+        so memory stays bounded on very large batches.
+    timeout:
+        Per-request timeout in seconds.
+    user_agent:
+        ``User-Agent`` header sent with every request.
+    parser:
+        ``"streaming"`` for :class:`~.extractor.StreamingExtractor` or
+        ``"soup"`` to fall back to BeautifulSoup.
+    leaf_stop_when:
+        On pages whose links will not be followed, stop reading the body once
+        each of these fields has been found.  An empty tuple reads every page
+        in full.
+    max_page_bytes:
+        Never read more than this many bytes of a single page.
+    max_tracked_hosts:
+        How many hosts' rate limits and robots.txt files are kept in memory.
+        The least recently crawled are forgotten first.
+    """
+
+    max_depth: int = 1
+    max_pages_per_domain: int = 10
+    per_host_concurrency: int = 2
+    host_rate: float = 1.0
+    host_burst: float = 3.0
+    respect_robots: bool = True
+    robots_ttl: float = 24 * 3600
+    dns_ttl: float = 300.0
+    throttle_retries: int = 1
+    max_pause: float = 60.0
+    max_in_flight: int = 32
+    max_active_domains: int = 64
+    timeout: float = 10.0
+    user_agent: str = "LeadContentProspector/1.0"
+    parser: str = "streaming"
+    leaf_stop_when: tuple[str, ...] = ("title", "emails")
+    max_page_bytes: int = 2 * 1024 * 1024
+    max_tracked_hosts: int = 10_000
+
+
+@dataclass
+class PageResult:
+    """Outcome of fetching and parsing a single page."""
+
+    url: str
+    depth: int
+    title: str | None = None
+    emails: set[str] = field(default_factory=set)
+    phones: set[str] = field(default_factory=set)
+    organizations: list[dict] = field(default_factory=list)
+    links: list[str] = field(default_factory=list)
+    links_collected: bool = True
+    error: str | None = None
+    cache_status: str | None = None
+    status_code: int | None = None
+    retry_after: float | None = None
+
+    def extracted(self) -> dict:
+        """Serializable extraction result, as stored in the response cache."""
+
+        return {
+            "title": self.title,
+            "emails": sorted(self.emails),
+            "phones": sorted(self.phones),
+            "organizations": self.organizations,
+            "links": self.links,
+            "links_collected": self.links_collected,
+        }
+
+    def restore(self, extracted: dict) -> None:
+        self.title = extracted.get("title")
+        self.emails = set(extracted.get("emails", ()))
+        self.phones = set(extracted.get("phones", ()))
+        self.organizations = list(extracted.get("organizations", ()))
+        self.links = list(extracted.get("links", ()))
+        self.links_collected = extracted.get("links_collected", True)
+
+    def absorb(self, extraction: Extraction) -> None:
+        self.title = extraction.title
+        self.emails = extraction.emails
+        self.phones = extraction.phones
+        self.organizations = extraction.organizations
+        self.links = extraction.links
+
+
+@dataclass
+class CrawlStats:
+    """Throughput and block counters for one :meth:`CrawlEngine.crawl` call."""
+
+    started: float = field(default_factory=time.monotonic)
+    seconds: float = 0.0
+    domains: int = 0
+    requests: int = 0
+    pages: int = 0
+    robots_disallowed: int = 0
+    throttled: int = 0
+    blocked: int = 0
+    retries: int = 0
+    hosts: set[str] = field(default_factory=set)
+
+    def record(self, host: str, page: PageResult) -> None:
+        self.hosts.add(host)
+        if page.cache_status != "hit":
+            self.requests += 1
+        if page.error is None:
+            self.pages += 1
+        if page.status_code in THROTTLE_STATUSES:
+            self.throttled += 1
+        elif page.status_code in BLOCK_STATUSES:
+            self.blocked += 1
+
+    def to_dict(self) -> dict:
+        seconds = self.seconds or time.monotonic() - self.started
+        return {
+            "domains": self.domains,
+            "hosts": len(self.hosts),
+            "requests": self.requests,
+            "pages": self.pages,
+            "seconds": round(seconds, 3),
+            "pages_per_second": round(self.pages / seconds, 2) if seconds else 0.0,
+            "robots_disallowed": self.robots_disallowed,
+            "throttled": self.throttled,
+            "blocked": self.blocked,
+            "retries": self.retries,
+            # Share of requests the sites refused or asked us to slow down.
+            "block_rate": round((self.throttled + self.blocked) / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+@dataclass
+class _DomainState:
+    """Book-keeping for one seed domain while it is being crawled."""
+
+    seed_url: str
+    host: str
+    max_depth: int
+    max_pages: int
+    frontier: deque = field(default_factory=deque)
+    seen: set[str] = field(default_factory=set)
+    pages: list[PageResult] = field(default_factory=list)
+    in_flight: int = 0
+    scheduled: int = 0
+    queued: bool = False
+    # Cache lookup for the head of the frontier, kept while it waits for its
+    # host so the lookup is not repeated: ``(url, entry or None)``.
+    head_lookup: tuple[str, CachedResponse | None] | None = None
+
+    def pop_head(self) -> tuple[str, int]:
+        self.head_lookup = None
+        return self.frontier.popleft()
+
+    @property
+    def schedulable(self) -> bool:
+        return bool(self.frontier) and self.scheduled < self.max_pages
+
+    @property
+    def done(self) -> bool:
+        return self.in_flight == 0 and not self.schedulable
+
+    def to_dict(self) -> dict:
+        """Summarise the crawl in the same shape :func:`prospect_website` returns."""
+
+        succeeded = [page for page in self.pages if page.error is None]
+        if not succeeded:
+            error = self.pages[0].error if self.pages else "No pages fetched"
+            return {"url": self.seed_url, "error": error, "status": "failure"}
+
+        # Prefer the seed page's title; fall back to the first page that had one.
+        title = next((page.title for page in succeeded if page.title), None)
+        emails: set[str] = set()
+        phones: set[str] = set()
+        organizations: list[dict] = []
+        for page in succeeded:
+            emails.update(page.emails)
+            phones.update(page.phones)
+            organizations.extend(org for org in page.organizations if org not in organizations)
+        return {
+            "url": self.seed_url,
+            "title": title.strip() if title else "No title found",
+            "emails": sorted(emails),
+            "phones": sorted(phones),
+            "organizations": organizations,
+            "pages_crawled": [page.url for page in succeeded],
+            "status": "success",
+        }
+
+
+def normalize_seed(seed: str) -> str:
+    """Turn ``example.com`` or ``https://example.com/x`` into a fetchable URL."""
+
+    seed = seed.strip()
+    if "://" not in seed:
+        seed = f"https://{seed}"
+    parts = urlsplit(seed)
+    return parts._replace(path=parts.path or "/", fragment="").geturl()
+
+
+def site_key(host: str) -> str:
+    """Host name used to decide whether two URLs belong to the same site."""
+
+    host = host.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _link_priority(url: str) -> int:
+    path = urlsplit(url).path.lower()
+    return 0 if any(hint in path for hint in PRIORITY_PATH_HINTS) else 1
+
+
+class CrawlEngine:
+    """Bounded, pooled, polite crawler that streams results per seed domain."""
+
+    def __init__(self, config: CrawlConfig | None = None, cache: ResponseCache | None = None) -> None:
+        self.config = config or CrawlConfig()
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = self.config.user_agent
+        # One connection pool per host, each big enough for the per-host limit,
+        # so keep-alive connections are reused across pages and calls.  New
+        # connections resolve their host through the shared DNS cache.
+        self.dns = DnsCache(ttl=self.config.dns_ttl)
+        adapter = DnsCachingAdapter(
+            self.dns,
+            pool_connections=self.config.max_in_flight,
+            pool_maxsize=self.config.per_host_concurrency,
+            max_retries=0,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Shared by every crawl of this engine, so concurrent callers (e.g.
+        # several agents prospecting at once) are polite together.
+        self.limiter = HostLimiter(
+            rate=self.config.host_rate,
+            burst=self.config.host_burst,
+            concurrency=self.config.per_host_concurrency,
+            max_pause=self.config.max_pause,
+            max_hosts=self.config.max_tracked_hosts,
+        )
+        self.robots = None
+        if self.config.respect_robots:
+            # robots.txt names the product token, not the full User-Agent.
+            token = self.config.user_agent.split("/", 1)[0]
+            self.robots = RobotsCache(
+                self.session,
+                token,
+                ttl=self.config.robots_ttl,
+                timeout=self.config.timeout,
+                limiter=self.limiter,
+                max_origins=self.config.max_tracked_hosts,
+            )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.max_in_flight, thread_name_prefix="crawler"
+        )
+
+    def close(self) -> None:
+        """Shut down the worker pool and close pooled connections."""
+
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self) -> "CrawlEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+    def fetch_page(
+        self,
+        url: str,
+        depth: int = 0,
+        force_refresh: bool = False,
+        collect_links: bool = True,
+        queued_at: float | None = None,
+        cache_entry: CachedResponse | None | _LookUp = _LOOK_UP,
+    ) -> PageResult:
+        """Fetch ``url`` and extract its title, e-mails and links.
+
+        With a cache attached, a fresh entry is returned without any request
+        and a stale one is revalidated; ``force_refresh`` bypasses both and
+        always downloads the page again.  When ``collect_links`` is false the
+        page is a leaf of the crawl and its body may be read only partially.
+        ``queued_at`` (a ``time.time()`` value) is when the fetch was scheduled
+        and is only used to trace how long it waited for a worker.
+        ``cache_entry`` is the usable cache entry the caller already looked
+        up for ``url`` (``None`` if there was none), so the cache is not
+        queried again.
+        """
+
+        with tracing.span("http.fetch", "http", queued_at=queued_at, url=url) as fetch_span:
+            page = self._fetch(url, depth, force_refresh, collect_links, fetch_span, cache_entry)
+            fetch_span.set(cache_status=page.cache_status or "uncached")
+            if page.error:
+                fetch_span.status, fetch_span.error = "error", page.error
+        return page
+
+    def _fetch(
+        self,
+        url: str,
+        depth: int,
+        force_refresh: bool,
+        collect_links: bool,
+        fetch_span: tracing.Span,
+        cache_entry: CachedResponse | None | _LookUp = _LOOK_UP,
+    ) -> PageResult:
+        page = PageResult(url=url, depth=depth, links_collected=collect_links)
+        entry: CachedResponse | None = None
+        try:
+            headers = {}
+            if self.cache is not None and not force_refresh:
+                if isinstance(cache_entry, _LookUp):
+                    entry = self._usable_entry(url, collect_links)
+                else:
+                    entry = cache_entry
+                if entry is not None:
+                    if entry.is_fresh(self.cache.ttl):
+                        self.cache.record_hit(entry)
+                        page.restore(entry.extracted)
+                        page.cache_status = "hit"
+                        return page
+                    headers = entry.conditional_headers()
+
+            response = self.session.get(
+                url, headers=headers, timeout=self.config.timeout, stream=True
+            )
+            with response:
+                fetch_span.set(http_status=response.status_code)
+                page.status_code = response.status_code
+                if response.status_code in THROTTLE_STATUSES:
+                    page.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 304:
+                    if entry is None:
+                        # We sent no validators, so there is no copy to reuse.
+                        page.error = "304 Not Modified for an unconditional request"
+                        return page
+                    # Unchanged since we cached it: skip both download and parse.
+                    self.cache.record_not_modified(entry)
+                    page.restore(entry.extracted)
+                    page.cache_status = "revalidated"
+                    return page
+                response.raise_for_status()  # Raises HTTPError for non-200 responses
+
+                body = None
+                downloaded = 0
+                if "html" in response.headers.get("Content-Type", "text/html"):
+                    body, downloaded = self._extract(page, response, collect_links)
+                fetch_span.set(bytes_fetched=downloaded)
+            if self.cache is not None:
+                self.cache.record_miss(downloaded)
+                self.cache.store(
+                    url,
+                    page.extracted(),
+                    body=body,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+                page.cache_status = "miss"
+        except requests.RequestException as e:
+            # Network-related or HTTP errors are captured here
+            page.error = str(e)
+        except Exception as e:  # pragma: no cover - catch unexpected parsing errors
+            page.error = f"An unexpected error occurred: {str(e)}"
+        return page
+
+    def _extract(
+        self, page: PageResult, response: requests.Response, collect_links: bool
+    ) -> tuple[bytes, int]:
+        """Stream the body through the extractor; return what was read."""
+
+        chunks: list[bytes] = []
+        if self.config.parser == "soup":
+            body = response.raw.read(self.config.max_page_bytes, decode_content=True)
+            page.absorb(extract_with_soup(body, response.url))
+            return body, len(body)
+
+        extractor = StreamingExtractor(
+            response.url,
+            fields=ALL_FIELDS if collect_links else ALL_FIELDS - {"links"},
+            stop_when=() if collect_links else self.config.leaf_stop_when,
+            max_bytes=self.config.max_page_bytes,
+            encoding=response.encoding,
+        )
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            if self.cache is not None:
+                chunks.append(chunk)
+            if extractor.feed(chunk):
+                # Everything we need has been seen; closing the response
+                # abandons the rest of the download.
+                break
+        page.absorb(extractor.close())
+        return b"".join(chunks), extractor.result.bytes_read
+
+    # ------------------------------------------------------------------
+    # Crawling
+    # ------------------------------------------------------------------
+    def crawl(
+        self,
+        seeds: Iterable[str],
+        max_depth: int | None = None,
+        max_pages: int | None = None,
+        force_refresh: bool = False,
+        stats: CrawlStats | None = None,
+    ) -> Iterator[dict]:
+        """Crawl every seed domain and yield one result dict per domain.
+
+        Parameters
+        ----------
+        seeds:
+            Domains or URLs to start from.  The iterable is consumed lazily.
+            An item that is already a result dict (a domain the caller could
+            answer without crawling) is yielded as soon as it is read.
+        max_depth, max_pages:
+            Optional per-call overrides of the configured depth and page budget.
+        force_refresh:
+            Ignore cached responses and download every page again.
+        stats:
+            Filled with this crawl's throughput and block counters; they are
+            also logged when the crawl finishes.
+
+        Yields
+        ------
+        dict
+            The per-domain summary produced by ``_DomainState.to_dict``, in the
+            order domains finish rather than the order they were given.
+        """
+
+        depth_limit = self.config.max_depth if max_depth is None else max_depth
+        page_limit = self.config.max_pages_per_domain if max_pages is None else max_pages
+        stats = stats if stats is not None else CrawlStats()
+        seed_iter = iter(seeds)
+        active: deque[_DomainState] = deque()
+        # Domains with pages to fetch, ordered by when their host may next be
+        # contacted; the counter breaks ties round-robin.
+        ready: list[tuple[float, int, _DomainState]] = []
+        order = itertools.count()
+        # robots.txt fetches in flight, with the domains waiting for them.
+        robots_waiting: dict[str, list[_DomainState]] = {}
+        in_flight: dict[Future, tuple] = {}
+        attempts: dict[str, int] = {}
+        seeds_exhausted = False
+
+        def push(state: _DomainState, at: float) -> None:
+            if state.schedulable and not state.queued:
+                state.queued = True
+                heapq.heappush(ready, (at, next(order), state))
+
+        try:
+            while True:
+                now = time.monotonic()
+                # Admit new seed domains while there is room.
+                while not seeds_exhausted and len(active) < self.config.max_active_domains:
+                    try:
+                        seed = next(seed_iter)
+                    except StopIteration:
+                        seeds_exhausted = True
+                        break
+                    if isinstance(seed, dict):
+                        yield seed
+                        continue
+                    seed_url = normalize_seed(seed)
+                    state = _DomainState(
+                        seed_url=seed_url,
+                        host=site_key(urlsplit(seed_url).hostname or ""),
+                        max_depth=depth_limit,
+                        max_pages=page_limit,
+                    )
+                    state.frontier.append((seed_url, 0))
+                    state.seen.add(seed_url)
+                    active.append(state)
+                    stats.domains += 1
+                    push(state, now)
+
+                while ready and ready[0][0] <= now and len(in_flight) < self.config.max_in_flight:
+                    _, _, state = heapq.heappop(ready)
+                    state.queued = False
+                    if not state.schedulable:
+                        continue
+                    url, depth = state.frontier[0]
+                    entry = self._head_entry(state, url, force_refresh, depth < state.max_depth)
+                    if entry is not None and entry.is_fresh(self.cache.ttl):
+                        # Served from disk without contacting the host.
+                        state.pop_head()
+                        self._submit(in_flight, state, url, depth, force_refresh, entry, limited=False)
+                        push(state, now)
+                        continue
+                    if self.robots is not None:
+                        rules = self.robots.cached(origin_of(url))
+                        if rules is None:
+                            self._wait_for_robots(origin_of(url), state, robots_waiting, in_flight)
+                            continue
+                        if not rules.allowed(url):
+                            state.pop_head()
+                            state.pages.append(PageResult(url=url, depth=depth, error="Disallowed by robots.txt"))
+                            stats.robots_disallowed += 1
+                            push(state, now)
+                            continue
+                        # Re-applied every time: the host's bucket may have
+                        # been forgotten since robots.txt was fetched.
+                        delay = rules.delay()
+                        if delay:
+                            self.limiter.slow_down(state.host, delay)
+                    wait_seconds = self.limiter.acquire(state.host, now)
+                    if wait_seconds:
+                        push(state, now + wait_seconds)
+                        continue
+                    state.pop_head()
+                    self._submit(in_flight, state, url, depth, force_refresh, entry, limited=True)
+                    push(state, now)
+
+                if not in_flight:
+                    if ready:
+                        # Every remaining domain is waiting on its host's rate.
+                        time.sleep(max(0.0, ready[0][0] - time.monotonic()))
+                        continue
+                    # Nothing running and nothing admissible: every active
+                    # domain is finished (or had no pages to fetch).
+                    while active:
+                        yield active.popleft().to_dict()
+                    if seeds_exhausted:
+                        return
+                    continue
+
+                timeout = None
+                if ready and len(in_flight) < self.config.max_in_flight:
+                    timeout = max(0.0, ready[0][0] - now)
+                finished, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                for future in finished:
+                    kind, *job = in_flight.pop(future)
+                    if kind == "robots":
+                        future.result()
+                        self._robots_loaded(job[0], robots_waiting, push, now)
+                        continue
+                    state, url, depth, limited = job
+                    state.in_flight -= 1
+                    if limited:
+                        self.limiter.release(state.host)
+                    page = future.result()
+                    stats.record(state.host, page)
+                    if page.status_code in THROTTLE_STATUSES:
+                        paused = self.limiter.pause(state.host, page.retry_after, now)
+                        if attempts.get(url, 0) < self.config.throttle_retries:
+                            # Try again once the host's pause is over; a retry
+                            # does not count against the page budget.
+                            attempts[url] = attempts.get(url, 0) + 1
+                            stats.retries += 1
+                            state.scheduled -= 1
+                            state.frontier.appendleft((url, depth))
+                            push(state, now + paused)
+                            continue
+                    state.pages.append(page)
+                    if depth < state.max_depth:
+                        self._enqueue_links(state, page)
+                    push(state, now)
+
+                for state in [s for s in active if s.done]:
+                    active.remove(state)
+                    yield state.to_dict()
+        finally:
+            # Fetches abandoned by a caller that stopped early still hold
+            # their host's slot until they finish.
+            for future, (kind, *job) in in_flight.items():
+                if kind == "page" and job[3]:
+                    future.add_done_callback(lambda _, host=job[0].host: self.limiter.release(host))
+            stats.seconds = time.monotonic() - stats.started
+            summary = stats.to_dict()
+            if summary["requests"]:
+                logger.info(
+                    "Crawled %d pages from %d hosts in %.1fs (%.1f pages/s, %.1f%% blocked, %d disallowed by robots.txt)",
+                    summary["pages"],
+                    summary["hosts"],
+                    summary["seconds"],
+                    summary["pages_per_second"],
+                    summary["block_rate"] * 100,
+                    summary["robots_disallowed"],
+                )
+
+    def _submit(
+        self,
+        in_flight: dict,
+        state: _DomainState,
+        url: str,
+        depth: int,
+        force_refresh: bool,
+        entry: CachedResponse | None,
+        limited: bool,
+    ) -> None:
+        # Run in a copy of this context so fetch spans nest under the
+        # caller's span.
+        future = self._executor.submit(
+            contextvars.copy_context().run,
+            self.fetch_page,
+            url,
+            depth,
+            force_refresh,
+            depth < state.max_depth,
+            time.time(),
+            entry,
+        )
+        in_flight[future] = ("page", state, url, depth, limited)
+        state.in_flight += 1
+        state.scheduled += 1
+
+    def _usable_entry(self, url: str, collect_links: bool) -> CachedResponse | None:
+        """The cache entry for ``url``, unless it lacks the links this fetch needs."""
+
+        entry = self.cache.lookup(url)
+        if entry is not None and collect_links and not entry.extracted.get("links_collected", True):
+            # Cached from a partial read that skipped the links.
+            return None
+        return entry
+
+    def _head_entry(
+        self, state: _DomainState, url: str, force_refresh: bool, collect_links: bool
+    ) -> CachedResponse | None:
+        """Cache entry for the head of ``state``'s frontier, looked up once."""
+
+        if self.cache is None or force_refresh:
+            return None
+        if state.head_lookup is None or state.head_lookup[0] != url:
+            state.head_lookup = (url, self._usable_entry(url, collect_links))
+        return state.head_lookup[1]
+
+    def _wait_for_robots(
+        self, origin: str, state: _DomainState, robots_waiting: dict, in_flight: dict
+    ) -> None:
+        """Park ``state`` until ``origin``'s robots.txt is known, fetching it once."""
+
+        if origin not in robots_waiting:
+            robots_waiting[origin] = []
+            future = self._executor.submit(contextvars.copy_context().run, self.robots.get, origin, state.host)
+            in_flight[future] = ("robots", origin)
+        robots_waiting[origin].append(state)
+
+    @staticmethod
+    def _robots_loaded(origin: str, robots_waiting: dict, push: Callable, now: float) -> None:
+        for state in robots_waiting.pop(origin, ()):
+            push(state, now)
+
+    @staticmethod
+    def _enqueue_links(state: _DomainState, page: PageResult) -> None:
+        candidates = []
+        for link in page.links:
+            parts = urlsplit(link)
+            if parts.scheme not in ("http", "https") or link in state.seen:
+                continue
+            if site_key(parts.hostname or "") != state.host:
+                continue
+            state.seen.add(link)
+            candidates.append(link)
+        # Contact/about/team pages first so they fit inside the page budget.
+        candidates.sort(key=_link_priority)
+        for link in candidates:
+            state.frontier.append((link, page.depth + 1))
+
+
+_default_engine: CrawlEngine | None = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_engine() -> CrawlEngine:
+    """Return a process-wide engine so connections are pooled across calls."""
+
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            cache = None
+            if settings.PROSPECTOR_CACHE_PATH:
+                cache = ResponseCache(
+                    settings.PROSPECTOR_CACHE_PATH,
+                    ttl=settings.PROSPECTOR_CACHE_TTL,
+                    max_bytes=settings.PROSPECTOR_CACHE_MAX_BYTES,
+                )
+            config = CrawlConfig(
+                host_rate=settings.CRAWL_HOST_RATE,
+                host_burst=settings.CRAWL_HOST_BURST,
+                per_host_concurrency=settings.CRAWL_HOST_CONCURRENCY,
+                respect_robots=settings.CRAWL_RESPECT_ROBOTS,
+                robots_ttl=settings.CRAWL_ROBOTS_TTL,
+                dns_ttl=settings.CRAWL_DNS_TTL,
+            )
+            _default_engine = CrawlEngine(config, cache=cache)
+        return _default_engine
@@ -1,18 +1,270 @@
-"""Minimal placeholder for a CRM integration."""
+"""CRM integration used by the lead agents.
 
+The connector talks to the HTTP API configured by ``CRM_API_ENDPOINT`` and
+``CRM_API_KEY`` in :mod:`config.settings`.  The API exposes two bulk calls:
 
+``POST {endpoint}/contacts/lookup``
+    ``{"queries": [{"company_name": ...} | {"contact_id": ...}, ...]}`` returns
+    ``{"results": [{"found": true, "record": {...}} | {"found": false}, ...]}``
+    in the same order as the queries.
+``POST {endpoint}/contacts/upsert``
+    ``{"records": [{...}, ...]}`` returns ``{"ids": [...], "created": n,
+    "updated": m}``.
+
+:class:`CRMClient` sends those over a pooled keep-alive session, splits large
+inputs into batches of ``batch_size`` and retries throttled or failed requests
+with jittered exponential backoff.  Single lookups, which is how the agents'
+tool calls arrive, are coalesced: lookups made within ``coalesce_window``
+seconds of each other are sent together as one bulk request.  Coalesced
+batches are sent from a small pool, so a batch waiting out retry backoff does
+not hold up the lookups queued behind it.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common_tools.tracing import traced
+from config import settings
+from .politeness import parse_retry_after
+
+
+# Status codes worth retrying: throttling and transient server errors.
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class CRMError(Exception):
+    """Raised when the CRM cannot be reached or rejects a request."""
+
+
+class CRMClient:
+    """Pooled, batching client for the CRM HTTP API.
+
+    Parameters
+    ----------
+    endpoint, api_key:
+        Base URL of the CRM API and the bearer token sent with every request.
+    batch_size:
+        Maximum number of queries or records per HTTP request.
+    coalesce_window:
+        How long (seconds) a single lookup waits for others to share its
+        request.
+    max_retries:
+        Retries after the first attempt for retryable failures.
+    backoff_base, backoff_max:
+        Bounds of the "full jitter" exponential backoff between retries.
+    timeout:
+        Per-request timeout in seconds.
+    pool_size:
+        Size of the keep-alive connection pool.
+    flush_workers:
+        How many coalesced batches can be in flight (or retrying) at once.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: str | None = None,
+        batch_size: int = 250,
+        coalesce_window: float = 0.05,
+        max_retries: int = 4,
+        backoff_base: float = 0.2,
+        backoff_max: float = 10.0,
+        timeout: float = 10.0,
+        pool_size: int = 10,
+        flush_workers: int = 4,
+    ) -> None:
+        self.endpoint = endpoint.rstrip("/")
+        self.batch_size = batch_size
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+        self.session.headers["Content-Type"] = "application/json"
+
+        self.requests_sent = 0
+        self._sent_lock = threading.Lock()
+        self._pending: list[tuple[dict, Future]] = []
+        self._pending_lock = threading.Condition()
+        self._flusher: threading.Thread | None = None
+        self._senders = ThreadPoolExecutor(max_workers=flush_workers, thread_name_prefix="crm-flush")
+
+    def close(self) -> None:
+        self._senders.shutdown(wait=True)
+        self.session.close()
+
+    # ------------------------------------------------------------------
+    # HTTP with retries
+    # ------------------------------------------------------------------
+    def _post(self, path: str, payload: dict) -> dict:
+        url = f"{self.endpoint}{path}"
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                with self._sent_lock:
+                    self.requests_sent += 1
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    return response.json()
+                error = CRMError(f"CRM returned HTTP {response.status_code} for {path}")
+                # Seconds or an HTTP date; either way the server's floor on the delay.
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = CRMError(f"CRM request to {path} failed: {e}")
+            except requests.RequestException as e:
+                # Client errors (bad key, malformed payload) will not improve on retry.
+                raise CRMError(f"CRM request to {path} failed: {e}") from e
+
+            if attempt == self.max_retries:
+                raise error
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            time.sleep(delay)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    # ------------------------------------------------------------------
+    # Bulk calls
+    # ------------------------------------------------------------------
+    def bulk_lookup(self, queries: list[dict]) -> list[dict | None]:
+        """Look up many companies/contacts; returns one record (or ``None``) per query."""
+
+        records: list[dict | None] = []
+        for start in range(0, len(queries), self.batch_size):
+            batch = queries[start:start + self.batch_size]
+            results = self._post("/contacts/lookup", {"queries": batch}).get("results", [])
+            if len(results) != len(batch):
+                raise CRMError("CRM lookup returned a different number of results than queries")
+            records.extend(result.get("record") if result.get("found") else None for result in results)
+        return records
+
+    def bulk_upsert(self, records: list[dict]) -> dict:
+        """Create or update many records; returns the assigned ids and counts."""
+
+        summary = {"ids": [], "created": 0, "updated": 0}
+        for start in range(0, len(records), self.batch_size):
+            reply = self._post("/contacts/upsert", {"records": records[start:start + self.batch_size]})
+            summary["ids"].extend(reply.get("ids", []))
+            summary["created"] += reply.get("created", 0)
+            summary["updated"] += reply.get("updated", 0)
+        return summary
+
+    # ------------------------------------------------------------------
+    # Coalesced single lookups
+    # ------------------------------------------------------------------
+    def lookup(self, query: dict) -> dict | None:
+        """Look up one company or contact, sharing a request with concurrent lookups."""
+
+        future: Future = Future()
+        with self._pending_lock:
+            self._pending.append((query, future))
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name="crm-coalescer", daemon=True)
+                self._flusher.start()
+            self._pending_lock.notify()
+        return future.result()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._pending_lock:
+                if not self._pending:
+                    # Nothing queued: let the thread exit until the next lookup.
+                    self._flusher = None
+                    return
+                deadline = time.monotonic() + self.coalesce_window
+                while len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_lock.wait(remaining)
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+            # Sent from the pool so that this thread can start gathering the
+            # next batch while this one is in flight or backing off.
+            try:
+                self._senders.submit(self._send_batch, batch)
+            except RuntimeError:
+                # The client was closed.
+                for _, future in batch:
+                    future.set_exception(CRMError("CRM client is closed"))
+
+    def _send_batch(self, batch: list[tuple[dict, Future]]) -> None:
+        try:
+            records = self.bulk_lookup([query for query, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+        else:
+            for (_, future), record in zip(batch, records):
+                future.set_result(record)
+
+
+_default_client: CRMClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> CRMClient | None:
+    """Return the shared client for the configured CRM, or ``None`` if unset."""
+
+    global _default_client
+    if not settings.CRM_API_ENDPOINT:
+        return None
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = CRMClient(settings.CRM_API_ENDPOINT, settings.CRM_API_KEY)
+        return _default_client
+
+
+@traced()
 def get_contact_details(company_name: str | None = None, contact_id: str | None = None) -> dict:
     """Retrieve details about a contact or company from the CRM.
 
-    This stub function illustrates where code interfacing with a real CRM system
-    would live.  Replace its internals with API calls to your actual CRM of
-    choice.
+    Lookups issued close together (for instance several tool calls in one
+    agent turn) are batched into a single CRM request automatically.  The
+    ``status`` is ``"success"``, ``"not_found"`` when the CRM has no matching
+    record, or ``"error"`` when the lookup itself failed.
     """
 
     if company_name:
-        # In a production implementation, query the CRM by company name and
-        # return the structured record.
-        return {"status": "success", "details": f"Mock details for {company_name}"}
+        query = {"company_name": company_name}
     elif contact_id:
-        return {"status": "success", "details": f"Mock details for contact {contact_id}"}
-    return {"status": "error", "message": "Company name or contact ID required."}
+        query = {"contact_id": contact_id}
+    else:
+        return {"status": "error", "message": "Company name or contact ID required."}
+
+    client = get_default_client()
+    if client is None:
+        return {"status": "error", "message": "CRM_API_ENDPOINT is not configured."}
+    try:
+        record = client.lookup(query)
+    except CRMError as e:
+        return {"status": "error", "message": str(e)}
+    if record is None:
+        return {"status": "not_found", "message": f"No CRM record found for {company_name or contact_id}."}
+    return {"status": "success", "details": record}
+
+
+@traced()
+def upsert_contacts(records: list[dict]) -> dict:
+    """Create or update contact records in the CRM in as few requests as possible."""
+
+    client = get_default_client()
+    if client is None:
+        return {"status": "error", "message": "CRM_API_ENDPOINT is not configured."}
+    try:
+        return {"status": "success", **client.bulk_upsert(records)}
+    except CRMError as e:
+        return {"status": "error", "message": str(e)}
@@ -0,0 +1,395 @@
+"""Streaming, tree-free extraction of lead data from HTML.
+
+Building a full BeautifulSoup tree just to read ``<title>`` and a handful of
+``mailto:`` links is the prospector's main CPU cost per page and keeps the
+whole DOM in memory.  :class:`StreamingExtractor` instead scans the response
+body chunk by chunk with a few precompiled regular expressions, keeping only a
+short overlap between chunks so matches that straddle a boundary are not lost.
+
+It collects:
+
+* the page ``<title>``;
+* ``mailto:`` links, plain-text addresses and lightly obfuscated ones such as
+  ``name [at] example [dot] com`` or ``name&#64;example.com``.  Addresses in
+  attribute values and in ``<script>``/``<style>`` code are ignored;
+* ``tel:`` links;
+* schema.org ``Organization`` objects from JSON-LD blocks;
+* outgoing ``<a href>`` links, resolved against the page URL.
+
+The caller decides which of those it needs; once every field listed in
+``stop_when`` has a value the extractor reports that it is done and the rest of
+the body does not have to be downloaded.  :func:`extract_with_soup` is the
+BeautifulSoup-based fallback producing the same :class:`Extraction`.
+"""
+
+import codecs
+import html
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from urllib.parse import unquote, urldefrag, urljoin
+
+
+ALL_FIELDS = frozenset({"title", "emails", "phones", "organizations", "links"})
+
+# schema.org types that describe a company rather than a person or product.
+ORGANIZATION_TYPES = frozenset(
+    {"Organization", "Corporation", "LocalBusiness", "ProfessionalService", "NGO", "OnlineBusiness"}
+)
+
+# Characters kept from the end of one chunk and rescanned with the next.  Long
+# enough for any e-mail address or ``href`` attribute we care about.  The kept
+# tail starts at a ``<`` when one is close enough, and never inside the local
+# part of an address, so no address is cut in half at the start of the next
+# buffer.
+_OVERLAP = 512
+# An address ending this close to the end of the buffer may continue in the
+# next chunk (``acme.co`` + ``.uk``, ``acme [dot] co`` + `` [dot] uk``).
+_EMAIL_TAIL = 32
+# Upper bounds on elements we buffer until they are closed.
+_MAX_TITLE_CHARS = 4096
+_MAX_JSON_LD_CHARS = 256 * 1024
+
+# File extensions that look like TLDs in retina image names (``logo@2x.png``).
+_NOT_TLDS = frozenset({"png", "jpg", "jpeg", "gif", "svg", "webp", "css", "js", "ico"})
+
+_TITLE_OPEN = re.compile(r"<title\b[^>]*>", re.I)
+_TITLE_CLOSE = re.compile(r"</title\s*>", re.I)
+_JSON_LD_OPEN = re.compile(r"<script\b[^>]*application/ld\+json[^>]*>", re.I)
+_SCRIPT_CLOSE = re.compile(r"</script\s*>", re.I)
+# Elements whose content is code, not text a visitor reads.
+_RAW_TEXT_TAG = re.compile(r"<(/?)(script|style)\b[^>]*>", re.I)
+_HREF = re.compile(r"""<a\b[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.I)
+# E-mail matching is anchored on the (rare) at-sign rather than on the local
+# part, which would make the regex engine try every word of the page.  The
+# ``@`` may be written as an HTML entity or obfuscated as ``[at]``/``(at)``.
+_AT_SIGN = re.compile(r"@|&#0*64;|&#x0*40;|&commat;|\s*[\[\(\{]\s*at\s*[\]\)\}]\s*", re.I)
+_LOCAL_PART = re.compile(r"[A-Za-z0-9._%+-]{1,64}$")
+_DOMAIN = re.compile(r"[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,24}")
+_OBFUSCATED_DOMAIN = re.compile(
+    r"[A-Za-z0-9-]+(?:\s*(?:[\[\(\{]\s*dot\s*[\]\)\}]|\.)\s*[A-Za-z0-9-]+)+", re.I
+)
+_OBFUSCATED_DOT = re.compile(r"\s*[\[\(\{]\s*dot\s*[\]\)\}]\s*|\s*\.\s*", re.I)
+
+
+@dataclass
+class Extraction:
+    """Lead data found on a single page."""
+
+    title: str | None = None
+    emails: set[str] = field(default_factory=set)
+    phones: set[str] = field(default_factory=set)
+    organizations: list[dict] = field(default_factory=list)
+    links: list[str] = field(default_factory=list)
+    bytes_read: int = 0
+    complete: bool = False
+
+    def has(self, name: str) -> bool:
+        return bool(getattr(self, name))
+
+
+def _clean_email(value: str) -> str | None:
+    value = unquote(value).strip().strip(".").lower()
+    if "@" not in value:
+        return None
+    if value.rsplit(".", 1)[-1] in _NOT_TLDS:
+        return None
+    return value
+
+
+def _find_emails(buf: str):
+    """Yield ``(start, end, address)`` for every e-mail-like string in ``buf``."""
+
+    for at in _AT_SIGN.finditer(buf):
+        local = _LOCAL_PART.search(buf, max(0, at.start() - 64), at.start())
+        if local is None:
+            continue
+        if at.group(0) == "@" or at.group(0).startswith("&"):
+            domain = _DOMAIN.match(buf, at.end())
+            if domain is None:
+                continue
+            address = domain.group(0)
+        else:
+            domain = _OBFUSCATED_DOMAIN.match(buf, at.end())
+            if domain is None:
+                continue
+            address = _OBFUSCATED_DOT.sub(".", domain.group(0))
+            if "." not in address:
+                continue
+        yield local.start(), domain.end(), f"{local.group(0)}@{address}"
+
+
+def _in_tag(buf: str, position: int) -> bool:
+    """Whether ``position`` lies inside a tag's markup rather than in text."""
+
+    opening = buf.rfind("<", 0, position)
+    if opening == -1 or buf.rfind(">", 0, position) > opening:
+        return False
+    following = buf[opening + 1:opening + 2]
+    return following.isalpha() or following in ("/", "!")
+
+
+def _raw_text_spans(buf: str, inside: str | None) -> tuple[list[tuple[int, int]], list[tuple[int, str | None]]]:
+    """Spans of ``buf`` inside ``<script>``/``<style>``, and where that state changes.
+
+    ``inside`` names the element ``buf`` starts in, if any.  Returns the
+    ``(start, end)`` spans and ``(position, element or None)`` transitions.
+    """
+
+    spans = []
+    transitions = []
+    start = 0
+    for match in _RAW_TEXT_TAG.finditer(buf):
+        closing, name = match.group(1), match.group(2).lower()
+        if inside is None and not closing:
+            inside, start = name, match.end()
+        elif inside == name and closing:
+            spans.append((start, match.start()))
+            inside = None
+        else:
+            continue
+        transitions.append((match.end(), inside))
+    if inside is not None:
+        spans.append((start, len(buf)))
+    return spans, transitions
+
+
+def _organizations_from_json_ld(raw: str) -> list[dict]:
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return []
+    found = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            types = node.get("@type", ())
+            types = {types} if isinstance(types, str) else set(types)
+            if types & ORGANIZATION_TYPES:
+                found.append(
+                    {
+                        key: node[key]
+                        for key in ("name", "url", "email", "telephone", "sameAs", "address")
+                        if key in node
+                    }
+                )
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+    return found
+
+
+def _add_organization(result: Extraction, org: dict) -> None:
+    result.organizations.append(org)
+    email = org.get("email")
+    if isinstance(email, str) and (cleaned := _clean_email(email.removeprefix("mailto:"))):
+        result.emails.add(cleaned)
+    phone = org.get("telephone")
+    if isinstance(phone, str):
+        result.phones.add(phone.strip())
+
+
+class StreamingExtractor:
+    """Incremental extractor fed with raw response chunks.
+
+    Parameters
+    ----------
+    base_url:
+        URL of the page, used to resolve relative links.
+    fields:
+        Which fields to collect.  Defaults to all of :data:`ALL_FIELDS`.
+    stop_when:
+        Fields that, once each has at least one value, make the extractor
+        report :attr:`done`.  Empty means read the whole body.
+    max_bytes:
+        Hard limit on how much of the body is scanned.
+    encoding:
+        Character set declared by the server, if any.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        fields: Iterable[str] = ALL_FIELDS,
+        stop_when: Iterable[str] = (),
+        max_bytes: int = 2 * 1024 * 1024,
+        encoding: str | None = None,
+    ) -> None:
+        self.base_url = base_url
+        self.fields = frozenset(fields)
+        self.stop_when = frozenset(stop_when) & self.fields
+        self.max_bytes = max_bytes
+        try:
+            decoder_factory = codecs.getincrementaldecoder(encoding or "utf-8")
+        except LookupError:
+            decoder_factory = codecs.getincrementaldecoder("utf-8")
+        self._decoder = decoder_factory(errors="replace")
+        self._buffer = ""
+        # Absolute offset of ``_buffer[0]`` in the decoded document, used to
+        # avoid reporting the same JSON-LD block twice after rescanning.
+        self._offset = 0
+        self._seen_blocks: set[int] = set()
+        self._seen_hrefs: set[str] = set()
+        self._seen_links: set[str] = set()
+        # ``script`` or ``style`` when ``_buffer`` starts inside one.
+        self._raw_text: str | None = None
+        self.result = Extraction()
+
+    @property
+    def done(self) -> bool:
+        return self.result.complete
+
+    def feed(self, chunk: bytes) -> bool:
+        """Scan another chunk of the body.  Returns ``True`` once done."""
+
+        if self.result.complete:
+            return True
+        self.result.bytes_read += len(chunk)
+        self._scan(self._decoder.decode(chunk), final=False)
+        if self.result.bytes_read >= self.max_bytes:
+            self.result.complete = True
+        return self.result.complete
+
+    def close(self) -> Extraction:
+        """Flush any buffered text and return the extraction."""
+
+        if not self.result.complete:
+            self._scan(self._decoder.decode(b"", final=True), final=True)
+            self.result.complete = True
+        return self.result
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+    def _scan(self, text: str, final: bool) -> None:
+        buf = self._buffer + text
+        keep_from = len(buf) if final else max(0, len(buf) - _OVERLAP)
+        result = self.result
+
+        if "title" in self.fields and result.title is None:
+            opening = _TITLE_OPEN.search(buf)
+            if opening:
+                closing = _TITLE_CLOSE.search(buf, opening.end())
+                if closing:
+                    result.title = html.unescape(buf[opening.end():closing.start()]).strip()
+                elif len(buf) - opening.end() < _MAX_TITLE_CHARS:
+                    keep_from = min(keep_from, opening.start())
+
+        if "organizations" in self.fields or "emails" in self.fields:
+            for opening in _JSON_LD_OPEN.finditer(buf):
+                start = self._offset + opening.start()
+                if start in self._seen_blocks:
+                    continue
+                closing = _SCRIPT_CLOSE.search(buf, opening.end())
+                if closing is None:
+                    if len(buf) - opening.end() < _MAX_JSON_LD_CHARS:
+                        keep_from = min(keep_from, opening.start())
+                    break
+                self._seen_blocks.add(start)
+                for org in _organizations_from_json_ld(buf[opening.end():closing.start()]):
+                    _add_organization(result, org)
+
+        need_hrefs = self.fields & {"emails", "phones", "links"}
+        if need_hrefs:
+            for match in _HREF.finditer(buf):
+                raw = match.group(1) or match.group(2) or ""
+                if raw in self._seen_hrefs:
+                    # Navigation links repeat on every page section; resolving
+                    # them again is the most expensive part of the scan.
+                    continue
+                self._seen_hrefs.add(raw)
+                href = html.unescape(raw).strip()
+                lowered = href[:7].lower()
+                if lowered == "mailto:":
+                    if "emails" in self.fields and (cleaned := _clean_email(href[7:].split("?", 1)[0])):
+                        result.emails.add(cleaned)
+                elif lowered.startswith("tel:"):
+                    if "phones" in self.fields:
+                        result.phones.add(unquote(href[4:]).strip())
+                elif "links" in self.fields and href and not href.startswith(("#", "javascript:")):
+                    link = urldefrag(urljoin(self.base_url, href))[0]
+                    if link not in self._seen_links:
+                        self._seen_links.add(link)
+                        result.links.append(link)
+
+        transitions = []
+        if "emails" in self.fields:
+            code, transitions = _raw_text_spans(buf, self._raw_text)
+            for start, end, candidate in _find_emails(buf):
+                if not final and len(buf) - end < _EMAIL_TAIL:
+                    # May continue in the next chunk; rescan it then.
+                    keep_from = min(keep_from, start)
+                elif _in_tag(buf, start) or any(low <= start < high for low, high in code):
+                    # Attribute values (``placeholder="you@company.com"``,
+                    # ``src="logo@2x.png"``) and script code are not contact
+                    # details; ``mailto:`` links were handled above.
+                    continue
+                elif cleaned := _clean_email(candidate):
+                    result.emails.add(cleaned)
+
+        if keep_from < len(buf):
+            tag_start = buf.rfind("<", 0, keep_from + 1)
+            if tag_start != -1 and keep_from - tag_start < 4 * _OVERLAP:
+                keep_from = tag_start
+            else:
+                # Do not split a word that may be the local part of an
+                # address whose ``@`` is in the kept tail.
+                partial = _LOCAL_PART.search(buf, max(0, keep_from - 64), keep_from)
+                if partial is not None:
+                    keep_from = partial.start()
+        for position, inside in transitions:
+            if position > keep_from:
+                break
+            self._raw_text = inside
+        self._offset += keep_from
+        self._buffer = buf[keep_from:]
+        if self.stop_when and all(result.has(name) for name in self.stop_when):
+            result.complete = True
+
+
+def extract_from_bytes(content: bytes, base_url: str, **options) -> Extraction:
+    """Run :class:`StreamingExtractor` over an in-memory document."""
+
+    extractor = StreamingExtractor(base_url, **options)
+    step = 64 * 1024
+    for start in range(0, len(content), step):
+        if extractor.feed(content[start:start + step]):
+            break
+    return extractor.close()
+
+
+def extract_with_soup(content: bytes, base_url: str) -> Extraction:
+    """Fallback extraction that builds a BeautifulSoup tree.
+
+    Slower and more memory hungry than :class:`StreamingExtractor`, but
+    tolerant of markup the regular expressions do not anticipate.
+    """
+
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    result = Extraction(bytes_read=len(content), complete=True)
+    seen_links: set[str] = set()
+    if soup.title and soup.title.string:
+        result.title = soup.title.string.strip()
+    for link in soup.find_all("a", href=True):
+        href = link["href"].strip()
+        if href.lower().startswith("mailto:"):
+            if cleaned := _clean_email(href[7:].split("?", 1)[0]):
+                result.emails.add(cleaned)  # strip the mailto: prefix
+        elif href.lower().startswith("tel:"):
+            result.phones.add(unquote(href[4:]).strip())
+        elif not href.startswith(("#", "javascript:")):
+            link_url = urldefrag(urljoin(base_url, href))[0]
+            if link_url not in seen_links:
+                seen_links.add(link_url)
+                result.links.append(link_url)
+    for script in soup.find_all("script", type="application/ld+json"):
+        for org in _organizations_from_json_ld(script.string or ""):
+            _add_organization(result, org)
+    for _, _, candidate in _find_emails(soup.get_text(" ")):
+        if cleaned := _clean_email(candidate):
+            result.emails.add(cleaned)
+    return result
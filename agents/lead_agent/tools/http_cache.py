@@ -0,0 +1,278 @@
+"""Persistent HTTP response cache for the web prospector.
+
+Pages are stored in a small SQLite database keyed by their normalized URL
+together with the ``ETag``/``Last-Modified`` validators the server sent and the
+data already extracted from them.  Within ``ttl`` seconds a cached page is
+served without touching the network; after that the prospector sends a
+conditional request and a ``304 Not Modified`` answer re-uses both the stored
+body and the stored extraction, so an unchanged page is neither downloaded nor
+parsed again.
+
+The cache is bounded by total stored bytes and evicts least-recently-used
+entries first.  Entries older than ``max_age`` are dropped regardless of use.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    body BLOB,
+    extracted TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+-- Every store looks for expired rows; without this it scans the table.
+CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Return a canonical form of ``url`` suitable for use as a cache key.
+
+    Scheme and host are lower-cased, default ports and fragments are dropped,
+    an empty path becomes ``/`` and query parameters are sorted.
+    """
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+@dataclass
+class CachedResponse:
+    """A cached page as returned by :meth:`ResponseCache.lookup`."""
+
+    key: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+    size: int
+    extracted: dict
+
+    def is_fresh(self, ttl: float, now: float | None = None) -> bool:
+        return ((now or time.time()) - self.fetched_at) < ttl
+
+    def conditional_headers(self) -> dict:
+        """Headers that turn a GET into a revalidation of this entry."""
+
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Thread-safe, size-bounded on-disk cache of fetched pages.
+
+    Parameters
+    ----------
+    path:
+        Location of the SQLite file.  Parent directories are created on demand.
+        ``":memory:"`` keeps the cache in process memory only.
+    ttl:
+        Seconds during which an entry is served without revalidation.
+    max_bytes:
+        Upper bound on the summed size of stored bodies.
+    max_age:
+        Entries fetched longer ago than this many seconds are purged.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 12 * 3600,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age: float = 30 * 24 * 3600,
+    ) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Worker threads of the crawl engine share this connection; every use
+        # is serialised through ``_lock``.
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        self.counters = {
+            "hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        """Return the hit/miss/byte counters plus current cache occupancy."""
+
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {**self.counters, "entries": entries, "stored_bytes": self._total_bytes}
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def lookup(self, url: str) -> CachedResponse | None:
+        """Return the cached entry for ``url`` or ``None``."""
+
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, fetched_at, size, extracted FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        etag, last_modified, fetched_at, size, extracted = row
+        return CachedResponse(key, etag, last_modified, fetched_at, size, json.loads(extracted))
+
+    def load_body(self, url: str) -> bytes | None:
+        """Return the stored response body for ``url``, if one was kept."""
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM responses WHERE key = ?", (normalize_url(url),)
+            ).fetchone()
+        return zlib.decompress(row[0]) if row and row[0] is not None else None
+
+    def iter_pages(self, since: float = 0.0, batch_size: int = 200):
+        """Yield ``(url, extracted, body)`` for stored pages fetched after ``since``.
+
+        Rows are read in batches so the lock is never held while the caller
+        processes a page.
+        """
+
+        last_key = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, extracted, body FROM responses "
+                    "WHERE key > ? AND fetched_at >= ? AND body IS NOT NULL ORDER BY key LIMIT ?",
+                    (last_key, since, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for key, extracted, body in rows:
+                yield key, json.loads(extracted), zlib.decompress(body)
+            last_key = rows[-1][0]
+
+    # ------------------------------------------------------------------
+    # Counters used by the fetch path
+    # ------------------------------------------------------------------
+    def record_hit(self, entry: CachedResponse) -> None:
+        with self._lock:
+            self.counters["hits"] += 1
+            self.counters["bytes_saved"] += entry.size
+
+    def record_miss(self, downloaded: int) -> None:
+        with self._lock:
+            self.counters["misses"] += 1
+            self.counters["bytes_downloaded"] += downloaded
+
+    def record_not_modified(self, entry: CachedResponse) -> None:
+        """Mark ``entry`` as freshly validated after a ``304`` response."""
+
+        now = time.time()
+        with self._lock:
+            self.counters["revalidated"] += 1
+            self.counters["bytes_saved"] += entry.size
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, entry.key),
+            )
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def store(
+        self,
+        url: str,
+        extracted: dict,
+        body: bytes | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Insert or replace the entry for ``url`` and enforce the size bound."""
+
+        key = normalize_url(url)
+        compressed = zlib.compress(body) if body is not None else None
+        size = len(body or b"")
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, now, now, size, compressed, json.dumps(extracted)),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self.counters["stores"] += 1
+            self._evict_locked(now)
+
+    def invalidate(self, url: str) -> None:
+        with self._lock:
+            key = normalize_url(url)
+            row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= row[0]
+
+    def _evict_locked(self, now: float) -> None:
+        expired = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE fetched_at < ?",
+            (now - self.max_age,),
+        ).fetchone()
+        if expired[0]:
+            self._conn.execute("DELETE FROM responses WHERE fetched_at < ?", (now - self.max_age,))
+            self._total_bytes -= expired[1]
+            self.counters["evictions"] += expired[0]
+
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Evict down to 90% of the bound so we do not evict on every store.
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ):
+            if self._total_bytes <= target:
+                break
+            victims.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.counters["evictions"] += len(victims)
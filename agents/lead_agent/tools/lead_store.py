@@ -0,0 +1,671 @@
+"""Lead store with entity resolution, used to skip duplicate prospecting.
+
+The same company keeps reaching the lead agents under different spellings:
+``http://www.acme.com/contact`` and ``https://acme.com``, ``Jane@Acme.com`` and
+``jane@acme.com``, "ACME Corp." and "Acme Corporation".  Before any crawl or
+agent run, :class:`LeadStore` resolves such inputs to a single lead in three
+steps:
+
+* **normalization** - URLs become canonical domains (scheme, ``www.``, port
+  and path dropped), e-mail addresses are lower-cased without ``+tag``
+  suffixes, and company names lose case, punctuation and legal suffixes;
+* **exact index** - every canonical domain and e-mail address maps to its lead
+  in an in-memory dict, so these lookups are O(1);
+* **near-duplicate index** - company names are MinHash-signed over character
+  trigrams and bucketed with locality-sensitive hashing (LSH).  A lookup only
+  compares the signatures that share a bucket, and accepts them when their
+  estimated Jaccard similarity reaches ``name_threshold``.  A name match is
+  only a suggestion: it never resolves input that names a domain, so two
+  sites are not merged because their names look alike.
+
+Only e-mail addresses on the lead's own domain identify it.  A shared agency
+or free-mail address found on several sites would otherwise join them.
+
+Leads are persisted in SQLite together with their signatures.  Whatever
+resolves to the same lead is merged into it: aliases, e-mails and data.
+:meth:`LeadStore.find_recent` only reports leads seen within ``window``
+seconds, so stale leads are prospected again.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from config import settings
+
+if TYPE_CHECKING:  # pragma: no cover - numpy is imported by the name index only
+    import numpy as np
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    lead_id INTEGER PRIMARY KEY,
+    company TEXT,
+    name_key TEXT,
+    signature BLOB,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lead_keys (
+    key TEXT PRIMARY KEY,
+    lead_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lead_keys_lead_id ON lead_keys (lead_id);
+"""
+
+# Trailing words that do not distinguish one company from another.
+LEGAL_SUFFIXES = frozenset(
+    "inc incorporated corp corporation co company llc llp lp ltd limited plc gmbh ag sa sas sarl "
+    "bv nv oy ab as pty srl spa kk group holdings".split()
+)
+
+_URL = re.compile(
+    r"\bhttps?://[^\s'\"<>)]+|(?<![\w.@-])(?:[a-z0-9-]+\.)+[a-z]{2,}\b(?![.\w-]*@)(?:/[^\s'\"<>)]*)?", re.IGNORECASE
+)
+_EMAIL = re.compile(r"\b[\w.+-]+@(?:[a-z0-9-]+\.)+[a-z]{2,}\b", re.IGNORECASE)
+_NAME_NOISE = re.compile(r"[^a-z0-9 ]+")
+_TASK_NOISE = re.compile(r"[^\w@./:-]+")
+
+# Bare "name.ext" tokens whose suffix is a file extension or language rather
+# than a top-level domain ("Node.js", "README.md", "setup.py").
+FILE_SUFFIXES = frozenset(
+    "js ts jsx tsx mjs cjs py rb go rs java kt cs cpp hpp h php pl sh bat ps1 md rst txt json yml yaml toml "
+    "ini cfg conf xml html htm css scss csv tsv log lock exe dll so bin zip gz tgz tar rar png jpg jpeg gif "
+    "svg webp pdf doc docx xls xlsx ppt pptx mp3 mp4 wav mov".split()
+)
+
+# Page titles (or title parts) that do not name the company.
+GENERIC_TITLES = frozenset(
+    [
+        "home", "homepage", "home page", "index", "welcome", "main", "start", "untitled", "untitled document",
+        "no title found", "about", "about us", "contact", "contact us", "team", "our team", "blog", "news",
+        "login", "log in", "sign in", "signin", "404", "not found", "page not found", "error", "access denied",
+        "forbidden", "service unavailable", "just a moment", "attention required", "coming soon", "under construction", "default page",
+        "website", "site", "web site", "official site", "official website", "redirecting",
+    ]
+)
+_TITLE_SEPARATORS = re.compile(r"\s*[|\u00b7\u2022]\s*|\s*:\s+|\s+[-\u2013\u2014]\s+")
+
+# Most recent distinct task answers kept per lead.
+MAX_ANSWERS_PER_LEAD = 16
+
+_PRIME = (1 << 61) - 1
+
+
+# ---------------------------------------------------------------------------
+# Normalization
+# ---------------------------------------------------------------------------
+def canonical_domain(url: str) -> str | None:
+    """Return the registrable-looking host of a URL or bare domain.
+
+    ``https://www.Acme.com:443/contact`` and ``acme.com`` both become
+    ``acme.com``.  Returns ``None`` if no host can be found.
+    """
+
+    url = url.strip()
+    if not url:
+        return None
+    host = urlsplit(url if "://" in url else f"//{url}").hostname or ""
+    host = host.rstrip(".").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if not host:
+        return None
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def normalize_email(email: str) -> str | None:
+    """Lower-case ``email`` and drop a ``+tag`` from its local part."""
+
+    email = email.strip().lower()
+    if email.startswith("mailto:"):
+        email = email[7:]
+    local, at, domain = email.partition("@")
+    if not at or not local or "." not in domain:
+        return None
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def normalize_company_name(name: str) -> str:
+    """Reduce a company name to the words that identify it.
+
+    "The ACME Corp., Inc." becomes ``"acme"``; an ampersand reads as ``and``.
+    """
+
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    words = _NAME_NOISE.sub(" ", ascii_name.lower().replace("&", " and ")).split()
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def company_from_title(title: str | None) -> str | None:
+    """The company name in a page title, or ``None`` if it only says "Home".
+
+    "Home | Acme Corp" gives ``"Acme Corp"``; "Welcome to Acme" gives
+    ``"Acme"``; "Home", "Contact us" and "404 Not Found" give ``None``.
+    """
+
+    for part in _TITLE_SEPARATORS.split(title or ""):
+        part = part.strip()
+        if part.lower().startswith("welcome to "):
+            part = part[len("welcome to "):].strip()
+        # "404 Not Found", "503 Service Unavailable".
+        key = re.sub(r"^\d+\b", "", normalize_company_name(part)).strip()
+        if key and key not in GENERIC_TITLES:
+            return part
+    return None
+
+
+def _same_site(domain: str, other: str) -> bool:
+    return domain == other or domain.endswith(f".{other}") or other.endswith(f".{domain}")
+
+
+def _mentioned_domain(token: str) -> str | None:
+    token = token.rstrip(".,;:!?")
+    if "://" not in token and token.partition("/")[0].rpartition(".")[2].lower() in FILE_SUFFIXES:
+        return None
+    return canonical_domain(token)
+
+
+def leads_in_text(text: str) -> tuple[list[str], list[str]]:
+    """Return the ``(domains, emails)`` mentioned in a free-text task."""
+
+    emails = []
+    for match in _EMAIL.finditer(text):
+        email = normalize_email(match.group())
+        if email and email not in emails:
+            emails.append(email)
+    # Strip addresses first so their domains are not read as websites.
+    domains = []
+    for match in _URL.finditer(_EMAIL.sub(" ", text)):
+        domain = _mentioned_domain(match.group())
+        if domain and domain not in domains:
+            domains.append(domain)
+    return domains, emails
+
+
+def task_key(task: str) -> str:
+    """Normalize a free-text agent task for answer reuse.
+
+    URLs and addresses are replaced by their canonical form, and case,
+    punctuation and spacing are dropped, so "Prospect https://www.Acme.com/"
+    and "prospect acme.com" share a key while "Find the CTO at acme.com" does
+    not.
+    """
+
+    text = _EMAIL.sub(lambda m: normalize_email(m.group()) or m.group(), task)
+
+    parts = re.split(r"(\S+@\S+)", text)
+    text = "".join(
+        part if "@" in part else _URL.sub(lambda m: _mentioned_domain(m.group()) or m.group(), part)
+        for part in parts
+    )
+    return " ".join(_TASK_NOISE.sub(" ", text.lower()).strip(" ./:-").split())
+
+
+# ---------------------------------------------------------------------------
+# MinHash
+# ---------------------------------------------------------------------------
+class MinHasher:
+    """MinHash signatures of strings over their character trigrams.
+
+    Parameters
+    ----------
+    num_perm:
+        Signature length.
+    bands:
+        Number of LSH bands; ``num_perm`` must be a multiple of it.  With
+        ``r = num_perm / bands`` rows per band, two names share a bucket with
+        probability ``1 - (1 - s**r) ** bands`` at Jaccard similarity ``s``.
+    seed:
+        Seed of the hash permutations.  Signatures are only comparable
+        between hashers with the same seed and length.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, seed: int = 1) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        # Imported only when used: numpy is slow to import and domain and
+        # e-mail lookups do not need it.
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # a < 2**32 and x < 2**32 keep a * x + b below 2**64.
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> "np.ndarray":
+        import numpy as np
+
+        padded = f" {text} "
+        shingles = {padded[i:i + 3] for i in range(max(len(padded) - 2, 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        return ((np.outer(hashes, self._a) + self._b) % np.uint64(_PRIME)).min(axis=0)
+
+    def load(self, blob: bytes) -> "np.ndarray | None":
+        """A signature stored with ``tobytes()``, or ``None`` if its length differs."""
+
+        import numpy as np
+
+        signature = np.frombuffer(blob, dtype=np.uint64)
+        return signature if signature.size == self.num_perm else None
+
+    def band_keys(self, signature: "np.ndarray") -> list[bytes]:
+        return [
+            band.to_bytes(1, "little") + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(signatures: "list[np.ndarray]", signature: "np.ndarray") -> "np.ndarray":
+        """Estimated Jaccard similarity of ``signature`` to each of ``signatures``."""
+
+        import numpy as np
+
+        return (np.stack(signatures) == signature).mean(axis=-1)
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+@dataclass
+class Lead:
+    """A resolved company with every alias it has been seen under."""
+
+    lead_id: int
+    company: str | None
+    first_seen: float
+    last_seen: float
+    data: dict
+    domains: list[str] = field(default_factory=list)
+    emails: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "lead_id": self.lead_id,
+            "company": self.company,
+            "domains": self.domains,
+            "emails": self.emails,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "data": self.data,
+        }
+
+    def answer_for(self, task: str):
+        """The agent answer recorded for ``task`` (see :meth:`LeadStore.record_task`), or ``None``."""
+
+        return self.data.get("answers", {}).get(task_key(task))
+
+
+@dataclass
+class LeadMatch:
+    """Result of resolving a domain, e-mail or company name to a lead."""
+
+    lead: Lead
+    matched_on: str
+    similarity: float = 1.0
+
+
+def _merge_data(old: dict, new: dict) -> dict:
+    merged = dict(old)
+    for key, value in new.items():
+        if isinstance(value, list) and isinstance(merged.get(key), list):
+            merged[key] = merged[key] + [v for v in value if v not in merged[key]]
+        elif key == "answers" and isinstance(value, dict) and isinstance(merged.get(key), dict):
+            # Newest answers last; the oldest are dropped beyond the cap.
+            answers = {k: v for k, v in merged[key].items() if k not in value}
+            answers.update(value)
+            merged[key] = dict(list(answers.items())[-MAX_ANSWERS_PER_LEAD:])
+        elif value is not None:
+            merged[key] = value
+    return merged
+
+
+class LeadStore:
+    """Thread-safe, SQLite-backed store of resolved leads.
+
+    Parameters
+    ----------
+    path:
+        SQLite file for the store, or ``":memory:"``.
+    window:
+        Seconds during which a lead counts as recently seen.
+    name_threshold:
+        Minimum estimated Jaccard similarity of company-name trigrams for a
+        near-duplicate match.
+    num_perm, bands:
+        MinHash signature length and LSH band count, see :class:`MinHasher`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        window: float = 7 * 24 * 3600,
+        name_threshold: float = 0.75,
+        num_perm: int = 128,
+        bands: int = 16,
+    ) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.window = window
+        self.name_threshold = name_threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self._hasher: MinHasher | None = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.counters = {"lookups": 0, "exact_matches": 0, "name_matches": 0, "created": 0, "merged": 0}
+
+        # Both indexes live in memory; SQLite is only read for lead details.
+        self._keys: dict[str, int] = dict(self._conn.execute("SELECT key, lead_id FROM lead_keys"))
+        self._last_seen: dict[int, float] = {}
+        self._signatures: dict[int, "np.ndarray"] = {}
+        self._buckets: dict[bytes, set[int]] = {}
+        for lead_id, last_seen, blob in self._conn.execute("SELECT lead_id, last_seen, signature FROM leads"):
+            self._last_seen[lead_id] = last_seen
+            if blob is not None:
+                signature = self.hasher.load(blob)
+                if signature is not None:
+                    self._index_name(lead_id, signature)
+
+    @property
+    def hasher(self) -> MinHasher:
+        """The name index's hasher, created on first use."""
+
+        if self._hasher is None:
+            self._hasher = MinHasher(self.num_perm, self.bands)
+        return self._hasher
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "leads": len(self._last_seen), "keys": len(self._keys)}
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def find(
+        self, urls: Iterable[str] = (), emails: Iterable[str] = (), company: str | None = None
+    ) -> LeadMatch | None:
+        """Resolve the given identifiers to a known lead.
+
+        Domains and e-mail addresses are tried first.  The company name is
+        only used when neither matches and no domain was given.
+        """
+
+        keys = _keys_for(urls, emails)
+        name_key = normalize_company_name(company) if company else ""
+        with self._lock:
+            self.counters["lookups"] += 1
+            match = self._resolve_locked(keys, name_key)
+            if match is None:
+                return None
+            lead_id, matched_on, similarity = match
+            self.counters["exact_matches" if matched_on != "name" else "name_matches"] += 1
+            return LeadMatch(self._load_locked(lead_id), matched_on, similarity)
+
+    def find_recent(
+        self,
+        urls: Iterable[str] = (),
+        emails: Iterable[str] = (),
+        company: str | None = None,
+        window: float | None = None,
+    ) -> LeadMatch | None:
+        """Like :meth:`find`, but ignore leads not seen in the last ``window`` seconds."""
+
+        match = self.find(urls, emails, company)
+        window = self.window if window is None else window
+        if match is None or match.lead.last_seen < time.time() - window:
+            return None
+        return match
+
+    def find_for_task(self, task: str) -> LeadMatch | None:
+        """Recently seen lead that already holds an answer to this same task.
+
+        Every domain and e-mail in ``task`` must resolve to the same lead, and
+        that lead must hold an answer recorded under the task's
+        :func:`task_key` (see :meth:`record_task`).  A different question
+        about a known company is not answered from the store.
+        """
+
+        match = None
+        for domains, emails in _task_groups(task):
+            found = self.find_recent(domains, emails)
+            if found is None or found.lead.answer_for(task) is None:
+                return None
+            if match is not None and found.lead.lead_id != match.lead.lead_id:
+                return None
+            match = found
+        return match
+
+    def record_task(self, task: str, answer) -> list[Lead]:
+        """Attach an agent's final answer to each lead mentioned in ``task``.
+
+        The answer is keyed by the normalized task, so it is only reused for
+        the same request.  Identifiers are grouped per company (an address
+        joins the domain it belongs to) so a task naming several companies
+        does not merge them.
+        """
+
+        data = {"answers": {task_key(task): answer}}
+        return [self.record(domains, emails, data=data) for domains, emails in _task_groups(task)]
+
+    def get(self, lead_id: int) -> Lead | None:
+        with self._lock:
+            return self._load_locked(lead_id) if lead_id in self._last_seen else None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def record(
+        self,
+        urls: Iterable[str] = (),
+        emails: Iterable[str] = (),
+        company: str | None = None,
+        data: dict | None = None,
+    ) -> Lead:
+        """Insert a lead or merge the identifiers and ``data`` into the one they resolve to.
+
+        When the domains and e-mails point at several stored leads, those
+        leads are merged into the oldest of them.  A similar company name
+        only joins a stored lead when no domain is given.  When domains are
+        given, only e-mails on them are kept as the lead's addresses.
+        """
+
+        keys = _keys_for(urls, emails)
+        name_key = normalize_company_name(company) if company else ""
+        now = time.time()
+        with self._lock:
+            owners = sorted({self._keys[key] for key in keys if key in self._keys})
+            if not owners:
+                match = self._resolve_locked(keys, name_key)
+                owners = [match[0]] if match else []
+            self._conn.execute("BEGIN")
+            try:
+                if owners:
+                    lead_id = owners[0]
+                    for other in owners[1:]:
+                        self._absorb_locked(lead_id, other)
+                    row = self._conn.execute(
+                        "SELECT company, name_key, data FROM leads WHERE lead_id = ?", (lead_id,)
+                    ).fetchone()
+                    merged = _merge_data(json.loads(row[2]), data or {})
+                    self._conn.execute(
+                        "UPDATE leads SET company = ?, last_seen = ?, data = ? WHERE lead_id = ?",
+                        (row[0] or company, now, json.dumps(merged, default=str), lead_id),
+                    )
+                    if name_key and not row[1]:
+                        self._set_name_locked(lead_id, name_key)
+                    self.counters["merged"] += 1
+                else:
+                    lead_id = self._conn.execute(
+                        "INSERT INTO leads (company, first_seen, last_seen, data) VALUES (?, ?, ?, ?)",
+                        (company, now, now, json.dumps(data or {}, default=str)),
+                    ).lastrowid
+                    if name_key:
+                        self._set_name_locked(lead_id, name_key)
+                    self.counters["created"] += 1
+                new_keys = [key for key in keys if self._keys.get(key) != lead_id]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO lead_keys VALUES (?, ?)", [(key, lead_id) for key in new_keys]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            for key in new_keys:
+                self._keys[key] = lead_id
+            self._last_seen[lead_id] = now
+            return self._load_locked(lead_id)
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold ``_lock``)
+    # ------------------------------------------------------------------
+    def _resolve_locked(self, keys: list[str], name_key: str) -> tuple[int, str, float] | None:
+        for key in keys:
+            lead_id = self._keys.get(key)
+            if lead_id is not None:
+                return lead_id, key.partition(":")[0], 1.0
+        if not name_key or any(key.startswith("domain:") for key in keys):
+            # A domain nobody has seen is a new company, however its name reads.
+            return None
+        signature = self.hasher.signature(name_key)
+        candidates = set()
+        for band in self.hasher.band_keys(signature):
+            candidates.update(self._buckets.get(band, ()))
+        if not candidates:
+            return None
+        # Shared suffixes ("labs", "systems") put many names in the same
+        # buckets, so candidates are verified in one vectorised comparison.
+        ids = list(candidates)
+        similarities = MinHasher.similarity([self._signatures[i] for i in ids], signature)
+        best = int(similarities.argmax())
+        if similarities[best] < self.name_threshold:
+            return None
+        return ids[best], "name", float(similarities[best])
+
+    def _index_name(self, lead_id: int, signature: "np.ndarray") -> None:
+        self._signatures[lead_id] = signature
+        for band in self.hasher.band_keys(signature):
+            self._buckets.setdefault(band, set()).add(lead_id)
+
+    def _unindex_name(self, lead_id: int) -> None:
+        signature = self._signatures.pop(lead_id, None)
+        if signature is None:
+            return
+        for band in self.hasher.band_keys(signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(lead_id)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _set_name_locked(self, lead_id: int, name_key: str) -> None:
+        signature = self.hasher.signature(name_key)
+        self._conn.execute(
+            "UPDATE leads SET name_key = ?, signature = ? WHERE lead_id = ?",
+            (name_key, signature.tobytes(), lead_id),
+        )
+        self._index_name(lead_id, signature)
+
+    def _absorb_locked(self, lead_id: int, other: int) -> None:
+        """Fold lead ``other`` into ``lead_id`` (same entity seen under two keys)."""
+
+        row = self._conn.execute("SELECT data, first_seen FROM leads WHERE lead_id = ?", (other,)).fetchone()
+        target = self._conn.execute("SELECT data FROM leads WHERE lead_id = ?", (lead_id,)).fetchone()
+        self._conn.execute(
+            "UPDATE leads SET data = ?, first_seen = MIN(first_seen, ?) WHERE lead_id = ?",
+            (json.dumps(_merge_data(json.loads(row[0]), json.loads(target[0])), default=str), row[1], lead_id),
+        )
+        self._conn.execute("UPDATE lead_keys SET lead_id = ? WHERE lead_id = ?", (lead_id, other))
+        self._conn.execute("DELETE FROM leads WHERE lead_id = ?", (other,))
+        for key, owner in list(self._keys.items()):
+            if owner == other:
+                self._keys[key] = lead_id
+        self._last_seen.pop(other, None)
+        self._unindex_name(other)
+
+    def _load_locked(self, lead_id: int) -> Lead:
+        company, first_seen, last_seen, data = self._conn.execute(
+            "SELECT company, first_seen, last_seen, data FROM leads WHERE lead_id = ?", (lead_id,)
+        ).fetchone()
+        lead = Lead(lead_id, company, first_seen, last_seen, json.loads(data))
+        for (key,) in self._conn.execute("SELECT key FROM lead_keys WHERE lead_id = ? ORDER BY key", (lead_id,)):
+            kind, _, value = key.partition(":")
+            (lead.domains if kind == "domain" else lead.emails).append(value)
+        return lead
+
+
+def _task_groups(task: str) -> list[tuple[list[str], list[str]]]:
+    domains, emails = leads_in_text(task)
+    groups = {domain: ([domain], []) for domain in domains}
+    for email in emails:
+        domain = canonical_domain(email.rpartition("@")[2])
+        groups.setdefault(domain if domain in groups else email, ([], []))[1].append(email)
+    return list(groups.values())
+
+
+def _keys_for(urls: Iterable[str], emails: Iterable[str]) -> list[str]:
+    keys = []
+    domains = []
+    for url in urls:
+        domain = canonical_domain(url)
+        if domain and domain not in domains:
+            domains.append(domain)
+            keys.append(f"domain:{domain}")
+    for email in emails:
+        normalized = normalize_email(email)
+        if not normalized or f"email:{normalized}" in keys:
+            continue
+        # An address on another domain (an agency, a mailbox provider) may
+        # appear on many sites, so it does not identify this one.
+        if domains and not any(_same_site(normalized.rpartition("@")[2], domain) for domain in domains):
+            continue
+        keys.append(f"email:{normalized}")
+    return keys
+
+
+_default_store: LeadStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_lead_store() -> LeadStore | None:
+    """Return the process-wide lead store, or ``None`` when it is disabled."""
+
+    global _default_store
+    if not settings.LEAD_STORE_PATH:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = LeadStore(
+                settings.LEAD_STORE_PATH,
+                window=settings.LEAD_DEDUP_WINDOW,
+                name_threshold=settings.LEAD_NAME_SIMILARITY,
+            )
+        return _default_store
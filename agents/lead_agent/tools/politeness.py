@@ -0,0 +1,514 @@
+"""Per-host politeness for the crawler: rate limits, robots.txt and DNS.
+
+Large prospecting batches used to hit each site as fast as the worker pool
+allowed, which got us throttled (``429``) or blocked (``403``).  The pieces
+here let :class:`~.crawler.CrawlEngine` stay fast overall while every single
+host sees a polite rate:
+
+* :class:`HostLimiter` - one token bucket per host plus a per-host in-flight
+  cap, shared by every crawl running in the process.  ``Crawl-delay`` and
+  ``Request-rate`` from robots.txt lower a host's rate, and throttling
+  responses pause the host for their ``Retry-After``.  Idle hosts are
+  forgotten once more than ``max_hosts`` are tracked.
+* :class:`RobotsCache` - fetched and parsed robots.txt files, one per origin,
+  kept for a TTL and bounded to the ``max_origins`` most recently used.  Fetch
+  errors follow RFC 9309: a missing file (4xx) allows everything, and an
+  unreachable one (5xx, ``429`` or network error) disallows the site for a
+  short retry period.
+* :class:`DnsCache` and :class:`DnsCachingAdapter` - resolved addresses
+  shared by every pooled connection, so opening connections to the same host
+  does not resolve it again.
+"""
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from ipaddress import ip_address
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.connection import allowed_gai_family
+
+# RFC 9309 asks crawlers to parse at least the first 500 KiB of robots.txt.
+ROBOTS_MAX_BYTES = 500 * 1024
+
+# How long an unreachable robots.txt keeps its site disallowed before retrying.
+ROBOTS_ERROR_TTL = 600.0
+
+# Responses telling us to slow down, and the ones refusing us outright.
+THROTTLE_STATUSES = frozenset({429, 503})
+BLOCK_STATUSES = frozenset({401, 403})
+
+
+def origin_of(url: str) -> str:
+    """``scheme://host[:port]`` of ``url``; robots.txt is defined per origin."""
+
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Seconds to wait according to a ``Retry-After`` header, if it has one."""
+
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------------------
+@dataclass
+class TokenBucket:
+    """Classic token bucket; ``rate`` tokens per second, at most ``burst`` saved."""
+
+    rate: float
+    burst: float
+    tokens: float = 0.0
+    updated: float = 0.0
+    paused_until: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.tokens = self.burst
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (``0`` if one is now)."""
+
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1
+
+
+class HostLimiter:
+    """Token buckets and in-flight counts per host, safe to share across threads.
+
+    Parameters
+    ----------
+    rate:
+        Requests per second allowed to each host.  ``0`` disables rate
+        limiting; robots.txt delays still apply.
+    burst:
+        Requests a host may receive back to back after being idle.
+    concurrency:
+        Maximum simultaneous requests to a host.
+    max_pause:
+        Upper bound on how long a ``Retry-After`` may pause a host.
+    max_hosts:
+        How many hosts keep a bucket.  Beyond that the least recently used
+        idle hosts are forgotten; hosts with requests in flight or a pending
+        pause are kept.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 3.0,
+        concurrency: int = 2,
+        max_pause: float = 60.0,
+        max_hosts: int = 10_000,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.concurrency = concurrency
+        self.max_pause = max_pause
+        self.max_hosts = max_hosts
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._in_flight: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            self._buckets.move_to_end(host)
+            return bucket
+        now = time.monotonic()
+        bucket = self._buckets[host] = TokenBucket(self.rate, self.burst, updated=now)
+        if len(self._buckets) > self.max_hosts:
+            self._evict(now)
+        return bucket
+
+    def _evict(self, now: float) -> None:
+        # Oldest first; a busy or paused host would come back with a fresh
+        # burst, so it stays even if that leaves us over the bound for now.
+        for host in list(self._buckets):
+            if len(self._buckets) <= self.max_hosts:
+                break
+            if host in self._in_flight or self._buckets[host].paused_until > now:
+                continue
+            del self._buckets[host]
+
+    def acquire(self, host: str, now: float | None = None) -> float:
+        """Claim a request slot for ``host``.
+
+        Returns ``0.0`` when the request may be sent (the caller must then
+        :meth:`release` it), otherwise how many seconds to wait before asking
+        again.  A host at its concurrency cap returns ``0.01``; a slot usually
+        frees up well before the next token would.
+        """
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._in_flight.get(host, 0) >= self.concurrency:
+                return 0.01
+            bucket = self._bucket(host)
+            wait = bucket.wait_time(now)
+            if wait > 0:
+                return wait
+            bucket.take()
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            return 0.0
+
+    def release(self, host: str) -> None:
+        with self._lock:
+            remaining = self._in_flight.get(host, 0) - 1
+            if remaining > 0:
+                self._in_flight[host] = remaining
+            else:
+                self._in_flight.pop(host, None)
+
+    def slow_down(self, host: str, delay: float) -> None:
+        """Limit ``host`` to one request every ``delay`` seconds (robots.txt)."""
+
+        if delay <= 0:
+            return
+        with self._lock:
+            bucket = self._bucket(host)
+            if bucket.rate <= 0 or bucket.rate > 1 / delay:
+                bucket.rate = 1 / delay
+                bucket.burst = 1.0
+                bucket.tokens = min(bucket.tokens, 1.0)
+
+    def pause(self, host: str, seconds: float | None, now: float | None = None) -> float:
+        """Send nothing to ``host`` for ``seconds`` (a throttling response).
+
+        Without a ``Retry-After`` the pause is a few request intervals.
+        Returns the pause actually applied.
+        """
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._bucket(host)
+            if seconds is None:
+                seconds = 4 / bucket.rate if bucket.rate > 0 else 1.0
+            seconds = min(seconds, self.max_pause)
+            bucket.paused_until = max(bucket.paused_until, now + seconds)
+            bucket.tokens = min(bucket.tokens, 1.0)
+            return seconds
+
+
+# ---------------------------------------------------------------------------
+# robots.txt
+# ---------------------------------------------------------------------------
+def parse_crawl_delays(lines: list[str]) -> dict[str, float]:
+    """``Crawl-delay`` per user-agent group, fractional values included.
+
+    :class:`RobotFileParser` only understands whole seconds, but values such
+    as ``0.5`` are common.
+    """
+
+    delays: dict[str, float] = {}
+    agents: list[str] = []
+    in_rules = False
+    for line in lines:
+        key, _, value = line.split("#", 1)[0].partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "user-agent":
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        elif key in ("allow", "disallow", "crawl-delay", "request-rate"):
+            in_rules = True
+            if key == "crawl-delay":
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for agent in agents:
+                    delays.setdefault(agent, delay)
+    return delays
+
+
+@dataclass
+class RobotsRules:
+    """A parsed robots.txt file for one origin."""
+
+    parser: RobotFileParser
+    user_agent: str
+    expires: float
+    status: str
+    crawl_delays: dict[str, float] = field(default_factory=dict)
+    # Set when robots.txt itself was throttled: the ``Retry-After`` in
+    # seconds, ``0.0`` if the response had none.
+    retry_after: float | None = None
+
+    def allowed(self, url: str) -> bool:
+        return self.parser.can_fetch(self.user_agent, url)
+
+    def delay(self) -> float | None:
+        """Minimum seconds between requests, from ``Crawl-delay`` or ``Request-rate``."""
+
+        delays = []
+        # Same matching as RobotFileParser: a group applies when its name is
+        # part of our product token; ``*`` is the fallback.
+        token = self.user_agent.lower()
+        crawl_delay = next((d for agent, d in self.crawl_delays.items() if agent != "*" and agent in token), None)
+        if crawl_delay is None:
+            crawl_delay = self.crawl_delays.get("*")
+        if crawl_delay:
+            delays.append(crawl_delay)
+        request_rate = self.parser.request_rate(self.user_agent)
+        if request_rate and request_rate.requests:
+            delays.append(request_rate.seconds / request_rate.requests)
+        return max(delays) if delays else None
+
+
+class RobotsCache:
+    """Fetches robots.txt once per origin and keeps it for ``ttl`` seconds.
+
+    Parameters
+    ----------
+    session:
+        Session used for the fetches, normally the crawler's pooled session.
+    user_agent:
+        Product token matched against the ``User-agent`` lines.
+    ttl:
+        Seconds a fetched file is reused.
+    timeout:
+        Request timeout in seconds.
+    limiter:
+        When given, robots.txt fetches take a request slot of their host like
+        any other page, and a throttling response pauses the host.
+    max_origins:
+        How many origins' rules are kept; the least recently used go first.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        user_agent: str,
+        ttl: float = 24 * 3600,
+        timeout: float = 10.0,
+        limiter: HostLimiter | None = None,
+        max_origins: int = 10_000,
+    ) -> None:
+        self.session = session
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.timeout = timeout
+        self.limiter = limiter
+        self.max_origins = max_origins
+        self._rules: OrderedDict[str, RobotsRules] = OrderedDict()
+        # Per-origin fetch locks with the number of callers using them; a lock
+        # is dropped as soon as nobody waits on it.
+        self._locks: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def cached(self, origin: str) -> RobotsRules | None:
+        """Rules for ``origin`` if they are cached and fresh; never fetches."""
+
+        with self._lock:
+            rules = self._rules.get(origin)
+            if rules is None:
+                return None
+            if rules.expires < time.time():
+                del self._rules[origin]
+                return None
+            self._rules.move_to_end(origin)
+            return rules
+
+    def get(self, origin: str, host: str | None = None) -> RobotsRules:
+        """Rules for ``origin``, fetching robots.txt if needed.
+
+        Concurrent callers for the same origin share one fetch.  ``host`` is
+        the key the fetch is rate limited under, by default the origin's host
+        name.
+        """
+
+        rules = self.cached(origin)
+        if rules is not None:
+            return rules
+        with self._lock:
+            entry = self._locks.get(origin)
+            if entry is None:
+                entry = self._locks[origin] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                rules = self.cached(origin)
+                if rules is None:
+                    rules = self._fetch(origin, host or urlsplit(origin).hostname or "")
+                    self._store(origin, rules)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._locks.pop(origin, None)
+        return rules
+
+    def _store(self, origin: str, rules: RobotsRules) -> None:
+        with self._lock:
+            self._rules[origin] = rules
+            self._rules.move_to_end(origin)
+            while len(self._rules) > self.max_origins:
+                self._rules.popitem(last=False)
+
+    def _fetch(self, origin: str, host: str) -> RobotsRules:
+        if self.limiter is None:
+            return self._request(origin)
+        while True:
+            wait = self.limiter.acquire(host)
+            if not wait:
+                break
+            time.sleep(wait)
+        try:
+            rules = self._request(origin)
+        finally:
+            self.limiter.release(host)
+        if rules.retry_after is not None:
+            self.limiter.pause(host, rules.retry_after or None)
+        return rules
+
+    def _request(self, origin: str) -> RobotsRules:
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        ttl = self.ttl
+        crawl_delays = {}
+        retry_after = None
+        try:
+            response = self.session.get(parser.url, timeout=self.timeout, stream=True)
+            with response:
+                if response.status_code in THROTTLE_STATUSES:
+                    # Being throttled says nothing about the rules, so the
+                    # site is off limits until we may ask again.
+                    retry_after = parse_retry_after(response.headers.get("Retry-After")) or 0.0
+                    ttl = min(ROBOTS_ERROR_TTL, retry_after) if retry_after else ROBOTS_ERROR_TTL
+                    parser.disallow_all, status = True, f"unreachable ({response.status_code})"
+                elif response.status_code >= 500:
+                    parser.disallow_all, ttl, status = True, ROBOTS_ERROR_TTL, f"unreachable ({response.status_code})"
+                elif response.status_code >= 400:
+                    parser.allow_all, status = True, "missing"
+                else:
+                    body = response.raw.read(ROBOTS_MAX_BYTES, decode_content=True)
+                    lines = body.decode("utf-8", errors="replace").splitlines()
+                    parser.parse(lines)
+                    crawl_delays = parse_crawl_delays(lines)
+                    status = "parsed"
+        except requests.RequestException:
+            parser.disallow_all, ttl, status = True, ROBOTS_ERROR_TTL, "unreachable"
+        # ``can_fetch`` refuses everything until the parser is marked as read.
+        parser.modified()
+        return RobotsRules(parser, self.user_agent, time.time() + ttl, status, crawl_delays, retry_after)
+
+
+# ---------------------------------------------------------------------------
+# DNS
+# ---------------------------------------------------------------------------
+class DnsCache:
+    """Resolved addresses per ``(host, port)``, kept for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[tuple[str, int], tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def address(self, host: str, port: int) -> str | None:
+        """An IP address for ``host``; ``None`` if it already is one or cannot be resolved."""
+
+        try:
+            ip_address(host.strip("[]"))
+            return None
+        except ValueError:
+            pass
+        key = (host.lower(), port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        try:
+            infos = socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            # Let the connection attempt resolve it and report the error.
+            return None
+        address = infos[0][4][0]
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, address)
+        return address
+
+    def forget(self, host: str, port: int) -> None:
+        with self._lock:
+            self._entries.pop((host.lower(), port), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hosts": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _cached_dns_connection(base: type, dns: DnsCache) -> type:
+    class Connection(base):
+        def _new_conn(self):
+            # urllib3 resolves ``_dns_host`` when connecting and uses ``host``
+            # for the Host header and TLS, so only the lookup is replaced.
+            host = self._dns_host
+            address = dns.address(host, self.port)
+            if address is None:
+                return super()._new_conn()
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except Exception:
+                dns.forget(host, self.port)
+                raise
+            finally:
+                self._dns_host = host
+
+    return Connection
+
+
+class DnsCachingAdapter(HTTPAdapter):
+    """:class:`HTTPAdapter` whose connections resolve hosts through a :class:`DnsCache`."""
+
+    __attrs__ = HTTPAdapter.__attrs__ + ["dns_cache"]
+
+    def __init__(self, dns_cache: DnsCache, **kwargs) -> None:
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        http = _cached_dns_connection(HTTPConnection, self.dns_cache)
+        https = _cached_dns_connection(HTTPSConnection, self.dns_cache)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("CachedDnsHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http}),
+            "https": type("CachedDnsHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https}),
+        }
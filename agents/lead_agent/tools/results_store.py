@@ -0,0 +1,614 @@
+"""Columnar store of every processed lead, for export and analysis.
+
+Prospector results (``{"url", "title", "emails", "status", ...}``), agent
+answers and outreach-pipeline records are appended to :class:`ResultsStore`
+as rows of one stable schema (:data:`SCHEMA`).  Rows are buffered and written
+as Parquet files partitioned by UTC day::
+
+    <RESULTS_STORE_PATH>/date=2024-05-02/part-<timestamp>-<id>.parquet
+
+Every flush adds a small file.  Once a day partition has
+``RESULTS_COMPACT_MIN_FILES`` small files they are merged into one, batch by
+batch, so compaction never holds a whole partition in memory.  Reads go
+through :mod:`pyarrow.dataset` on a memory-mapped file system.  Partition
+pruning, column projection and filter pushdown mean a scan only touches the
+days, columns and row groups it needs, and :meth:`ResultsStore.scan` yields
+record batches, so millions of rows can be processed without loading them
+all::
+
+    python -m agents.lead_agent.tools.results_store query --since 7d --with-emails --format csv
+    python -m agents.lead_agent.tools.results_store compact
+
+Files are only ever added or replaced, never rewritten in place.  A scan that
+races a compaction of the same day may fail to open a replaced file and can
+simply be retried.  Compactions of a day take a lock file in its partition, so
+several processes sharing a store never merge the same files twice.
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+from config import settings
+from .lead_store import canonical_domain, leads_in_text, normalize_email
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = "1"
+
+# Columns are only ever added (as nullable) so older files stay readable.
+SCHEMA = pa.schema(
+    [
+        pa.field("recorded_at", pa.timestamp("ms", tz="UTC"), nullable=False),
+        pa.field("source", pa.string(), nullable=False),
+        pa.field("status", pa.string()),
+        pa.field("domain", pa.string()),
+        pa.field("url", pa.string()),
+        pa.field("title", pa.string()),
+        pa.field("emails", pa.list_(pa.string())),
+        pa.field("email_count", pa.int32()),
+        pa.field("phones", pa.list_(pa.string())),
+        pa.field("lead_id", pa.int64()),
+        pa.field("agent", pa.string()),
+        pa.field("task", pa.string()),
+        pa.field("output", pa.string()),
+        pa.field("error", pa.string()),
+    ],
+    metadata={"schema_version": SCHEMA_VERSION},
+)
+
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+DATASET_SCHEMA = SCHEMA.append(pa.field("date", pa.string()))
+
+# Files smaller than this are merged by compaction; larger ones are left alone.
+COMPACT_TARGET_BYTES = 128 * 1024 * 1024
+# Rows per row group in compacted files.
+ROW_GROUP_ROWS = 64 * 1024
+# Temporary files and compaction locks older than this were left behind by a
+# crashed writer; younger ones may belong to another process still at work.
+STALE_SECONDS = 3600.0
+LOCK_NAME = ".compact.lock"
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+_DURATION_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def _text(value: object) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def as_datetime(value: datetime | timedelta | float | str) -> datetime:
+    """A UTC datetime from a datetime, an age (``timedelta`` or ``"7d"``) or epoch seconds."""
+
+    if isinstance(value, str):
+        match = _DURATION.match(value.strip())
+        if match is None:
+            return as_datetime(datetime.fromisoformat(value))
+        value = timedelta(seconds=float(match.group(1)) * _DURATION_SECONDS[match.group(2)])
+    if isinstance(value, timedelta):
+        return datetime.now(timezone.utc) - value
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+def _partition_dirs(root: str) -> list[str]:
+    try:
+        return sorted(entry.path for entry in os.scandir(root) if entry.is_dir() and entry.name.startswith("date="))
+    except FileNotFoundError:
+        return []
+
+
+def _conform(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """``batch`` in ``schema``'s column order, with columns it predates filled with nulls."""
+
+    names = batch.schema.names
+    arrays = [
+        batch.column(names.index(f.name)).cast(f.type) if f.name in names else pa.nulls(batch.num_rows, f.type)
+        for f in schema
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _data_files(directory: str) -> list[os.DirEntry]:
+    return sorted(
+        (entry for entry in os.scandir(directory) if entry.is_file() and entry.name.endswith(".parquet")),
+        key=lambda entry: entry.name,
+    )
+
+
+class ResultsStore:
+    """Append-only, day-partitioned Parquet store of lead results.
+
+    Parameters
+    ----------
+    path:
+        Root directory of the dataset.
+    flush_rows:
+        Buffered rows that trigger a write.
+    flush_interval:
+        Seconds after which buffered rows are written on the next append.
+    compact_min_files:
+        Small files in a day partition that trigger its compaction after a
+        flush.  ``0`` only compacts when :meth:`compact` is called.
+    """
+
+    def __init__(
+        self, path: str, flush_rows: int = 1000, flush_interval: float = 30.0, compact_min_files: int = 8
+    ) -> None:
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compact_min_files = compact_min_files
+        self.counters = {"appended": 0, "written": 0, "files_written": 0, "compactions": 0}
+        self._rows: list[dict] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        # Serializes file writes and compactions, outside the buffer lock.
+        self._write_lock = threading.Lock()
+        self._filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def append(
+        self,
+        source: str,
+        status: str | None = None,
+        *,
+        url: str | None = None,
+        domain: str | None = None,
+        title: str | None = None,
+        emails: Iterable[str] = (),
+        phones: Iterable[str] = (),
+        lead_id: int | None = None,
+        agent: str | None = None,
+        task: str | None = None,
+        output: object = None,
+        error: str | None = None,
+        recorded_at: datetime | float | None = None,
+    ) -> None:
+        """Buffer one row; ``domain`` defaults to the canonical domain of ``url``."""
+
+        emails = sorted({e for e in (normalize_email(email) for email in emails) if e})
+        row = {
+            "recorded_at": as_datetime(time.time() if recorded_at is None else recorded_at),
+            "source": source,
+            "status": status,
+            "domain": domain or (canonical_domain(url) if url else None),
+            "url": url,
+            "title": title,
+            "emails": emails,
+            "email_count": len(emails),
+            "phones": list(phones),
+            "lead_id": lead_id,
+            "agent": agent,
+            "task": task,
+            "output": _text(output),
+            "error": error,
+        }
+        with self._lock:
+            self._rows.append(row)
+            self.counters["appended"] += 1
+            due = len(self._rows) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def append_result(self, result: dict, source: str = "prospect") -> None:
+        """Buffer a prospector result dict (see ``prospect_website``)."""
+
+        self.append(
+            source,
+            result.get("status"),
+            url=result.get("url"),
+            title=result.get("title"),
+            emails=result.get("emails", ()),
+            phones=result.get("phones", ()),
+            lead_id=result.get("lead_id"),
+            error=result.get("error"),
+        )
+
+    def append_run(self, agent: str, task: str, output: object, status: str = "success") -> None:
+        """Buffer an agent's free-text answer, keyed by the first domain in ``task``."""
+
+        domains, _ = leads_in_text(task)
+        _, emails = leads_in_text(_text(output) or "")
+        self.append(
+            "agent",
+            status,
+            domain=domains[0] if domains else None,
+            agent=agent,
+            task=task,
+            output=output,
+            emails=emails,
+            error=_text(output) if status != "success" else None,
+        )
+
+    def flush(self) -> int:
+        """Write buffered rows, one file per day partition; return how many were written."""
+
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._last_flush = time.monotonic()
+        if not rows:
+            return 0
+        by_day: dict[str, list[dict]] = {}
+        for row in rows:
+            by_day.setdefault(row["recorded_at"].strftime("%Y-%m-%d"), []).append(row)
+        unwritten = dict(by_day)
+        try:
+            with self._write_lock:
+                for day, day_rows in by_day.items():
+                    directory = os.path.join(self.path, f"date={day}")
+                    self._write(directory, pa.Table.from_pylist(day_rows, schema=SCHEMA))
+                    del unwritten[day]
+                    self.counters["written"] += len(day_rows)
+                    # Only fresh flush files are merged here; compacted files
+                    # are merged again by an explicit :meth:`compact`.
+                    if self.compact_min_files and len(self._small_files(directory, "part-")) >= self.compact_min_files:
+                        self._compact_partition(directory, "part-")
+        except Exception:
+            # Keep the rows that did not reach disk for the next flush, ahead
+            # of anything appended meanwhile.
+            with self._lock:
+                self._rows[:0] = [row for day_rows in unwritten.values() for row in day_rows]
+            raise
+        return len(rows)
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write(self, directory: str, table: pa.Table, prefix: str = "part") -> str:
+        os.makedirs(directory, exist_ok=True)
+        name = f"{prefix}-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+        # Dot-prefixed files are ignored by dataset discovery until renamed.
+        temporary = os.path.join(directory, f".{name}.tmp")
+        pq.write_table(table, temporary, compression="zstd", row_group_size=ROW_GROUP_ROWS)
+        path = os.path.join(directory, name)
+        os.replace(temporary, path)
+        self.counters["files_written"] += 1
+        return path
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+    def compact(self, min_files: int = 2) -> dict:
+        """Merge the small files of every day partition that has at least ``min_files``.
+
+        Returns
+        -------
+        dict
+            ``partitions`` compacted, ``files_merged`` and ``rows`` rewritten.
+        """
+
+        self.flush()
+        summary = {"partitions": 0, "files_merged": 0, "rows": 0}
+        with self._write_lock:
+            for directory in _partition_dirs(self.path):
+                if len(self._small_files(directory)) >= min_files:
+                    merged, rows = self._compact_partition(directory)
+                    summary["partitions"] += bool(merged)
+                    summary["files_merged"] += merged
+                    summary["rows"] += rows
+        return summary
+
+    @staticmethod
+    def _small_files(directory: str, prefix: str = "") -> list[str]:
+        return [
+            entry.path
+            for entry in _data_files(directory)
+            if entry.name.startswith(prefix) and entry.stat().st_size < COMPACT_TARGET_BYTES
+        ]
+
+    @staticmethod
+    @contextmanager
+    def _partition_lock(directory: str) -> Iterator[bool]:
+        """Hold ``directory``'s compaction lock file; yields ``False`` if another process has it."""
+
+        path = os.path.join(directory, LOCK_NAME)
+        fd = None
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                pass
+            try:
+                if time.time() - os.stat(path).st_mtime < STALE_SECONDS:
+                    break
+                logger.warning("Removing stale compaction lock %s", path)
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if fd is None:
+            yield False
+            return
+        try:
+            os.write(fd, f"{os.getpid()} {time.time()}\n".encode())
+            os.close(fd)
+            yield True
+        finally:
+            os.remove(path)
+
+    def _compact_partition(self, directory: str, prefix: str = "") -> tuple[int, int]:
+        with self._partition_lock(directory) as locked:
+            if not locked:
+                logger.info("Skipping compaction of %s: another process is compacting it", directory)
+                return 0, 0
+            self._finish_interrupted(directory)
+            sources = self._small_files(directory, prefix)
+            if len(sources) < 2:
+                return 0, 0
+            return self._merge(directory, sources)
+
+    def _merge(self, directory: str, sources: list[str]) -> tuple[int, int]:
+        name = f"compacted-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+        temporary = os.path.join(directory, f".{name}.tmp")
+        # The inputs are recorded in the new file, so a crash between the
+        # rename and the deletes is finished by the next compaction.
+        schema = SCHEMA.with_metadata(
+            {**SCHEMA.metadata, b"compacted_from": json.dumps([os.path.basename(s) for s in sources])}
+        )
+        rows = 0
+        pending: list[pa.RecordBatch] = []
+        try:
+            with pq.ParquetWriter(temporary, schema, compression="zstd") as writer:
+                for source in sources:
+                    # Stream batch by batch; memory stays at about one row group.
+                    for batch in pq.ParquetFile(source, memory_map=True).iter_batches(batch_size=ROW_GROUP_ROWS):
+                        pending.append(_conform(batch, schema))
+                        rows += batch.num_rows
+                        if sum(b.num_rows for b in pending) >= ROW_GROUP_ROWS:
+                            writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=ROW_GROUP_ROWS)
+                            pending = []
+                if pending:
+                    writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=ROW_GROUP_ROWS)
+            os.replace(temporary, os.path.join(directory, name))
+        except BaseException:
+            # The sources are untouched; drop the partial output.
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        for source in sources:
+            os.remove(source)
+        self.counters["compactions"] += 1
+        logger.info("Compacted %d files (%d rows) in %s", len(sources), rows, directory)
+        return len(sources), rows
+
+    @staticmethod
+    def _finish_interrupted(directory: str) -> None:
+        names = {entry.name for entry in _data_files(directory)}
+        for name in names:
+            if not name.startswith("compacted-"):
+                continue
+            metadata = pq.read_schema(os.path.join(directory, name)).metadata or {}
+            for source in json.loads(metadata.get(b"compacted_from", b"[]")):
+                if source in names:
+                    os.remove(os.path.join(directory, source))
+        # A young temporary file may be another process's flush in progress.
+        cutoff = time.time() - STALE_SECONDS
+        for entry in os.scandir(directory):
+            if entry.name.startswith(".") and entry.name.endswith(".tmp") and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def dataset(self) -> ds.Dataset:
+        """The store as a :class:`pyarrow.dataset.Dataset` over memory-mapped files."""
+
+        return ds.dataset(
+            self.path,
+            schema=DATASET_SCHEMA,
+            format="parquet",
+            partitioning=PARTITIONING,
+            filesystem=self._filesystem,
+        )
+
+    @staticmethod
+    def where(
+        since: datetime | timedelta | float | str | None = None,
+        until: datetime | timedelta | float | str | None = None,
+        status: str | Iterable[str] | None = None,
+        sources: Iterable[str] | None = None,
+        domains: Iterable[str] | None = None,
+        with_emails: bool = False,
+    ) -> ds.Expression | None:
+        """Filter expression for :meth:`scan`; the day partitions are pruned too."""
+
+        conditions = []
+        if since is not None:
+            start = as_datetime(since)
+            conditions.append(ds.field("date") >= start.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("recorded_at") >= pa.scalar(start, SCHEMA.field("recorded_at").type))
+        if until is not None:
+            end = as_datetime(until)
+            conditions.append(ds.field("date") <= end.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("recorded_at") < pa.scalar(end, SCHEMA.field("recorded_at").type))
+        if status is not None:
+            statuses = [status] if isinstance(status, str) else list(status)
+            conditions.append(ds.field("status").isin(statuses))
+        if sources is not None:
+            conditions.append(ds.field("source").isin(list(sources)))
+        if domains is not None:
+            canonical = [canonical_domain(domain) or domain for domain in domains]
+            conditions.append(ds.field("domain").isin(canonical))
+        if with_emails:
+            conditions.append(ds.field("email_count") > 0)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def scan(
+        self, columns: list[str] | None = None, batch_size: int = ROW_GROUP_ROWS, **where
+    ) -> Iterator[pa.RecordBatch]:
+        """Stream matching rows as record batches.
+
+        ``where`` takes the keyword arguments of :meth:`where`.  Buffered rows
+        are flushed first so they are visible.
+        """
+
+        self.flush()
+        scanner = self.dataset().scanner(columns=columns, filter=self.where(**where), batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch
+
+    def query(self, columns: list[str] | None = None, **where) -> pa.Table:
+        """Matching rows as one table; prefer :meth:`scan` for very large results."""
+
+        self.flush()
+        return self.dataset().to_table(columns=columns, filter=self.where(**where))
+
+    def count(self, **where) -> int:
+        self.flush()
+        return self.dataset().count_rows(filter=self.where(**where))
+
+    def domains(self, **where) -> set[str]:
+        """Distinct domains among matching rows, e.g. ``domains(since="7d", with_emails=True)``."""
+
+        found: set[str] = set()
+        for batch in self.scan(columns=["domain"], **where):
+            found.update(value for value in batch.column(0).unique().to_pylist() if value)
+        return found
+
+    def stats(self) -> dict:
+        partitions = _partition_dirs(self.path)
+        files = [entry for directory in partitions for entry in _data_files(directory)]
+        with self._lock:
+            buffered = len(self._rows)
+        return {
+            **self.counters,
+            "buffered": buffered,
+            "partitions": len(partitions),
+            "files": len(files),
+            "bytes": sum(entry.stat().st_size for entry in files),
+        }
+
+
+_default_store: ResultsStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_results_store() -> ResultsStore | None:
+    """Return the process-wide results store, or ``None`` when it is disabled.
+
+    Buffered rows are flushed when the interpreter exits.
+    """
+
+    global _default_store
+    if not settings.RESULTS_STORE_PATH:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResultsStore(
+                settings.RESULTS_STORE_PATH,
+                flush_rows=settings.RESULTS_FLUSH_ROWS,
+                flush_interval=settings.RESULTS_FLUSH_INTERVAL,
+                compact_min_files=settings.RESULTS_COMPACT_MIN_FILES,
+            )
+            atexit.register(_default_store.close)
+        return _default_store
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", help="dataset root (default: RESULTS_STORE_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="print matching rows")
+    query.add_argument("--since", help="age such as 7d or 12h, or an ISO date")
+    query.add_argument("--until", help="age or ISO date")
+    query.add_argument("--status", action="append", help="repeatable")
+    query.add_argument("--source", action="append", help="prospect, crawl, agent or pipeline; repeatable")
+    query.add_argument("--domain", action="append", help="repeatable")
+    query.add_argument("--with-emails", action="store_true", help="only rows with at least one e-mail")
+    query.add_argument("--columns", help="comma-separated column list")
+    query.add_argument("--format", choices=("jsonl", "csv", "count", "domains"), default="jsonl")
+
+    compact = commands.add_parser("compact", help="merge small files")
+    compact.add_argument("--min-files", type=int, default=2)
+    commands.add_parser("stats", help="files, partitions and size")
+    args = parser.parse_args()
+
+    path = args.path or settings.RESULTS_STORE_PATH
+    if not path:
+        parser.error("no dataset path: pass --path or set RESULTS_STORE_PATH")
+    store = ResultsStore(path, compact_min_files=0)
+    if args.command == "compact":
+        print(json.dumps(store.compact(args.min_files)))
+        return
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+        return
+
+    where = {
+        "since": args.since,
+        "until": args.until,
+        "status": args.status,
+        "sources": args.source,
+        "domains": args.domain,
+        "with_emails": args.with_emails,
+    }
+    if args.format == "count":
+        print(store.count(**where))
+        return
+    if args.format == "domains":
+        for domain in sorted(store.domains(**where)):
+            print(domain)
+        return
+    columns = args.columns.split(",") if args.columns else None
+    if args.format == "csv":
+        # List columns are written as JSON text; CSV has no list type.
+        with pa_csv.CSVWriter(sys.stdout.buffer, _csv_schema(columns)) as writer:
+            for batch in store.scan(columns=columns, **where):
+                writer.write_batch(_flatten_lists(batch))
+        return
+    for batch in store.scan(columns=columns, **where):
+        for row in batch.to_pylist():
+            print(json.dumps(row, default=str, ensure_ascii=False))
+
+
+def _csv_schema(columns: list[str] | None) -> pa.Schema:
+    fields = [DATASET_SCHEMA.field(name) for name in (columns or DATASET_SCHEMA.names)]
+    return pa.schema([pa.field(f.name, pa.string()) if pa.types.is_list(f.type) else f for f in fields])
+
+
+def _flatten_lists(batch: pa.RecordBatch) -> pa.RecordBatch:
+    arrays = [
+        pa.array([None if v is None else json.dumps(v) for v in column.to_pylist()], pa.string())
+        if pa.types.is_list(column.type)
+        else column
+        for column in batch.columns
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=_csv_schema(batch.schema.names))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,156 @@
-"""Simple website prospector used by the lead agent."""
+"""Simple website prospector used by the lead agent.
 
-import requests
-from bs4 import BeautifulSoup
+Both entry points delegate to the shared :class:`~.crawler.CrawlEngine`, so
+single-URL lookups made by the agents reuse the same pooled connections as the
+nightly multi-domain crawls.  Every successful result is recorded in the
+:class:`~.lead_store.LeadStore`; a domain that resolves to a lead prospected
+within ``LEAD_DEDUP_WINDOW`` is answered from the store instead of crawled.
+Every crawled result, failed or not, is also appended to the
+:class:`~.results_store.ResultsStore` for analysis.
+"""
 
+from collections.abc import Iterable, Iterator
 
-def prospect_website(url: str) -> dict:
+from common_tools.tracing import traced
+from config import settings
+from .crawler import CrawlStats, get_default_engine
+from .lead_store import LeadStore, canonical_domain, company_from_title, get_default_lead_store
+
+
+def _company_name(result: dict) -> str | None:
+    for organization in result.get("organizations") or ():
+        if isinstance(organization, dict) and organization.get("name"):
+            return organization["name"]
+    return company_from_title(result.get("title"))
+
+
+def _recent_prospect(store: LeadStore | None, url: str) -> dict | None:
+    """Stored prospect result for ``url``'s domain, if recently seen."""
+
+    if store is None:
+        return None
+    match = store.find_recent(urls=[url])
+    if match is None or "prospect" not in match.lead.data:
+        return None
+    return {**match.lead.data["prospect"], "url": url, "lead_id": match.lead.lead_id, "deduplicated": True}
+
+
+def _record_prospect(store: LeadStore | None, result: dict) -> None:
+    if store is None or result.get("status") != "success":
+        return
+    prospect = {k: v for k, v in result.items() if k not in ("url", "lead_id", "deduplicated")}
+    lead = store.record(
+        urls=[result["url"]],
+        emails=result.get("emails", ()),
+        company=_company_name(result),
+        data={"prospect": prospect},
+    )
+    result["lead_id"] = lead.lead_id
+
+
+def _store_result(result: dict, source: str) -> None:
+    if not settings.RESULTS_STORE_PATH:
+        return
+    # Imported on first use: pyarrow is slow to import and most callers of
+    # this module never need it at start-up.
+    from .results_store import get_default_results_store
+
+    get_default_results_store().append_result(result, source)
+
+
+@traced()
+def prospect_website(url: str, force_refresh: bool = False) -> dict:
     """Extract basic lead information from a website.
 
     Parameters
     ----------
     url:
         The HTTP or HTTPS URL to inspect.
+    force_refresh:
+        Download the page even if a cached copy is available or the lead was
+        recently prospected.
 
     Returns
     -------
     dict
         Dictionary containing the web page title and any e-mail addresses
         discovered.  The dict always contains ``status`` which is ``"success"``
-        when scraping succeeds or ``"failure"`` otherwise.
+        when scraping succeeds or ``"failure"`` otherwise.  Results served
+        from the lead store carry ``deduplicated=True``.
     """
 
-    try:
-        # ------------------------------------------------------------------
-        # Fetch the page and parse it
-        # ------------------------------------------------------------------
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raises HTTPError for non-200 responses
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # ------------------------------------------------------------------
-        # Gather all email addresses from "mailto:" links
-        # ------------------------------------------------------------------
-        emails_found: set[str] = set()
-        for link in soup.find_all("a", href=True):
-            if link["href"].startswith("mailto:"):
-                emails_found.add(link["href"][7:])  # strip the mailto: prefix
-
-        # Page title is useful for context about the company
-        title = soup.title.string if soup.title else "No title found"
-
-        return {
-            "url": url,
-            "title": title.strip(),
-            "emails": list(emails_found),
-            "status": "success",
-        }
-    except requests.RequestException as e:
-        # Network-related or HTTP errors are captured here
-        return {"url": url, "error": str(e), "status": "failure"}
-    except Exception as e:  # pragma: no cover - catch unexpected parsing errors
-        return {
-            "url": url,
-            "error": f"An unexpected error occurred: {str(e)}",
-            "status": "failure",
-        }
+    store = get_default_lead_store()
+    if not force_refresh and (known := _recent_prospect(store, url)) is not None:
+        return known
+    # A crawl of depth 0 with a budget of one page is exactly a single fetch.
+    engine = get_default_engine()
+    result = next(engine.crawl([url], max_depth=0, max_pages=1, force_refresh=force_refresh))
+    if result["status"] == "success":
+        result["url"] = url
+        result.pop("pages_crawled", None)
+        _record_prospect(store, result)
+    _store_result(result, "prospect")
+    return result
+
+
+def crawl_websites(
+    domains: Iterable[str],
+    max_depth: int | None = None,
+    max_pages: int | None = None,
+    force_refresh: bool = False,
+    stats: CrawlStats | None = None,
+) -> Iterator[dict]:
+    """Prospect many domains, following same-site links on each.
+
+    Parameters
+    ----------
+    domains:
+        Seed domains or URLs.  Bare domains are fetched over HTTPS.
+    max_depth, max_pages:
+        Override the engine's default link depth and per-domain page budget.
+    force_refresh:
+        Bypass the response cache and the lead store and download every page
+        again.
+    stats:
+        Receives the crawl's throughput and block-rate counters (see
+        :class:`~.crawler.CrawlStats`).
+
+    Yields
+    ------
+    dict
+        One result per distinct domain, in completion order, shaped like the
+        output of :func:`prospect_website` plus a ``pages_crawled`` list.
+        Seeds repeating an earlier seed's canonical domain (``www.`` or
+        scheme variants) are dropped; recently prospected domains are
+        answered from the lead store without a crawl.
+    """
+
+    store = get_default_lead_store()
+    seen: set[str] = set()
+
+    def seeds() -> Iterator[str | dict]:
+        # The engine passes stored answers straight through, so they are
+        # yielded as soon as the seed loop reaches them.
+        for seed in domains:
+            domain = canonical_domain(seed) or seed
+            if domain in seen:
+                continue
+            seen.add(domain)
+            stored = None if force_refresh else _recent_prospect(store, seed)
+            yield seed if stored is None else stored
+
+    results = get_default_engine().crawl(
+        seeds(), max_depth=max_depth, max_pages=max_pages, force_refresh=force_refresh, stats=stats
+    )
+    for result in results:
+        if not result.get("deduplicated"):
+            _record_prospect(store, result)
+            _store_result(result, "crawl")
+        yield result
+
+
+def prospector_cache_stats() -> dict:
+    """Return the response cache's hit/miss/byte counters (empty if disabled)."""
 
+    cache = get_default_engine().cache
+    return cache.stats() if cache is not None else {}
@@ -0,0 +1,245 @@
+"""Lead-to-outreach workflow: prospect, qualify and draft in one pipeline.
+
+Every domain goes through four stages connected by bounded queues (see
+:mod:`common_tools.pipeline`):
+
+1. **prospect** - :func:`~agents.lead_agent.tools.web_prospector.prospect_website`
+   on a worker thread (``PIPELINE_PROSPECT_CONCURRENCY``);
+2. **qualify** - a lead agent decides whether the company is worth contacting
+   (``PIPELINE_QUALIFY_CONCURRENCY``);
+3. **draft** - a content agent writes a personalised outreach e-mail for each
+   qualified lead (``PIPELINE_DRAFT_CONCURRENCY``);
+4. **write** - one JSONL record per domain is appended to the output file,
+   and one row to the columnar results store (``RESULTS_STORE_PATH``).
+
+While one lead is being drafted, the next ones are being qualified and
+crawled, so a batch takes roughly as long as its slowest stage instead of the
+sum of all stages.  Domains whose prospecting failed or that were not
+qualified skip the remaining model calls but are still written, with their
+``status``.  A stage that raises turns the domain's record into an
+``"error"`` record, which is written the same way.  As with
+:func:`common_tools.batch_runner.run_batch`, re-running against the same
+output file skips domains that already succeeded.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from common_tools.batch_runner import load_completed, task_id_for
+from common_tools.pipeline import Stage, run_pipeline
+from config import settings
+from hybrid_components.streaming import collect_final
+from .lead_agent.tools.lead_store import canonical_domain
+from .lead_agent.tools.web_prospector import prospect_website
+from .registry import create_agent
+
+logger = logging.getLogger(__name__)
+
+QUALIFY_PROMPT = (
+    "Qualify this company as a sales lead for outreach. Start your answer with QUALIFIED or "
+    "NOT QUALIFIED on its own line, then summarise what the company does, who to contact and why.\n"
+    "Website: {url}\nPage title: {title}\nE-mail addresses: {emails}\nPhone numbers: {phones}"
+)
+
+
+def is_qualified(answer: object) -> bool:
+    """Read the verdict from a qualification answer.
+
+    Only an explicit ``NOT QUALIFIED``/``UNQUALIFIED`` verdict on the first
+    line rejects a lead, so an answer that ignores the format is still drafted.
+    """
+
+    lines = [line.strip().upper() for line in str(answer).splitlines() if line.strip()]
+    verdict = lines[0] if lines else ""
+    return not (verdict.startswith("NOT QUALIFIED") or verdict.startswith("UNQUALIFIED"))
+
+
+class OutreachPipeline:
+    """Chain prospecting, lead qualification and drafting through bounded queues.
+
+    Parameters
+    ----------
+    lead_agent:
+        A lead agent with ``astream_lead_request`` (either backend).
+    content_agent:
+        A content agent with ``astream_content`` (either backend).
+    output_path:
+        JSONL file receiving one record per domain.
+    prospect_concurrency, qualify_concurrency, draft_concurrency:
+        Workers per stage.  Default to the ``PIPELINE_*_CONCURRENCY`` settings.
+    content_type:
+        What the content agent is asked to write for each lead.
+    """
+
+    def __init__(
+        self,
+        lead_agent,
+        content_agent,
+        output_path: str,
+        prospect_concurrency: int | None = None,
+        qualify_concurrency: int | None = None,
+        draft_concurrency: int | None = None,
+        content_type: str = "personalized outreach email",
+    ) -> None:
+        self.lead_agent = lead_agent
+        self.content_agent = content_agent
+        self.output_path = output_path
+        self.content_type = content_type
+        self.stages = [
+            self._stage("prospect", self._prospect, prospect_concurrency or settings.PIPELINE_PROSPECT_CONCURRENCY),
+            self._stage("qualify", self._qualify, qualify_concurrency or settings.PIPELINE_QUALIFY_CONCURRENCY),
+            self._stage("draft", self._draft, draft_concurrency or settings.PIPELINE_DRAFT_CONCURRENCY),
+            Stage("write", self._write, 1),
+        ]
+        self._output = None
+        self._prospect_pool: ThreadPoolExecutor | None = None
+        self.results_store = None
+        if settings.RESULTS_STORE_PATH:
+            # Imported only when enabled: pyarrow is slow to import.
+            from .lead_agent.tools.results_store import get_default_results_store
+
+            self.results_store = get_default_results_store()
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+    def _stage(self, name: str, fn, concurrency: int) -> Stage:
+        return Stage(name, fn, concurrency, on_error=functools.partial(self._error_record, name))
+
+    @staticmethod
+    def _error_record(stage: str, item: str | dict, error: Exception) -> dict:
+        """The record written for a domain whose ``stage`` raised ``error``."""
+
+        if isinstance(item, dict):
+            record = item
+        else:
+            record = {"id": task_id_for(canonical_domain(item) or item), "domain": item, "prospect": {}}
+        record["status"] = "error"
+        record["error"] = f"{stage}: {error}"
+        return record
+
+    async def _prospect(self, domain: str) -> dict:
+        # A dedicated pool, so crawls neither wait for nor starve the threads
+        # the ADK agents use to stream their events.
+        context = contextvars.copy_context()
+        result = await asyncio.get_running_loop().run_in_executor(
+            self._prospect_pool, context.run, prospect_website, domain
+        )
+        record = {"id": task_id_for(canonical_domain(domain) or domain), "domain": domain, "prospect": result}
+        if result.get("status") != "success":
+            record["status"] = "failure"
+        return record
+
+    async def _qualify(self, record: dict) -> dict:
+        if "status" in record:
+            return record
+        prospect = record["prospect"]
+        task = QUALIFY_PROMPT.format(
+            url=prospect.get("url", record["domain"]),
+            title=prospect.get("title") or "unknown",
+            emails=", ".join(prospect.get("emails", ())) or "none found",
+            phones=", ".join(prospect.get("phones", ())) or "none found",
+        )
+        answer = await collect_final(self.lead_agent.astream_lead_request(task))
+        record["qualification"] = answer
+        if not is_qualified(answer):
+            record["status"] = "unqualified"
+        return record
+
+    async def _draft(self, record: dict) -> dict:
+        if "status" in record:
+            return record
+        prospect = record["prospect"]
+        topic = (
+            f"{prospect.get('title') or record['domain']} ({prospect.get('url', record['domain'])}), "
+            f"addressed to {', '.join(prospect.get('emails', ())) or 'their team'}. "
+            f"What we know about them: {record['qualification']}"
+        )
+        record["draft"] = await collect_final(self.content_agent.astream_content(topic, self.content_type))
+        record["status"] = "success"
+        return record
+
+    async def _write(self, record: dict) -> None:
+        self._output.write(json.dumps(record, default=str) + "\n")
+        self._output.flush()
+        if self.results_store is not None:
+            prospect = record["prospect"]
+            self.results_store.append(
+                "pipeline",
+                record["status"],
+                url=prospect.get("url"),
+                domain=canonical_domain(record["domain"]),
+                title=prospect.get("title"),
+                emails=prospect.get("emails", ()),
+                phones=prospect.get("phones", ()),
+                lead_id=prospect.get("lead_id"),
+                output={key: record[key] for key in ("qualification", "draft") if key in record} or None,
+                error=record.get("error") or prospect.get("error"),
+            )
+
+    # ------------------------------------------------------------------
+    # Entry points
+    # ------------------------------------------------------------------
+    async def arun(self, domains: Iterable[str]) -> dict:
+        """Async variant of :meth:`run`."""
+
+        completed = load_completed(self.output_path)
+        skipped = 0
+
+        def pending():
+            nonlocal skipped
+            for domain in domains:
+                if task_id_for(canonical_domain(domain) or domain) in completed:
+                    skipped += 1
+                    continue
+                yield domain
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        self._prospect_pool = ThreadPoolExecutor(self.stages[0].concurrency, thread_name_prefix="prospect")
+        try:
+            with open(self.output_path, "a", encoding="utf-8") as self._output:
+                stats = await run_pipeline(pending(), self.stages)
+        finally:
+            self._prospect_pool.shutdown(wait=False)
+        stats["skipped"] = skipped
+        return stats
+
+    def run(self, domains: Iterable[str]) -> dict:
+        """Prospect, qualify and draft outreach for every domain in ``domains``.
+
+        Returns
+        -------
+        dict
+            Wall time, per-stage counts and busy time (see
+            :func:`common_tools.pipeline.run_pipeline`), plus the number of
+            domains ``skipped`` because an earlier run already finished them.
+        """
+
+        logger.info("Running outreach pipeline -> %s", self.output_path)
+        stats = asyncio.run(self.arun(domains))
+        logger.info("Outreach pipeline finished: %s", stats)
+        return stats
+
+
+def create_outreach_pipeline(
+    output_path: str,
+    lead_backend: str = "lead/openai",
+    content_backend: str = "content/openai",
+    lead_kwargs: dict | None = None,
+    content_kwargs: dict | None = None,
+    **pipeline_kwargs,
+) -> OutreachPipeline:
+    """Build an :class:`OutreachPipeline` from agent backend names of :mod:`agents.registry`."""
+
+    return OutreachPipeline(
+        create_agent(lead_backend, **(lead_kwargs or {})),
+        create_agent(content_backend, **(content_kwargs or {})),
+        output_path,
+        **pipeline_kwargs,
+    )
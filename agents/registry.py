@@ -0,0 +1,48 @@
+"""Registry of agent backends, imported only when they are first requested.
+
+Each backend pulls in a heavy SDK (``openai_agents`` or ``google.adk`` with
+LiteLLM), so importing all four agent modules up front costs seconds on every
+short-lived invocation.  The registry maps a backend name to a dotted path and
+imports the module the first time that backend is created.
+"""
+
+import importlib
+
+
+AGENT_BACKENDS = {
+    "lead/openai": "agents.lead_agent.lead_agent_openai_sdk:LeadAgentOpenAISDK",
+    "lead/adk": "agents.lead_agent.lead_agent_google_adk:LeadAgentGoogleADK",
+    "content/openai": "agents.content_agent.content_agent_openai_sdk:ContentAgentOpenAISDK",
+    "content/adk": "agents.content_agent.content_agent_google_adk:ContentAgentGoogleADK",
+    "lead/routed": "agents.routing:RoutedLeadAgent",
+    "content/routed": "agents.routing:RoutedContentAgent",
+}
+
+_loaded: dict[str, type] = {}
+
+
+def available_backends() -> list[str]:
+    """Names accepted by :func:`get_agent_class` and :func:`create_agent`."""
+
+    return sorted(AGENT_BACKENDS)
+
+
+def get_agent_class(name: str) -> type:
+    """Import (once) and return the agent class registered under ``name``."""
+
+    if name not in _loaded:
+        try:
+            target = AGENT_BACKENDS[name]
+        except KeyError:
+            raise ValueError(
+                f"Unknown agent backend {name!r}; expected one of {available_backends()}"
+            ) from None
+        module_name, class_name = target.split(":")
+        _loaded[name] = getattr(importlib.import_module(module_name), class_name)
+    return _loaded[name]
+
+
+def create_agent(name: str, **kwargs):
+    """Instantiate the agent registered under ``name`` with ``kwargs``."""
+
+    return get_agent_class(name)(**kwargs)
@@ -0,0 +1,142 @@
+"""Lead and content agents that route each request across several backends.
+
+:class:`RoutedLeadAgent` and :class:`RoutedContentAgent` hold one agent per
+backend (by default the OpenAI Agents SDK, the ADK through LiteLLM and the ADK
+on Gemini) and send every request through a
+:class:`~hybrid_components.provider_router.ProviderRouter`.  They expose the
+same entry points as the single-backend agents, so they can be used wherever
+those are, including the outreach pipeline (registry names ``lead/routed``
+and ``content/routed``).
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Mapping
+
+from config import settings
+from hybrid_components.provider_router import ProviderRouter
+from hybrid_components.streaming import ERROR, AgentEvent, cached_events, collect_final
+from .registry import create_agent
+
+logger = logging.getLogger(__name__)
+
+# Backend label -> (registry name, constructor kwargs).
+LEAD_BACKENDS = {
+    "openai-sdk": ("lead/openai", {}),
+    "adk-litellm": ("lead/adk", {"use_openai_model": True}),
+    "adk-gemini": ("lead/adk", {}),
+}
+CONTENT_BACKENDS = {
+    "openai-sdk": ("content/openai", {}),
+    "adk-litellm": ("content/adk", {"use_openai_model": True}),
+    "adk-gemini": ("content/adk", {}),
+}
+
+
+def _build_agents(specs: Mapping[str, tuple[str, dict]]) -> dict[str, object]:
+    """Instantiate every backend that can be configured, skipping the rest."""
+
+    agents = {}
+    for label, (registry_name, kwargs) in specs.items():
+        try:
+            agents[label] = create_agent(registry_name, **kwargs)
+        except Exception as e:
+            logger.warning("Routing backend %s unavailable: %s", label, e)
+    if not agents:
+        raise ValueError("No routing backend could be created; check the provider credentials.")
+    return agents
+
+
+def _default_router(backends: Mapping, router_kwargs: dict) -> ProviderRouter:
+    options = {
+        "window": settings.LLM_ROUTER_WINDOW,
+        "max_error_rate": settings.LLM_ROUTER_MAX_ERROR_RATE,
+        "cooldown": settings.LLM_ROUTER_COOLDOWN,
+        "hedge": settings.LLM_ROUTER_HEDGE,
+        **router_kwargs,
+    }
+    return ProviderRouter(backends, **options)
+
+
+class RoutedLeadAgent:
+    """Lead agent that answers each request with the fastest healthy backend.
+
+    Parameters
+    ----------
+    agents:
+        Backend label to lead agent.  Defaults to every backend in
+        :data:`LEAD_BACKENDS` that can be created with the current settings.
+    **router_kwargs:
+        Passed to :class:`ProviderRouter`, overriding the ``LLM_ROUTER_*``
+        settings (e.g. ``hedge=True``).
+    """
+
+    def __init__(self, agents: Mapping[str, object] | None = None, **router_kwargs) -> None:
+        self.agents = dict(agents) if agents is not None else _build_agents(LEAD_BACKENDS)
+        backends = {
+            label: (lambda task, agent=agent: collect_final(agent.astream_lead_request(task)))
+            for label, agent in self.agents.items()
+        }
+        self.router = _default_router(backends, router_kwargs)
+        logger.info("RoutedLeadAgent initialized with backends: %s", ", ".join(self.agents))
+
+    async def aprocess_lead_request(self, task_description: str):
+        return await self.router.call(task_description)
+
+    def process_lead_request(self, task_description: str):
+        """Run one lead-generation task on the best available backend."""
+
+        return asyncio.run(self.aprocess_lead_request(task_description))
+
+    async def astream_lead_request(self, task_description: str) -> AsyncIterator[AgentEvent]:
+        """Yield the routed answer as ``text_delta``/``done`` events.
+
+        Hedging may start the request on two backends, so the answer is only
+        emitted once the winning backend has finished.
+        """
+
+        try:
+            result = await self.aprocess_lead_request(task_description)
+        except Exception as e:
+            yield AgentEvent(ERROR, text=str(e))
+            return
+        for event in cached_events(result):
+            yield event
+
+
+class RoutedContentAgent:
+    """Content agent that answers each request with the fastest healthy backend.
+
+    Parameters are as for :class:`RoutedLeadAgent`, with
+    :data:`CONTENT_BACKENDS` as the default backends.
+    """
+
+    def __init__(self, agents: Mapping[str, object] | None = None, **router_kwargs) -> None:
+        self.agents = dict(agents) if agents is not None else _build_agents(CONTENT_BACKENDS)
+        backends = {
+            label: (
+                lambda topic, content_type, agent=agent: collect_final(agent.astream_content(topic, content_type))
+            )
+            for label, agent in self.agents.items()
+        }
+        self.router = _default_router(backends, router_kwargs)
+        logger.info("RoutedContentAgent initialized with backends: %s", ", ".join(self.agents))
+
+    async def agenerate_content(self, topic: str, content_type: str = "blog_post_outline"):
+        return await self.router.call(topic, content_type)
+
+    def generate_content(self, topic: str, content_type: str = "blog_post_outline"):
+        """Generate content on the best available backend."""
+
+        return asyncio.run(self.agenerate_content(topic, content_type))
+
+    async def astream_content(self, topic: str, content_type: str = "blog_post_outline") -> AsyncIterator[AgentEvent]:
+        """Yield the routed draft as ``text_delta``/``done`` events."""
+
+        try:
+            result = await self.agenerate_content(topic, content_type)
+        except Exception as e:
+            yield AgentEvent(ERROR, text=str(e))
+            return
+        for event in cached_events(result):
+            yield event
@@ -0,0 +1,69 @@
+"""Measure CRM lookups one request per record versus batched and coalesced.
+
+Starts :mod:`benchmarks.fake_crm` with a simulated per-request latency and
+looks up the same companies three ways: sequentially one per request, with
+:meth:`CRMClient.bulk_lookup`, and as concurrent single lookups that the
+client coalesces::
+
+    python -m benchmarks.bench_crm --records 500 --latency 0.01
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from agents.lead_agent.tools.crm_connector import CRMClient
+from benchmarks.fake_crm import start_fake_crm
+
+
+def run(records: int = 500, latency: float = 0.01, concurrency: int = 32) -> dict:
+    server, crm, url = start_fake_crm(api_key="bench", latency=latency)
+    crm.seed(records)
+    queries = [{"company_name": f"Company {i}"} for i in range(records)]
+    report = {"records": records, "latency": latency, "scenarios": {}}
+    try:
+        scenarios = {
+            "one_per_request": lambda client: [client.bulk_lookup([q]) for q in queries],
+            "bulk": lambda client: client.bulk_lookup(queries),
+            "coalesced": lambda client: list(
+                ThreadPoolExecutor(max_workers=concurrency).map(client.lookup, queries)
+            ),
+        }
+        for name, scenario in scenarios.items():
+            client = CRMClient(url, "bench")
+            start = time.perf_counter()
+            scenario(client)
+            elapsed = time.perf_counter() - start
+            report["scenarios"][name] = {
+                "seconds": elapsed,
+                "http_requests": client.requests_sent,
+                "lookups_per_second": records / elapsed,
+            }
+            client.close()
+    finally:
+        server.shutdown()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.01, help="simulated CRM latency per request")
+    parser.add_argument("--concurrency", type=int, default=32, help="threads issuing single lookups")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.records, args.latency, args.concurrency)
+    for name, result in report["scenarios"].items():
+        print(
+            f"{name:<16} {result['seconds']:7.3f} s  {result['http_requests']:5d} requests  "
+            f"{result['lookups_per_second']:9.1f} lookups/s"
+        )
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare the streaming extractor with the BeautifulSoup fallback.
+
+Runs both extractors over the saved pages in ``benchmarks/fixtures/html`` and
+reports throughput, peak traced memory and whether they found the same
+e-mail addresses.  Real marketing pages are much larger than the fixtures, so
+``--inflate`` repeats each page's body to simulate them::
+
+    python -m benchmarks.bench_extractor --inflate 200 --repeat 5
+"""
+
+import argparse
+import json
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+from agents.lead_agent.tools.extractor import extract_from_bytes, extract_with_soup
+
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "html"
+
+_BODY = re.compile(rb"(<body[^>]*>)(.*)(</body>)", re.S | re.I)
+
+
+def load_corpus(inflate: int = 1) -> dict[str, bytes]:
+    """Read the fixtures, repeating each ``<body>`` ``inflate`` times."""
+
+    corpus = {}
+    for path in sorted(FIXTURE_DIR.glob("*.html")):
+        content = path.read_bytes()
+        if inflate > 1:
+            content = _BODY.sub(lambda m: m.group(1) + m.group(2) * inflate + m.group(3), content)
+        corpus[path.name] = content
+    return corpus
+
+
+def _measure(extract, content: bytes, repeat: int) -> tuple[float, int, set[str]]:
+    tracemalloc.start()
+    result = extract(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        extract(content)
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, peak, result.emails
+
+
+def run(inflate: int = 1, repeat: int = 5) -> dict:
+    """Benchmark both extractors and return per-fixture and total figures."""
+
+    extractors = {
+        "streaming": lambda content: extract_from_bytes(content, "https://fixture.example/"),
+        "soup": lambda content: extract_with_soup(content, "https://fixture.example/"),
+    }
+    report = {"inflate": inflate, "repeat": repeat, "fixtures": {}, "totals": {}}
+    for name, content in load_corpus(inflate).items():
+        entry = {"bytes": len(content)}
+        found = {}
+        for label, extract in extractors.items():
+            seconds, peak, emails = _measure(extract, content, repeat)
+            found[label] = emails
+            entry[label] = {"seconds": seconds, "peak_bytes": peak, "emails": len(emails)}
+            totals = report["totals"].setdefault(label, {"seconds": 0.0, "bytes": 0, "peak_bytes": 0})
+            totals["seconds"] += seconds
+            totals["bytes"] += len(content)
+            totals["peak_bytes"] = max(totals["peak_bytes"], peak)
+        # The streaming extractor also decodes obfuscated addresses, so it is
+        # expected to find a superset of what the soup fallback finds.
+        entry["streaming_covers_soup"] = found["soup"] <= found["streaming"]
+        report["fixtures"][name] = entry
+    for totals in report["totals"].values():
+        totals["mb_per_second"] = totals["bytes"] / totals["seconds"] / 1e6 if totals["seconds"] else 0.0
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inflate", type=int, default=1, help="repeat each page body N times")
+    parser.add_argument("--repeat", type=int, default=5, help="timed iterations per fixture")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.inflate, args.repeat)
+    for name, entry in report["fixtures"].items():
+        print(
+            f"{name:<24} {entry['bytes']:>10,d} B  "
+            f"streaming {entry['streaming']['seconds'] * 1e3:8.2f} ms  "
+            f"soup {entry['soup']['seconds'] * 1e3:8.2f} ms  "
+            f"emails {entry['streaming']['emails']}/{entry['soup']['emails']}"
+        )
+    for label, totals in report["totals"].items():
+        print(f"{label:<10} {totals['mb_per_second']:8.2f} MB/s  peak {totals['peak_bytes'] / 1e6:.2f} MB")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Crawl throughput and block rate against a site that throttles fast clients.
+
+The fixture server answers ``429 Too Many Requests`` (with ``Retry-After``)
+once it receives more than ``--server-rate`` requests per second, and
+publishes a ``robots.txt`` disallowing one company.  The same crawl is run
+twice with :class:`~agents.lead_agent.tools.crawler.CrawlEngine`:
+
+* **unthrottled** - no per-host rate, robots.txt ignored, no retries: the
+  old behaviour;
+* **polite** - per-host token bucket just under the server's limit,
+  robots.txt honoured and throttled pages retried after their pause.
+
+Pages per second, requests sent and the block rate are reported for both::
+
+    python -m benchmarks.bench_politeness --companies 40 --server-rate 60
+"""
+
+import argparse
+import json
+import time
+
+from agents.lead_agent.tools.crawler import CrawlConfig, CrawlEngine, CrawlStats
+from benchmarks.fixture_server import start_fixture_server
+
+ROBOTS = "User-agent: *\nDisallow: /company-1/\n"
+
+
+def _crawl(seeds: list[str], config: CrawlConfig) -> dict:
+    stats = CrawlStats()
+    with CrawlEngine(config) as engine:
+        failed = sum(result["status"] != "success" for result in engine.crawl(seeds, stats=stats))
+    return {**stats.to_dict(), "failed_domains": failed}
+
+
+def run(companies: int = 40, server_rate: float = 60.0, latency: float = 0.005) -> dict:
+    server, sites, base_url = start_fixture_server(
+        companies=companies, latency=latency, robots=ROBOTS, max_rate=server_rate
+    )
+    try:
+        seeds = sites.seeds(base_url)
+        pages = sites.pages_per_site()
+        unthrottled = CrawlConfig(
+            max_pages_per_domain=pages,
+            host_rate=0,
+            per_host_concurrency=16,
+            respect_robots=False,
+            throttle_retries=0,
+        )
+        polite = CrawlConfig(
+            max_pages_per_domain=pages,
+            host_rate=server_rate * 0.9,
+            host_burst=4,
+            per_host_concurrency=4,
+            throttle_retries=1,
+        )
+        results = {"unthrottled": _crawl(seeds, unthrottled)}
+        server_throttled = sites.throttled
+        # Let the server's one-second window drain before the second crawl.
+        time.sleep(1.0)
+        results["polite"] = _crawl(seeds, polite)
+        results["server_429s"] = {"unthrottled": server_throttled, "polite": sites.throttled - server_throttled}
+        return results
+    finally:
+        server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=40)
+    parser.add_argument("--server-rate", type=float, default=60.0, help="requests/s the server accepts")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds added to every response")
+    args = parser.parse_args()
+    print(json.dumps(run(args.companies, args.server_rate, args.latency), indent=2))
+
+
+if __name__ == "__main__":
+    main()
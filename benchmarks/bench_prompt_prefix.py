@@ -0,0 +1,106 @@
+"""Per-call prompt assembly cost and provider prompt-cache hit rate.
+
+Two measurements:
+
+* **assembly** - rebuilding an agent's instructions and serializing its tool
+  schemas for every call versus reusing the prefix built once by
+  :func:`~hybrid_components.prompt_prefix.build_prefix`;
+* **provider cache** - a stream of runs against
+  :class:`~hybrid_components.stub_model.StubRunner`, which reports cached
+  prompt tokens the way the OpenAI API does, with a long static system prompt
+  kept byte-identical versus one that interpolates per-request data.  Prompt
+  tokens, cached tokens and the estimated cost are reported for both::
+
+    python -m benchmarks.bench_prompt_prefix --runs 200 --model gpt-4o-mini
+"""
+
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+from agents.content_agent.tools.research_tool import perform_web_research
+from agents.content_agent.tools.style_analyzer import analyze_style
+from agents.lead_agent.tools.crm_connector import get_contact_details
+from agents.lead_agent.tools.web_prospector import prospect_website
+from common_tools.tracing import estimate_cost
+from hybrid_components.prompt_prefix import build_prefix
+from hybrid_components.stub_model import StubRunner
+
+TOOLS = (prospect_website, get_contact_details, perform_web_research, analyze_style)
+
+# A realistic production system prompt: role, qualification rubric and output
+# format, comfortably above the 1024-token provider cache minimum.
+PLAYBOOK = " ".join(
+    f"Rule {i}: when the prospect's website, CRM record or research results mention signal {i} "
+    f"(for example hiring, funding, expansion or tooling changes), weigh it in the qualification "
+    f"score, cite the source URL and keep the summary factual and concise."
+    for i in range(1, 41)
+)
+INSTRUCTIONS = "You are a lead generation specialist. " + PLAYBOOK
+
+
+def bench_assembly(calls: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(calls):
+        build_prefix("bench.rebuilt", "You are a lead generation specialist. " + PLAYBOOK, TOOLS)
+    rebuilt = time.perf_counter() - started
+
+    prefix = build_prefix("bench.static", INSTRUCTIONS, TOOLS)
+    started = time.perf_counter()
+    for _ in range(calls):
+        _ = (prefix.instructions, prefix.tool_names)
+    reused = time.perf_counter() - started
+    return {
+        "prefix_tokens": prefix.tokens,
+        "rebuilt_us_per_call": round(rebuilt / calls * 1e6, 2),
+        "reused_us_per_call": round(reused / calls * 1e6, 3),
+    }
+
+
+def _drive(runs: int, model: str, per_request_prefix: bool) -> dict:
+    runner = StubRunner(latency=0.0)
+    static_agent = SimpleNamespace(instructions=INSTRUCTIONS, tools=list(TOOLS))
+    prompt = cached = completion = 0
+    for i in range(runs):
+        task = f"Qualify the company at https://company-{i}.example and summarise its contacts."
+        if per_request_prefix:
+            # The anti-pattern: request data baked into the system prompt.
+            agent = SimpleNamespace(instructions=f"{INSTRUCTIONS} Current task: {task}", tools=list(TOOLS))
+        else:
+            agent = static_agent
+        usage = runner.run_sync(agent, task).usage
+        prompt += usage.input_tokens
+        cached += usage.input_tokens_details.cached_tokens
+        completion += usage.output_tokens
+    cost = estimate_cost(model, prompt, completion, cached)
+    return {
+        "prompt_tokens": prompt,
+        "cached_prompt_tokens": cached,
+        "uncached_prompt_tokens": prompt - cached,
+        "cached_ratio": round(cached / prompt, 4) if prompt else 0.0,
+        "cost_usd": round(cost, 4) if cost is not None else None,
+    }
+
+
+def run(runs: int = 200, model: str = "gpt-4o-mini", calls: int = 2000) -> dict:
+    return {
+        "assembly": bench_assembly(calls),
+        "provider_cache": {
+            "per_request_prefix": _drive(runs, model, per_request_prefix=True),
+            "static_prefix": _drive(runs, model, per_request_prefix=False),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200, help="simulated agent runs per scenario")
+    parser.add_argument("--model", default="gpt-4o-mini", help="model whose prices are used for the cost estimate")
+    parser.add_argument("--calls", type=int, default=2000, help="prompt assemblies timed")
+    args = parser.parse_args()
+    print(json.dumps(run(args.runs, args.model, args.calls), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare static provider choice with latency-aware routing and hedging.
+
+Three simulated backends (:class:`~hybrid_components.stub_model.StubRunner`
+with jitter) answer a stream of concurrent requests.  Part-way through, the
+primary backend's latency spikes, and one backend fails a share of its calls.
+The same workload runs with a static choice of the primary backend, with the
+router and with the router plus hedging, and reports latency percentiles and
+failures::
+
+    python -m benchmarks.bench_router --requests 400 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from hybrid_components.provider_router import ProviderRouter
+from hybrid_components.stub_model import StubRunner
+
+
+def make_backends(seed: int = 3) -> dict[str, StubRunner]:
+    return {
+        "primary": StubRunner(latency=0.04, jitter=0.01, seed=seed),
+        "secondary": StubRunner(latency=0.06, jitter=0.01, seed=seed + 1),
+        "flaky": StubRunner(latency=0.03, jitter=0.01, error_rate=0.3, seed=seed + 2),
+    }
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def _drive(call, runners: dict[str, StubRunner], requests: int, concurrency: int, spike: float) -> dict:
+    latencies: list[float] = []
+    failures = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+
+    async def worker() -> None:
+        nonlocal failures
+        while not queue.empty():
+            i = queue.get_nowait()
+            if i == requests // 4:
+                # The primary provider degrades for the rest of the run.
+                runners["primary"].latency = spike
+            started = time.perf_counter()
+            try:
+                await call(f"task {i}")
+            except Exception:
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    latencies.sort()
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "failures": failures,
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def run(requests: int = 400, concurrency: int = 8, spike: float = 0.5) -> dict:
+    report = {}
+
+    runners = make_backends()
+    report["static"] = asyncio.run(
+        _drive(lambda q: runners["primary"].run(None, q), runners, requests, concurrency, spike)
+    )
+
+    for label, hedge in (("routed", False), ("routed_hedged", True)):
+        runners = make_backends()
+        router = ProviderRouter(
+            {name: (lambda q, r=runner: r.run(None, q)) for name, runner in runners.items()},
+            window=5.0,
+            cooldown=2.0,
+            hedge=hedge,
+        )
+        report[label] = asyncio.run(_drive(router.call, runners, requests, concurrency, spike))
+        report[label]["backends"] = {
+            name: {key: stats[key] for key in ("calls", "wins", "errors", "hedges")}
+            for name, stats in router.stats().items()
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--spike", type=float, default=0.5, help="primary latency after the spike, seconds")
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.concurrency, args.spike), indent=2))
+
+
+if __name__ == "__main__":
+    main()
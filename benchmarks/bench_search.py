@@ -0,0 +1,89 @@
+"""Measure ingestion rate and query latency of the local research index.
+
+Builds a synthetic corpus whose vocabulary follows a Zipf distribution, like
+real text, in a temporary directory and times queries of one to three
+terms drawn from the frequent, mid and rare ranges::
+
+    python -m benchmarks.bench_search --docs 1000000 --json search.json
+"""
+
+import argparse
+import itertools
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from agents.content_agent.tools.search_index import SearchIndex
+
+
+def _vocabulary(size: int) -> list[str]:
+    rng = random.Random(7)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [f"{''.join(rng.choices(letters, k=rng.randint(3, 9)))}{i}" for i in range(size)]
+
+
+def synthetic_documents(count: int, words: int = 120, vocabulary: int = 50_000, seed: int = 1):
+    rng = random.Random(seed)
+    vocab = _vocabulary(vocabulary)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    for i in range(count):
+        tokens = rng.choices(vocab, cum_weights=cumulative, k=words)
+        yield {"key": f"doc://{i}", "title": " ".join(tokens[:6]), "text": " ".join(tokens)}
+
+
+def run(docs: int = 100_000, queries: int = 200, vocabulary: int = 50_000) -> dict:
+    vocab = _vocabulary(vocabulary)
+    rng = random.Random(3)
+    bands = {"frequent": vocab[:100], "mid": vocab[1000:5000], "rare": vocab[20000:]}
+    with tempfile.TemporaryDirectory() as directory:
+        index = SearchIndex(directory)
+        start = time.perf_counter()
+        index.add_many(synthetic_documents(docs, vocabulary=vocabulary))
+        index.commit()
+        ingest = time.perf_counter() - start
+        start = time.perf_counter()
+        index.merge()
+        merge = time.perf_counter() - start
+
+        report = {"docs": docs, "ingest_docs_per_second": docs / ingest, "merge_seconds": merge, "queries": {}}
+        for band, terms in bands.items():
+            latencies = []
+            for _ in range(queries):
+                query = " ".join(rng.sample(terms, rng.randint(1, 3)))
+                start = time.perf_counter()
+                index.search(query, 10)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            report["queries"][band] = {
+                "p50_ms": statistics.median(latencies),
+                "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+                "max_ms": latencies[-1],
+            }
+        report["index_bytes"] = sum(p.stat().st_size for p in Path(directory).iterdir())
+        index.close()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200, help="queries per term band")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.docs, args.queries)
+    print(
+        f"{report['docs']} docs: {report['ingest_docs_per_second']:.0f} docs/s ingest, "
+        f"merge {report['merge_seconds']:.1f} s, {report['index_bytes'] / 2**20:.0f} MiB on disk"
+    )
+    for band, result in report["queries"].items():
+        print(f"  {band:<9} p50={result['p50_ms']:7.2f} ms  p95={result['p95_ms']:7.2f} ms  max={result['max_ms']:7.2f} ms")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Measure cold-start import cost of each entry point with ``-X importtime``.
+
+Every module is imported in a fresh interpreter so nothing is shared between
+measurements; the per-module self/cumulative times Python writes to stderr are
+parsed to find what dominates start-up::
+
+    python -m benchmarks.bench_startup --repeat 3 --json startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = (
+    "config.settings",
+    "main",
+    "agents.registry",
+    "agents.lead_agent.lead_agent_openai_sdk",
+    "agents.lead_agent.lead_agent_google_adk",
+    "agents.content_agent.content_agent_openai_sdk",
+    "agents.content_agent.content_agent_google_adk",
+)
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Parse ``import time: self [us] | cumulative | imported package`` lines."""
+
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        imports.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    return imports
+
+
+def measure(module: str) -> dict:
+    """Import ``module`` in a fresh interpreter and summarise the import tree."""
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    imports = parse_importtime(proc.stderr)
+    result = {
+        "wall_seconds": wall,
+        "import_seconds": sum(item["self_us"] for item in imports) / 1e6,
+        "modules_imported": len(imports),
+        "slowest": sorted(imports, key=lambda item: item["self_us"], reverse=True)[:10],
+        "status": "success" if proc.returncode == 0 else "failure",
+    }
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        result["error"] = errors[-1] if errors else f"exit code {proc.returncode}"
+    return result
+
+
+def run(modules=ENTRY_POINTS, repeat: int = 1) -> dict:
+    report = {"python": sys.version.split()[0], "repeat": repeat, "entry_points": {}}
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        # Keep the fastest run's breakdown; report the median wall time as well.
+        best = min(runs, key=lambda r: r["wall_seconds"])
+        best["median_wall_seconds"] = statistics.median(r["wall_seconds"] for r in runs)
+        report["entry_points"][module] = best
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS), help="modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per module")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.modules, args.repeat)
+    for module, result in report["entry_points"].items():
+        line = (
+            f"{module:<48} {result['median_wall_seconds'] * 1000:8.1f} ms wall  "
+            f"{result['import_seconds'] * 1000:8.1f} ms imports  {result['modules_imported']:4d} modules"
+        )
+        if result["status"] != "success":
+            line += f"  [{result['error']}]"
+        print(line)
+        for item in result["slowest"][:3]:
+            print(f"    {item['self_us'] / 1000:8.1f} ms  {item['module']}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Throughput of the batch style analyzer.
+
+Builds a synthetic corpus by sampling sentences of two registers (short,
+direct marketing copy and long, passive corporate prose), then times
+:func:`analyze_batch` and scoring against a profile built from the first
+register::
+
+    python -m benchmarks.bench_style --docs 5000 --sentences 30
+"""
+
+import argparse
+import json
+import random
+import time
+
+from agents.content_agent.tools.style_analyzer import StyleProfile, analyze_batch
+
+
+DIRECT = (
+    "We build tools you love.",
+    "Our team ships fast.",
+    "You get results, not excuses.",
+    "Your pipeline deserves better.",
+    "Try it today and see the difference.",
+    "We answer every ticket within an hour.",
+)
+FORMAL = (
+    "The implementation of the aforementioned methodology was undertaken by the committee.",
+    "It was subsequently determined that considerable restructuring would be necessitated.",
+    "Stakeholder alignment is expected to be facilitated by the revised governance framework.",
+    "Operational efficiencies were identified across the organisation's distribution channels.",
+)
+
+
+def make_corpus(docs: int, sentences: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(docs):
+        pool = DIRECT if i % 2 == 0 else FORMAL
+        corpus.append(" ".join(rng.choice(pool) for _ in range(sentences)))
+    return corpus
+
+
+def run(docs: int = 2000, sentences: int = 30) -> dict:
+    corpus = make_corpus(docs, sentences)
+    start = time.perf_counter()
+    profile = StyleProfile.from_texts("direct", corpus[::2][:200])
+    profile_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = analyze_batch(corpus)
+    analyze_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    overall = profile.similarity(batch)["overall"]
+    score_seconds = time.perf_counter() - start
+    return {
+        "docs": docs,
+        "sentences_per_doc": sentences,
+        "profile_seconds": round(profile_seconds, 4),
+        "analyze_seconds": round(analyze_seconds, 4),
+        "docs_per_second": round(docs / analyze_seconds, 1),
+        "score_seconds": round(score_seconds, 6),
+        "mean_similarity_direct": round(float(overall[::2].mean()), 4),
+        "mean_similarity_formal": round(float(overall[1::2].mean()), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--sentences", type=int, default=30)
+    args = parser.parse_args()
+    print(json.dumps(run(args.docs, args.sentences), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Local stand-in for the CRM HTTP API.
+
+Implements the two bulk endpoints :mod:`agents.lead_agent.tools.crm_connector`
+talks to, backed by an in-memory dict, with optional per-request latency and
+injected failures so batching, coalescing and retries can be measured without
+a real CRM::
+
+    python -m benchmarks.fake_crm --port 8900 --latency 0.02
+
+Point ``CRM_API_ENDPOINT`` at ``http://127.0.0.1:8900`` to use it.
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeCRM:
+    """In-memory CRM state shared by the request handlers."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        latency: float = 0.0,
+        fail_every: int = 0,
+        fail_status: int = 503,
+        retry_after: str | None = None,
+    ) -> None:
+        self.api_key = api_key
+        self.latency = latency
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        # ``Retry-After`` sent with injected failures: seconds or an HTTP date.
+        self.retry_after = retry_after
+        self.requests = 0
+        self.records: dict[str, dict] = {}
+        self.by_company: dict[str, str] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def seed(self, count: int) -> None:
+        """Create ``count`` companies named ``Company 0`` .. ``Company n-1``."""
+
+        self.upsert(
+            [
+                {"company_name": f"Company {i}", "email": f"contact@company{i}.example", "industry": "Software"}
+                for i in range(count)
+            ]
+        )
+
+    def lookup(self, queries: list[dict]) -> list[dict]:
+        results = []
+        with self._lock:
+            for query in queries:
+                record_id = query.get("contact_id") or self.by_company.get(
+                    str(query.get("company_name", "")).lower()
+                )
+                record = self.records.get(record_id) if record_id else None
+                results.append({"found": True, "record": record} if record else {"found": False})
+        return results
+
+    def upsert(self, records: list[dict]) -> dict:
+        ids, created, updated = [], 0, 0
+        with self._lock:
+            for record in records:
+                company_key = str(record.get("company_name", "")).lower()
+                record_id = record.get("contact_id") or self.by_company.get(company_key)
+                if record_id and record_id in self.records:
+                    self.records[record_id].update(record)
+                    updated += 1
+                else:
+                    record_id = record_id or f"c{next(self._ids)}"
+                    self.records[record_id] = {**record, "contact_id": record_id}
+                    created += 1
+                if company_key:
+                    self.by_company[company_key] = record_id
+                ids.append(record_id)
+        return {"ids": ids, "created": created, "updated": updated}
+
+
+def _handler_for(crm: FakeCRM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like a real API
+        disable_nagle_algorithm = True
+
+        def _reply(self, status: int, payload: dict, headers: dict | None = None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            with crm._lock:
+                crm.requests += 1
+                request_number = crm.requests
+            if crm.latency:
+                time.sleep(crm.latency)
+            if crm.api_key and self.headers.get("Authorization") != f"Bearer {crm.api_key}":
+                self._reply(401, {"error": "unauthorized"})
+            elif crm.fail_every and request_number % crm.fail_every == 0:
+                headers = {"Retry-After": crm.retry_after} if crm.retry_after else None
+                self._reply(crm.fail_status, {"error": "injected failure"}, headers)
+            elif self.path == "/contacts/lookup":
+                self._reply(200, {"results": crm.lookup(payload.get("queries", []))})
+            elif self.path == "/contacts/upsert":
+                self._reply(200, crm.upsert(payload.get("records", [])))
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return Handler
+
+
+def start_fake_crm(
+    port: int = 0, api_key: str | None = None, latency: float = 0.0, fail_every: int = 0, **options
+) -> tuple[ThreadingHTTPServer, FakeCRM, str]:
+    """Start the server on a background thread; returns ``(server, crm, base_url)``.
+
+    ``options`` (``fail_status``, ``retry_after``) are passed to :class:`FakeCRM`.
+    """
+
+    crm = FakeCRM(api_key=api_key, latency=latency, fail_every=fail_every, **options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler_for(crm))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, crm, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--api-key")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every n-th request with an error")
+    parser.add_argument("--fail-status", type=int, default=503, help="status of injected failures")
+    parser.add_argument("--retry-after", help="Retry-After header sent with injected failures")
+    parser.add_argument("--seed", type=int, default=1000, help="number of companies to pre-create")
+    args = parser.parse_args()
+
+    server, crm, url = start_fake_crm(
+        args.port,
+        args.api_key,
+        args.latency,
+        args.fail_every,
+        fail_status=args.fail_status,
+        retry_after=args.retry_after,
+    )
+    crm.seed(args.seed)
+    print(f"Fake CRM listening on {url} with {args.seed} companies")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Deterministic fake LLM that makes scripted tool calls.
+
+:class:`ScriptedRunner` has the same entry points as the OpenAI Agents SDK
+``Runner`` (``run``, ``run_sync`` and ``run_streamed``), like
+:class:`~hybrid_components.stub_model.StubRunner`, but it also behaves like a
+tool-using model.  For every task a *script* decides which of the agent's
+tools to call and with what arguments.  The runner executes those tools for
+real (so crawls, CRM lookups and their caches are part of the measurement),
+then writes a final answer from the tool outputs.  Model time is simulated
+per turn as a time-to-first-token plus generated tokens divided by a
+decoding rate, and usage reports the tokens every turn would have consumed.
+
+A benchmark therefore measures our own overhead (prompt assembly, tool
+execution, caching, scheduling) against a model whose latency is known and
+constant.
+"""
+
+import asyncio
+import inspect
+import json
+import re
+from collections.abc import AsyncIterator, Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+
+from hybrid_components.prompt_prefix import estimate_tokens, tool_schema
+from hybrid_components.stub_model import (
+    StubProviderError,
+    StubRateLimitError,
+    StubRunner,
+    StubRunResult,
+    StubStreamEvent,
+    StubTextDelta,
+    StubUsage,
+)
+
+_URL = re.compile(r"https?://[^\s'\"<>)]+")
+
+
+@dataclass
+class ToolCall:
+    """One tool call the scripted model makes."""
+
+    name: str
+    arguments: dict = field(default_factory=dict)
+
+
+def prospect_urls_script(task: str, tool_names: Iterable[str]) -> list[ToolCall]:
+    """Call the agent's web-prospector tool once for every URL in the task."""
+
+    prospector = next((name for name in tool_names if "prospect" in name.lower()), None)
+    if prospector is None:
+        return []
+    return [ToolCall(prospector, {"url": url.rstrip(".,")}) for url in _URL.findall(task)]
+
+
+def summarize_answer(task: str, outputs: list[tuple[ToolCall, object]]) -> str:
+    """A short, deterministic summary of the tool outputs."""
+
+    lines = [f"Summary for: {task}"]
+    for call, output in outputs:
+        if isinstance(output, dict):
+            emails = ", ".join(output.get("emails", ())) or "none"
+            lines.append(f"- {call.name}({call.arguments}): {output.get('status', 'ok')}, e-mails: {emails}")
+        else:
+            lines.append(f"- {call.name}({call.arguments}): {str(output)[:200]}")
+    return "\n".join(lines)
+
+
+@dataclass
+class _RawToolItem:
+    name: str
+    arguments: str
+
+
+@dataclass
+class _RunItem:
+    raw_item: _RawToolItem
+    output: object = None
+
+
+@dataclass
+class _RunItemEvent:
+    name: str
+    item: _RunItem
+    type: str = "run_item_stream_event"
+
+
+class ScriptedRunner(StubRunner):
+    """Fake model runner that executes scripted tool calls.
+
+    Parameters
+    ----------
+    script:
+        ``script(task, tool_names)`` returns the :class:`ToolCall` list for a
+        task.  Defaults to :func:`prospect_urls_script`.
+    answer:
+        ``answer(task, [(call, output), ...])`` produces the final output.
+        Defaults to :func:`summarize_answer`.
+    first_token_latency:
+        Seconds before the first token of every model turn.
+    tokens_per_second:
+        Simulated decoding rate for generated tokens.
+    tools:
+        Tool name to callable, overriding the tools found on the agent.
+    **stub_kwargs:
+        ``jitter``, ``error_rate``, ``rate_limit_every``, ``seed`` and
+        ``prompt_cache`` as for :class:`StubRunner`.
+    """
+
+    def __init__(
+        self,
+        script: Callable[[str, Iterable[str]], list[ToolCall]] | None = None,
+        answer: Callable[[str, list], object] | None = None,
+        first_token_latency: float = 0.05,
+        tokens_per_second: float = 200.0,
+        tools: Mapping[str, Callable] | None = None,
+        **stub_kwargs,
+    ) -> None:
+        super().__init__(latency=first_token_latency, **stub_kwargs)
+        self.script = script or prospect_urls_script
+        self.answer = answer or summarize_answer
+        self.tokens_per_second = tokens_per_second
+        self.tools = dict(tools or {})
+        self.tool_calls = 0
+
+    # ------------------------------------------------------------------
+    # Tools
+    # ------------------------------------------------------------------
+    def _agent_tools(self, agent) -> dict[str, object]:
+        found = {tool_schema(tool)["name"]: tool for tool in getattr(agent, "tools", None) or ()}
+        return {**found, **self.tools}
+
+    @staticmethod
+    async def _invoke(tool, arguments: dict) -> object:
+        if hasattr(tool, "on_invoke_tool"):
+            # An SDK ``FunctionTool``: arguments arrive as the model's JSON.
+            return await tool.on_invoke_tool(None, json.dumps(arguments))
+        fn = getattr(tool, "fn", None) or getattr(tool, "func", None) or tool
+        if inspect.iscoroutinefunction(fn):
+            return await fn(**arguments)
+        # Tools block on I/O; keep the event loop free for concurrent runs.
+        return await asyncio.to_thread(fn, **arguments)
+
+    async def _turn(self, output_tokens: int) -> None:
+        await asyncio.sleep(self.delay() + output_tokens / self.tokens_per_second)
+
+    # ------------------------------------------------------------------
+    # Runs
+    # ------------------------------------------------------------------
+    def _check_failures(self) -> None:
+        with self._lock:
+            call = next(self._calls)
+            self.calls = call
+            failed = self.error_rate and self._random.random() < self.error_rate
+        if self.rate_limit_every and call % self.rate_limit_every == 0:
+            raise StubRateLimitError("Rate limit reached (fake LLM)")
+        if failed:
+            raise StubProviderError("Service unavailable (fake LLM)")
+
+    async def _execute(self, agent, task: str, on_event=None) -> StubRunResult:
+        self._check_failures()
+        tools = self._agent_tools(agent)
+        prefix_tokens, cached_tokens = self._prefix_usage(agent)
+        context_tokens = estimate_tokens(task)
+        usage = StubUsage()
+        outputs: list[tuple[ToolCall, object]] = []
+        for call in self.script(task, tools):
+            arguments = json.dumps(call.arguments)
+            await self._turn(estimate_tokens(arguments))
+            usage.input_tokens += prefix_tokens + context_tokens
+            usage.output_tokens += estimate_tokens(arguments)
+            usage.input_tokens_details.cached_tokens += cached_tokens
+            if on_event is not None:
+                await on_event(_RunItemEvent("tool_called", _RunItem(_RawToolItem(call.name, arguments))))
+            tool = tools.get(call.name)
+            if tool is None:
+                output = {"error": f"unknown tool {call.name}"}
+            else:
+                output = await self._invoke(tool, call.arguments)
+            with self._lock:
+                self.tool_calls += 1
+            outputs.append((call, output))
+            context_tokens += estimate_tokens(arguments) + estimate_tokens(json.dumps(output, default=str))
+            if on_event is not None:
+                await on_event(_RunItemEvent("tool_output", _RunItem(_RawToolItem(call.name, arguments), output)))
+        final_output = self.answer(task, outputs)
+        text = str(final_output)
+        await self._turn(estimate_tokens(text))
+        usage.input_tokens += prefix_tokens + context_tokens
+        usage.output_tokens += estimate_tokens(text)
+        usage.input_tokens_details.cached_tokens += cached_tokens
+        return StubRunResult(final_output=final_output, usage=usage)
+
+    async def run(self, agent, input: str, **kwargs) -> StubRunResult:
+        return await self._execute(agent, input)
+
+    def run_streamed(self, agent, input: str, chunk_size: int = 16, **kwargs) -> "ScriptedStreamedResult":
+        return ScriptedStreamedResult(self, agent, input, chunk_size)
+
+
+class ScriptedStreamedResult:
+    """The subset of ``RunResultStreaming`` the agents read."""
+
+    def __init__(self, runner: ScriptedRunner, agent, task: str, chunk_size: int) -> None:
+        self._runner = runner
+        self._agent = agent
+        self._task = task
+        self._chunk_size = chunk_size
+        self.final_output = None
+        self.usage = None
+
+    async def stream_events(self) -> AsyncIterator:
+        events: asyncio.Queue = asyncio.Queue()
+        run = asyncio.create_task(self._runner._execute(self._agent, self._task, events.put))
+        while True:
+            getter = asyncio.create_task(events.get())
+            done, _ = await asyncio.wait({getter, run}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+                continue
+            getter.cancel()
+            break
+        while not events.empty():
+            yield events.get_nowait()
+        result = run.result()
+        text = str(result.final_output)
+        for start in range(0, len(text), self._chunk_size):
+            yield StubStreamEvent(StubTextDelta(text[start:start + self._chunk_size]))
+        self.final_output = result.final_output
+        self.usage = result.usage
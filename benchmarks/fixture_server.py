@@ -0,0 +1,262 @@
+"""Local HTTP server hosting a corpus of generated company websites.
+
+Every company gets a small site under its own path prefix: a homepage
+(``/<slug>/``) with Organization JSON-LD and a navigation bar, ``contact``,
+``about`` and ``team`` pages carrying plain, ``mailto:`` and obfuscated e-mail
+addresses and phone numbers, and a number of filler pages (``news-1``, ...)
+padded to a configurable size.  Links are relative, so a crawl seeded with a
+company's homepage stays inside that company's site.  Pages are generated
+deterministically from the company index, so runs are comparable::
+
+    python -m benchmarks.fixture_server --port 8901 --companies 200 --latency 0.01
+
+Seed a crawl with ``http://127.0.0.1:8901/company-0/`` and so on.  The server
+can also publish a ``robots.txt`` and, like a site protecting itself, answer
+``429 Too Many Requests`` once clients exceed a request rate.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_FIRST_NAMES = ("Dana", "Sam", "Priya", "Jordan", "Alex", "Mina", "Tomas", "Ines")
+_LAST_NAMES = ("Ortiz", "Lee", "Shah", "Kim", "Novak", "Berg", "Costa", "Okafor")
+_INDUSTRIES = ("workflow automation", "logistics", "precision machining", "design", "payments", "analytics")
+_FILLER = (
+    "Our customers rely on us to ship reliable products on time, every time. "
+    "We invest in tooling, training and long-term partnerships with the teams we serve. "
+)
+
+
+class CompanySites:
+    """Deterministic page generator shared by the request handlers.
+
+    Parameters
+    ----------
+    companies:
+        Number of company sites, ``company-0`` .. ``company-<n-1>``.
+    filler_pages:
+        Extra pages per site, linked from the homepage.
+    page_bytes:
+        Approximate size every page is padded to.
+    latency:
+        Seconds added to every response, to model a remote server.
+    robots:
+        Body served at ``/robots.txt``; ``None`` answers it with a 404.
+    max_rate:
+        Requests per second served before answering ``429`` with a
+        ``Retry-After`` header; ``0`` never throttles.
+    """
+
+    def __init__(
+        self,
+        companies: int = 200,
+        filler_pages: int = 4,
+        page_bytes: int = 8_000,
+        latency: float = 0.0,
+        robots: str | None = None,
+        max_rate: float = 0.0,
+    ):
+        self.companies = companies
+        self.filler_pages = filler_pages
+        self.page_bytes = page_bytes
+        self.latency = latency
+        self.robots = robots
+        self.max_rate = max_rate
+        self.requests = 0
+        self.throttled = 0
+        self.bytes_served = 0
+        self._recent: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def seeds(self, base_url: str, count: int | None = None) -> list[str]:
+        """Homepage URLs of the first ``count`` companies (all by default)."""
+
+        return [f"{base_url}/company-{i}/" for i in range(min(count or self.companies, self.companies))]
+
+    def pages_per_site(self) -> int:
+        return 4 + self.filler_pages
+
+    # ------------------------------------------------------------------
+    # Page generation
+    # ------------------------------------------------------------------
+    def _company(self, index: int) -> dict:
+        return {
+            "name": f"Company {index} {_INDUSTRIES[index % len(_INDUSTRIES)].title()}",
+            "domain": f"company{index}.example",
+            "industry": _INDUSTRIES[index % len(_INDUSTRIES)],
+            "phone": f"+1-415-555-{index % 10_000:04d}",
+        }
+
+    def _pad(self, html: str) -> str:
+        missing = self.page_bytes - len(html)
+        if missing <= 0:
+            return html
+        filler = (_FILLER * (missing // len(_FILLER) + 1))[:missing]
+        return html.replace("</main>", f"<section class=\"story\"><p>{filler}</p></section></main>")
+
+    def _layout(self, company: dict, title: str, body: str, head: str = "") -> str:
+        nav = " ".join(
+            f'<a href="{href}">{label}</a>'
+            for href, label in (("./", "Home"), ("about", "About"), ("team", "Team"), ("contact", "Contact"))
+        )
+        news = " ".join(f'<a href="news-{i}">News {i}</a>' for i in range(1, self.filler_pages + 1))
+        return (
+            f"<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\"><title>{title} | {company['name']}"
+            f"</title>{head}</head><body><header><nav>{nav}</nav></header><main>{body}</main>"
+            f"<footer><p>{news}</p><a href=\"https://www.linkedin.com/company/{company['domain']}\">LinkedIn</a>"
+            f"</footer></body></html>"
+        )
+
+    def page(self, index: int, name: str) -> str | None:
+        """HTML of page ``name`` of company ``index``, or ``None`` if it does not exist."""
+
+        if not 0 <= index < self.companies:
+            return None
+        company = self._company(index)
+        domain = company["domain"]
+        if name == "":
+            head = (
+                '<script type="application/ld+json">{"@context": "https://schema.org", "@type": "Organization", '
+                f'"name": "{company["name"]}", "url": "https://www.{domain}", "email": "hello@{domain}", '
+                f'"telephone": "{company["phone"]}"}}</script>'
+            )
+            body = (
+                f"<h1>{company['name']}</h1><p>We build {company['industry']} products for growing teams.</p>"
+                f'<p><a href="mailto:sales@{domain}">Talk to sales</a> or call {company["phone"]}.</p>'
+            )
+            return self._pad(self._layout(company, "Home", body, head))
+        if name == "contact":
+            body = (
+                f'<h1>Contact us</h1><p>General enquiries: <a href="mailto:info@{domain}">info@{domain}</a></p>'
+                f"<p>Press: press&#64;{domain}</p><p>Careers: jobs (at) {domain.replace('.', ' (dot) ')}</p>"
+                f'<p>Phone: <a href="tel:{company["phone"]}">{company["phone"]}</a></p>'
+            )
+            return self._pad(self._layout(company, "Contact", body))
+        if name in ("about", "team"):
+            people = "".join(
+                f"<li><h3>{_FIRST_NAMES[(index + i) % 8]} {_LAST_NAMES[(index * 3 + i) % 8]}</h3>"
+                f"<p>{_FIRST_NAMES[(index + i) % 8].lower()} [at] {domain.replace('.', ' [dot] ')}</p></li>"
+                for i in range(4)
+            )
+            return self._pad(self._layout(company, name.title(), f"<h1>People</h1><ul class=\"team\">{people}</ul>"))
+        if name.startswith("news-") and name[5:].isdigit() and 1 <= int(name[5:]) <= self.filler_pages:
+            body = f"<h1>News {name[5:]}</h1><p>{company['name']} announces a new {company['industry']} release.</p>"
+            return self._pad(self._layout(company, f"News {name[5:]}", body))
+        return None
+
+    def throttle(self) -> bool:
+        """Count a request; ``True`` if it exceeds ``max_rate`` over the last second."""
+
+        if not self.max_rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and self._recent[0] <= now - 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_rate:
+                self.throttled += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def resolve(self, path: str) -> str | None:
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        if not parts[0].startswith("company-") or not parts[0][8:].isdigit() or len(parts) > 2:
+            return None
+        return self.page(int(parts[0][8:]), parts[1] if len(parts) == 2 else "")
+
+
+def _handler_for(sites: CompanySites):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like a real web server
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            if sites.latency:
+                time.sleep(sites.latency)
+            if sites.throttle():
+                self._send(429, b"Too many requests", "text/plain", {"Retry-After": "1"})
+                return
+            if self.path == "/robots.txt":
+                if sites.robots is None:
+                    self._send(404, b"Not found", "text/plain")
+                else:
+                    self._send(200, sites.robots.encode("utf-8"), "text/plain")
+                return
+            html = sites.resolve(self.path)
+            body = (html or "<html><body><h1>Not found</h1></body></html>").encode("utf-8")
+            with sites._lock:
+                sites.requests += 1
+                sites.bytes_served += len(body)
+            self._send(200 if html is not None else 404, body, "text/html")
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return Handler
+
+
+class _FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Crawlers abandon keep-alive connections mid-response (leaf pages
+        # stop reading early); that is expected, not worth a traceback.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_fixture_server(
+    port: int = 0,
+    companies: int = 200,
+    filler_pages: int = 4,
+    page_bytes: int = 8_000,
+    latency: float = 0.0,
+    robots: str | None = None,
+    max_rate: float = 0.0,
+) -> tuple[ThreadingHTTPServer, CompanySites, str]:
+    """Start the server on a background thread; returns ``(server, sites, base_url)``."""
+
+    sites = CompanySites(companies, filler_pages, page_bytes, latency, robots, max_rate)
+    server = _FixtureServer(("127.0.0.1", port), _handler_for(sites))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, sites, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--filler-pages", type=int, default=4, help="extra pages per company site")
+    parser.add_argument("--page-bytes", type=int, default=8_000, help="approximate size of every page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--crawl-delay", type=float, help="publish a robots.txt with this Crawl-delay")
+    parser.add_argument("--max-rate", type=float, default=0.0, help="answer 429 above this many requests/s")
+    args = parser.parse_args()
+
+    robots = None if args.crawl_delay is None else f"User-agent: *\nCrawl-delay: {args.crawl_delay}\n"
+    server, sites, url = start_fixture_server(
+        args.port, args.companies, args.filler_pages, args.page_bytes, args.latency, robots, args.max_rate
+    )
+    print(f"Fixture sites listening on {url}/company-0/ .. {url}/company-{sites.companies - 1}/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
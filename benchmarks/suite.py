@@ -0,0 +1,395 @@
+"""End-to-end benchmark suite with stored results and a regression check.
+
+Runs a fixed set of scenarios fully offline, against
+:mod:`benchmarks.fixture_server` (generated company websites on localhost)
+and :class:`benchmarks.fake_llm.ScriptedRunner` (a tool-calling fake model
+with a known latency):
+
+``single_lead``
+    Sequential lead requests through the OpenAI SDK lead agent, each
+    prospecting one fixture site: p50/p95 latency.
+``batch``
+    The same requests through ``process_lead_batch``: tasks per second.
+``crawl``
+    Multi-page crawls of the fixture sites with :class:`CrawlEngine`: pages
+    and megabytes per second.
+``extraction``
+    The streaming extractor over the saved HTML fixtures: MB per second.
+``memory``
+    Peak traced allocation while crawling, and the process's peak RSS.
+
+Response caches, the lead store, the results store and trace export are disabled so every run
+does the same work and never touches the local ``.cache`` files.  Results are
+written as JSON; ``--baseline`` compares them with an earlier run and exits
+with status 1 when a gated metric regressed by more than ``--threshold``::
+
+    python -m benchmarks.suite run --output .cache/bench/main.json
+    python -m benchmarks.suite run --baseline .cache/bench/main.json --threshold 0.15
+    python -m benchmarks.suite compare .cache/bench/main.json .cache/bench/branch.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+# Applied before any setting is read, so the scenarios neither reuse nor
+# pollute cached responses and leads from earlier runs.
+ISOLATED_ENV = {
+    "LLM_CACHE_PATH": "",
+    "LEAD_STORE_PATH": "",
+    "PROSPECTOR_CACHE_PATH": "",
+    "TRACE_EXPORTER": "",
+    "RESULTS_STORE_PATH": "",
+    # Every fixture site is served from 127.0.0.1, so per-host politeness
+    # would throttle the whole suite to one host's rate.
+    "CRAWL_HOST_RATE": "0",
+    "CRAWL_HOST_CONCURRENCY": "64",
+}
+
+HIGHER, LOWER = "higher", "lower"
+
+# Metrics checked against the baseline, and which direction is better.
+GATED_METRICS = {
+    "single_lead": {"p50_ms": LOWER, "p95_ms": LOWER},
+    "batch": {"tasks_per_second": HIGHER},
+    "crawl": {"pages_per_second": HIGHER},
+    "extraction": {"mb_per_second": HIGHER},
+    "memory": {"peak_traced_bytes": LOWER},
+}
+
+
+@dataclass
+class SuiteConfig:
+    """Workload sizes shared by the scenarios.
+
+    Parameters
+    ----------
+    companies:
+        Fixture sites served, and the number of crawl seeds.
+    leads:
+        Lead requests in the ``single_lead`` and ``batch`` scenarios.
+    concurrency:
+        Concurrent agent runs in the ``batch`` scenario.
+    model_latency:
+        Simulated time to first token of every fake model turn, in seconds.
+    model_tokens_per_second:
+        Simulated decoding rate.  Fast by default, so our own overhead is
+        not drowned out by generation time.
+    server_latency:
+        Seconds the fixture server adds to every response.
+    page_bytes:
+        Approximate size of every fixture page.
+    inflate:
+        Body repetitions of the HTML fixtures in the ``extraction`` scenario.
+    """
+
+    companies: int = 100
+    leads: int = 40
+    concurrency: int = 8
+    model_latency: float = 0.02
+    model_tokens_per_second: float = 2000.0
+    server_latency: float = 0.005
+    page_bytes: int = 8_000
+    inflate: int = 50
+
+
+class Fixtures:
+    """The fixture web server, started once for the whole suite."""
+
+    def __init__(self, config: SuiteConfig) -> None:
+        from benchmarks.fixture_server import start_fixture_server
+
+        self.server, self.sites, self.base_url = start_fixture_server(
+            companies=config.companies, page_bytes=config.page_bytes, latency=config.server_latency
+        )
+
+    def lead_tasks(self, count: int) -> list[str]:
+        return [f"Prospect {url} and summarise the company." for url in self.sites.seeds(self.base_url, count)]
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _lead_agent(config: SuiteConfig):
+    from agents.registry import create_agent
+    from benchmarks.fake_llm import ScriptedRunner
+
+    runner = ScriptedRunner(
+        first_token_latency=config.model_latency, tokens_per_second=config.model_tokens_per_second
+    )
+    return create_agent("lead/openai", runner=runner, use_llm_cache=False, use_lead_store=False), runner
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+def bench_single_lead(config: SuiteConfig, fixtures: Fixtures) -> dict:
+    agent, runner = _lead_agent(config)
+    latencies = []
+    for task in fixtures.lead_tasks(config.leads):
+        started = time.perf_counter()
+        agent.process_lead_request(task)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "tool_calls": runner.tool_calls,
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+    }
+
+
+def bench_batch(config: SuiteConfig, fixtures: Fixtures) -> dict:
+    agent, _ = _lead_agent(config)
+    tasks = fixtures.lead_tasks(config.leads)
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        output_path = os.path.join(directory, "batch.jsonl")
+        # No token budget: the fake model is not the provider being protected.
+        stats = asyncio.run(
+            agent.aprocess_lead_batch(tasks, output_path, concurrency=config.concurrency, tokens_per_minute=10**9)
+        )
+        seconds = time.perf_counter() - started
+    return {
+        "tasks": len(tasks),
+        "succeeded": stats.get("succeeded"),
+        "failed": stats.get("failed"),
+        "seconds": round(seconds, 3),
+        "tasks_per_second": round(len(tasks) / seconds, 2),
+    }
+
+
+def _crawl(fixtures: Fixtures, seeds: list[str]) -> tuple[int, int, float, dict]:
+    from agents.lead_agent.tools.crawler import CrawlConfig, CrawlEngine, CrawlStats
+
+    pages = 0
+    served = fixtures.sites.bytes_served
+    stats = CrawlStats()
+    crawl_config = CrawlConfig(
+        max_depth=1,
+        max_pages_per_domain=fixtures.sites.pages_per_site(),
+        # One host serves every site; see ``ISOLATED_ENV``.
+        host_rate=0,
+        per_host_concurrency=32,
+    )
+    with CrawlEngine(crawl_config) as engine:
+        started = time.perf_counter()
+        for result in engine.crawl(seeds, stats=stats):
+            pages += len(result.get("pages_crawled", ()))
+        seconds = time.perf_counter() - started
+    return pages, fixtures.sites.bytes_served - served, seconds, stats.to_dict()
+
+
+def bench_crawl(config: SuiteConfig, fixtures: Fixtures) -> dict:
+    pages, served, seconds, stats = _crawl(fixtures, fixtures.sites.seeds(fixtures.base_url))
+    return {
+        "domains": config.companies,
+        "pages": pages,
+        "seconds": round(seconds, 3),
+        "pages_per_second": round(pages / seconds, 1),
+        "mb_per_second": round(served / seconds / 1e6, 2),
+        "block_rate": stats["block_rate"],
+    }
+
+
+def bench_extraction(config: SuiteConfig, fixtures: Fixtures) -> dict:
+    from benchmarks.bench_extractor import run as run_extractor
+
+    totals = run_extractor(inflate=config.inflate, repeat=3)["totals"]
+    return {
+        "bytes": totals["streaming"]["bytes"],
+        "mb_per_second": round(totals["streaming"]["mb_per_second"], 2),
+        "soup_mb_per_second": round(totals["soup"]["mb_per_second"], 2),
+    }
+
+
+def bench_memory(config: SuiteConfig, fixtures: Fixtures) -> dict:
+    seeds = fixtures.sites.seeds(fixtures.base_url, max(1, config.companies // 4))
+    tracemalloc.start()
+    try:
+        pages, _, _, _ = _crawl(fixtures, seeds)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"pages": pages, "peak_traced_bytes": peak, "max_rss_bytes": _max_rss_bytes()}
+
+
+def _max_rss_bytes() -> int:
+    # ``ru_maxrss`` is in kilobytes on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+SCENARIOS: dict[str, Callable[[SuiteConfig, Fixtures], dict]] = {
+    "single_lead": bench_single_lead,
+    "batch": bench_batch,
+    "crawl": bench_crawl,
+    "extraction": bench_extraction,
+    "memory": bench_memory,
+}
+
+
+# ---------------------------------------------------------------------------
+# Running and comparing
+# ---------------------------------------------------------------------------
+def _median(runs: list[dict]) -> dict:
+    """Per-metric median of repeated runs; non-numeric values from the first run."""
+
+    merged = dict(runs[0])
+    for key, value in runs[0].items():
+        if isinstance(value, bool) or value is None:
+            continue
+        if isinstance(value, int):
+            merged[key] = statistics.median_low(run[key] for run in runs)
+        elif isinstance(value, float):
+            merged[key] = round(statistics.median(run[key] for run in runs), 3)
+    return merged
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_suite(config: SuiteConfig, scenarios: list[str] | None = None, repeat: int = 1) -> dict:
+    """Run ``scenarios`` (all by default) ``repeat`` times and return the report.
+
+    A scenario whose dependencies are missing (e.g. the agent SDK) is
+    reported as ``{"skipped": reason}`` rather than failing the suite.
+    """
+
+    for name, value in ISOLATED_ENV.items():
+        os.environ[name] = value
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "config": vars(config),
+        },
+        "scenarios": {},
+    }
+    fixtures = Fixtures(config)
+    try:
+        for name in scenarios or SCENARIOS:
+            try:
+                runs = [SCENARIOS[name](config, fixtures) for _ in range(repeat)]
+            except ImportError as e:
+                report["scenarios"][name] = {"skipped": f"missing dependency: {e.name or e}"}
+                continue
+            report["scenarios"][name] = _median(runs)
+    finally:
+        fixtures.close()
+    return report
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list[dict]:
+    """Gated metrics of ``current`` that are worse than ``baseline`` by more than ``threshold``.
+
+    ``threshold`` is a fraction of the baseline value (``0.1`` = 10 %).
+    Scenarios skipped or missing in either report are not compared.
+    """
+
+    regressions = []
+    for scenario, metrics in GATED_METRICS.items():
+        before = baseline.get("scenarios", {}).get(scenario, {})
+        after = current.get("scenarios", {}).get(scenario, {})
+        for metric, better in metrics.items():
+            if not before.get(metric) or metric not in after:
+                continue
+            change = (after[metric] - before[metric]) / before[metric]
+            if (change < -threshold) if better == HIGHER else (change > threshold):
+                regressions.append(
+                    {
+                        "scenario": scenario,
+                        "metric": metric,
+                        "baseline": before[metric],
+                        "current": after[metric],
+                        "change": round(change, 4),
+                    }
+                )
+    return regressions
+
+
+def _print_report(report: dict) -> None:
+    for name, metrics in report["scenarios"].items():
+        print(f"{name:<12} " + "  ".join(f"{key}={value}" for key, value in metrics.items()))
+
+
+def _print_regressions(regressions: list[dict], threshold: float) -> None:
+    if not regressions:
+        print(f"No regressions beyond {threshold:.0%}.")
+        return
+    for r in regressions:
+        print(
+            f"REGRESSION {r['scenario']}.{r['metric']}: {r['baseline']} -> {r['current']} "
+            f"({r['change']:+.1%}, threshold {threshold:.0%})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the scenarios and write a JSON report")
+    run.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these (repeatable)")
+    run.add_argument("--repeat", type=int, default=1, help="runs per scenario; the median is reported")
+    run.add_argument("--output", help="report path (defaults to .cache/bench/<timestamp>.json)")
+    run.add_argument("--baseline", help="earlier report to check for regressions")
+    run.add_argument("--threshold", type=float, default=0.1, help="allowed relative regression (0.1 = 10%%)")
+    for option, value in vars(SuiteConfig()).items():
+        run.add_argument(f"--{option.replace('_', '-')}", type=type(value), default=value)
+    diff = commands.add_parser("compare", help="compare two reports")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        baseline = json.loads(Path(args.baseline).read_text())
+        current = json.loads(Path(args.current).read_text())
+    else:
+        config = SuiteConfig(**{option: getattr(args, option) for option in vars(SuiteConfig())})
+        current = run_suite(config, args.scenario, args.repeat)
+        _print_report(current)
+        output = Path(args.output or f".cache/bench/{current['meta']['timestamp'].replace(':', '')}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(current, indent=2, sort_keys=True))
+        print(f"Report written to {output}")
+        if not args.baseline:
+            return
+        baseline = json.loads(Path(args.baseline).read_text())
+
+    regressions = compare(baseline, current, args.threshold)
+    _print_regressions(regressions, args.threshold)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
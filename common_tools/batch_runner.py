@@ -0,0 +1,299 @@
+"""Rate-limit aware batch execution of agent tasks.
+
+:func:`run_batch` drives an async ``run_one`` callable over many tasks with a
+bounded number of concurrent calls, writing every finished task to a JSONL
+file as soon as it completes.  Re-running the same batch against the same file
+skips tasks that already succeeded, so a crash part-way through a large batch
+only costs the tasks that were in flight.
+
+Two mechanisms keep the batch inside the provider's limits:
+
+* :class:`TokenBudget` reserves an estimated number of tokens per call from a
+  tokens-per-minute bucket before the call starts and settles the difference
+  once the real usage is known.
+* :class:`AdaptiveConcurrency` halves the number of concurrent calls and pauses
+  every worker when the provider answers ``429 Too Many Requests``, then grows
+  back one slot at a time as calls succeed.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+
+from . import tracing
+
+
+@dataclass
+class TaskOutcome:
+    """What ``run_one`` returns for a single task."""
+
+    output: object
+    tokens: int | None = None
+
+
+def task_id_for(task: str) -> str:
+    """Stable identifier used to recognise a task when resuming a batch."""
+
+    return hashlib.sha1(task.encode("utf-8")).hexdigest()[:16]
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Return ``True`` for provider errors that signal HTTP 429."""
+
+    if getattr(error, "status_code", None) == 429 or getattr(error, "status", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return type(error).__name__ == "RateLimitError"
+
+
+class TokenBudget:
+    """Token bucket refilled at ``tokens_per_minute``.
+
+    Reservations larger than the whole bucket are clamped to its capacity so a
+    single oversized task cannot block the batch forever.
+    """
+
+    def __init__(self, tokens_per_minute: int) -> None:
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def reserve(self, tokens: int) -> int:
+        """Wait until ``tokens`` are available and take them.  Returns the amount taken."""
+
+        tokens = min(float(tokens), self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._available < tokens:
+                await asyncio.sleep((tokens - self._available) / self.rate)
+                self._refill()
+            self._available -= tokens
+        return int(tokens)
+
+    def settle(self, reserved: int, actual: int | None) -> None:
+        """Return unused tokens (or charge the overrun) once usage is known."""
+
+        if actual is None:
+            return
+        self._refill()
+        self._available = min(self.capacity, self._available + reserved - actual)
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit that backs off on rate limiting (AIMD).
+
+    Parameters
+    ----------
+    maximum:
+        Upper bound on concurrent calls.
+    base_delay, max_delay:
+        Range of the exponential, jittered pause applied after a ``429``.
+    """
+
+    def __init__(self, maximum: int, base_delay: float = 1.0, max_delay: float = 60.0) -> None:
+        self.maximum = maximum
+        self.limit = maximum
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._active = 0
+        self._successes = 0
+        self._consecutive_limits = 0
+        self._resume_at = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            while True:
+                pause = self._resume_at - time.monotonic()
+                if pause > 0:
+                    self._condition.release()
+                    try:
+                        await asyncio.sleep(pause)
+                    finally:
+                        await self._condition.acquire()
+                    continue
+                if self._active < self.limit:
+                    self._active += 1
+                    return
+                await self._condition.wait()
+
+    async def release(self, rate_limited: bool = False) -> float:
+        """Free a slot; returns the pause applied if the call was rate limited."""
+
+        async with self._condition:
+            self._active -= 1
+            pause = 0.0
+            if rate_limited:
+                self._consecutive_limits += 1
+                self._successes = 0
+                self.limit = max(1, self.limit // 2)
+                pause = min(self.max_delay, self.base_delay * 2 ** (self._consecutive_limits - 1))
+                pause *= random.uniform(0.5, 1.0)
+                self._resume_at = max(self._resume_at, time.monotonic() + pause)
+            else:
+                self._consecutive_limits = 0
+                self._successes += 1
+                if self.limit < self.maximum and self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+            return pause
+
+
+def load_completed(output_path: str) -> set[str]:
+    """Return the ids of tasks already recorded as successful in ``output_path``."""
+
+    completed: set[str] = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave a truncated final line; that task reruns.
+                continue
+            if record.get("status") == "success":
+                completed.add(record["id"])
+    return completed
+
+
+async def run_batch(
+    tasks: Iterable[str | tuple[str, str]],
+    run_one: Callable[[str], Awaitable[TaskOutcome]],
+    output_path: str,
+    concurrency: int = 8,
+    tokens_per_minute: int | None = None,
+    estimate_tokens: Callable[[str], int] | None = None,
+    max_attempts: int = 5,
+) -> dict:
+    """Run ``run_one`` over ``tasks`` and append each result to ``output_path``.
+
+    Parameters
+    ----------
+    tasks:
+        Task strings, or ``(task_id, task)`` pairs when the caller has its own
+        identifiers.  Otherwise the id is derived from the task text.
+    run_one:
+        Coroutine function executing a single task.
+    output_path:
+        JSONL file receiving one record per finished task.  Existing successful
+        records are skipped, which is what makes a batch resumable.
+    concurrency:
+        Maximum number of tasks in flight.
+    tokens_per_minute:
+        Optional token budget shared by all workers.
+    estimate_tokens:
+        Token estimate reserved for a task before it runs.  Defaults to a
+        rough characters/4 prompt estimate plus a completion allowance.
+    max_attempts:
+        How many times a rate-limited task is tried before it is recorded as
+        an error.
+
+    Returns
+    -------
+    dict
+        Counts of ``succeeded``, ``failed``, ``skipped`` and ``rate_limited``
+        events for this invocation.
+    """
+
+    estimate_tokens = estimate_tokens or (lambda task: len(task) // 4 + 1000)
+    completed = load_completed(output_path)
+    budget = TokenBudget(tokens_per_minute) if tokens_per_minute else None
+    limiter = AdaptiveConcurrency(concurrency)
+    stats = {"succeeded": 0, "failed": 0, "skipped": 0, "rate_limited": 0}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    output = open(output_path, "a+", encoding="utf-8")
+    if output.tell():
+        # Start on a fresh line after a record truncated by a crash, so the
+        # first new record is not glued onto it.
+        output.seek(output.tell() - 1)
+        if output.read(1) != "\n":
+            output.write("\n")
+
+    def write(record: dict) -> None:
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+
+    async def execute(task_id: str, task: str) -> None:
+        started = time.monotonic()
+        for attempt in range(1, max_attempts + 1):
+            ready = time.time()
+            reserved = await budget.reserve(estimate_tokens(task)) if budget else 0
+            await limiter.acquire()
+            try:
+                # Time spent waiting for tokens and a slot shows up as queue time.
+                with tracing.span("batch.task", queued_at=ready, task_id=task_id, attempt=attempt):
+                    outcome = await run_one(task)
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                await limiter.release(rate_limited=rate_limited)
+                if budget:
+                    budget.settle(reserved, 0)
+                if rate_limited and attempt < max_attempts:
+                    stats["rate_limited"] += 1
+                    continue
+                stats["failed"] += 1
+                write({"id": task_id, "task": task, "status": "error", "error": str(e), "attempts": attempt})
+                return
+            await limiter.release()
+            if budget:
+                budget.settle(reserved, outcome.tokens)
+            stats["succeeded"] += 1
+            write(
+                {
+                    "id": task_id,
+                    "task": task,
+                    "status": "success",
+                    "output": outcome.output,
+                    "tokens": outcome.tokens,
+                    "attempts": attempt,
+                    "seconds": round(time.monotonic() - started, 3),
+                }
+            )
+            return
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                await execute(*item)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        # Feeding through a bounded queue keeps memory flat for huge batches.
+        for item in tasks:
+            task_id, task = item if isinstance(item, tuple) else (task_id_for(item), item)
+            if task_id in completed:
+                stats["skipped"] += 1
+                continue
+            await queue.put((task_id, task))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        output.close()
+    return stats
@@ -0,0 +1,146 @@
+"""Staged async pipelines connected by bounded queues.
+
+:func:`run_pipeline` pushes items from a source through a chain of
+:class:`Stage` objects.  Each stage runs its own pool of ``concurrency``
+workers and hands results to the next stage through an ``asyncio.Queue`` of
+``queue_size`` items.  A slow stage therefore fills its input queue and blocks
+the stages feeding it (backpressure) instead of letting work pile up in
+memory, while every stage keeps working on whatever it has.  Once the
+pipeline is full, throughput is set by the slowest stage (its per-item
+latency divided by its concurrency), not by the sum of all stage latencies.
+
+Each stage function is a coroutine taking one item.  Whatever it returns is
+passed on (the last stage's results are discarded) and ``None`` drops the
+item.  An exception is logged and counted; it drops the item unless the stage
+has an ``on_error`` handler, whose return value is passed on instead.
+Per-stage counters and busy time are returned so a bottleneck stage is easy
+to spot.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable, Sequence
+from dataclasses import dataclass
+
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+@dataclass
+class Stage:
+    """One step of a pipeline.
+
+    Parameters
+    ----------
+    name:
+        Used in statistics, logs and ``pipeline.<name>`` trace spans.
+    fn:
+        Coroutine function applied to each item.
+    concurrency:
+        Number of items this stage works on at once.
+    queue_size:
+        Capacity of the queue in front of this stage.  Defaults to twice the
+        concurrency, enough to keep every worker busy without buffering much.
+    on_error:
+        Called with the item and the exception when ``fn`` raises.  Its
+        return value is passed on like a result of ``fn``.
+    """
+
+    name: str
+    fn: Callable[[object], Awaitable[object]]
+    concurrency: int = 1
+    queue_size: int | None = None
+    on_error: Callable[[object, Exception], object] | None = None
+
+
+async def _iterate(source: Iterable | AsyncIterable):
+    if isinstance(source, AsyncIterable):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
+
+
+async def run_pipeline(source: Iterable | AsyncIterable, stages: Sequence[Stage]) -> dict:
+    """Run every item of ``source`` through ``stages`` and return statistics.
+
+    Returns
+    -------
+    dict
+        ``seconds`` of wall time, the number of items ``fed`` from the source,
+        and per stage (keyed by name) the ``processed``, ``dropped`` and
+        ``failed`` counts plus ``busy_seconds``, the summed time its workers
+        spent inside ``fn``.
+    """
+
+    if not stages:
+        raise ValueError("a pipeline needs at least one stage")
+    queues = [asyncio.Queue(maxsize=stage.queue_size or 2 * stage.concurrency) for stage in stages]
+    stats = {
+        stage.name: {"processed": 0, "dropped": 0, "failed": 0, "busy_seconds": 0.0} for stage in stages
+    }
+    started = time.monotonic()
+
+    async def worker(index: int) -> None:
+        stage, inbox = stages[index], queues[index]
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        counters = stats[stage.name]
+        while True:
+            item, queued_at = await inbox.get()
+            if item is _END:
+                return
+            begin = time.monotonic()
+            try:
+                with tracing.span(f"pipeline.{stage.name}", "pipeline", queued_at=queued_at):
+                    result = await stage.fn(item)
+            except Exception as e:
+                counters["failed"] += 1
+                logger.warning("Pipeline stage %s failed on %r: %s", stage.name, item, e)
+                if stage.on_error is None:
+                    continue
+                result = stage.on_error(item, e)
+            else:
+                counters["processed"] += 1
+            finally:
+                counters["busy_seconds"] += time.monotonic() - begin
+            if outbox is None:
+                continue
+            if result is None:
+                counters["dropped"] += 1
+            else:
+                # Blocks while the next stage is saturated: this is the backpressure.
+                await outbox.put((result, time.time()))
+
+    async def run_stage(index: int) -> None:
+        workers = [asyncio.create_task(worker(index)) for _ in range(stages[index].concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        # Every worker of this stage has finished, so nothing more will be
+        # put downstream; tell the next stage's workers to stop.
+        if index + 1 < len(stages):
+            for _ in range(stages[index + 1].concurrency):
+                await queues[index + 1].put((_END, None))
+
+    runners = [asyncio.create_task(run_stage(i)) for i in range(len(stages))]
+    fed = 0
+    try:
+        async for item in _iterate(source):
+            await queues[0].put((item, time.time()))
+            fed += 1
+        for _ in range(stages[0].concurrency):
+            await queues[0].put((_END, None))
+        await asyncio.gather(*runners)
+    finally:
+        for task in runners:
+            task.cancel()
+    for counters in stats.values():
+        counters["busy_seconds"] = round(counters["busy_seconds"], 3)
+    return {"seconds": round(time.monotonic() - started, 3), "fed": fed, "stages": stats}
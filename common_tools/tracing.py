@@ -0,0 +1,565 @@
+"""Structured tracing for agent runs, model calls, tool calls and HTTP fetches.
+
+Every unit of work is recorded as a :class:`Span` with its wall time, the time
+it spent queued before starting, and attributes such as the model, prompt and
+completion tokens, estimated cost, bytes fetched and cache status.  Spans nest
+through a context variable, so a tool call made while the model is running
+becomes a child of that model span, and the tool's HTTP fetches children of
+the tool.
+
+A ``model`` span covers a whole agent run, not a single model response: the
+SDKs drive the model-tool loop internally, so one span holds every response
+of the run, the tool calls made between them, and the run's summed token
+usage.
+
+Finished spans go to the exporters configured with ``TRACE_EXPORTER`` in
+:mod:`config.settings`:
+
+``jsonl``
+    One JSON object per span appended to ``TRACE_PATH``.
+``otel``
+    Re-emitted through the OpenTelemetry API (``opentelemetry-api`` and a
+    configured tracer provider are required), preserving the span hierarchy.
+
+Both can be combined (``jsonl,otel``); an empty value records nothing.  The
+JSONL file can be summarised with::
+
+    python -m common_tools.tracing summary .cache/traces.jsonl
+
+and ``prompt-cache`` reports how many prompt tokens the providers served
+from their prompt caches, per run and per prompt prefix.
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import math
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from config import settings
+
+
+# ---------------------------------------------------------------------------
+# Model prices
+# ---------------------------------------------------------------------------
+# USD per million (prompt, completion) tokens, used to estimate run cost.
+# Models missing from the table are traced without a cost.
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+# USD per million prompt tokens served from the provider's prompt cache.
+# Models missing here are charged the full prompt price for cached tokens.
+CACHED_PROMPT_PRICES = {
+    "gpt-4o": 1.25,
+    "gpt-4o-mini": 0.075,
+    "gpt-4.1": 0.50,
+    "gpt-4.1-mini": 0.10,
+    "gemini-1.5-flash": 0.01875,
+    "gemini-1.5-pro": 0.3125,
+}
+
+
+def estimate_cost(
+    model: str | None, prompt_tokens: int, completion_tokens: int, cached_prompt_tokens: int = 0
+) -> float | None:
+    """Estimated USD cost of a call, or ``None`` for unknown models.
+
+    ``cached_prompt_tokens`` is the part of ``prompt_tokens`` the provider
+    served from its prompt cache.
+    """
+
+    if not model:
+        return None
+    name = str(model).split("/")[-1]
+    prices = MODEL_PRICES.get(name)
+    if prices is None:
+        return None
+    cached = min(cached_prompt_tokens, prompt_tokens)
+    cached_price = CACHED_PROMPT_PRICES.get(name, prices[0])
+    return ((prompt_tokens - cached) * prices[0] + cached * cached_price + completion_tokens * prices[1]) / 1_000_000
+
+
+# ---------------------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------------------
+@dataclass(slots=True)
+class Span:
+    """One timed unit of work.
+
+    ``kind`` is one of ``"agent"``, ``"model"`` (the model-tool loop of one
+    agent run), ``"tool"``, ``"http"`` or ``"internal"``.  Times are epoch seconds; ``queue_ms`` is how long the work
+    waited between being scheduled and starting, when known.
+    """
+
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_time: float = 0.0
+    end_time: float | None = None
+    queue_ms: float | None = None
+    attributes: dict = field(default_factory=dict)
+    status: str = "ok"
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) * 1000
+
+    def set(self, **attributes) -> None:
+        """Attach attributes; ``None`` values are ignored."""
+
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def add_tokens(
+        self, prompt_tokens: int | None, completion_tokens: int | None, cached_prompt_tokens: int | None = None
+    ) -> None:
+        """Accumulate token usage and the estimated cost for the span's model.
+
+        ``cached_prompt_tokens`` (part of ``prompt_tokens``) is tracked
+        separately so prompt-cache effectiveness can be reported.
+        """
+
+        if prompt_tokens is None and completion_tokens is None:
+            return
+        prompt = self.attributes.get("prompt_tokens", 0) + (prompt_tokens or 0)
+        completion = self.attributes.get("completion_tokens", 0) + (completion_tokens or 0)
+        cached = self.attributes.get("cached_prompt_tokens", 0) + (cached_prompt_tokens or 0)
+        self.set(
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            cached_prompt_tokens=cached,
+            cost_usd=estimate_cost(self.attributes.get("model"), prompt, completion, cached),
+        )
+
+    def to_dict(self) -> dict:
+        duration = self.duration_ms
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(duration, 3) if duration is not None else None,
+            "queue_ms": round(self.queue_ms, 3) if self.queue_ms is not None else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    """The innermost open span in this context, if any."""
+
+    return _current_span.get()
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+class JsonlExporter:
+    """Append finished spans to a JSONL file, one object per line."""
+
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class OTelExporter:
+    """Mirror spans into OpenTelemetry so any OTel backend can receive them.
+
+    Uses the globally configured tracer provider unless one is passed.  OTel
+    spans are started when ours start, so parent/child links are kept.
+    """
+
+    def __init__(self, tracer_provider=None) -> None:
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("lead_content", tracer_provider=tracer_provider)
+        self._live: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._live.get(span.parent_id) if span.parent_id else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self._tracer.start_span(
+            span.name, context=context, start_time=int(span.start_time * 1e9)
+        )
+        with self._lock:
+            self._live[span.span_id] = otel_span
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            otel_span = self._live.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attribute("span.kind", span.kind)
+        if span.queue_ms is not None:
+            otel_span.set_attribute("queue_ms", span.queue_ms)
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(key, value)
+        if span.status == "error":
+            from opentelemetry.trace import Status, StatusCode
+
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int(span.end_time * 1e9))
+
+    def shutdown(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Tracer
+# ---------------------------------------------------------------------------
+class Tracer:
+    """Creates spans and hands finished ones to its exporters."""
+
+    def __init__(self, exporters: Iterable = ()) -> None:
+        self.exporters = list(exporters)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", queued_at: float | None = None, **attributes):
+        """Time the enclosed block as a child of the current span.
+
+        ``queued_at`` is the ``time.time()`` at which the work was scheduled;
+        the gap until the block starts is recorded as ``queue_ms``.  An
+        exception escaping the block marks the span as failed and is re-raised.
+        """
+
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_time=time.time(),
+        )
+        if queued_at is not None:
+            span.queue_ms = max(0.0, (span.start_time - queued_at) * 1000)
+        span.set(**attributes)
+        for exporter in self.exporters:
+            exporter.on_start(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # An async generator closed from a different context.
+                pass
+            span.end_time = time.time()
+            for exporter in self.exporters:
+                exporter.on_end(span)
+
+    def shutdown(self) -> None:
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+_default_tracer: Tracer | None = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer configured in :mod:`config.settings`."""
+
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            exporters = []
+            for name in filter(None, (part.strip() for part in settings.TRACE_EXPORTER.split(","))):
+                if name == "jsonl":
+                    exporters.append(JsonlExporter(settings.TRACE_PATH))
+                elif name == "otel":
+                    exporters.append(OTelExporter())
+                else:
+                    raise ValueError(f"Unknown TRACE_EXPORTER {name!r}; expected 'jsonl' or 'otel'")
+            _default_tracer = Tracer(exporters)
+        return _default_tracer
+
+
+def span(name: str, kind: str = "internal", queued_at: float | None = None, **attributes):
+    """Open a span on the default tracer; see :meth:`Tracer.span`."""
+
+    return get_tracer().span(name, kind, queued_at, **attributes)
+
+
+def traced(name: str | None = None, kind: str = "tool") -> Callable:
+    """Decorator recording every call of the function as a span.
+
+    The wrapper keeps the function's signature, so decorated tools still
+    produce the same schema for the agent frameworks.
+    """
+
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or fn.__name__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(f"{kind}.{span_name}", kind, **{kind: span_name}):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(f"{kind}.{span_name}", kind, **{kind: span_name}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+# ---------------------------------------------------------------------------
+# Token usage from SDK objects
+# ---------------------------------------------------------------------------
+def record_openai_usage(target: Span, result) -> None:
+    """Add the token usage of an OpenAI Agents SDK run result to ``target``."""
+
+    for holder in (result, getattr(result, "context_wrapper", None)):
+        usage = getattr(holder, "usage", None)
+        if usage is not None:
+            # Responses API usage reports ``input_tokens_details``, Chat
+            # Completions usage ``prompt_tokens_details``.
+            details = getattr(usage, "input_tokens_details", None) or getattr(usage, "prompt_tokens_details", None)
+            target.add_tokens(
+                getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None),
+                getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None),
+                getattr(details, "cached_tokens", None),
+            )
+            return
+
+
+def record_adk_usage(target: Span, event) -> None:
+    """Add the token usage reported on an ADK event (if any) to ``target``."""
+
+    usage = getattr(event, "usage_metadata", None)
+    if usage is not None:
+        target.add_tokens(
+            getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None),
+            getattr(usage, "cached_content_token_count", None),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Summaries
+# ---------------------------------------------------------------------------
+# The attribute that names a span's subject, per kind.
+_GROUP_BY = {"agent": "agent", "model": "model", "tool": "tool", "http": "cache_status"}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(spans: Iterable[dict]) -> dict:
+    """Latency percentiles, token totals and cost per kind and subject.
+
+    Model latency is per run and excludes the time spent in tool calls made
+    during the run, so slow tools are not blamed on the model.
+    """
+
+    spans = list(spans)
+    child_time: dict[str, float] = defaultdict(float)
+    for record in spans:
+        if record.get("parent_id") and record.get("kind") == "tool" and record.get("duration_ms"):
+            child_time[record["parent_id"]] += record["duration_ms"]
+
+    groups: dict[tuple[str, str], list[dict]] = defaultdict(list)
+    for record in spans:
+        kind = record.get("kind")
+        if kind not in _GROUP_BY or record.get("duration_ms") is None:
+            continue
+        subject = record.get("attributes", {}).get(_GROUP_BY[kind], "unknown")
+        groups[(kind, str(subject))].append(record)
+
+    report: dict[str, dict] = {}
+    for (kind, subject), records in sorted(groups.items()):
+        latencies = sorted(
+            r["duration_ms"] - (child_time[r["span_id"]] if kind == "model" else 0) for r in records
+        )
+        queued = [r["queue_ms"] for r in records if r.get("queue_ms") is not None]
+        entry = {
+            "count": len(records),
+            "errors": sum(r.get("status") == "error" for r in records),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_queue_ms": sum(queued) / len(queued) if queued else None,
+        }
+        for attribute in ("prompt_tokens", "cached_prompt_tokens", "completion_tokens", "cost_usd", "bytes_fetched"):
+            values = [r["attributes"][attribute] for r in records if attribute in r.get("attributes", {})]
+            if values:
+                entry[attribute] = sum(values)
+        if entry.get("prompt_tokens"):
+            entry["cached_ratio"] = round(entry.get("cached_prompt_tokens", 0) / entry["prompt_tokens"], 4)
+        report.setdefault(kind, {})[subject] = entry
+    return report
+
+
+def _cache_totals(records: list[dict]) -> dict:
+    prompt = sum(r["attributes"].get("prompt_tokens", 0) for r in records)
+    cached = sum(r["attributes"].get("cached_prompt_tokens", 0) for r in records)
+    cost = [r["attributes"]["cost_usd"] for r in records if "cost_usd" in r["attributes"]]
+    return {
+        "calls": len(records),
+        "prompt_tokens": prompt,
+        "cached_prompt_tokens": cached,
+        "uncached_prompt_tokens": prompt - cached,
+        "cached_ratio": round(cached / prompt, 4) if prompt else 0.0,
+        "cost_usd": sum(cost) if cost else None,
+    }
+
+
+def prompt_cache_report(spans: Iterable[dict]) -> dict:
+    """Cached versus uncached prompt tokens per run, per prompt prefix and overall.
+
+    A run is one trace; it is named after its outermost ``agent`` span.  The
+    ``prefix`` attribute of ``model`` spans (see
+    :mod:`hybrid_components.prompt_prefix`) groups calls that share the same
+    static instructions and tool schemas, which is where caching applies.
+    """
+
+    calls: dict[str, list[dict]] = defaultdict(list)
+    agents: dict[str, tuple[int, str]] = {}
+    prefixes: dict[str, list[dict]] = defaultdict(list)
+    for record in spans:
+        attributes = record.get("attributes", {})
+        if record.get("kind") == "agent" and "agent" in attributes:
+            # The outermost agent span of a trace is the one without a parent
+            # (or, failing that, the earliest).
+            rank = (0 if record.get("parent_id") is None else 1, record.get("start_time", 0))
+            if record["trace_id"] not in agents or rank < agents[record["trace_id"]][0]:
+                agents[record["trace_id"]] = (rank, attributes["agent"])
+        elif record.get("kind") == "model" and "prompt_tokens" in attributes:
+            calls[record["trace_id"]].append(record)
+            prefixes[str(attributes.get("prefix", "unknown"))].append(record)
+
+    runs = []
+    for trace_id, records in calls.items():
+        entry = {"trace_id": trace_id, "agent": agents.get(trace_id, (None, "unknown"))[1]}
+        entry.update(_cache_totals(records))
+        runs.append(entry)
+    everything = [r for records in calls.values() for r in records]
+    return {
+        "runs": runs,
+        "by_prefix": {prefix: _cache_totals(records) for prefix, records in sorted(prefixes.items())},
+        "total": _cache_totals(everything),
+    }
+
+
+def load_spans(path: str) -> Iterable[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect trace files written by the JSONL exporter.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="p50/p95/p99 latency per agent, model, tool and cache status")
+    summary.add_argument("path", nargs="?", help="trace file (defaults to TRACE_PATH)")
+    summary.add_argument("--json", action="store_true", help="print the summary as JSON")
+    prompt_cache = commands.add_parser("prompt-cache", help="cached vs uncached prompt tokens per run and prefix")
+    prompt_cache.add_argument("path", nargs="?", help="trace file (defaults to TRACE_PATH)")
+    prompt_cache.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.command == "prompt-cache":
+        _print_prompt_cache(prompt_cache_report(load_spans(args.path or settings.TRACE_PATH)), args.json)
+        return
+    report = summarize(load_spans(args.path or settings.TRACE_PATH))
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return
+    for kind, subjects in report.items():
+        print(f"{kind} (by {_GROUP_BY[kind]})")
+        for subject, entry in subjects.items():
+            line = (
+                f"  {subject:<36} n={entry['count']:<6} p50={entry['p50_ms']:9.1f} ms  "
+                f"p95={entry['p95_ms']:9.1f} ms  p99={entry['p99_ms']:9.1f} ms"
+            )
+            if entry["errors"]:
+                line += f"  errors={entry['errors']}"
+            if "cached_ratio" in entry:
+                line += f"  cached={100 * entry['cached_ratio']:.0f}%"
+            if "cost_usd" in entry:
+                line += f"  cost=${entry['cost_usd']:.4f}"
+            print(line)
+
+
+def _print_prompt_cache(report: dict, as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return
+
+    def line(label: str, entry: dict) -> str:
+        cost = f"  cost=${entry['cost_usd']:.4f}" if entry["cost_usd"] is not None else ""
+        return (
+            f"  {label:<40} calls={entry['calls']:<5} prompt={entry['prompt_tokens']:<9} "
+            f"cached={entry['cached_prompt_tokens']:<9} uncached={entry['uncached_prompt_tokens']:<9} "
+            f"({100 * entry['cached_ratio']:.0f}% cached){cost}"
+        )
+
+    print("runs")
+    for entry in report["runs"]:
+        print(line(f"{entry['agent']} {entry['trace_id'][:8]}", entry))
+    print("prefixes")
+    for prefix, entry in report["by_prefix"].items():
+        print(line(prefix, entry))
+    print(line("total", report["total"]))
+
+
+if __name__ == "__main__":
+    main()
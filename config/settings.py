@@ -9,58 +9,286 @@ Environment variables are loaded from a local ``.env`` file via
 ``python-dotenv``.  For sensitive values (API keys, project identifiers,
 database credentials, etc.) ensure that ``config/.env`` is excluded from
 version control.  See the provided ``.gitignore``.
+
+Importing this module has no side effects: the ``.env`` file is read and the
+environment parsed the first time a value is needed, through
+:func:`get_settings`, and the resulting :class:`Settings` object is cached for
+the life of the process.  ``settings.OPENAI_API_KEY`` style attribute access
+keeps working and reads from that cached object.
 """
 
 import os
-from dotenv import load_dotenv
-
+from dataclasses import dataclass, fields
+from functools import lru_cache
 
-# ---------------------------------------------------------------------------
-# Load environment variables
-# ---------------------------------------------------------------------------
-# ``load_dotenv`` will read variables from ``config/.env`` if it exists and
-# populate ``os.environ`` so ``os.getenv`` can retrieve them.  This keeps the
-# API keys and configuration values outside of the code base.
-load_dotenv()
 
 # ---------------------------------------------------------------------------
-# API Keys and Service Configuration
+# Default model names
 # ---------------------------------------------------------------------------
-
-# OpenAI configuration -------------------------------------------------------
-# The API key is required for any interaction with OpenAI models either via
-# the OpenAI SDK directly or through LiteLLM when used from Google ADK.
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# Google Cloud configuration -------------------------------------------------
-# ``GOOGLE_APPLICATION_CREDENTIALS`` should point to a service account JSON
-# key file if the default credentials are not sufficient.
-GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-# The project and location identify the Google Cloud project and region for
-# Gemini models or other services used by the ADK.
-GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
-GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
-
-# Default model names -------------------------------------------------------
 # These defaults can be overridden when constructing agents, but keeping them
-# here ensures a single place to change preferred models.
+# here ensures a single place to change preferred models.  They are plain
+# constants, so using them as default arguments does not load the environment.
 DEFAULT_OPENAI_MODEL = "gpt-4o"
 DEFAULT_GOOGLE_GEMINI_MODEL = "gemini-1.5-flash"
 
-# Additional configuration values can be defined below.  These are optional
-# and depend entirely on how you extend the agents and their tools.
-CRM_API_ENDPOINT = os.getenv("CRM_API_ENDPOINT")
-CRM_API_KEY = os.getenv("CRM_API_KEY")
+
+def _optional(environ, name: str, cast):
+    value = environ.get(name)
+    return cast(value) if value else None
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Typed view of every environment-driven setting."""
+
+    # OpenAI configuration ---------------------------------------------------
+    # The API key is required for any interaction with OpenAI models either via
+    # the OpenAI SDK directly or through LiteLLM when used from Google ADK.
+    openai_api_key: str | None = None
+
+    # Google Cloud configuration ---------------------------------------------
+    # ``GOOGLE_APPLICATION_CREDENTIALS`` should point to a service account JSON
+    # key file if the default credentials are not sufficient.  The project and
+    # location identify the Google Cloud project and region for Gemini models
+    # or other services used by the ADK.
+    google_application_credentials: str | None = None
+    google_cloud_project: str | None = None
+    google_cloud_location: str | None = None
+
+    # CRM integration ----------------------------------------------------------
+    crm_api_endpoint: str | None = None
+    crm_api_key: str | None = None
+
+    # Batch processing ---------------------------------------------------------
+    # Concurrency and token-per-minute budget used by the agents' batch entry
+    # points.  ``None`` disables token budgeting.
+    lead_batch_concurrency: int = 8
+    openai_tokens_per_minute: int | None = None
+
+    # Outreach pipeline --------------------------------------------------------
+    # Workers per stage of ``agents/outreach_pipeline.py``: website crawls,
+    # lead-qualification runs and outreach-draft runs.
+    pipeline_prospect_concurrency: int = 8
+    pipeline_qualify_concurrency: int = 4
+    pipeline_draft_concurrency: int = 4
+
+    # LLM response cache -------------------------------------------------------
+    # Final agent responses are cached on disk, keyed by model, instructions,
+    # tools and prompt.  A similarity threshold (e.g. ``0.95``) also reuses
+    # answers for near-identical prompts.  An empty path disables the cache.
+    llm_cache_path: str = ".cache/llm_cache.sqlite"
+    llm_cache_ttl: float = 24 * 3600
+    llm_cache_max_entries: int = 50_000
+    llm_cache_similarity_threshold: float | None = None
+
+    # Provider routing ---------------------------------------------------------
+    # The ``lead/routed`` and ``content/routed`` agents send each request to
+    # the backend with the lowest recent median latency.  Backends whose error
+    # rate over ``LLM_ROUTER_WINDOW`` seconds exceeds ``LLM_ROUTER_MAX_ERROR_RATE``
+    # are ejected for ``LLM_ROUTER_COOLDOWN`` seconds.  ``LLM_ROUTER_HEDGE``
+    # sends a second request to the next backend once the first exceeds its
+    # p95 latency.
+    llm_router_window: float = 300.0
+    llm_router_max_error_rate: float = 0.5
+    llm_router_cooldown: float = 30.0
+    llm_router_hedge: bool = False
+
+    # Run records --------------------------------------------------------------
+    # Agents summarise each run from its event stream, keeping the last
+    # ``RUN_RECORD_MAX_TOOLS`` tool calls with payloads capped at
+    # ``RUN_TOOL_OUTPUT_MAX_BYTES``.  Larger tool outputs are written to
+    # ``RUN_SPILL_DIR``; an empty value only truncates them.
+    run_record_max_tools: int = 32
+    run_tool_output_max_bytes: int = 4096
+    run_spill_dir: str = ".cache/run_spill"
+
+    # Google ADK sessions ------------------------------------------------------
+    # ADK agents keep conversations in a SQLite file so a ``session_id`` can be
+    # resumed across requests and process restarts.  Only recently used
+    # sessions are held in memory, up to a session count and a total size,
+    # with at most ``ADK_SESSION_MAX_EVENTS`` events each.  Sessions untouched
+    # for ``ADK_SESSION_RETENTION_SECONDS`` are deleted (0 keeps them).
+    adk_session_db_path: str = ".cache/adk_sessions.sqlite"
+    adk_session_idle_seconds: float = 900.0
+    adk_max_active_sessions: int = 1000
+    adk_max_active_session_bytes: int = 64 * 1024 * 1024
+    adk_session_max_events: int = 200
+    adk_session_retention_seconds: float = 30 * 24 * 3600.0
+
+    # Web prospector response cache -------------------------------------------
+    # Pages fetched by the prospector are cached on disk so repeated lookups and
+    # nightly re-runs only revalidate them.  An empty path disables the cache.
+    prospector_cache_path: str = ".cache/prospector.sqlite"
+    prospector_cache_ttl: float = 12 * 3600
+    prospector_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Crawler politeness -------------------------------------------------------
+    # Requests per second (and back-to-back burst) the prospector sends to any
+    # single host, and how many it may have open at once; a rate of ``0``
+    # disables the limit.  robots.txt is honoured, including ``Crawl-delay``,
+    # unless ``CRAWL_RESPECT_ROBOTS`` is off.  Fetched robots.txt files and DNS
+    # answers are reused for their TTLs in seconds.
+    crawl_host_rate: float = 1.0
+    crawl_host_burst: float = 3.0
+    crawl_host_concurrency: int = 2
+    crawl_respect_robots: bool = True
+    crawl_robots_ttl: float = 24 * 3600
+    crawl_dns_ttl: float = 300.0
+
+    # Lead store ---------------------------------------------------------------
+    # Resolved leads (canonical domains, e-mails and company names) are kept on
+    # disk; a lead seen within ``LEAD_DEDUP_WINDOW`` seconds is not prospected
+    # again.  ``LEAD_NAME_SIMILARITY`` is the near-duplicate threshold for
+    # company names.  An empty path disables the store.
+    lead_store_path: str = ".cache/leads.sqlite"
+    lead_dedup_window: float = 7 * 24 * 3600
+    lead_name_similarity: float = 0.75
+
+    # Results store ------------------------------------------------------------
+    # Every prospected lead, agent answer and pipeline record is appended to
+    # day-partitioned Parquet files under this directory (see
+    # ``agents/lead_agent/tools/results_store.py``).  Rows are written every
+    # ``RESULTS_FLUSH_ROWS`` rows or ``RESULTS_FLUSH_INTERVAL`` seconds, and a
+    # day's small files are merged once there are ``RESULTS_COMPACT_MIN_FILES``.
+    # An empty path disables the store.
+    results_store_path: str = ".cache/results"
+    results_flush_rows: int = 1000
+    results_flush_interval: float = 30.0
+    results_compact_min_files: int = 8
+
+    # Research backend ---------------------------------------------------------
+    # ``local`` searches the BM25 index at ``RESEARCH_INDEX_PATH`` (see
+    # ``agents/content_agent/tools/search_index.py``); ``mock`` returns canned
+    # results.
+    research_backend: str = "local"
+    research_index_path: str = ".cache/research_index"
+
+    # Style analyzer -----------------------------------------------------------
+    # Reference style profiles (e.g. the brand voice) built with
+    # ``python -m agents.content_agent.tools.style_analyzer build-profile``.
+    style_profile_dir: str = ".cache/style_profiles"
+
+    # Tracing and logging ------------------------------------------------------
+    # ``TRACE_EXPORTER`` is a comma separated list of ``jsonl`` and ``otel``;
+    # empty disables export.  JSONL traces are appended to ``TRACE_PATH``.
+    trace_exporter: str = ""
+    trace_path: str = ".cache/traces.jsonl"
+    log_level: str = "INFO"
+
+    @classmethod
+    def from_environ(cls, environ=None) -> "Settings":
+        """Build settings from ``environ`` (defaults to ``os.environ``)."""
+
+        env = os.environ if environ is None else environ
+        defaults = cls()
+        return cls(
+            openai_api_key=env.get("OPENAI_API_KEY"),
+            google_application_credentials=env.get("GOOGLE_APPLICATION_CREDENTIALS"),
+            google_cloud_project=env.get("GOOGLE_CLOUD_PROJECT"),
+            google_cloud_location=env.get("GOOGLE_CLOUD_LOCATION"),
+            crm_api_endpoint=env.get("CRM_API_ENDPOINT"),
+            crm_api_key=env.get("CRM_API_KEY"),
+            lead_batch_concurrency=int(env.get("LEAD_BATCH_CONCURRENCY", defaults.lead_batch_concurrency)),
+            openai_tokens_per_minute=_optional(env, "OPENAI_TOKENS_PER_MINUTE", int),
+            pipeline_prospect_concurrency=int(
+                env.get("PIPELINE_PROSPECT_CONCURRENCY", defaults.pipeline_prospect_concurrency)
+            ),
+            pipeline_qualify_concurrency=int(
+                env.get("PIPELINE_QUALIFY_CONCURRENCY", defaults.pipeline_qualify_concurrency)
+            ),
+            pipeline_draft_concurrency=int(
+                env.get("PIPELINE_DRAFT_CONCURRENCY", defaults.pipeline_draft_concurrency)
+            ),
+            llm_cache_path=env.get("LLM_CACHE_PATH", defaults.llm_cache_path),
+            llm_cache_ttl=float(env.get("LLM_CACHE_TTL", defaults.llm_cache_ttl)),
+            llm_cache_max_entries=int(env.get("LLM_CACHE_MAX_ENTRIES", defaults.llm_cache_max_entries)),
+            llm_cache_similarity_threshold=_optional(env, "LLM_CACHE_SIMILARITY_THRESHOLD", float),
+            llm_router_window=float(env.get("LLM_ROUTER_WINDOW", defaults.llm_router_window)),
+            llm_router_max_error_rate=float(
+                env.get("LLM_ROUTER_MAX_ERROR_RATE", defaults.llm_router_max_error_rate)
+            ),
+            llm_router_cooldown=float(env.get("LLM_ROUTER_COOLDOWN", defaults.llm_router_cooldown)),
+            llm_router_hedge=env.get("LLM_ROUTER_HEDGE", "").strip().lower() in ("1", "true", "yes", "on"),
+            run_record_max_tools=int(env.get("RUN_RECORD_MAX_TOOLS", defaults.run_record_max_tools)),
+            run_tool_output_max_bytes=int(
+                env.get("RUN_TOOL_OUTPUT_MAX_BYTES", defaults.run_tool_output_max_bytes)
+            ),
+            run_spill_dir=env.get("RUN_SPILL_DIR", defaults.run_spill_dir),
+            adk_session_db_path=env.get("ADK_SESSION_DB_PATH", defaults.adk_session_db_path),
+            adk_session_idle_seconds=float(
+                env.get("ADK_SESSION_IDLE_SECONDS", defaults.adk_session_idle_seconds)
+            ),
+            adk_max_active_sessions=int(env.get("ADK_MAX_ACTIVE_SESSIONS", defaults.adk_max_active_sessions)),
+            adk_max_active_session_bytes=int(
+                env.get("ADK_MAX_ACTIVE_SESSION_BYTES", defaults.adk_max_active_session_bytes)
+            ),
+            adk_session_max_events=int(env.get("ADK_SESSION_MAX_EVENTS", defaults.adk_session_max_events)),
+            adk_session_retention_seconds=float(
+                env.get("ADK_SESSION_RETENTION_SECONDS", defaults.adk_session_retention_seconds)
+            ),
+            prospector_cache_path=env.get("PROSPECTOR_CACHE_PATH", defaults.prospector_cache_path),
+            prospector_cache_ttl=float(env.get("PROSPECTOR_CACHE_TTL", defaults.prospector_cache_ttl)),
+            prospector_cache_max_bytes=int(
+                env.get("PROSPECTOR_CACHE_MAX_BYTES", defaults.prospector_cache_max_bytes)
+            ),
+            crawl_host_rate=float(env.get("CRAWL_HOST_RATE", defaults.crawl_host_rate)),
+            crawl_host_burst=float(env.get("CRAWL_HOST_BURST", defaults.crawl_host_burst)),
+            crawl_host_concurrency=int(env.get("CRAWL_HOST_CONCURRENCY", defaults.crawl_host_concurrency)),
+            crawl_respect_robots=env.get("CRAWL_RESPECT_ROBOTS", "1").strip().lower()
+            not in ("0", "false", "no", "off"),
+            crawl_robots_ttl=float(env.get("CRAWL_ROBOTS_TTL", defaults.crawl_robots_ttl)),
+            crawl_dns_ttl=float(env.get("CRAWL_DNS_TTL", defaults.crawl_dns_ttl)),
+            lead_store_path=env.get("LEAD_STORE_PATH", defaults.lead_store_path),
+            lead_dedup_window=float(env.get("LEAD_DEDUP_WINDOW", defaults.lead_dedup_window)),
+            lead_name_similarity=float(env.get("LEAD_NAME_SIMILARITY", defaults.lead_name_similarity)),
+            results_store_path=env.get("RESULTS_STORE_PATH", defaults.results_store_path),
+            results_flush_rows=int(env.get("RESULTS_FLUSH_ROWS", defaults.results_flush_rows)),
+            results_flush_interval=float(env.get("RESULTS_FLUSH_INTERVAL", defaults.results_flush_interval)),
+            results_compact_min_files=int(
+                env.get("RESULTS_COMPACT_MIN_FILES", defaults.results_compact_min_files)
+            ),
+            research_backend=env.get("RESEARCH_BACKEND", defaults.research_backend),
+            research_index_path=env.get("RESEARCH_INDEX_PATH", defaults.research_index_path),
+            style_profile_dir=env.get("STYLE_PROFILE_DIR", defaults.style_profile_dir),
+            trace_exporter=env.get("TRACE_EXPORTER", defaults.trace_exporter),
+            trace_path=env.get("TRACE_PATH", defaults.trace_path),
+            log_level=env.get("LOG_LEVEL", defaults.log_level),
+        )
+
+    def warnings(self) -> list[str]:
+        """Messages about missing essential keys, for the caller to report."""
+
+        messages = []
+        if not self.openai_api_key:
+            messages.append("Warning: OPENAI_API_KEY not found in .env file.")
+        if not self.google_cloud_project:
+            messages.append("Warning: GOOGLE_CLOUD_PROJECT not found in .env file.")
+        return messages
 
 
 # ---------------------------------------------------------------------------
-# Simple validation / warnings
+# Load environment variables
 # ---------------------------------------------------------------------------
-# If essential keys are missing, print warnings so the developer is aware when
-# running the code.  You could also raise exceptions here for stricter
-# enforcement if desired.
-if not OPENAI_API_KEY:
-    print("Warning: OPENAI_API_KEY not found in .env file.")
-if not GOOGLE_CLOUD_PROJECT:
-    print("Warning: GOOGLE_CLOUD_PROJECT not found in .env file.")
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load ``.env`` once and return the cached :class:`Settings`.
+
+    ``load_dotenv`` will read variables from ``config/.env`` if it exists and
+    populate ``os.environ``.  It does not override variables that are already
+    set, so real environment variables win over the file.
+    """
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return Settings.from_environ()
+
+
+_ATTRIBUTE_NAMES = {field.name.upper(): field.name for field in fields(Settings)}
+
 
+def __getattr__(name: str):
+    # Module-level access such as ``settings.OPENAI_API_KEY`` (PEP 562).
+    if name in _ATTRIBUTE_NAMES:
+        return getattr(get_settings(), _ATTRIBUTE_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,63 @@
+"""Long-lived ADK runner shared by every request an agent handles."""
+
+import threading
+
+from config import settings
+from .session_store import PersistentSessionService, SQLiteSessionBackend
+
+
+_default_session_service: PersistentSessionService | None = None
+_default_session_service_lock = threading.Lock()
+
+
+def get_default_session_service() -> PersistentSessionService:
+    """Return the process-wide session service configured in :mod:`config.settings`."""
+
+    global _default_session_service
+    with _default_session_service_lock:
+        if _default_session_service is None:
+            _default_session_service = PersistentSessionService(
+                SQLiteSessionBackend(settings.ADK_SESSION_DB_PATH),
+                idle_timeout=settings.ADK_SESSION_IDLE_SECONDS,
+                max_active_sessions=settings.ADK_MAX_ACTIVE_SESSIONS,
+                max_active_bytes=settings.ADK_MAX_ACTIVE_SESSION_BYTES,
+                max_session_events=settings.ADK_SESSION_MAX_EVENTS,
+                retention=settings.ADK_SESSION_RETENTION_SECONDS or None,
+            )
+        return _default_session_service
+
+
+class AdkRuntime:
+    """Owns one ``Runner`` and session service for the lifetime of an agent.
+
+    Building these per request both costs setup time and, with an in-memory
+    session service, loses every earlier turn.  Keeping them here lets a
+    follow-up request with the same ``session_id`` continue the conversation
+    from the stored session rather than replaying its history.
+    """
+
+    def __init__(self, app_name: str, agent, session_service: PersistentSessionService | None = None) -> None:
+        from google.adk.runners import Runner
+
+        self.app_name = app_name
+        self.session_service = session_service or get_default_session_service()
+        self.runner = Runner(app_name=app_name, agent=agent, session_service=self.session_service)
+
+    def ensure_session(self, user_id: str, session_id: str | None = None) -> str:
+        """Return ``session_id``, creating the session if it does not exist yet."""
+
+        if session_id:
+            session = self.session_service.get_session(
+                user_id=user_id, session_id=session_id, app_name=self.app_name
+            )
+            if session:
+                return session_id
+        session = self.session_service.create_session(
+            user_id=user_id, session_id=session_id, app_name=self.app_name
+        )
+        return session.session_id
+
+    def run_once(self, session_id: str, query: str):
+        """Run one turn and return the runner's event iterator."""
+
+        return self.runner.run_once(session_id=session_id, query=query)
@@ -0,0 +1,344 @@
+"""Response cache shared by the OpenAI SDK and Google ADK agents.
+
+Many of our prompts repeat almost verbatim ("Create a blog_post_outline about
+X", the same company lookup for the tenth time), and every one of them used
+to be a full, paid model round-trip.  :class:`LLMResponseCache` answers them
+from a local SQLite store in two tiers:
+
+* **exact** - the key is a hash of the model, the agent instructions, the tool
+  names and the prompt, so any change to the agent configuration misses;
+* **similar** (optional) - prompts for the same model/instructions/tools are
+  embedded locally with hashed character n-grams and a cached answer is
+  reused when the cosine similarity reaches ``similarity_threshold``.
+
+Entries expire after ``ttl`` seconds and the least recently used ones are
+evicted beyond ``max_entries``.  Hit rates are tracked per agent name.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from config import settings
+
+if TYPE_CHECKING:  # pragma: no cover - numpy is imported by the similarity tier only
+    import numpy as np
+
+
+EMBEDDING_DIM = 512
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_responses_accessed_at ON llm_responses (accessed_at);
+CREATE INDEX IF NOT EXISTS llm_responses_created_at ON llm_responses (created_at);
+"""
+
+# Expired entries are swept on every n-th store rather than on each one.
+_EXPIRY_SWEEP_INTERVAL = 100
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _scope(model: str, instructions: str, tools: Iterable[str]) -> str:
+    return _scope_digest(str(model), instructions, tuple(tools))
+
+
+@functools.lru_cache(maxsize=256)
+def _scope_digest(model: str, instructions: str, tools: tuple[str, ...]) -> str:
+    # Agents pass the same (long) instructions on every lookup and store, so
+    # the digest is computed once per agent configuration.
+    payload = json.dumps([model, instructions, list(tools)], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def embed(text: str, dim: int = EMBEDDING_DIM) -> "np.ndarray":
+    """Embed ``text`` as an L2-normalised ``float32`` vector of hashed character trigrams.
+
+    Cheap and deterministic.  It captures surface similarity (reworded or
+    re-cased prompts, a changed word or two), which is exactly what repeated
+    template prompts differ by.
+    """
+
+    # Imported only when used: numpy is slow to import and the exact tier
+    # does not need it.
+    import numpy as np
+
+    normalized = f" {_WHITESPACE.sub(' ', text.lower()).strip()} "
+    hashes = np.fromiter(
+        (zlib.crc32(normalized[i:i + 3].encode("utf-8")) for i in range(len(normalized) - 2)),
+        dtype=np.uint32,
+        count=max(0, len(normalized) - 2),
+    )
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+    vector = np.zeros(dim, dtype=np.float32)
+    np.add.at(vector, hashes % dim, signs)
+    norm = float(np.linalg.norm(vector)) or 1.0
+    return vector / norm
+
+
+class _ScopeIndex:
+    """Embeddings of one scope as rows of a matrix, scored with one product.
+
+    Rows are appended into spare capacity and removed by moving the last row
+    into the gap, so :meth:`snapshot` can hand out a view plus a copy of the
+    key list and the scan runs without the cache lock.  A row moved after a
+    snapshot was taken is caught by re-checking the winner (:meth:`score`).
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+        import numpy as np
+
+        self.matrix = np.empty((16, dim), dtype=np.float32)
+        self.keys: list[str] = []
+        self.rows: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str, vector: "np.ndarray") -> None:
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row == len(self.matrix):
+                import numpy as np
+
+                # A new buffer, so views handed out by snapshot() stay intact.
+                grown = np.empty((2 * row, self.matrix.shape[1]), dtype=np.float32)
+                grown[:row] = self.matrix[:row]
+                self.matrix = grown
+            self.keys.append(key)
+            self.rows[key] = row
+        self.matrix[row] = vector
+
+    def remove(self, key: str) -> None:
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last = self.keys.pop()
+        if last != key:
+            self.matrix[row] = self.matrix[len(self.keys)]
+            self.keys[row] = last
+            self.rows[last] = row
+
+    def snapshot(self) -> tuple["np.ndarray", list[str]]:
+        return self.matrix[:len(self.keys)], list(self.keys)
+
+    def score(self, key: str, query: "np.ndarray") -> float | None:
+        row = self.rows.get(key)
+        return None if row is None else float(self.matrix[row] @ query)
+
+
+@dataclass
+class CacheHit:
+    response: object
+    tier: str
+    similarity: float = 1.0
+
+
+class LLMResponseCache:
+    """Two-tier, disk-backed cache of final agent responses.
+
+    Parameters
+    ----------
+    path:
+        SQLite file for the store, or ``":memory:"``.
+    ttl:
+        Seconds a cached response stays valid.
+    max_entries:
+        Least recently used entries beyond this count are evicted.
+    similarity_threshold:
+        Minimum cosine similarity for the similarity tier.  ``None`` disables
+        that tier so only exact matches are served.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 24 * 3600,
+        max_entries: int = 50_000,
+        similarity_threshold: float | None = None,
+    ) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._metrics: dict[str, dict[str, int]] = {}
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        self._stores = 0
+        # Embeddings are kept in memory, one matrix per scope, for the
+        # similarity scan.
+        self._vectors: dict[str, _ScopeIndex] = {}
+        if similarity_threshold is not None:
+            import numpy as np
+
+            for key, scope, prompt, blob in self._conn.execute(
+                "SELECT key, scope, prompt, embedding FROM llm_responses"
+            ):
+                # Entries stored while the similarity tier was off have no
+                # embedding yet.
+                vector = np.frombuffer(blob, dtype=np.float32) if blob else embed(prompt)
+                self._index(scope).add(key, vector)
+
+    def _index(self, scope: str) -> _ScopeIndex:
+        index = self._vectors.get(scope)
+        if index is None:
+            index = self._vectors[scope] = _ScopeIndex()
+        return index
+
+    def _count(self, agent: str, outcome: str) -> None:
+        counters = self._metrics.setdefault(agent, {"exact_hits": 0, "similar_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def stats(self) -> dict:
+        """Per-agent hit counts and hit rate."""
+
+        with self._lock:
+            report = {}
+            for agent, counters in self._metrics.items():
+                total = sum(counters.values())
+                hits = counters["exact_hits"] + counters["similar_hits"]
+                report[agent] = {**counters, "hit_rate": hits / total if total else 0.0}
+            return report
+
+    # ------------------------------------------------------------------
+    # Lookup and store
+    # ------------------------------------------------------------------
+    def lookup(
+        self, agent: str, model: str, instructions: str, tools: list[str], prompt: str
+    ) -> CacheHit | None:
+        """Return a cached response for this call, or ``None`` on a miss."""
+
+        scope = _scope(model, instructions, tools)
+        key = hashlib.sha256(f"{scope}\0{prompt}".encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] < self.ttl:
+                self._conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self._count(agent, "exact_hits")
+                return CacheHit(json.loads(row[0]), "exact")
+            index = self._vectors.get(scope) if self.similarity_threshold is not None else None
+            if not index:
+                self._count(agent, "misses")
+                return None
+            matrix, keys = index.snapshot()
+
+        # Scored outside the lock: other agent threads keep using the cache.
+        query = embed(prompt)
+        scores = matrix @ query
+        best = int(scores.argmax())
+        best_key = keys[best]
+        with self._lock:
+            # The row may have been replaced since the snapshot; trust only
+            # the current vector of the chosen key.
+            best_score = index.score(best_key, query)
+            if best_score is not None and best_score >= self.similarity_threshold:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ?", (best_key,)
+                ).fetchone()
+                if row and now - row[1] < self.ttl:
+                    self._conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, best_key))
+                    self._count(agent, "similar_hits")
+                    return CacheHit(json.loads(row[0]), "similar", best_score)
+            self._count(agent, "misses")
+            return None
+
+    def store(
+        self,
+        model: str,
+        instructions: str,
+        tools: list[str],
+        prompt: str,
+        response: object,
+    ) -> None:
+        """Cache ``response`` for this call.  Non-JSON responses are skipped."""
+
+        try:
+            payload = json.dumps(response)
+        except (TypeError, ValueError):
+            return
+        scope = _scope(model, instructions, tools)
+        key = hashlib.sha256(f"{scope}\0{prompt}".encode("utf-8")).hexdigest()
+        vector = embed(prompt) if self.similarity_threshold is not None else None
+        now = time.time()
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, prompt, payload, vector.tobytes() if vector is not None else b"", now, now),
+            )
+            self._entries += not existed
+            self._stores += 1
+            if self.similarity_threshold is not None:
+                self._index(scope).add(key, vector)
+            self._evict_locked(now)
+
+    def _evict_locked(self, now: float) -> None:
+        doomed = []
+        if self._stores % _EXPIRY_SWEEP_INTERVAL == 0:
+            doomed = self._conn.execute(
+                "SELECT key, scope FROM llm_responses WHERE created_at < ?", (now - self.ttl,)
+            ).fetchall()
+        overflow = self._entries - len(doomed) - self.max_entries
+        if overflow > 0:
+            doomed += self._conn.execute(
+                "SELECT key, scope FROM llm_responses WHERE created_at >= ? ORDER BY accessed_at ASC LIMIT ?",
+                (now - self.ttl, overflow),
+            ).fetchall()
+        if not doomed:
+            return
+        self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", [(key,) for key, _ in doomed])
+        self._entries -= len(doomed)
+        for key, scope in doomed:
+            index = self._vectors.get(scope)
+            if index is not None:
+                index.remove(key)
+                if not index:
+                    del self._vectors[scope]
+
+
+_default_cache: LLMResponseCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_llm_cache() -> LLMResponseCache | None:
+    """Return the process-wide cache, or ``None`` when caching is disabled."""
+
+    global _default_cache
+    if not settings.LLM_CACHE_PATH:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache(
+                settings.LLM_CACHE_PATH,
+                ttl=settings.LLM_CACHE_TTL,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                similarity_threshold=settings.LLM_CACHE_SIMILARITY_THRESHOLD,
+            )
+        return _default_cache
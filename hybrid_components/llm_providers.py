@@ -1,10 +1,22 @@
-"""Helpers for configuring alternative language models."""
+"""Helpers for configuring alternative language models.
+
+These pick one provider per agent.  To choose between providers per request,
+by measured latency and error rate, use the ``lead/routed`` and
+``content/routed`` agents built on :mod:`hybrid_components.provider_router`.
+"""
+
+import logging
+from typing import TYPE_CHECKING
 
-from google.adk.llms.litellm import LiteLlm  # LiteLLM adapter available in ADK
 from config import settings
 
+if TYPE_CHECKING:  # pragma: no cover - the ADK import is deferred until needed
+    from google.adk.llms.litellm import LiteLlm
+
+logger = logging.getLogger(__name__)
 
-def get_openai_llm_for_adk(model_name: str = settings.DEFAULT_OPENAI_MODEL) -> LiteLlm | None:
+
+def get_openai_llm_for_adk(model_name: str = settings.DEFAULT_OPENAI_MODEL) -> "LiteLlm | None":
     """Return a LiteLlm instance configured for an OpenAI model.
 
     The Google ADK natively supports Gemini models.  To use OpenAI models within
@@ -31,15 +43,20 @@ def get_openai_llm_for_adk(model_name: str = settings.DEFAULT_OPENAI_MODEL) -> L
         )
 
     try:
+        # LiteLLM adapter available in ADK.  Imported here so merely importing
+        # this module does not load the ADK and LiteLLM.
+        from google.adk.llms.litellm import LiteLlm
+
         # Instantiating ``LiteLlm`` with the model name is often sufficient.  It
         # will pick up the API key from the environment variables.
         llm = LiteLlm(model=model_name)
-        print(f"Configured LiteLlm for ADK with model: {model_name}")
+        logger.info("Configured LiteLlm for ADK with model: %s", model_name)
         return llm
     except Exception as e:  # pragma: no cover - defensive
         # Any error here is likely due to misconfiguration of LiteLLM or missing
         # dependencies.
-        print(f"Error configuring LiteLlm for ADK: {e}")
-        print("Make sure 'litellm' is installed and OPENAI_API_KEY is set.")
+        logger.error(
+            "Error configuring LiteLlm for ADK: %s. Make sure 'litellm' is installed and OPENAI_API_KEY is set.", e
+        )
         return None
 
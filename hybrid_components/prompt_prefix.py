@@ -0,0 +1,158 @@
+"""Static prompt prefixes: agent instructions and tool schemas, built once.
+
+Every model call starts with the same block of tokens for a given agent: the
+system instructions followed by the tool definitions.  Providers cache such
+prefixes (OpenAI from 1024 tokens, in 128-token steps; Gemini through context
+caching) and bill and serve the cached part much more cheaply, but only while
+the prefix stays *byte-identical* from call to call.
+
+:func:`build_prefix` is therefore called once per agent, at import time.  It
+serializes the tool schemas canonically (sorted keys, fixed separators),
+fingerprints instructions and tools together, and registers the result so a
+prefix that changes within a process is reported rather than silently
+defeating the provider cache.  Everything that varies per request (the task,
+the topic, retrieved data) belongs in the user message, never in the
+instructions.
+
+How much of the prompt the provider actually served from its cache is
+recorded on ``model`` spans as ``cached_prompt_tokens``; see
+:func:`common_tools.tracing.prompt_cache_report`.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import threading
+import types
+import typing
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Smallest prompt the OpenAI API caches, and the granularity of cache hits.
+PROVIDER_CACHE_MIN_TOKENS = 1024
+PROVIDER_CACHE_INCREMENT = 128
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four bytes per token for English text)."""
+
+    return max(1, round(len(text.encode("utf-8")) / 4)) if text else 0
+
+
+def canonical_json(value: object) -> str:
+    """Serialize ``value`` the same way on every call and in every process."""
+
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _json_type(annotation: object) -> dict:
+    origin = typing.get_origin(annotation)
+    if origin in (typing.Union, types.UnionType):
+        options = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _json_type(options[0]) if len(options) == 1 else {}
+    json_type = _JSON_TYPES.get(origin or annotation)
+    return {"type": json_type} if json_type else {}
+
+
+def _signature_schema(fn) -> dict:
+    properties, required = {}, []
+    for name, parameter in inspect.signature(fn).parameters.items():
+        if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+            continue
+        properties[name] = _json_type(parameter.annotation)
+        if parameter.default is parameter.empty:
+            required.append(name)
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def tool_schema(tool: object) -> dict:
+    """The name, description and parameter schema a model is shown for ``tool``.
+
+    Handles OpenAI Agents SDK ``FunctionTool`` objects (which carry their own
+    ``params_json_schema``), ADK ``FunctionTool`` objects wrapping a function,
+    and plain functions.
+    """
+
+    fn = getattr(tool, "fn", None) or getattr(tool, "func", None)
+    if fn is None and inspect.isfunction(tool):
+        fn = tool
+    name = getattr(tool, "name", None) or getattr(fn, "__name__", None) or str(tool)
+    description = getattr(tool, "description", None) or (inspect.getdoc(fn) if fn else None) or ""
+    parameters = getattr(tool, "params_json_schema", None)
+    if parameters is None and fn is not None:
+        parameters = _signature_schema(fn)
+    return {"name": str(name), "description": description, "parameters": parameters or {}}
+
+
+@dataclass(frozen=True)
+class PromptPrefix:
+    """The static head of every prompt an agent sends.
+
+    ``tool_names`` is sorted, as used in response-cache keys; ``tools_json``
+    is the canonical serialization of the tool schemas; ``digest``
+    fingerprints both, and ``tokens`` estimates the size of the prefix.
+    """
+
+    agent: str
+    instructions: str
+    tool_names: tuple[str, ...]
+    tools_json: str
+    digest: str
+    tokens: int
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the prefix alone is long enough for provider caching."""
+
+        return self.tokens >= PROVIDER_CACHE_MIN_TOKENS
+
+
+_prefixes: dict[str, PromptPrefix] = {}
+_prefixes_lock = threading.Lock()
+
+
+def build_prefix(agent: str, instructions: str, tools: Iterable = ()) -> PromptPrefix:
+    """Build and register the prompt prefix of ``agent``.
+
+    Call this once per agent (at module level), not per request.  Rebuilding
+    a prefix with different content under the same agent name is logged,
+    since every call after the change misses the provider's cache.
+    """
+
+    schemas = sorted((tool_schema(tool) for tool in tools), key=lambda schema: schema["name"])
+    tools_json = canonical_json(schemas)
+    digest = hashlib.sha256(f"{instructions}\x00{tools_json}".encode("utf-8")).hexdigest()[:16]
+    prefix = PromptPrefix(
+        agent=agent,
+        instructions=instructions,
+        tool_names=tuple(schema["name"] for schema in schemas),
+        tools_json=tools_json,
+        digest=digest,
+        tokens=estimate_tokens(instructions) + estimate_tokens(tools_json),
+    )
+    with _prefixes_lock:
+        previous = _prefixes.get(agent)
+        if previous is not None and previous.digest != digest:
+            logger.warning(
+                "Prompt prefix of %s changed (%s -> %s); provider prompt caching restarts",
+                agent, previous.digest, digest,
+            )
+        _prefixes[agent] = prefix
+    if not prefix.cacheable:
+        logger.debug(
+            "Prompt prefix of %s is ~%d tokens, below the %d-token provider cache minimum",
+            agent, prefix.tokens, PROVIDER_CACHE_MIN_TOKENS,
+        )
+    return prefix
+
+
+def registered_prefixes() -> dict[str, PromptPrefix]:
+    """Every prefix built in this process, by agent name."""
+
+    with _prefixes_lock:
+        return dict(_prefixes)
@@ -0,0 +1,326 @@
+"""Latency-aware routing, hedging and failover across LLM backends.
+
+The same request can usually be served by several backends: the OpenAI Agents
+SDK, an ADK agent talking to OpenAI through LiteLLM, or an ADK agent on
+Gemini.  Picking one statically means a latency spike at that provider slows
+the whole batch down.  :class:`ProviderRouter` instead keeps a rolling window
+of latencies and errors per backend and, for every request:
+
+* **routes** to the healthy backend with the lowest recent latency (a
+  moving average, or the age of its oldest outstanding call if that is
+  larger).  A backend with too few samples in the window is probed first,
+  one request at a time, so new backends and backends whose window expired
+  get measured again;
+* **hedges** (optional): if the chosen backend has not answered after its
+  own p95 latency, the next-best backend is sent the same request.  The
+  first answer wins and the other call is cancelled;
+* **fails over**: a failed call is retried on the next backend in the
+  ranking.  A backend whose error rate in the window exceeds
+  ``max_error_rate`` is ejected for ``cooldown`` seconds and only used as a
+  last resort meanwhile.
+
+Backends are plain coroutine functions, so simulated local backends (for
+example :class:`~hybrid_components.stub_model.StubRunner` with jitter and
+error injection) plug in the same way as real agents.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping
+
+from common_tools import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class RouterError(Exception):
+    """Every backend failed for a request."""
+
+
+class BackendStats:
+    """Rolling window of call outcomes for one backend.
+
+    Parameters
+    ----------
+    window:
+        Samples older than this many seconds are forgotten.
+    max_samples:
+        Upper bound on the samples kept, whatever their age.
+    smoothing:
+        Weight of the newest sample in :attr:`ewma`, the moving average of
+        successful latencies that reacts to a spike within a few calls.
+    """
+
+    def __init__(self, window: float = 300.0, max_samples: int = 512, smoothing: float = 0.3) -> None:
+        self.window = window
+        self.smoothing = smoothing
+        self.ewma: float | None = None
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._started: dict[object, float] = {}
+        self.ejected_until = 0.0
+        self.counters = {"calls": 0, "wins": 0, "errors": 0, "cancelled": 0, "hedges": 0}
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+            if ok:
+                self.ewma = latency if self.ewma is None else self.ewma + self.smoothing * (latency - self.ewma)
+
+    def record_censored(self, elapsed: float) -> None:
+        """Account for a call cut off after ``elapsed`` seconds (a lost hedge race).
+
+        Its latency is only known to be at least ``elapsed``.  The sample
+        counts towards the window (it is not an error) but not towards the
+        latency quantiles, and it can raise :attr:`ewma`, never lower it.  A
+        backend that loses every race is still measured this way instead of
+        being probed forever.
+        """
+
+        with self._lock:
+            self._samples.append((time.monotonic(), elapsed, None))
+            if self.ewma is None or elapsed > self.ewma:
+                self.ewma = elapsed if self.ewma is None else self.ewma + self.smoothing * (elapsed - self.ewma)
+
+    def _recent(self) -> list[tuple[float, float, bool]]:
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return list(self._samples)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._started)
+
+    def begin(self, token: object) -> float:
+        with self._lock:
+            self._started[token] = now = time.monotonic()
+        return now
+
+    def end(self, token: object) -> None:
+        with self._lock:
+            self._started.pop(token, None)
+
+    def oldest_in_flight(self) -> float:
+        """Age in seconds of the longest-running call, ``0.0`` if idle."""
+
+        with self._lock:
+            return time.monotonic() - min(self._started.values()) if self._started else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self.ewma = None
+
+    def snapshot(self) -> tuple[int, float, float | None, float | None]:
+        """``(samples, error_rate, p50, p95)`` over the current window."""
+
+        samples = self._recent()
+        latencies = sorted(latency for _, latency, ok in samples if ok)
+        errors = sum(1 for _, _, ok in samples if ok is False)
+        error_rate = errors / len(samples) if samples else 0.0
+        if not latencies:
+            return len(samples), error_rate, None, None
+        return len(samples), error_rate, _quantile(latencies, 0.5), _quantile(latencies, 0.95)
+
+
+def _quantile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProviderRouter:
+    """Route requests to the fastest healthy backend, with hedging and failover.
+
+    Parameters
+    ----------
+    backends:
+        Backend name to coroutine function.  Every backend is called with
+        the arguments passed to :meth:`call` and must return the same kind
+        of result.
+    window:
+        Seconds of history used for latency and error statistics.
+    min_samples:
+        Below this many samples in the window a backend is treated as
+        unmeasured and is probed before the ranked backends.
+    max_error_rate:
+        Error rate in the window above which a backend is ejected.
+    cooldown:
+        Seconds an ejected backend is kept out of the ranking.
+    hedge:
+        Send a second request to the next backend when the first has not
+        answered after its p95 latency.
+    hedge_quantile:
+        Latency quantile of the primary backend used as the hedge delay.
+    hedge_delay_bounds:
+        ``(minimum, maximum)`` hedge delay in seconds; the maximum is also used
+        while a backend has no latency history.
+    """
+
+    def __init__(
+        self,
+        backends: Mapping[str, Callable[..., Awaitable[object]]],
+        window: float = 300.0,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_delay_bounds: tuple[float, float] = (0.05, 10.0),
+    ) -> None:
+        if not backends:
+            raise ValueError("ProviderRouter needs at least one backend")
+        self.backends = dict(backends)
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay_bounds = hedge_delay_bounds
+        self.stats_by_backend = {name: BackendStats(window) for name in self.backends}
+
+    # ------------------------------------------------------------------
+    # Ranking
+    # ------------------------------------------------------------------
+    def ranking(self) -> list[str]:
+        """Backends in the order they would be tried for the next request."""
+
+        now = time.monotonic()
+        probes, ranked, ejected = [], [], []
+        for name, stats in self.stats_by_backend.items():
+            samples, error_rate, _, _ = stats.snapshot()
+            if stats.ejected_until > now:
+                ejected.append((stats.ejected_until, name))
+            elif samples >= self.min_samples and error_rate > self.max_error_rate:
+                # Eject, and forget the window so the backend is re-probed
+                # from scratch once the cooldown is over.
+                stats.ejected_until = now + self.cooldown
+                stats.clear()
+                logger.warning("Backend %s ejected for %.0fs (error rate %.0f%%)", name, self.cooldown, 100 * error_rate)
+                ejected.append((stats.ejected_until, name))
+            elif samples < self.min_samples or stats.ewma is None:
+                # Unmeasured backends are probed one request at a time.
+                if stats.in_flight == 0:
+                    probes.append(name)
+                else:
+                    ranked.append((float("inf"), name))
+            else:
+                # A call outstanding for longer than the average is evidence
+                # of a latency spike before any slow sample has completed.
+                ranked.append((max(stats.ewma, stats.oldest_in_flight()), name))
+        return probes + [name for _, name in sorted(ranked)] + [name for _, name in sorted(ejected)]
+
+    def _hedge_delay(self, name: str) -> float:
+        low, high = self.hedge_delay_bounds
+        delay = self._latency_quantile(name)
+        if delay is None:
+            # An unmeasured backend is hedged once it is slower than the
+            # slowest measured one would normally be.
+            known = [q for q in map(self._latency_quantile, self.stats_by_backend) if q is not None]
+            delay = max(known) if known else high
+        return min(high, max(low, delay))
+
+    def _latency_quantile(self, name: str) -> float | None:
+        samples = self.stats_by_backend[name]._recent()
+        latencies = sorted(latency for _, latency, ok in samples if ok)
+        if len(latencies) < self.min_samples:
+            return None
+        return _quantile(latencies, self.hedge_quantile)
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+    async def _attempt(self, name: str, args: tuple, kwargs: dict) -> object:
+        stats = self.stats_by_backend[name]
+        stats.counters["calls"] += 1
+        token = object()
+        started = stats.begin(token)
+        try:
+            with tracing.span("router.attempt", "router", backend=name):
+                result = await self.backends[name](*args, **kwargs)
+        except asyncio.CancelledError:
+            # Lost a hedge race: the elapsed time is a lower bound of its latency.
+            stats.counters["cancelled"] += 1
+            stats.record_censored(time.monotonic() - started)
+            raise
+        except Exception:
+            stats.counters["errors"] += 1
+            stats.record(time.monotonic() - started, False)
+            raise
+        finally:
+            stats.end(token)
+        stats.record(time.monotonic() - started, True)
+        return result
+
+    async def call(self, *args, **kwargs) -> object:
+        """Run the request on the best backend, hedging and failing over as configured.
+
+        Raises
+        ------
+        RouterError
+            If every backend failed.
+        """
+
+        candidates = deque(self.ranking())
+        running: dict[asyncio.Task, str] = {}
+        errors: list[str] = []
+        hedged = False
+
+        def launch() -> None:
+            name = candidates.popleft()
+            running[asyncio.create_task(self._attempt(name, args, kwargs))] = name
+
+        with tracing.span("router.call", "router") as span:
+            launch()
+            try:
+                while running:
+                    timeout = None
+                    if self.hedge and not hedged and candidates and len(running) == 1:
+                        (primary,) = running.values()
+                        timeout = self._hedge_delay(primary)
+                    done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        hedged = True
+                        self.stats_by_backend[candidates[0]].counters["hedges"] += 1
+                        launch()
+                        continue
+                    for task in done:
+                        name = running.pop(task)
+                        if task.exception() is None:
+                            self.stats_by_backend[name].counters["wins"] += 1
+                            span.set(backend=name, hedged=hedged, failed_attempts=len(errors))
+                            return task.result()
+                        errors.append(f"{name}: {task.exception()}")
+                        logger.info("Backend %s failed, failing over: %s", name, task.exception())
+                    if not running and candidates:
+                        launch()
+            finally:
+                for task in running:
+                    task.cancel()
+            span.set(failed_attempts=len(errors))
+            raise RouterError("All backends failed: " + "; ".join(errors))
+
+    def call_sync(self, *args, **kwargs) -> object:
+        """Blocking variant of :meth:`call` for code outside an event loop."""
+
+        return asyncio.run(self.call(*args, **kwargs))
+
+    def stats(self) -> dict:
+        """Per-backend latency quantiles, error rate and call counters."""
+
+        now = time.monotonic()
+        report = {}
+        for name, stats in self.stats_by_backend.items():
+            samples, error_rate, p50, p95 = stats.snapshot()
+            report[name] = {
+                **stats.counters,
+                "samples": samples,
+                "error_rate": round(error_rate, 4),
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "ejected": stats.ejected_until > now,
+            }
+        return report
@@ -0,0 +1,217 @@
+"""Compact, memory-bounded records of agent runs.
+
+A long tool-calling run can produce hundreds of tool calls, some of which
+return whole scraped pages.  Keeping the SDK's history or every event around
+to log or inspect a run makes its memory grow with the number of calls.  A
+:class:`RunRecord` is built incrementally from the run's event stream instead
+and keeps:
+
+* counters (tool calls, streamed characters, bytes spilled) for the whole run;
+* the most recent ``RUN_RECORD_MAX_TOOLS`` tool calls as slotted
+  :class:`ToolRecord` objects, each holding at most
+  ``RUN_TOOL_OUTPUT_MAX_BYTES`` of its arguments and output.
+
+Larger tool payloads are written to ``RUN_SPILL_DIR`` (content-addressed, so
+repeated payloads share one file) and the record only keeps a preview and the
+file path.  Per-run memory is therefore bounded regardless of how many tools
+the model calls.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from config import settings
+from .streaming import DONE, ERROR, TEXT_DELTA, TOOL_CALL, TOOL_RESULT, AgentEvent
+
+logger = logging.getLogger(__name__)
+
+# Spilled payloads older than this are deleted on every n-th spill.
+_SPILL_MAX_AGE = 7 * 24 * 3600
+_SPILL_SWEEP_INTERVAL = 100
+
+_spills = 0
+_spills_lock = threading.Lock()
+
+
+def _serialize(value: object) -> str:
+    if isinstance(value, str):
+        return value
+    try:
+        return json.dumps(value, default=str, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def prune_spills(directory: str, max_age: float = _SPILL_MAX_AGE) -> int:
+    """Delete spilled payloads older than ``max_age`` seconds; return how many."""
+
+    removed = 0
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def spill(data: bytes, directory: str) -> str:
+    """Write ``data`` to ``directory`` under its content hash and return the path."""
+
+    global _spills
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, hashlib.sha256(data).hexdigest()[:32] + ".json")
+    if os.path.exists(path):
+        # Same payload as an earlier spill; refresh its age instead of rewriting.
+        os.utime(path)
+    else:
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+    with _spills_lock:
+        _spills += 1
+        sweep = _spills % _SPILL_SWEEP_INTERVAL == 0
+    if sweep:
+        prune_spills(directory)
+    return path
+
+
+def cap_payload(value: object, max_bytes: int, spill_dir: str | None = None) -> tuple[str, int, str | None]:
+    """Serialize ``value`` and cap it at ``max_bytes``.
+
+    Returns
+    -------
+    tuple
+        ``(text, size, spill_path)``: the payload, or a truncated preview
+        when it is larger than ``max_bytes``; its full size in bytes; and the
+        file holding the full payload when it was spilled (``None`` if it
+        fitted, or if spilling is disabled or failed).
+    """
+
+    text = _serialize(value)
+    data = text.encode("utf-8")
+    if len(data) <= max_bytes:
+        return text, len(data), None
+    path = None
+    if spill_dir:
+        try:
+            path = spill(data, spill_dir)
+        except OSError as e:
+            logger.warning("Could not spill a %d-byte tool payload to %s: %s", len(data), spill_dir, e)
+    preview = data[:max_bytes].decode("utf-8", errors="ignore")
+    return preview + "…", len(data), path
+
+
+@dataclass(slots=True)
+class ToolRecord:
+    """One tool call: capped arguments and output, and where the rest went."""
+
+    name: str
+    arguments: str
+    output: str | None = None
+    output_bytes: int = 0
+    spill_path: str | None = None
+
+
+@dataclass(slots=True)
+class RunRecord:
+    """Bounded summary of one agent run, fed event by event.
+
+    Parameters
+    ----------
+    agent:
+        Name of the agent that ran.
+    task:
+        The request, capped at ``max_bytes``.
+    max_tools:
+        How many of the most recent tool calls are kept.
+    max_bytes:
+        Cap on each stored payload (task, tool arguments, tool output).
+    spill_dir:
+        Directory receiving payloads larger than ``max_bytes``; ``None``
+        truncates them without keeping the rest.
+    """
+
+    agent: str
+    task: str
+    max_tools: int = 32
+    max_bytes: int = 4096
+    spill_dir: str | None = None
+    status: str = "running"
+    tool_calls: int = 0
+    tool_output_bytes: int = 0
+    spilled_bytes: int = 0
+    text_chars: int = 0
+    tools: deque = field(default_factory=deque)
+
+    def __post_init__(self) -> None:
+        self.task = cap_payload(self.task, self.max_bytes)[0]
+        self.tools = deque(self.tools, maxlen=self.max_tools)
+
+    @classmethod
+    def start(cls, agent: str, task: str) -> "RunRecord":
+        """A record using the ``RUN_*`` settings."""
+
+        return cls(
+            agent=agent,
+            task=task,
+            max_tools=settings.RUN_RECORD_MAX_TOOLS,
+            max_bytes=settings.RUN_TOOL_OUTPUT_MAX_BYTES,
+            spill_dir=settings.RUN_SPILL_DIR or None,
+        )
+
+    def tool_called(self, name: str | None, arguments: object) -> None:
+        self.tool_calls += 1
+        text, _, _ = cap_payload(arguments, self.max_bytes)
+        self.tools.append(ToolRecord(name=str(name), arguments=text))
+        logger.debug("%s tool call #%d: %s(%s)", self.agent, self.tool_calls, name, text)
+
+    def tool_returned(self, name: str | None, output: object) -> None:
+        text, size, path = cap_payload(output, self.max_bytes, self.spill_dir)
+        self.tool_output_bytes += size
+        if path is not None:
+            self.spilled_bytes += size
+        # Pair the output with the oldest call of that tool still waiting for
+        # one: parallel calls of a tool report their outputs in call order.
+        record = next((r for r in self.tools if r.name == str(name) and r.output is None), None)
+        if record is None:
+            record = ToolRecord(name=str(name), arguments="")
+            self.tools.append(record)
+        record.output, record.output_bytes, record.spill_path = text, size, path
+        logger.debug("%s tool output from %s: %d bytes (spilled to %s)", self.agent, name, size, path)
+
+    def observe(self, event: AgentEvent) -> None:
+        """Account for one streamed event; nothing but the capped record is kept."""
+
+        if event.type == TEXT_DELTA:
+            self.text_chars += len(event.text)
+        elif event.type == TOOL_CALL:
+            self.tool_called(event.tool_name, event.payload)
+        elif event.type == TOOL_RESULT:
+            self.tool_returned(event.tool_name, event.payload)
+        elif event.type == DONE:
+            self.status = "ok"
+        elif event.type == ERROR:
+            self.status = "error"
+
+    def summary(self) -> dict:
+        """Counters suitable for span attributes and logs."""
+
+        return {
+            "tool_calls": self.tool_calls,
+            "tool_output_bytes": self.tool_output_bytes,
+            "spilled_bytes": self.spilled_bytes,
+        }
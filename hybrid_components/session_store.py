@@ -0,0 +1,370 @@
+"""Persistent session service for Google ADK runners.
+
+ADK's ``InMemorySessionService`` forgets every conversation when the service
+object goes away, and the agents used to build a new one per request, so a
+``session_id`` passed back in never found its earlier turns.
+:class:`PersistentSessionService` offers the same calls the runner makes
+(``create_session``, ``get_session``, ``append_event``, ``delete_session``)
+but keeps sessions in a pluggable :class:`SessionBackend`.
+
+Recently used sessions stay in memory so follow-up turns do not touch the
+disk.  The in-memory tier is bounded three ways: sessions idle for longer than
+``idle_timeout`` are dropped, the least recently used sessions are dropped once
+more than ``max_active_sessions`` or ``max_active_bytes`` of events are held,
+and each session keeps only its last ``max_session_events`` events in memory.
+Dropped sessions and events are still in the backend; sessions are reloaded
+on their next use.  Events are written through to the backend as they are
+appended, so each turn only adds new rows instead of rewriting the whole
+history.  Sessions not updated for ``retention`` seconds are purged from the
+backend by a periodic sweep.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Protocol
+
+
+@dataclass
+class StoredSession:
+    """Conversation state handed to the ADK runner."""
+
+    app_name: str
+    user_id: str
+    session_id: str
+    state: dict = field(default_factory=dict)
+    events: list = field(default_factory=list)
+    last_update_time: float = field(default_factory=time.time)
+    # Events ever appended (``events`` may only hold the most recent ones) and
+    # the stored size of each event held in ``events``.
+    event_count: int = 0
+    event_bytes: list[int] = field(default_factory=list, repr=False)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self.event_bytes)
+
+    @property
+    def id(self) -> str:
+        # ADK refers to ``session.id``; the agents in this repo use ``session_id``.
+        return self.session_id
+
+
+class SessionBackend(Protocol):
+    """Storage used by :class:`PersistentSessionService`."""
+
+    def load(
+        self, app_name: str | None, user_id: str, session_id: str, max_events: int | None = None
+    ) -> StoredSession | None: ...
+
+    def save_session(self, session: StoredSession) -> None: ...
+
+    def append_event(self, session: StoredSession, event) -> int: ...
+
+    def delete(self, app_name: str, user_id: str, session_id: str) -> None: ...
+
+    def purge(self, older_than: float) -> int: ...
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    state BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event BLOB NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, seq)
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+"""
+
+
+class SQLiteSessionBackend:
+    """Stores sessions and their events in a SQLite file.
+
+    Events and state are pickled, since ADK event objects are arbitrary
+    Python objects.  Only load databases you wrote yourself.
+    """
+
+    def __init__(self, path: str) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def load(
+        self, app_name: str | None, user_id: str, session_id: str, max_events: int | None = None
+    ) -> StoredSession | None:
+        """Load a session with its last ``max_events`` events (all if ``None``).
+
+        Without an ``app_name`` the most recently updated session with this
+        user and id is returned, whatever app it belongs to.
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT app_name, state, updated_at FROM sessions WHERE user_id = ? AND session_id = ?"
+                " AND (? IS NULL OR app_name = ?) ORDER BY updated_at DESC LIMIT 1",
+                (user_id, session_id, app_name, app_name),
+            ).fetchone()
+            if row is None:
+                return None
+            app_name = row[0]
+            key = (app_name, user_id, session_id)
+            (count,) = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            ).fetchone()
+            blobs = [
+                blob
+                for (blob,) in self._conn.execute(
+                    "SELECT event FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? AND seq >= ?"
+                    " ORDER BY seq",
+                    (*key, 0 if max_events is None else count - max_events),
+                )
+            ]
+        return StoredSession(
+            app_name,
+            user_id,
+            session_id,
+            pickle.loads(row[1]),
+            [pickle.loads(blob) for blob in blobs],
+            row[2],
+            event_count=count,
+            event_bytes=[len(blob) for blob in blobs],
+        )
+
+    def save_session(self, session: StoredSession) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+                (
+                    session.app_name,
+                    session.user_id,
+                    session.session_id,
+                    pickle.dumps(session.state),
+                    session.last_update_time,
+                ),
+            )
+
+    def append_event(self, session: StoredSession, event) -> int:
+        """Store ``event`` as number ``session.event_count - 1``; returns its size in bytes."""
+
+        blob = pickle.dumps(event)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?)",
+                (
+                    session.app_name,
+                    session.user_id,
+                    session.session_id,
+                    session.event_count - 1,
+                    blob,
+                ),
+            )
+            self._conn.execute(
+                "UPDATE sessions SET state = ?, updated_at = ? WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (
+                    pickle.dumps(session.state),
+                    session.last_update_time,
+                    session.app_name,
+                    session.user_id,
+                    session.session_id,
+                ),
+            )
+            self._conn.execute("COMMIT")
+        return len(blob)
+
+    def delete(self, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            )
+            self._conn.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            )
+
+    def purge(self, older_than: float) -> int:
+        """Delete sessions not updated since ``older_than`` (a UNIX timestamp)."""
+
+        with self._lock:
+            stale = self._conn.execute(
+                "SELECT app_name, user_id, session_id FROM sessions WHERE updated_at < ?",
+                (older_than,),
+            ).fetchall()
+            for key in stale:
+                self._conn.execute(
+                    "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+                )
+            self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (older_than,))
+        return len(stale)
+
+
+class PersistentSessionService:
+    """ADK session service with a bounded in-memory tier over a backend.
+
+    Parameters
+    ----------
+    backend:
+        Where sessions live between uses, e.g. :class:`SQLiteSessionBackend`.
+    idle_timeout:
+        Seconds after which an unused session is dropped from memory.
+    max_active_sessions:
+        Maximum number of sessions kept in memory at once.
+    max_active_bytes:
+        Maximum stored size of the events held in memory across sessions.
+    max_session_events:
+        Most recent events of a session kept in memory (and handed to the
+        runner); older ones stay in the backend.
+    retention:
+        Sessions not updated for this many seconds are purged from the
+        backend, checked at most once per ``idle_timeout``.  ``None`` keeps
+        them forever.
+    """
+
+    def __init__(
+        self,
+        backend: SessionBackend,
+        idle_timeout: float = 900.0,
+        max_active_sessions: int = 1000,
+        max_active_bytes: int = 64 * 1024 * 1024,
+        max_session_events: int = 200,
+        retention: float | None = 30 * 24 * 3600,
+    ) -> None:
+        self.backend = backend
+        self.idle_timeout = idle_timeout
+        self.max_active_sessions = max_active_sessions
+        self.max_active_bytes = max_active_bytes
+        self.max_session_events = max_session_events
+        self.retention = retention
+        self._active: OrderedDict[tuple[str, str, str], tuple[StoredSession, float, int]] = OrderedDict()
+        # (user_id, session_id) -> app names, for lookups without an app name.
+        self._by_user: dict[tuple[str, str], set[str]] = {}
+        self._active_bytes = 0
+        self._next_purge = time.time()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # In-memory tier
+    # ------------------------------------------------------------------
+    def _remember(self, session: StoredSession) -> None:
+        key = (session.app_name, session.user_id, session.session_id)
+        now = time.time()
+        size = session.size_bytes
+        with self._lock:
+            previous = self._active.pop(key, None)
+            if previous is not None:
+                self._active_bytes -= previous[2]
+            self._active[key] = (session, now, size)
+            self._active_bytes += size
+            self._by_user.setdefault(key[1:], set()).add(key[0])
+            self._evict_locked(now)
+            purge = self.retention is not None and now >= self._next_purge
+            if purge:
+                self._next_purge = now + self.idle_timeout
+        if purge:
+            self.backend.purge(now - self.retention)
+
+    def _forget_locked(self, key: tuple[str, str, str]) -> None:
+        entry = self._active.pop(key, None)
+        if entry is None:
+            return
+        self._active_bytes -= entry[2]
+        apps = self._by_user.get(key[1:])
+        if apps is not None:
+            apps.discard(key[0])
+            if not apps:
+                del self._by_user[key[1:]]
+
+    def _evict_locked(self, now: float) -> None:
+        # ``_active`` is ordered from least to most recently used, so idle
+        # sessions are always at the front.  The most recent session is kept
+        # even if it alone exceeds the byte budget.
+        while self._active:
+            key, (_, last_used, _) = next(iter(self._active.items()))
+            if (
+                len(self._active) <= self.max_active_sessions
+                and (self._active_bytes <= self.max_active_bytes or len(self._active) == 1)
+                and now - last_used < self.idle_timeout
+            ):
+                break
+            self._forget_locked(key)
+
+    def active_bytes(self) -> int:
+        with self._lock:
+            return self._active_bytes
+
+    def active_session_count(self) -> int:
+        with self._lock:
+            self._evict_locked(time.time())
+            return len(self._active)
+
+    # ------------------------------------------------------------------
+    # Session service API used by the ADK runner
+    # ------------------------------------------------------------------
+    def create_session(
+        self,
+        user_id: str,
+        app_name: str,
+        session_id: str | None = None,
+        state: dict | None = None,
+    ) -> StoredSession:
+        session = StoredSession(app_name, user_id, session_id or uuid.uuid4().hex, dict(state or {}))
+        self.backend.save_session(session)
+        self._remember(session)
+        return session
+
+    def get_session(
+        self, user_id: str, session_id: str, app_name: str | None = None
+    ) -> StoredSession | None:
+        with self._lock:
+            if app_name is None:
+                apps = self._by_user.get((user_id, session_id))
+                entry = self._active.get((next(iter(apps)), user_id, session_id)) if apps else None
+            else:
+                entry = self._active.get((app_name, user_id, session_id))
+        session = entry[0] if entry is not None else None
+        if session is None:
+            session = self.backend.load(app_name, user_id, session_id, self.max_session_events)
+            if session is None:
+                return None
+        self._remember(session)
+        return session
+
+    def append_event(self, session: StoredSession, event):
+        session.events.append(event)
+        session.event_count += 1
+        # ADK events may carry a state delta to merge into the session state.
+        delta = getattr(getattr(event, "actions", None), "state_delta", None)
+        if delta:
+            session.state.update(delta)
+        session.last_update_time = time.time()
+        session.event_bytes.append(self.backend.append_event(session, event) or 0)
+        overflow = len(session.events) - self.max_session_events
+        if overflow > 0:
+            del session.events[:overflow]
+            del session.event_bytes[:overflow]
+        self._remember(session)
+        return event
+
+    def delete_session(self, user_id: str, session_id: str, app_name: str) -> None:
+        with self._lock:
+            self._forget_locked((app_name, user_id, session_id))
+        self.backend.delete(app_name, user_id, session_id)
@@ -0,0 +1,179 @@
+"""Incremental agent output shared by the OpenAI SDK and Google ADK agents.
+
+The streaming entry points of every agent (``astream_lead_request`` and
+``astream_content``) are async generators of :class:`AgentEvent`, whatever
+backend produced them, so a UI can render text as it arrives and show tool
+activity while the run is still going.  Events are translated one at a time;
+nothing here holds on to the output already yielded.
+"""
+
+import asyncio
+import contextvars
+from collections.abc import AsyncIterator, Coroutine, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from common_tools import tracing
+
+
+# Event types --------------------------------------------------------------
+TEXT_DELTA = "text_delta"  # a piece of the model's answer, in order
+TOOL_CALL = "tool_call"  # the model asked for a tool; ``payload`` holds the arguments
+TOOL_RESULT = "tool_result"  # a tool finished; ``payload`` holds its output
+DONE = "done"  # the run finished; ``payload`` holds the final output
+ERROR = "error"  # the run failed; ``text`` holds the message
+
+
+@dataclass(slots=True)
+class AgentEvent:
+    """One step of a streamed agent run."""
+
+    type: str
+    text: str = ""
+    tool_name: str | None = None
+    payload: object = None
+    session_id: str | None = None
+
+
+def cached_events(response: object, session_id: str | None = None) -> list[AgentEvent]:
+    """Events replaying a response that was served from the cache."""
+
+    events = [AgentEvent(DONE, payload=response, session_id=session_id)]
+    if isinstance(response, str) and response:
+        events.insert(0, AgentEvent(TEXT_DELTA, text=response, session_id=session_id))
+    return events
+
+
+async def collect_final(events: AsyncIterator[AgentEvent]) -> object:
+    """Drain a stream and return the run's final output.
+
+    Falls back to the concatenated text deltas when the ``done`` payload was
+    not collected.  Raises :class:`RuntimeError` on an ``error`` event.
+    """
+
+    parts = []
+    final = None
+    # The stream is drained rather than abandoned at ``done`` so the
+    # producer's spans close normally instead of through ``GeneratorExit``.
+    async for event in events:
+        if event.type == TEXT_DELTA:
+            parts.append(event.text)
+        elif event.type == ERROR:
+            raise RuntimeError(event.text)
+        elif event.type == DONE and event.payload is not None:
+            final = event.payload
+    return final if final is not None else "".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# OpenAI Agents SDK
+# ---------------------------------------------------------------------------
+def run_blocking(coroutine: Coroutine):
+    """Run ``coroutine`` to completion from synchronous code and return its result.
+
+    ``asyncio.run`` refuses to start while this thread already runs an event
+    loop (notebooks, async web handlers, ADK callbacks).  The coroutine then
+    runs on its own loop in a worker thread, in a copy of the caller's context
+    so trace spans still nest, and the caller blocks until it is done.
+    """
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(1, thread_name_prefix="run-blocking") as pool:
+        return pool.submit(context.run, asyncio.run, coroutine).result()
+
+
+async def stream_openai_run(runner, agent, query: str, span=None) -> AsyncIterator[AgentEvent]:
+    """Translate ``runner.run_streamed`` events into :class:`AgentEvent`.
+
+    Raw model deltas become ``text_delta`` events and the SDK's run items for
+    tool calls and tool outputs become ``tool_call`` / ``tool_result``.  The
+    final ``done`` event carries ``final_output`` once the stream is drained,
+    at which point the run's token usage is added to ``span`` if given.
+    """
+
+    result = runner.run_streamed(agent, query)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event":
+            data = event.data
+            if getattr(data, "type", None) == "response.output_text.delta" and data.delta:
+                yield AgentEvent(TEXT_DELTA, text=data.delta)
+        elif event.type == "run_item_stream_event":
+            item = event.item
+            raw = getattr(item, "raw_item", None)
+            if event.name == "tool_called":
+                yield AgentEvent(
+                    TOOL_CALL,
+                    tool_name=getattr(raw, "name", None),
+                    payload=getattr(raw, "arguments", None),
+                )
+            elif event.name == "tool_output":
+                yield AgentEvent(
+                    TOOL_RESULT,
+                    tool_name=getattr(raw, "name", None),
+                    payload=getattr(item, "output", None),
+                )
+    if span is not None:
+        tracing.record_openai_usage(span, result)
+    yield AgentEvent(DONE, payload=result.final_output)
+
+
+# ---------------------------------------------------------------------------
+# Google ADK
+# ---------------------------------------------------------------------------
+_EXHAUSTED = object()
+
+
+async def iterate_in_thread(events: Iterable) -> AsyncIterator:
+    """Consume a blocking iterator from a worker thread, one item at a time.
+
+    The ADK runner yields events synchronously; pulling each one with
+    ``asyncio.to_thread`` keeps the event loop free while the model is
+    generating and never buffers more than the item being handed over.
+    """
+
+    iterator = iter(events)
+    while True:
+        item = await asyncio.to_thread(next, iterator, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return
+        yield item
+
+
+async def stream_adk_events(
+    events: Iterable, session_id: str, collect: bool = True, span=None
+) -> AsyncIterator[AgentEvent]:
+    """Translate ADK runner events into :class:`AgentEvent`.
+
+    With ``collect`` the ``done`` event carries the concatenated model text as
+    its payload; without it the text is only yielded as deltas and the payload
+    is ``None``, so arbitrarily long answers are never held in memory.  Token
+    usage reported on the events is added to ``span`` if given.
+    """
+
+    parts = []
+    async for event in iterate_in_thread(events):
+        if span is not None:
+            tracing.record_adk_usage(span, event)
+        if event.type == "TEXT" and event.source.type == "MODEL":
+            if collect:
+                parts.append(event.content)
+            yield AgentEvent(TEXT_DELTA, text=event.content, session_id=session_id)
+        elif event.type == "TOOL_CALL":
+            yield AgentEvent(
+                TOOL_CALL,
+                tool_name=event.tool_name,
+                payload=getattr(event, "tool_input", None),
+                session_id=session_id,
+            )
+        elif event.type == "TOOL_OUTPUT":
+            yield AgentEvent(
+                TOOL_RESULT,
+                tool_name=event.tool_name,
+                payload=getattr(event, "tool_output", None),
+                session_id=session_id,
+            )
+    yield AgentEvent(DONE, payload="".join(parts) if collect else None, session_id=session_id)
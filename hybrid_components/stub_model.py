@@ -0,0 +1,202 @@
+"""Offline stand-in for the OpenAI Agents SDK runner.
+
+``StubRunner`` exposes the entry points our agents call on
+``openai_agents.Runner`` (``run``, ``run_sync`` and ``run_streamed``) but
+answers locally, with a
+configurable latency and an optional pattern of simulated ``429`` responses.
+Passing it as the ``runner`` of an agent lets batch runs, resumption and
+rate-limit handling be exercised without network access or an API key.
+Latency jitter and random server errors make it a stand-in for a slow or
+flaky provider, and ``latency`` can be changed mid-run to simulate a spike.
+Reported usage counts the agent's instructions and tool schemas as part of
+the prompt and, like the OpenAI API, reports the prefix as cached once the
+same prefix of at least 1024 tokens has been sent before.
+"""
+
+import asyncio
+import itertools
+import random
+import threading
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+
+from .prompt_prefix import (
+    PROVIDER_CACHE_INCREMENT,
+    PROVIDER_CACHE_MIN_TOKENS,
+    canonical_json,
+    estimate_tokens,
+    tool_schema,
+)
+
+
+class StubRateLimitError(Exception):
+    """Mimics the SDK's ``RateLimitError`` (HTTP 429)."""
+
+    status_code = 429
+
+
+class StubProviderError(Exception):
+    """Mimics a provider-side failure (HTTP 503)."""
+
+    status_code = 503
+
+
+@dataclass
+class StubTokenDetails:
+    cached_tokens: int = 0
+
+
+@dataclass
+class StubUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    input_tokens_details: StubTokenDetails = field(default_factory=StubTokenDetails)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+@dataclass
+class StubRunResult:
+    """The subset of ``RunResult`` the agents read."""
+
+    final_output: object
+    usage: StubUsage = field(default_factory=StubUsage)
+    run_context: object = None
+
+
+@dataclass
+class StubTextDelta:
+    delta: str
+    type: str = "response.output_text.delta"
+
+
+@dataclass
+class StubStreamEvent:
+    data: StubTextDelta
+    type: str = "raw_response_event"
+
+
+class StubStreamedResult:
+    """The subset of ``RunResultStreaming`` the agents read."""
+
+    def __init__(self, runner: "StubRunner", task: str, chunk_size: int, agent=None) -> None:
+        self._runner = runner
+        self._task = task
+        self._chunk_size = chunk_size
+        self.final_output = None
+        self.usage = None
+        self._agent = agent
+
+    async def stream_events(self) -> AsyncIterator[StubStreamEvent]:
+        await asyncio.sleep(self._runner.delay())
+        result = self._runner._answer(self._task, self._agent)
+        text = str(result.final_output)
+        # Spread the answer over the same latency again, chunk by chunk.
+        chunks = range(0, len(text), self._chunk_size)
+        for start in chunks:
+            await asyncio.sleep(self._runner.latency / max(len(chunks), 1))
+            yield StubStreamEvent(StubTextDelta(text[start:start + self._chunk_size]))
+        self.final_output = result.final_output
+        self.usage = result.usage
+
+
+class StubRunner:
+    """Deterministic local runner.
+
+    Parameters
+    ----------
+    respond:
+        Callable producing the final output from the task text.  Defaults to
+        echoing the task back.
+    latency:
+        Seconds each call takes.
+    rate_limit_every:
+        When set, every n-th call raises :class:`StubRateLimitError` instead of
+        answering.
+    jitter:
+        Mean of an exponentially distributed delay added to ``latency``,
+        which gives calls the long tail real providers have.
+    error_rate:
+        Probability that a call raises :class:`StubProviderError`.
+    seed:
+        Seed for the jitter and error draws.
+    prompt_cache:
+        Report repeated prompt prefixes as cached tokens, as the provider's
+        automatic prompt caching would.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[str], object] | None = None,
+        latency: float = 0.05,
+        rate_limit_every: int | None = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+        prompt_cache: bool = True,
+    ) -> None:
+        self.respond = respond or (lambda task: f"Stub summary for: {task}")
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._calls = itertools.count(1)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_cache = prompt_cache
+        self._seen_prefixes: set[int] = set()
+
+    def delay(self) -> float:
+        """Seconds the next call takes."""
+
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.expovariate(1 / self.jitter)
+
+    def _prefix_usage(self, agent) -> tuple[int, int]:
+        """``(prefix tokens, cached tokens)`` for a call to ``agent``."""
+
+        if agent is None:
+            return 0, 0
+        instructions = str(getattr(agent, "instructions", "") or "")
+        tools = canonical_json([tool_schema(tool) for tool in getattr(agent, "tools", None) or ()])
+        tokens = estimate_tokens(instructions) + estimate_tokens(tools)
+        if not self.prompt_cache or tokens < PROVIDER_CACHE_MIN_TOKENS:
+            return tokens, 0
+        key = hash((instructions, tools))
+        with self._lock:
+            seen = key in self._seen_prefixes
+            self._seen_prefixes.add(key)
+        return tokens, tokens - tokens % PROVIDER_CACHE_INCREMENT if seen else 0
+
+    def _answer(self, task: str, agent=None) -> StubRunResult:
+        with self._lock:
+            call = next(self._calls)
+            self.calls = call
+            failed = self.error_rate and self._random.random() < self.error_rate
+        if self.rate_limit_every and call % self.rate_limit_every == 0:
+            raise StubRateLimitError("Rate limit reached (stub)")
+        if failed:
+            raise StubProviderError("Service unavailable (stub)")
+        output = self.respond(task)
+        prefix_tokens, cached_tokens = self._prefix_usage(agent)
+        usage = StubUsage(
+            input_tokens=prefix_tokens + len(task) // 4 + 1,
+            output_tokens=len(str(output)) // 4 + 1,
+            input_tokens_details=StubTokenDetails(cached_tokens),
+        )
+        return StubRunResult(final_output=output, usage=usage)
+
+    async def run(self, agent, input: str, **kwargs) -> StubRunResult:
+        await asyncio.sleep(self.delay())
+        return self._answer(input, agent)
+
+    def run_sync(self, agent, input: str, **kwargs) -> StubRunResult:
+        return asyncio.run(self.run(agent, input, **kwargs))
+
+    def run_streamed(self, agent, input: str, chunk_size: int = 16, **kwargs) -> StubStreamedResult:
+        return StubStreamedResult(self, input, chunk_size, agent)
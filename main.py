@@ -1,46 +1,88 @@
 # Entry point for running example agent tasks.
+#
+# Agent backends are created through ``agents.registry`` so only the SDK that a
+# task actually uses gets imported.  Both tasks call the model providers, so
+# the outreach pipeline only runs for domains passed with ``--outreach``:
+#
+#     python main.py --outreach acme.com globex.com --output output/outreach.jsonl
+
+import argparse
+import logging
 
 from config import settings
-from agents.lead_agent.lead_agent_google_adk import LeadAgentGoogleADK
-from agents.lead_agent.lead_agent_openai_sdk import LeadAgentOpenAISDK
-from agents.content_agent.content_agent_google_adk import ContentAgentGoogleADK
-from agents.content_agent.content_agent_openai_sdk import ContentAgentOpenAISDK
+from agents.registry import create_agent
+
+logger = logging.getLogger("main")
 
 
 def run_lead_generation_tasks():
     """Demonstrate a simple lead-generation workflow."""
 
-    print("--- Running Lead Generation Tasks ---")
-    print("\nInitializing Lead Agent with OpenAI SDK...")
-    lead_agent_o = LeadAgentOpenAISDK(model_name=settings.DEFAULT_OPENAI_MODEL)
+    logger.info("--- Running Lead Generation Tasks ---")
+    logger.info("Initializing Lead Agent with OpenAI SDK...")
+    lead_agent_o = create_agent("lead/openai", model_name=settings.DEFAULT_OPENAI_MODEL)
     response_o1 = lead_agent_o.process_lead_request(
         "Can you look up information on 'Innovate Corp' by prospecting their website 'https://www.innovatecorp.com' (mock URL, use example.com)?"
     )
-    print(f"Lead Agent (OpenAI SDK) Response for Innovate Corp: {response_o1}")
+    logger.info("Lead Agent (OpenAI SDK) Response for Innovate Corp: %s", response_o1)
+
 
+def run_outreach_pipeline(domains, output_path: str = "output/outreach.jsonl"):
+    """Prospect, qualify and draft outreach for ``domains`` as one pipeline.
 
-def run_content_generation_tasks():
-    """Placeholder for content generation examples."""
+    Crawling, lead qualification and drafting overlap, so every qualified
+    lead goes straight into a personalised outreach draft.
+    """
 
-    print("\n--- Running Content Generation Tasks ---")
-    pass
+    from agents.outreach_pipeline import create_outreach_pipeline
+
+    logger.info("--- Running Outreach Pipeline ---")
+    pipeline = create_outreach_pipeline(
+        output_path,
+        lead_backend="lead/openai",
+        content_backend="content/openai",
+        lead_kwargs={"model_name": settings.DEFAULT_OPENAI_MODEL},
+        content_kwargs={"model_name": settings.DEFAULT_OPENAI_MODEL},
+    )
+    stats = pipeline.run(domains)
+    logger.info("Outreach pipeline stats: %s", stats)
+    return stats
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the example lead and outreach tasks.")
+    parser.add_argument(
+        "--outreach", nargs="+", metavar="DOMAIN", default=[], help="run the outreach pipeline for these domains"
+    )
+    parser.add_argument("--output", default="output/outreach.jsonl", help="JSONL file for outreach records")
+    parser.add_argument("--skip-lead-tasks", action="store_true", help="do not run the lead-generation example")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    print("AI Agent Project Initializing...")
+    args = parse_args()
+    logging.basicConfig(
+        level=settings.LOG_LEVEL.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    logger.info("AI Agent Project Initializing...")
+    for warning in settings.get_settings().warnings():
+        logger.warning(warning)
     if not settings.OPENAI_API_KEY and not settings.GOOGLE_APPLICATION_CREDENTIALS:
-        print(
+        logger.critical(
             "CRITICAL ERROR: Neither OpenAI nor Google Cloud credentials are set. Agents may not function."
         )
         exit(1)
     elif not settings.OPENAI_API_KEY:
-        print(
+        logger.warning(
             "Warning: OPENAI_API_KEY is not set. OpenAI SDK agents or ADK with OpenAI models will fail."
         )
     elif not settings.GOOGLE_APPLICATION_CREDENTIALS and not settings.GOOGLE_CLOUD_PROJECT:
-        print(
+        logger.warning(
             "Warning: Google Cloud credentials/project not set. Google ADK agents with Google models may fail."
         )
 
-    run_lead_generation_tasks()
-    print("\nAI Agent Project Tasks Complete.")
+    if not args.skip_lead_tasks:
+        run_lead_generation_tasks()
+    if args.outreach:
+        run_outreach_pipeline(args.outreach, args.output)
+    logger.info("AI Agent Project Tasks Complete.")
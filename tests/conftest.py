@@ -0,0 +1,9 @@
+"""Shared test setup: keep every run off the persistent caches and stores."""
+
+import os
+
+from benchmarks.suite import ISOLATED_ENV
+
+# Settings are read once per process, so this must happen before any test
+# imports an agent.
+os.environ.update(ISOLATED_ENV)
@@ -0,0 +1,176 @@
+"""Batch runs against the local stub model: resume, 429 back-off and token budgets."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from common_tools.batch_runner import AdaptiveConcurrency, TaskOutcome, TokenBudget, run_batch, task_id_for
+from hybrid_components.stub_model import StubRateLimitError, StubRunner
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Make the jittered pause after a 429 zero, keeping the tests fast."""
+
+    monkeypatch.setattr("common_tools.batch_runner.random.uniform", lambda low, high: 0.0)
+
+
+def _records(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _stub_run_one(runner: StubRunner):
+    async def run_one(task: str) -> TaskOutcome:
+        result = await runner.run(None, task)
+        return TaskOutcome(output=result.final_output, tokens=result.usage.total_tokens)
+
+    return run_one
+
+
+def test_resume_skips_tasks_already_in_the_output(tmp_path):
+    output = tmp_path / "leads.jsonl"
+    tasks = [f"Prospect company-{i}.example" for i in range(10)]
+    broken = set(tasks[:3])
+
+    async def flaky(task: str) -> TaskOutcome:
+        if task in broken:
+            raise ValueError("boom")
+        return TaskOutcome(output=f"done {task}", tokens=10)
+
+    first = asyncio.run(run_batch(tasks, flaky, str(output), concurrency=4))
+    assert first == {"succeeded": 7, "failed": 3, "skipped": 0, "rate_limited": 0}
+
+    # A crash mid-write leaves a truncated last line; that task simply reruns.
+    with output.open("a") as handle:
+        handle.write('{"id": "trunc')
+
+    runner = StubRunner(latency=0.001)
+    second = asyncio.run(run_batch(tasks, _stub_run_one(runner), str(output), concurrency=4))
+    assert second == {"succeeded": 3, "failed": 0, "skipped": 7, "rate_limited": 0}
+    assert runner.calls == 3
+
+    lines = output.read_text().splitlines()
+    assert lines[-4] == '{"id": "trunc'
+    succeeded = {json.loads(line)["id"] for line in lines[:-4] + lines[-3:] if '"success"' in line}
+    assert succeeded == {task_id_for(task) for task in tasks}
+
+
+def test_resume_uses_caller_task_ids(tmp_path):
+    output = tmp_path / "leads.jsonl"
+    runner = StubRunner(latency=0.001)
+    tasks = [("a", "Prospect a.example"), ("b", "Prospect b.example")]
+    asyncio.run(run_batch(tasks, _stub_run_one(runner), str(output)))
+    again = asyncio.run(run_batch(tasks + [("c", "Prospect c.example")], _stub_run_one(runner), str(output)))
+    assert again["skipped"] == 2 and again["succeeded"] == 1
+    assert [record["id"] for record in _records(output)][-1] == "c"
+
+
+def test_rate_limited_tasks_are_retried_with_less_concurrency(tmp_path, no_backoff):
+    output = tmp_path / "leads.jsonl"
+    concurrency = 8
+    runner = StubRunner(latency=0.02, rate_limit_every=5)
+    in_flight = 0
+    starts: list[tuple[float, int]] = []
+    limited_at: list[float] = []
+
+    async def run_one(task: str) -> TaskOutcome:
+        nonlocal in_flight
+        in_flight += 1
+        starts.append((time.monotonic(), in_flight))
+        try:
+            return await _stub_run_one(runner)(task)
+        except StubRateLimitError:
+            limited_at.append(time.monotonic())
+            raise
+        finally:
+            in_flight -= 1
+
+    tasks = [f"Prospect company-{i}.example" for i in range(24)]
+    stats = asyncio.run(run_batch(tasks, run_one, str(output), concurrency=concurrency))
+
+    assert stats["succeeded"] == len(tasks) and stats["failed"] == 0
+    assert stats["rate_limited"] == len(limited_at) > 0
+    assert max(depth for _, depth in starts) == concurrency
+    # The first call started after a 429 finds the limit halved.
+    after = [depth for started, depth in starts if started > limited_at[0]]
+    assert after and after[0] <= concurrency // 2
+    assert all(record["status"] == "success" for record in _records(output))
+
+
+def test_rate_limit_gives_up_after_max_attempts(tmp_path, no_backoff):
+    output = tmp_path / "leads.jsonl"
+
+    async def always_limited(task: str) -> TaskOutcome:
+        raise StubRateLimitError("429")
+
+    stats = asyncio.run(run_batch(["Prospect a.example"], always_limited, str(output), max_attempts=3))
+    assert stats == {"succeeded": 0, "failed": 1, "skipped": 0, "rate_limited": 2}
+    (record,) = _records(output)
+    assert record["status"] == "error" and record["attempts"] == 3
+
+
+def test_adaptive_concurrency_halves_then_recovers():
+    async def main():
+        limiter = AdaptiveConcurrency(8, base_delay=0.0)
+        await limiter.acquire()
+        await limiter.release(rate_limited=True)
+        assert limiter.limit == 4
+        await limiter.acquire()
+        await limiter.release(rate_limited=True)
+        assert limiter.limit == 2
+        for _ in range(2):
+            await limiter.acquire()
+            await limiter.release()
+        assert limiter.limit == 3
+
+    asyncio.run(main())
+
+
+def test_token_budget_waits_for_refill_and_settles():
+    async def main():
+        budget = TokenBudget(tokens_per_minute=6000)  # 100 tokens/s
+        assert await budget.reserve(6000) == 6000
+        started = time.monotonic()
+        await budget.reserve(20)
+        waited = time.monotonic() - started
+        # Returning an unused reservation makes it available at once.
+        budget.settle(reserved=3000, actual=1000)
+        started = time.monotonic()
+        await budget.reserve(1500)
+        return waited, time.monotonic() - started
+
+    waited, refunded_wait = asyncio.run(main())
+    assert waited == pytest.approx(0.2, abs=0.1)
+    assert refunded_wait < 0.05
+
+
+def test_oversized_reservation_is_clamped_to_the_bucket():
+    budget = TokenBudget(tokens_per_minute=600)
+    assert asyncio.run(budget.reserve(10_000)) == 600
+
+
+def test_lead_agent_batch_resumes_with_stub_runner(tmp_path, no_backoff):
+    pytest.importorskip("openai_agents")
+    from agents.lead_agent.lead_agent_openai_sdk import LeadAgentOpenAISDK
+
+    output = tmp_path / "leads.jsonl"
+    runner = StubRunner(latency=0.001, rate_limit_every=4)
+    agent = LeadAgentOpenAISDK(runner=runner, use_llm_cache=False, use_lead_store=False)
+    tasks = [f"Prospect company-{i}.example" for i in range(6)]
+    stats = agent.process_lead_batch(tasks, str(output), concurrency=3)
+    assert stats["succeeded"] == 6 and stats["rate_limited"] >= 1
+    assert agent.process_lead_batch(tasks, str(output))["skipped"] == 6
+
+
+def test_lead_agent_runs_inside_an_event_loop():
+    pytest.importorskip("openai_agents")
+    from agents.lead_agent.lead_agent_openai_sdk import LeadAgentOpenAISDK
+
+    agent = LeadAgentOpenAISDK(runner=StubRunner(latency=0.001), use_llm_cache=False, use_lead_store=False)
+
+    async def handler():
+        return agent.process_lead_request("Prospect acme.example")
+
+    assert asyncio.run(handler()) == "Stub summary for: Prospect acme.example"
@@ -0,0 +1,93 @@
+"""CrawlEngine with a response cache: one lookup per page, revalidation, bad 304s."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents.lead_agent.tools.crawler import CrawlConfig, CrawlEngine
+from agents.lead_agent.tools.http_cache import ResponseCache
+
+PAGE = b'<html><head><title>Cached Co</title></head><body><a href="mailto:sales@cached.test">x</a></body></html>'
+
+
+@pytest.fixture
+def site():
+    """A one-page site with an ``ETag``; ``server.always_304`` answers 304 to everything."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server.requests.append(self.headers.get("If-None-Match"))
+            if server.always_304 or self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    server.always_304 = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def _engine(cache: ResponseCache) -> CrawlEngine:
+    config = CrawlConfig(max_depth=0, respect_robots=False, host_rate=0)
+    return CrawlEngine(config, cache=cache)
+
+
+def _counting(cache: ResponseCache) -> list[str]:
+    lookups: list[str] = []
+    lookup = cache.lookup
+
+    def counted(url):
+        lookups.append(url)
+        return lookup(url)
+
+    cache.lookup = counted
+    return lookups
+
+
+@pytest.mark.parametrize("stale", [False, True])
+def test_crawl_looks_each_page_up_once(site, stale):
+    server, url = site
+    cache = ResponseCache(":memory:", ttl=3600)
+    with _engine(cache) as engine:
+        assert next(engine.crawl([url]))["emails"] == ["sales@cached.test"]
+        if stale:
+            cache.ttl = 0
+        lookups = _counting(cache)
+        result = next(engine.crawl([url]))
+    assert result["emails"] == ["sales@cached.test"]
+    assert len(lookups) == 1
+    assert len(server.requests) == (2 if stale else 1)
+    assert cache.counters["revalidated" if stale else "hits"] == 1
+
+
+def test_uncached_page_is_not_looked_up_twice(site):
+    _, url = site
+    cache = ResponseCache(":memory:")
+    with _engine(cache) as engine:
+        lookups = _counting(cache)
+        next(engine.crawl([url]))
+    assert len(lookups) == 1
+    assert cache.counters["misses"] == 1
+
+
+def test_unconditional_304_is_an_error(site):
+    server, url = site
+    server.always_304 = True
+    with _engine(ResponseCache(":memory:")) as engine:
+        page = engine.fetch_page(url)
+    assert page.status_code == 304
+    assert page.error and "304" in page.error
+    assert page.title is None
@@ -0,0 +1,162 @@
+"""CRMClient against the local fake CRM: batching, coalescing and retries."""
+
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from agents.lead_agent.tools import crm_connector
+from agents.lead_agent.tools.crm_connector import CRMClient, CRMError
+from benchmarks.fake_crm import start_fake_crm
+
+
+@pytest.fixture
+def fake_crm(request):
+    """A seeded fake CRM; parametrize indirectly with ``start_fake_crm`` options."""
+
+    server, crm, url = start_fake_crm(**getattr(request, "param", {}))
+    crm.seed(50)
+    crm.requests = 0
+    yield crm, url
+    server.shutdown()
+
+
+def _client(url: str, **options) -> CRMClient:
+    options = {"backoff_base": 0.001, "backoff_max": 0.01, **options}
+    return CRMClient(url, **options)
+
+
+def test_bulk_lookup_splits_into_batches_and_keeps_order(fake_crm):
+    crm, url = fake_crm
+    client = _client(url, batch_size=10)
+    queries = [{"company_name": f"Company {i}"} for i in range(24)] + [{"company_name": "Unknown"}]
+    records = client.bulk_lookup(queries)
+    assert crm.requests == client.requests_sent == 3
+    assert [record["company_name"] for record in records[:24]] == [f"Company {i}" for i in range(24)]
+    assert records[24] is None
+
+
+def test_bulk_upsert_batches_and_sums_counts(fake_crm):
+    crm, url = fake_crm
+    client = _client(url, batch_size=4)
+    records = [{"company_name": f"Company {i}", "industry": "Retail"} for i in range(45, 55)]
+    summary = client.bulk_upsert(records)
+    assert crm.requests == 3
+    assert summary["created"] == 5 and summary["updated"] == 5 and len(summary["ids"]) == 10
+
+
+def test_concurrent_lookups_are_coalesced(fake_crm):
+    crm, url = fake_crm
+    client = _client(url, coalesce_window=0.2)
+    results: dict[int, dict | None] = {}
+    barrier = threading.Barrier(20)
+
+    def look_up(i: int) -> None:
+        barrier.wait()
+        results[i] = client.lookup({"company_name": f"Company {i}"})
+
+    threads = [threading.Thread(target=look_up, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert crm.requests <= 2
+    assert all(results[i]["company_name"] == f"Company {i}" for i in range(20))
+
+
+def test_coalesced_lookup_flushes_when_batch_is_full(fake_crm):
+    crm, url = fake_crm
+    # A long window only matters when the batch does not fill up.
+    client = _client(url, batch_size=5, coalesce_window=30)
+    started = time.monotonic()
+    threads = [
+        threading.Thread(target=client.lookup, args=({"company_name": f"Company {i}"},)) for i in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert time.monotonic() - started < 5
+    assert crm.requests == 1
+
+
+def test_lookups_are_not_held_up_by_a_batch_that_is_backing_off(fake_crm):
+    crm, url = fake_crm
+    client = _client(url, coalesce_window=0.01)
+    send, release = client.bulk_lookup, threading.Event()
+
+    def stalled(queries):
+        # Stands in for a batch sleeping through retry backoff.
+        if queries[0]["company_name"] == "Company 1":
+            release.wait(10)
+        return send(queries)
+
+    client.bulk_lookup = stalled
+    stuck = threading.Thread(target=client.lookup, args=({"company_name": "Company 1"},))
+    stuck.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    assert client.lookup({"company_name": "Company 2"})["company_name"] == "Company 2"
+    assert time.monotonic() - started < 1
+    release.set()
+    stuck.join(timeout=10)
+    client.close()
+
+
+def test_contact_details_distinguish_not_found_from_errors(fake_crm, monkeypatch):
+    crm, url = fake_crm
+    client = _client(url, coalesce_window=0.001, max_retries=0)
+    monkeypatch.setattr(crm_connector, "get_default_client", lambda: client)
+    found = crm_connector.get_contact_details(company_name="Company 3")
+    assert found["status"] == "success" and found["details"]["company_name"] == "Company 3"
+    assert crm_connector.get_contact_details(company_name="Nobody Inc")["status"] == "not_found"
+    crm.fail_every, crm.fail_status = 1, 503
+    assert crm_connector.get_contact_details(company_name="Company 3")["status"] == "error"
+    client.close()
+
+
+@pytest.mark.parametrize("fake_crm", [{"fail_every": 2}], indirect=True)
+def test_transient_failures_are_retried(fake_crm):
+    crm, url = fake_crm
+    client = _client(url)
+    for i in range(3):
+        assert client.bulk_lookup([{"company_name": f"Company {i}"}])[0] is not None
+    # Requests 2 and 4 failed with 503 and were retried.
+    assert crm.requests == client.requests_sent == 5
+
+
+@pytest.mark.parametrize("fake_crm", [{"fail_every": 1, "fail_status": 503}], indirect=True)
+def test_retries_give_up_with_crm_error(fake_crm):
+    crm, url = fake_crm
+    client = _client(url, max_retries=2)
+    with pytest.raises(CRMError, match="503"):
+        client.bulk_lookup([{"company_name": "Company 1"}])
+    assert crm.requests == 3
+
+
+@pytest.mark.parametrize("fake_crm", [{"api_key": "secret"}], indirect=True)
+def test_client_errors_are_not_retried(fake_crm):
+    crm, url = fake_crm
+    client = _client(url, api_key="wrong")
+    with pytest.raises(CRMError, match="401"):
+        client.bulk_lookup([{"company_name": "Company 1"}])
+    assert crm.requests == 1
+
+
+@pytest.mark.parametrize(
+    "retry_after",
+    [lambda: "1", lambda: formatdate(time.time() + 2, usegmt=True)],
+    ids=["seconds", "http-date"],
+)
+@pytest.mark.parametrize("fake_crm", [{"fail_every": 2, "fail_status": 429}], indirect=True)
+def test_retry_after_is_honoured(fake_crm, retry_after):
+    crm, url = fake_crm
+    client = _client(url)
+    client.bulk_lookup([{"company_name": "Company 1"}])
+    crm.retry_after = retry_after()
+    started = time.monotonic()
+    assert client.bulk_lookup([{"company_name": "Company 2"}])[0]["company_name"] == "Company 2"
+    # HTTP dates have one-second resolution, so either form waits at least ~1 s.
+    assert time.monotonic() - started >= 0.9
+    assert crm.requests == 3
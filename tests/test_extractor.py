@@ -0,0 +1,97 @@
+"""StreamingExtractor fed in tiny and page-sized chunks."""
+
+import pytest
+
+from agents.lead_agent.tools.extractor import StreamingExtractor
+
+CHUNK_SIZES = [1, 4096]
+
+
+def _extract(document: str, chunk_size: int, **options):
+    content = document.encode("utf-8")
+    extractor = StreamingExtractor("https://acme.com/about", **options)
+    for start in range(0, len(content), chunk_size):
+        extractor.feed(content[start:start + chunk_size])
+    return extractor.close()
+
+
+def _straddling(before: str, piece: str, boundary: int = 4096) -> str:
+    """``before`` padded so that ``piece`` starts a few bytes ahead of ``boundary``."""
+
+    padding = boundary - len(before.encode("utf-8")) - len(piece) // 2
+    return before + "x" * (padding - 1) + " " + piece
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_address_split_across_chunks(chunk_size):
+    document = _straddling("<html><body><p>", "jane.doe@acme-widgets.com</p>") + "</body></html>"
+    assert document.encode().index(b"@") in range(4080, 4100)
+    assert _extract(document, chunk_size).emails == {"jane.doe@acme-widgets.com"}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_title_split_across_chunks(chunk_size):
+    document = _straddling("<html><head>", "<title>Acme &amp; Sons | Home</title></head>") + "<body></body></html>"
+    assert document.encode().index(b"<title>") in range(4070, 4096)
+    assert _extract(document, chunk_size).title == "Acme & Sons | Home"
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_obfuscated_addresses(chunk_size):
+    document = (
+        "<html><body><p>Write to jane [at] acme [dot] com, bob(at)acme.com or"
+        " sales&#64;acme.com.</p><p>Support: help {at} acme {dot} co {dot} uk</p></body></html>"
+    )
+    assert _extract(document, chunk_size).emails == {
+        "jane@acme.com",
+        "bob@acme.com",
+        "sales@acme.com",
+        "help@acme.co.uk",
+    }
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_addresses_in_attributes_and_code_are_skipped(chunk_size):
+    document = (
+        '<html><head><style>/* design@agency.example */ a { color: red }</style>'
+        '<script>var tracker = "pixel@analytics.example";</script>'
+        "<script>if (a < b) { send('queue@internal.example'); }</script></head><body>"
+        '<img src="/img/logo@2x.png" alt="logo">'
+        '<input type="email" placeholder="you@company.example">'
+        "<p>Contact info@acme.com</p></body></html>"
+    )
+    assert _extract(document, chunk_size).emails == {"info@acme.com"}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_script_spanning_chunks_is_skipped(chunk_size):
+    document = _straddling("<html><body><script>// ", "bot@tracker.example\n</script>") + (
+        "<p>team@acme.com</p></body></html>"
+    )
+    assert _extract(document, chunk_size).emails == {"team@acme.com"}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_mailto_and_tel_links(chunk_size):
+    document = (
+        '<html><body><a href="mailto:Sales@Acme.com?subject=Hello">Sales</a>'
+        "<a href='tel:+1%20555%200100'>Call us</a>"
+        '<a href="/team#top">Team</a><a href="javascript:void(0)">x</a></body></html>'
+    )
+    result = _extract(document, chunk_size)
+    assert result.emails == {"sales@acme.com"}
+    assert result.phones == {"+1 555 0100"}
+    assert result.links == ["https://acme.com/team"]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_stops_once_requested_fields_are_found(chunk_size):
+    document = "<html><head><title>Acme</title></head><body><p>hi@acme.com</p>" + "<p>filler</p>" * 2000
+    extractor = StreamingExtractor("https://acme.com/", stop_when=("title", "emails"))
+    content = document.encode()
+    for start in range(0, len(content), chunk_size):
+        if extractor.feed(content[start:start + chunk_size]):
+            break
+    result = extractor.close()
+    assert result.title == "Acme" and result.emails == {"hi@acme.com"}
+    assert result.bytes_read < len(content)
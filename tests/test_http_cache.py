@@ -0,0 +1,34 @@
+"""ResponseCache: expiry and size eviction, and the indexes they rely on."""
+
+from agents.lead_agent.tools import http_cache
+from agents.lead_agent.tools.http_cache import ResponseCache
+
+
+def test_expired_entries_are_evicted_on_store(monkeypatch):
+    cache = ResponseCache(":memory:", max_age=60)
+    cache.store("https://acme.com/", {"title": "Acme"}, body=b"x" * 100)
+    now = http_cache.time.time()
+    monkeypatch.setattr(http_cache.time, "time", lambda: now + 120)
+    cache.store("https://globex.com/", {"title": "Globex"}, body=b"y" * 10)
+    assert cache.lookup("https://acme.com/") is None
+    assert cache.lookup("https://globex.com/").extracted == {"title": "Globex"}
+    assert cache.counters["evictions"] == 1
+    assert cache.stats()["stored_bytes"] == 10
+
+
+def test_size_bound_evicts_least_recently_used():
+    cache = ResponseCache(":memory:", max_bytes=1000)
+    for i in range(5):
+        cache.store(f"https://site{i}.com/", {"i": i}, body=b"z" * 300)
+        cache.lookup("https://site0.com/")
+    assert cache.lookup("https://site0.com/") is not None
+    assert cache.lookup("https://site1.com/") is None
+    assert cache.stats()["stored_bytes"] <= 1000
+
+
+def test_expiry_sweep_uses_an_index():
+    cache = ResponseCache(":memory:")
+    plan = cache._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE fetched_at < ?", (0,)
+    ).fetchall()
+    assert any("responses_fetched_at" in row[-1] for row in plan)
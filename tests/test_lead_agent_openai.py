@@ -0,0 +1,57 @@
+"""LeadAgentOpenAISDK: failed runs are never cached or attached to a lead."""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("openai_agents")
+
+from agents.lead_agent.lead_agent_openai_sdk import LeadAgentOpenAISDK
+from agents.lead_agent.tools.lead_store import LeadStore
+from hybrid_components.llm_cache import LLMResponseCache
+from hybrid_components.streaming import collect_final
+from hybrid_components.stub_model import StubRunner
+
+TASK = "Prospect acme.example"
+
+
+def _agent(respond) -> LeadAgentOpenAISDK:
+    agent = LeadAgentOpenAISDK(runner=StubRunner(respond, latency=0.001), use_llm_cache=False, use_lead_store=False)
+    agent.llm_cache = LLMResponseCache(":memory:")
+    agent.lead_store = LeadStore(":memory:")
+    return agent
+
+
+def _cached(agent: LeadAgentOpenAISDK, task: str = TASK) -> bool:
+    in_cache = agent.llm_cache.lookup("test", *agent._cache_scope, task) is not None
+    return in_cache or agent.lead_store.find_for_task(task) is not None
+
+
+def test_error_output_is_not_cached():
+    agent = _agent(lambda task: {"error": "crm unavailable"})
+    assert agent.process_lead_request(TASK) == {"error": "crm unavailable"}
+    assert not _cached(agent)
+
+
+def test_successful_output_is_cached():
+    agent = _agent(lambda task: "Acme makes anvils.")
+    agent.process_lead_request(TASK)
+    assert _cached(agent)
+
+
+def test_streamed_error_output_is_not_cached():
+    agent = _agent(lambda task: {"error": "crm unavailable"})
+    assert asyncio.run(collect_final(agent.astream_lead_request(TASK))) == {"error": "crm unavailable"}
+    assert not _cached(agent)
+
+
+def test_batch_error_output_is_recorded_as_error_and_not_cached(tmp_path):
+    agent = _agent(lambda task: {"error": "crm unavailable"} if "acme" in task else f"ok: {task}")
+    output = tmp_path / "leads.jsonl"
+    stats = agent.process_lead_batch([TASK, "Prospect globex.example"], str(output))
+    assert stats["succeeded"] == 1 and stats["failed"] == 1
+    records = {record["task"]: record for record in map(json.loads, output.read_text().splitlines())}
+    assert records[TASK]["status"] == "error" and "crm unavailable" in records[TASK]["error"]
+    assert not _cached(agent)
+    assert _cached(agent, "Prospect globex.example")
@@ -0,0 +1,173 @@
+"""LeadStore: normalization, exact and near-duplicate resolution, merges, task answers."""
+
+import pytest
+
+from agents.lead_agent.tools import lead_store
+from agents.lead_agent.tools.lead_store import (
+    MAX_ANSWERS_PER_LEAD,
+    LeadStore,
+    canonical_domain,
+    company_from_title,
+    leads_in_text,
+    normalize_company_name,
+    normalize_email,
+    task_key,
+)
+from agents.lead_agent.tools.web_prospector import _record_prospect, _recent_prospect
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.db"), window=3600)
+    yield store
+    store.close()
+
+
+def _prospect(store: LeadStore, url: str, title: str, emails: list[str]) -> dict:
+    result = {"url": url, "title": title, "emails": emails, "status": "success"}
+    _record_prospect(store, result)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Normalization
+# ---------------------------------------------------------------------------
+def test_normalization():
+    assert canonical_domain("https://www.Acme.com:443/contact") == canonical_domain("acme.com") == "acme.com"
+    assert normalize_email("mailto:Jane+news@Acme.com") == "jane@acme.com"
+    assert normalize_email("not-an-address") is None
+    assert normalize_company_name("The ACME Corp., Inc.") == "acme"
+    assert normalize_company_name("Smith & Sons Ltd") == "smith and sons"
+
+
+def test_leads_in_text_ignores_file_names_and_address_domains():
+    domains, emails = leads_in_text("Check acme.com and README.md, mail Jane@Globex.com, built with Node.js")
+    assert domains == ["acme.com"]
+    assert emails == ["jane@globex.com"]
+
+
+def test_task_key():
+    assert task_key("Prospect https://www.Acme.com/") == task_key("prospect acme.com")
+    assert task_key("Email JANE+x@acme.com!") == task_key("email jane@acme.com")
+    assert task_key("Find the CTO at acme.com") != task_key("Prospect acme.com")
+
+
+def test_company_from_title_skips_generic_titles():
+    assert company_from_title("Home") is None
+    assert company_from_title("404 Not Found") is None
+    assert company_from_title("No title found") is None
+    assert company_from_title("Home | Acme Corp") == "Acme Corp"
+    assert company_from_title("Welcome to Globex") == "Globex"
+    assert company_from_title("Delta Robotics – Industrial arms") == "Delta Robotics"
+
+
+# ---------------------------------------------------------------------------
+# Resolution
+# ---------------------------------------------------------------------------
+def test_domain_and_email_variants_resolve_to_one_lead(store):
+    lead = store.record(urls=["https://www.acme.com/contact"], emails=["Jane@Acme.com"], company="Acme Corp")
+    for query in ({"urls": ["http://acme.com"]}, {"emails": ["jane+sales@acme.com"]}):
+        match = store.find(**query)
+        assert match is not None and match.lead.lead_id == lead.lead_id and match.similarity == 1.0
+    assert lead.domains == ["acme.com"] and lead.emails == ["jane@acme.com"]
+    assert store.find(urls=["globex.com"]) is None
+
+
+def test_similar_names_match_only_without_a_domain(store):
+    lead = store.record(urls=["acme.com"], company="Acme Corporation")
+    match = store.find(company="ACME Corp.")
+    assert match is not None and match.lead.lead_id == lead.lead_id and match.matched_on == "name"
+    assert store.find(company="Globex Industries") is None
+    # A domain nobody has seen is not resolved by its name alone.
+    assert store.find(urls=["acme-labs.io"], company="ACME Corp.") is None
+    other = store.record(urls=["acme-labs.io"], company="ACME Corp.")
+    assert other.lead_id != lead.lead_id
+    # A name without a domain still joins the lead it resembles.
+    assert store.record(company="Acme Corp", data={"note": "x"}).lead_id == lead.lead_id
+
+
+def test_keys_of_two_leads_merge_them(store):
+    by_domain = store.record(urls=["acme.com"], data={"tags": ["a"], "source": "crawl"})
+    by_email = store.record(emails=["jane@acme.com"], data={"tags": ["b"]})
+    assert by_domain.lead_id != by_email.lead_id
+
+    merged = store.record(urls=["acme.com"], emails=["jane@acme.com"])
+    assert merged.lead_id == by_domain.lead_id
+    assert merged.data == {"tags": ["b", "a"], "source": "crawl"}
+    assert merged.domains == ["acme.com"] and merged.emails == ["jane@acme.com"]
+    assert store.get(by_email.lead_id) is None
+    assert store.find(emails=["jane@acme.com"]).lead.lead_id == merged.lead_id
+    assert store.stats()["leads"] == 1
+
+
+def test_find_recent_respects_the_window(store, monkeypatch):
+    store.record(urls=["acme.com"])
+    assert store.find_recent(urls=["acme.com"]) is not None
+    now = lead_store.time.time()
+    monkeypatch.setattr(lead_store.time, "time", lambda: now + 7200)
+    assert store.find_recent(urls=["acme.com"]) is None
+    assert store.find_recent(urls=["acme.com"], window=3 * 3600) is not None
+
+
+def test_store_reloads_its_indexes(tmp_path):
+    path = str(tmp_path / "leads.db")
+    first = LeadStore(path)
+    lead = first.record(urls=["acme.com"], company="Acme Corporation")
+    first.close()
+    reopened = LeadStore(path)
+    assert reopened.find(urls=["www.acme.com"]).lead.lead_id == lead.lead_id
+    assert reopened.find(company="ACME Corp").lead.lead_id == lead.lead_id
+    reopened.close()
+
+
+# ---------------------------------------------------------------------------
+# False merges
+# ---------------------------------------------------------------------------
+def test_sites_with_generic_titles_stay_apart(store):
+    _prospect(store, "https://alpha.com", "Home", ["sales@alpha.com"])
+    _prospect(store, "https://beta.io", "Home", ["sales@beta.io"])
+    assert _recent_prospect(store, "https://alpha.com")["emails"] == ["sales@alpha.com"]
+    assert _recent_prospect(store, "https://beta.io")["emails"] == ["sales@beta.io"]
+    assert store.stats()["leads"] == 2
+
+
+def test_sites_sharing_a_third_party_address_stay_apart(store):
+    _prospect(store, "https://gamma.com", "Gamma Foods", ["hello@webagency.net", "info@gamma.com"])
+    _prospect(store, "https://delta.com", "Delta Robotics", ["hello@webagency.net", "jobs@gmail.com"])
+    assert _recent_prospect(store, "https://gamma.com")["title"] == "Gamma Foods"
+    assert _recent_prospect(store, "https://delta.com")["title"] == "Delta Robotics"
+    gamma = store.find(urls=["gamma.com"]).lead
+    assert gamma.emails == ["info@gamma.com"]
+    assert store.find(emails=["hello@webagency.net"]) is None
+
+
+def test_address_on_a_subdomain_identifies_the_site(store):
+    lead = store.record(urls=["acme.com"], emails=["jane@mail.acme.com"])
+    assert lead.emails == ["jane@mail.acme.com"]
+
+
+# ---------------------------------------------------------------------------
+# Task answers
+# ---------------------------------------------------------------------------
+def test_answers_are_reused_for_the_same_task_only(store):
+    store.record_task("Prospect https://www.acme.com/", "Acme sells anvils.")
+    match = store.find_for_task("prospect acme.com")
+    assert match is not None and match.lead.answer_for("prospect acme.com") == "Acme sells anvils."
+    assert store.find_for_task("Find the CTO at acme.com") is None
+    assert store.find_for_task("Prospect globex.com") is None
+
+
+def test_task_naming_two_companies_does_not_merge_them(store):
+    leads = store.record_task("Compare acme.com and globex.com", "Acme is bigger.")
+    assert len({lead.lead_id for lead in leads}) == 2
+    # Both leads hold the answer, but they are different leads.
+    assert store.find_for_task("Compare acme.com and globex.com") is None
+
+
+def test_answers_per_lead_are_capped(store):
+    for i in range(MAX_ANSWERS_PER_LEAD + 4):
+        store.record_task(f"Question {i} about acme.com", f"answer {i}")
+    answers = store.find(urls=["acme.com"]).lead.data["answers"]
+    assert len(answers) == MAX_ANSWERS_PER_LEAD
+    assert task_key("Question 0 about acme.com") not in answers
+    assert answers[task_key(f"Question {MAX_ANSWERS_PER_LEAD + 3} about acme.com")] == f"answer {MAX_ANSWERS_PER_LEAD + 3}"
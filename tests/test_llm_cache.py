@@ -0,0 +1,41 @@
+"""LLMResponseCache exact and similarity tiers."""
+
+from hybrid_components.llm_cache import LLMResponseCache
+
+SCOPE = ("gpt-4o", "You are a writer.", ["research"])
+
+
+def test_exact_and_similar_hits_and_misses():
+    cache = LLMResponseCache(":memory:", similarity_threshold=0.9)
+    cache.store(*SCOPE, "Write a blog post about vector databases", "draft")
+    assert cache.lookup("agent", *SCOPE, "Write a blog post about vector databases").tier == "exact"
+    hit = cache.lookup("agent", *SCOPE, "write a blog post about  vector databases!")
+    assert hit.tier == "similar" and hit.response == "draft" and hit.similarity >= 0.9
+    assert cache.lookup("agent", *SCOPE, "Summarise the quarterly sales figures") is None
+    # Another scope never shares answers.
+    assert cache.lookup("agent", "gpt-4o", "Other instructions", ["research"], "Write a blog post about vector databases!") is None
+    assert cache.stats()["agent"] == {"exact_hits": 1, "similar_hits": 1, "misses": 2, "hit_rate": 0.5}
+
+
+def test_similarity_index_follows_eviction():
+    cache = LLMResponseCache(":memory:", max_entries=20, similarity_threshold=0.95)
+    for i in range(100):
+        cache.store(*SCOPE, f"Prospect company number {i} for contacts", i)
+    # Evicted prompts are gone from the index; the survivors still match their own answer.
+    assert cache.lookup("agent", *SCOPE, "prospect company number 3 for contacts") is None
+    for i in range(80, 100):
+        assert cache.lookup("agent", *SCOPE, f"prospect company number {i} for contacts").response == i
+
+
+def test_similarity_index_is_rebuilt_from_disk(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    LLMResponseCache(path, similarity_threshold=0.9).store(*SCOPE, "Write about edge caching", "draft")
+    reopened = LLMResponseCache(path, similarity_threshold=0.9)
+    assert reopened.lookup("agent", *SCOPE, "write about  EDGE caching").response == "draft"
+
+
+def test_entries_stored_without_the_similarity_tier_join_it_later(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    LLMResponseCache(path).store(*SCOPE, "Write about edge caching", "draft")
+    reopened = LLMResponseCache(path, similarity_threshold=0.9)
+    assert reopened.lookup("agent", *SCOPE, "write about  EDGE caching").response == "draft"
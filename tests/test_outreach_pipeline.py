@@ -0,0 +1,56 @@
+"""OutreachPipeline: every domain gets a record, including those whose stage raised."""
+
+import json
+
+from agents import outreach_pipeline
+from agents.outreach_pipeline import OutreachPipeline
+from hybrid_components.streaming import DONE, ERROR, AgentEvent
+
+
+class FakeLeadAgent:
+    async def astream_lead_request(self, task):
+        if "broken.example" in task:
+            yield AgentEvent(ERROR, text="model unavailable")
+            return
+        verdict = "NOT QUALIFIED" if "cold.example" in task else "QUALIFIED"
+        yield AgentEvent(DONE, payload=f"{verdict}\nA company.")
+
+
+class FakeContentAgent:
+    async def astream_content(self, topic, content_type):
+        yield AgentEvent(DONE, payload=f"Hello {topic.split(' ')[0]}")
+
+
+def fake_prospect(domain):
+    if domain == "crash.example":
+        raise OSError("connection reset")
+    if domain == "down.example":
+        return {"url": f"https://{domain}", "status": "failure", "error": "timeout"}
+    return {"url": f"https://{domain}", "title": domain, "emails": [f"hi@{domain}"], "status": "success"}
+
+
+def test_every_domain_is_written_with_its_status(tmp_path, monkeypatch):
+    monkeypatch.setattr(outreach_pipeline, "prospect_website", fake_prospect)
+    output = tmp_path / "outreach.jsonl"
+    pipeline = OutreachPipeline(FakeLeadAgent(), FakeContentAgent(), str(output), 2, 2, 2)
+    domains = ["good.example", "cold.example", "down.example", "crash.example", "broken.example"]
+    stats = pipeline.run(domains)
+
+    records = {record["domain"]: record for record in map(json.loads, output.read_text().splitlines())}
+    assert {domain: record["status"] for domain, record in records.items()} == {
+        "good.example": "success",
+        "cold.example": "unqualified",
+        "down.example": "failure",
+        "crash.example": "error",
+        "broken.example": "error",
+    }
+    assert records["crash.example"]["error"] == "prospect: connection reset"
+    assert records["broken.example"]["error"] == "qualify: model unavailable"
+    assert records["good.example"]["draft"] == "Hello good.example"
+    assert stats["stages"]["prospect"]["failed"] == 1
+    assert stats["stages"]["qualify"]["failed"] == 1
+    assert stats["stages"]["write"]["processed"] == len(domains)
+
+    # Errors are retried by the next run; successes are skipped.
+    monkeypatch.setattr(outreach_pipeline, "prospect_website", lambda domain: fake_prospect("good.example"))
+    assert pipeline.run(["good.example", "crash.example"])["skipped"] == 1
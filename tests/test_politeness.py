@@ -0,0 +1,98 @@
+"""Host limiter and robots.txt cache: bounds, throttled robots.txt, rate limiting."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from agents.lead_agent.tools.politeness import HostLimiter, RobotsCache
+
+
+@pytest.fixture
+def robots_server():
+    """Serves ``/robots.txt`` with the status and headers set on ``server.reply``."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, headers, body = server.reply
+            server.hits.append(time.monotonic())
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.reply = (200, {}, b"User-agent: *\nDisallow: /private\n")
+    server.hits = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_limiter_forgets_least_recently_used_idle_hosts():
+    limiter = HostLimiter(rate=0, max_hosts=3)
+    for host in ("a", "b", "c"):
+        assert limiter.acquire(host) == 0.0
+        limiter.release(host)
+    limiter.acquire("a")
+    limiter.release("a")
+    limiter.acquire("d")
+    limiter.release("d")
+    assert len(limiter) == 3
+    assert set(limiter._buckets) == {"a", "c", "d"}
+
+
+def test_limiter_keeps_busy_and_paused_hosts():
+    limiter = HostLimiter(rate=0, max_hosts=2)
+    assert limiter.acquire("busy") == 0.0
+    limiter.pause("paused", 30)
+    limiter.acquire("idle")
+    limiter.release("idle")
+    limiter.acquire("new")
+    assert "busy" in limiter._buckets and "paused" in limiter._buckets
+    assert "idle" not in limiter._buckets
+    assert limiter.acquire("paused") > 29
+
+
+def test_robots_cache_is_bounded(robots_server):
+    _, url = robots_server
+    cache = RobotsCache(requests.Session(), "TestBot", max_origins=2)
+    for origin in ("a", "b", "c"):
+        rules = cache._request(url)
+        cache._store(origin, rules)
+    assert len(cache) == 2
+    assert cache.cached("a") is None and cache.cached("c") is not None
+    cache.get(url)
+    assert not cache._locks
+
+
+def test_throttled_robots_disallows_briefly_and_pauses_host(robots_server):
+    server, url = robots_server
+    server.reply = (429, {"Retry-After": "20"}, b"")
+    limiter = HostLimiter(rate=0)
+    cache = RobotsCache(requests.Session(), "TestBot", limiter=limiter)
+    rules = cache.get(url, host="site")
+    assert rules.status == "unreachable (429)"
+    assert not rules.allowed(f"{url}/")
+    assert rules.expires - time.time() == pytest.approx(20, abs=2)
+    assert limiter.acquire("site") == pytest.approx(20, abs=2)
+
+
+def test_robots_fetch_waits_for_its_host(robots_server):
+    server, url = robots_server
+    limiter = HostLimiter(rate=5, burst=1)
+    cache = RobotsCache(requests.Session(), "TestBot", limiter=limiter)
+    assert limiter.acquire("site") == 0.0
+    limiter.release("site")
+    started = time.monotonic()
+    rules = cache.get(url, host="site")
+    assert server.hits[0] - started >= 0.15
+    assert rules.allowed(f"{url}/") and not rules.allowed(f"{url}/private")
+    assert not limiter._in_flight
@@ -0,0 +1,135 @@
+"""Prompt prefixes: byte-identical rebuilds, change warnings and the prompt-cache report."""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from common_tools.tracing import Tracer, prompt_cache_report
+from hybrid_components.prompt_prefix import build_prefix, canonical_json, tool_schema
+
+INSTRUCTIONS = "You are a lead generation specialist. Qualify the company and cite sources."
+
+
+def find_company(company_name: str, country: str | None = None, limit: int = 5) -> dict:
+    """Look a company up by name."""
+
+
+def score_lead(domain: str, signals: list, weights: dict | None = None) -> float:
+    """Score a lead from its signals."""
+
+
+def _sdk_tool(properties: dict) -> SimpleNamespace:
+    """A stand-in for an OpenAI Agents SDK ``FunctionTool``."""
+
+    return SimpleNamespace(
+        name="send_email",
+        description="Send an e-mail.",
+        params_json_schema={"type": "object", "properties": properties, "required": ["to"]},
+    )
+
+
+def test_canonical_json_ignores_key_order():
+    first = canonical_json({"b": [1, {"y": 2, "x": "é"}], "a": None})
+    second = canonical_json({"a": None, "b": [1, {"x": "é", "y": 2}]})
+    assert first == second == '{"a":null,"b":[1,{"x":"é","y":2}]}'
+
+
+def test_tool_schema_of_plain_and_sdk_tools():
+    assert tool_schema(find_company) == {
+        "name": "find_company",
+        "description": "Look a company up by name.",
+        "parameters": {
+            "type": "object",
+            "properties": {"company_name": {"type": "string"}, "country": {"type": "string"}, "limit": {"type": "integer"}},
+            "required": ["company_name"],
+        },
+    }
+    sdk = _sdk_tool({"to": {"type": "string"}})
+    assert tool_schema(sdk)["parameters"] is sdk.params_json_schema
+
+
+def test_prefix_is_byte_identical_across_rebuilds_and_tool_order():
+    properties = {"to": {"type": "string"}, "body": {"type": "string"}}
+    reordered = {"body": {"type": "string"}, "to": {"type": "string"}}
+    first = build_prefix("test-stable", INSTRUCTIONS, [find_company, score_lead, _sdk_tool(properties)])
+    second = build_prefix("test-stable", INSTRUCTIONS, [_sdk_tool(reordered), score_lead, find_company])
+    assert first.tools_json.encode() == second.tools_json.encode()
+    assert first.digest == second.digest
+    assert first.tool_names == ("find_company", "score_lead", "send_email")
+
+
+def test_prefix_is_byte_identical_across_processes():
+    script = (
+        "from tests.test_prompt_prefix import INSTRUCTIONS, find_company, score_lead\n"
+        "from hybrid_components.prompt_prefix import build_prefix\n"
+        "prefix = build_prefix('test-process', INSTRUCTIONS, [score_lead, find_company])\n"
+        "print(prefix.digest, prefix.tools_json)\n"
+    )
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("0", "1", "2")
+    }
+    prefix = build_prefix("test-process", INSTRUCTIONS, [find_company, score_lead])
+    assert outputs == {f"{prefix.digest} {prefix.tools_json}\n"}
+
+
+def test_changed_prefix_is_reported(caplog):
+    build_prefix("test-changed", INSTRUCTIONS, [find_company])
+    with caplog.at_level(logging.WARNING, logger="hybrid_components.prompt_prefix"):
+        build_prefix("test-changed", INSTRUCTIONS, [find_company])
+        assert not caplog.records
+        changed = build_prefix("test-changed", f"Today is Monday. {INSTRUCTIONS}", [find_company])
+    assert len(caplog.records) == 1
+    assert "test-changed" in caplog.text and changed.digest in caplog.text
+
+
+class _Collector:
+    def __init__(self) -> None:
+        self.spans = []
+
+    def on_start(self, span) -> None:
+        pass
+
+    def on_end(self, span) -> None:
+        self.spans.append(span.to_dict())
+
+    def shutdown(self) -> None:
+        pass
+
+
+def test_prompt_cache_report_per_run_and_prefix():
+    collector = _Collector()
+    tracer = Tracer([collector])
+    for agent, prefix, usage in (
+        ("LeadAgent", "aaaa", [(1200, 50, 0), (1400, 40, 1152)]),
+        ("LeadAgent", "aaaa", [(1200, 60, 1152)]),
+        ("ContentAgent", "bbbb", [(300, 80, 0)]),
+    ):
+        with tracer.span(f"agent.{agent}", "agent", agent=agent):
+            for prompt, completion, cached in usage:
+                with tracer.span("model.run", "model", model="gpt-4o-mini", prefix=prefix) as span:
+                    span.add_tokens(prompt, completion, cached)
+
+    report = prompt_cache_report(json.loads(json.dumps(collector.spans)))
+    assert [(run["agent"], run["calls"], run["cached_prompt_tokens"]) for run in report["runs"]] == [
+        ("LeadAgent", 2, 1152),
+        ("LeadAgent", 1, 1152),
+        ("ContentAgent", 1, 0),
+    ]
+    lead = report["by_prefix"]["aaaa"]
+    assert lead["prompt_tokens"] == 3800 and lead["uncached_prompt_tokens"] == 3800 - 2304
+    assert lead["cached_ratio"] == round(2304 / 3800, 4)
+    assert report["by_prefix"]["bbbb"]["cached_ratio"] == 0.0
+    assert report["total"]["calls"] == 4 and report["total"]["prompt_tokens"] == 4100
+    # Cached tokens are billed at the cheaper cached price.
+    full_price = (3800 * 0.15 + 150 * 0.60) / 1_000_000
+    assert lead["cost_usd"] < full_price
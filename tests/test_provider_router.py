@@ -0,0 +1,120 @@
+"""ProviderRouter over simulated StubRunner backends: routing, failover, ejection, hedging."""
+
+import asyncio
+import time
+
+import pytest
+
+from hybrid_components.provider_router import BackendStats, ProviderRouter, RouterError
+from hybrid_components.stub_model import StubRunner
+
+
+def _router(runners: dict[str, StubRunner], **options) -> ProviderRouter:
+    backends = {name: (lambda task, r=runner: r.run(None, task)) for name, runner in runners.items()}
+    return ProviderRouter(backends, **{"min_samples": 3, **options})
+
+
+async def _calls(router: ProviderRouter, count: int) -> list:
+    return [await router.call(f"task {i}") for i in range(count)]
+
+
+def test_routes_to_the_fastest_backend_after_probing():
+    runners = {"slow": StubRunner(latency=0.03), "fast": StubRunner(latency=0.002)}
+    router = _router(runners)
+    results = asyncio.run(_calls(router, 20))
+    assert all(result.final_output.startswith("Stub summary") for result in results)
+    stats = router.stats()
+    # Both were measured, then the fast one took the rest.
+    assert stats["slow"]["calls"] == 3
+    assert stats["fast"]["wins"] == 17
+    assert router.ranking() == ["fast", "slow"]
+
+
+def test_failed_calls_fail_over_to_the_next_backend():
+    runners = {"flaky": StubRunner(latency=0.001, error_rate=1.0), "steady": StubRunner(latency=0.01)}
+    router = _router(runners, cooldown=60)
+    results = asyncio.run(_calls(router, 6))
+    assert len(results) == 6
+    stats = router.stats()
+    assert stats["steady"]["wins"] == 6
+    assert stats["flaky"]["errors"] == 3
+    # Three errors out of three samples: ejected, and only a last resort now.
+    assert stats["flaky"]["ejected"] and stats["flaky"]["calls"] == 3
+    assert router.ranking()[-1] == "flaky"
+
+
+def test_ejected_backend_is_probed_again_after_cooldown():
+    runners = {"flaky": StubRunner(latency=0.001, error_rate=1.0), "steady": StubRunner(latency=0.01)}
+    router = _router(runners, cooldown=0.2)
+    asyncio.run(_calls(router, 4))
+    assert router.stats()["flaky"]["ejected"]
+    runners["flaky"].error_rate = 0.0
+    time.sleep(0.25)
+    assert router.ranking()[0] == "flaky"
+    asyncio.run(_calls(router, 1))
+    assert router.stats()["flaky"]["wins"] == 1
+
+
+def test_router_error_when_every_backend_fails():
+    runners = {name: StubRunner(latency=0.001, error_rate=1.0) for name in ("a", "b")}
+    router = _router(runners)
+    with pytest.raises(RouterError, match="All backends failed"):
+        asyncio.run(router.call("task"))
+    assert all(stats["errors"] == 1 for stats in router.stats().values())
+
+
+def test_hedge_answers_from_the_second_backend_during_a_spike():
+    runners = {
+        "primary": StubRunner(latency=0.005, jitter=0.001, seed=1),
+        "secondary": StubRunner(latency=0.02, jitter=0.001, seed=2),
+    }
+    router = _router(runners, hedge=True, hedge_delay_bounds=(0.01, 1.0))
+    asyncio.run(_calls(router, 10))
+    assert router.ranking()[0] == "primary"
+    ewma_before = router.stats_by_backend["primary"].ewma
+    # A slow warm-up call on a busy machine may already have been hedged.
+    before = router.stats()
+
+    runners["primary"].latency = 2.0
+    started = time.monotonic()
+    asyncio.run(router.call("during spike"))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.5
+    stats = router.stats()
+    assert stats["secondary"]["hedges"] - before["secondary"]["hedges"] == 1
+    assert stats["primary"]["cancelled"] - before["primary"]["cancelled"] == 1
+    # The cut-off call is a lower bound on the primary's latency: it may raise
+    # the average, never pull it down.
+    assert router.stats_by_backend["primary"].ewma >= ewma_before
+
+
+def test_without_hedging_a_spike_is_waited_out():
+    runners = {"primary": StubRunner(latency=0.005), "secondary": StubRunner(latency=0.02)}
+    router = _router(runners)
+    asyncio.run(_calls(router, 10))
+    runners["primary"].latency = 0.3
+    started = time.monotonic()
+    asyncio.run(router.call("during spike"))
+    assert time.monotonic() - started >= 0.3
+    assert router.stats()["secondary"]["hedges"] == 0
+
+
+def test_censored_samples_never_lower_the_average():
+    stats = BackendStats()
+    for latency in (0.1, 0.1, 0.1):
+        stats.record(latency, True)
+    stats.record_censored(0.01)
+    assert stats.ewma == pytest.approx(0.1)
+    stats.record_censored(1.0)
+    assert stats.ewma > 0.1
+    # Censored calls count as samples, but neither as errors nor latencies.
+    samples, error_rate, p50, _ = stats.snapshot()
+    assert (samples, error_rate, p50) == (5, 0.0, 0.1)
+
+
+def test_censored_sample_seeds_an_unmeasured_backend():
+    stats = BackendStats()
+    stats.record_censored(0.2)
+    assert stats.ewma == 0.2
+    assert stats.snapshot() == (1, 0.0, None, None)
@@ -0,0 +1,75 @@
+"""ResultsStore: failed flushes, leftover temporary files and the compaction lock."""
+
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from agents.lead_agent.tools import results_store
+from agents.lead_agent.tools.results_store import LOCK_NAME, STALE_SECONDS, ResultsStore
+
+
+def _store(tmp_path, **options) -> ResultsStore:
+    options = {"flush_rows": 1000, "flush_interval": 3600, "compact_min_files": 0, **options}
+    return ResultsStore(str(tmp_path), **options)
+
+
+def _fill(store: ResultsStore, files: int, rows: int = 3) -> str:
+    for f in range(files):
+        for i in range(rows):
+            store.append_result({"url": f"https://company{f}-{i}.example/", "status": "success"})
+        store.flush()
+    (directory,) = results_store._partition_dirs(store.path)
+    return directory
+
+
+def test_failed_flush_keeps_rows_for_the_next_one(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    for i in range(5):
+        store.append_result({"url": f"https://company{i}.example/", "status": "success"})
+
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(results_store.pq, "write_table", broken)
+        with pytest.raises(OSError):
+            store.flush()
+    store.append_result({"url": "https://late.example/", "status": "success"})
+    assert store.flush() == 6
+    domains = store.query(columns=["domain"]).column("domain").to_pylist()
+    assert sorted(domains) == sorted([f"company{i}.example" for i in range(5)] + ["late.example"])
+
+
+def test_compaction_only_removes_stale_temporary_files(tmp_path):
+    store = _store(tmp_path)
+    directory = _fill(store, 3)
+    fresh = os.path.join(directory, ".part-fresh.parquet.tmp")
+    stale = os.path.join(directory, ".part-stale.parquet.tmp")
+    for path in (fresh, stale):
+        open(path, "wb").close()
+    old = time.time() - STALE_SECONDS - 60
+    os.utime(stale, (old, old))
+    assert store.compact()["files_merged"] == 3
+    assert os.path.exists(fresh) and not os.path.exists(stale)
+    assert not os.path.exists(os.path.join(directory, LOCK_NAME))
+    assert store.count() == 9
+
+
+def test_compaction_skips_a_partition_locked_by_another_process(tmp_path):
+    store = _store(tmp_path)
+    directory = _fill(store, 3)
+    lock = os.path.join(directory, LOCK_NAME)
+    open(lock, "w").close()
+    assert store.compact() == {"partitions": 0, "files_merged": 0, "rows": 0}
+    assert len(results_store._data_files(directory)) == 3
+
+    # A lock left behind by a crashed process is taken over.
+    old = time.time() - STALE_SECONDS - 60
+    os.utime(lock, (old, old))
+    assert store.compact()["files_merged"] == 3
+    assert len(results_store._data_files(directory)) == 1
+    assert not os.path.exists(lock)
+    assert store.count() == 9
@@ -0,0 +1,97 @@
+"""RunRecord: bounded memory, capped payloads and spilled outputs over long runs."""
+
+import hashlib
+import json
+import os
+import tracemalloc
+
+from hybrid_components.run_record import RunRecord
+from hybrid_components.streaming import DONE, TOOL_CALL, TOOL_RESULT, AgentEvent
+
+MAX_TOOLS = 16
+MAX_BYTES = 1024
+CALLS = 3000
+PAGES = 40
+
+
+def _page(i: int) -> str:
+    """A scraped page of about 24 KiB; every ``PAGES``-th one repeats."""
+
+    return f"<html><title>Page {i % PAGES}</title>" + "lorem ipsum dolor " * 1400 + "</html>"
+
+
+def _run(record: RunRecord) -> int:
+    """Feed ``CALLS`` tool calls with large outputs; return the output bytes sent."""
+
+    sent = 0
+    for i in range(CALLS):
+        tool = "crawl_websites" if i % 2 else "prospect_website"
+        record.observe(AgentEvent(TOOL_CALL, tool_name=tool, payload={"url": f"https://site{i}.example", "pad": "x" * 2000}))
+        page = _page(i)
+        sent += len(page.encode())
+        record.observe(AgentEvent(TOOL_RESULT, tool_name=tool, payload=page))
+    record.observe(AgentEvent(DONE, payload="summary"))
+    return sent
+
+
+def test_long_run_keeps_a_bounded_capped_record(tmp_path):
+    spill_dir = str(tmp_path / "spill")
+    record = RunRecord("agent", "task " * 1000, max_tools=MAX_TOOLS, max_bytes=MAX_BYTES, spill_dir=spill_dir)
+
+    tracemalloc.start()
+    sent = _run(record)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert record.status == "ok"
+    assert record.summary() == {"tool_calls": CALLS, "tool_output_bytes": sent, "spilled_bytes": sent}
+    assert len(record.tools) == MAX_TOOLS
+    # Tens of megabytes went through; the record holds a few dozen kilobytes.
+    assert sent > 50_000_000 and retained < 1_000_000
+    limit = MAX_BYTES + len("…".encode())
+    assert len(record.task.encode()) <= limit
+    for tool in record.tools:
+        assert len(tool.arguments.encode()) <= limit and len(tool.output.encode()) <= limit
+        assert tool.output_bytes > MAX_BYTES and tool.output.endswith("…")
+
+
+def test_spilled_outputs_are_content_addressed(tmp_path):
+    spill_dir = tmp_path / "spill"
+    record = RunRecord("agent", "task", max_tools=MAX_TOOLS, max_bytes=MAX_BYTES, spill_dir=str(spill_dir))
+    _run(record)
+
+    # Repeated pages share one file.
+    assert len(os.listdir(spill_dir)) == PAGES
+    for tool in record.tools:
+        with open(tool.spill_path, "rb") as f:
+            data = f.read()
+        assert os.path.basename(tool.spill_path) == hashlib.sha256(data).hexdigest()[:32] + ".json"
+        assert len(data) == tool.output_bytes
+        assert data.decode().startswith(tool.output[:-1])
+
+
+def test_outputs_are_paired_with_their_calls():
+    record = RunRecord("agent", "task", max_tools=8, max_bytes=MAX_BYTES)
+    # Parallel calls: all calls of a turn first, then their outputs in call order.
+    for turn in range(3):
+        calls = [("prospect_website", f"a{turn}"), ("get_contact_details", f"c{turn}"), ("prospect_website", f"b{turn}")]
+        for tool, argument in calls:
+            record.observe(AgentEvent(TOOL_CALL, tool_name=tool, payload={"arg": argument}))
+        for tool, argument in calls:
+            record.observe(AgentEvent(TOOL_RESULT, tool_name=tool, payload=f"result of {argument}"))
+
+    assert len(record.tools) == 8
+    for tool in record.tools:
+        assert tool.output == f"result of {json.loads(tool.arguments)['arg']}"
+
+    # An output without a pending call is kept on its own.
+    record.observe(AgentEvent(TOOL_RESULT, tool_name="analyze_style", payload="orphan"))
+    assert record.tools[-1].arguments == "" and record.tools[-1].output == "orphan"
+
+
+def test_spilling_disabled_truncates_only(tmp_path):
+    record = RunRecord("agent", "task", max_tools=4, max_bytes=MAX_BYTES)
+    record.observe(AgentEvent(TOOL_CALL, tool_name="crawl_websites", payload={}))
+    record.observe(AgentEvent(TOOL_RESULT, tool_name="crawl_websites", payload=_page(1)))
+    assert record.tools[-1].spill_path is None and record.spilled_bytes == 0
+    assert record.tool_output_bytes == len(_page(1).encode())
@@ -0,0 +1,54 @@
+"""SearchIndex: document lengths stay aligned with doc ids across failed flushes."""
+
+import pytest
+
+from agents.content_agent.tools.search_index import SearchIndex, tokenize
+
+DOCUMENTS = {
+    "a": "deliverability " * 3,
+    "b": "deliverability tips for cold email campaigns and warm domains",
+}
+
+
+def _lengths_match(index: SearchIndex) -> bool:
+    rows = index._conn.execute("SELECT doc_id, length FROM documents").fetchall()
+    return len(index._lengths) == index._next_doc_id and all(index._lengths[d] == n for d, n in rows)
+
+
+def test_lengths_of_an_uncommitted_flush_are_dropped_on_open(tmp_path):
+    with SearchIndex(str(tmp_path)) as index:
+        index.add("first", "an early document")
+    # A crash between appending the lengths and committing leaves extra slots.
+    with open(tmp_path / "doclens.u32", "ab") as lengths_file:
+        lengths_file.write(bytes([7, 0, 0, 0]) * 5)
+
+    with SearchIndex(str(tmp_path)) as index:
+        for key, text in DOCUMENTS.items():
+            index.add(key, text)
+        index.commit()
+        assert _lengths_match(index)
+        assert index._lengths[index.search("deliverability")[0].doc_id] == len(tokenize(f"\n{DOCUMENTS['a']}"))
+
+
+def test_failed_flush_leaves_lengths_and_counters_untouched(tmp_path, monkeypatch):
+    index = SearchIndex(str(tmp_path))
+    index.add("first", "an early document")
+    index.commit()
+    before = index.stats()
+
+    def fail() -> None:
+        raise RuntimeError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(index, "_write_meta_locked", fail)
+        index.add("lost", "never committed " * 50)
+        with pytest.raises(RuntimeError, match="disk full"):
+            index.commit()
+    assert index.stats() == before
+
+    for key, text in DOCUMENTS.items():
+        index.add(key, text)
+    index.commit()
+    assert _lengths_match(index)
+    assert [hit.key for hit in index.search("deliverability")] == ["a", "b"]
+    index.close()
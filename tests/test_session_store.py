@@ -0,0 +1,69 @@
+"""PersistentSessionService over the SQLite backend."""
+
+import time
+from types import SimpleNamespace
+
+from hybrid_components.session_store import PersistentSessionService, SQLiteSessionBackend
+
+
+def _service(tmp_path, **options) -> PersistentSessionService:
+    return PersistentSessionService(SQLiteSessionBackend(str(tmp_path / "sessions.sqlite")), **options)
+
+
+def test_sessions_survive_a_new_service(tmp_path):
+    service = _service(tmp_path)
+    session = service.create_session(user_id="u", app_name="LeadAgentApp", session_id="s1")
+    service.append_event(session, {"text": "hello", "actions": None})
+    service.append_event(session, SimpleNamespace(actions=SimpleNamespace(state_delta={"step": 2})))
+
+    reloaded = _service(tmp_path).get_session("u", "s1", app_name="LeadAgentApp")
+    assert reloaded.id == "s1" and len(reloaded.events) == 2
+    assert reloaded.state == {"step": 2} and reloaded.event_count == 2
+
+
+def test_lookup_without_app_name_uses_memory_then_backend(tmp_path):
+    service = _service(tmp_path)
+    service.create_session(user_id="u", app_name="ContentAgentApp", session_id="s1")
+    assert service.get_session("u", "s1").app_name == "ContentAgentApp"
+    assert service.get_session("u", "missing") is None
+
+    fresh = _service(tmp_path)
+    assert fresh.get_session("u", "s1").app_name == "ContentAgentApp"
+    assert fresh.get_session("other-user", "s1") is None
+
+
+def test_memory_is_bounded_by_bytes_and_events(tmp_path):
+    service = _service(tmp_path, max_active_bytes=20_000, max_session_events=5)
+    sessions = [service.create_session(user_id="u", app_name="A", session_id=f"s{i}") for i in range(4)]
+    for session in sessions:
+        for i in range(8):
+            service.append_event(session, {"payload": "x" * 1000, "n": i})
+    # Each session keeps its last five events (~5 kB); four of them do not fit.
+    assert all(len(session.events) == 5 for session in sessions)
+    assert sessions[-1].events[0]["n"] == 3
+    assert service.active_bytes() <= 20_000
+    assert service.active_session_count() < 4
+
+    # Older events are still stored, and reloading brings back the last five.
+    reloaded = _service(tmp_path, max_session_events=5).get_session("u", "s0", "A")
+    assert [event["n"] for event in reloaded.events] == [3, 4, 5, 6, 7]
+    service.append_event(reloaded, {"n": 8})
+    assert _service(tmp_path).get_session("u", "s0", "A").event_count == 9
+
+
+def test_stale_sessions_are_purged_from_the_backend(tmp_path):
+    service = _service(tmp_path, retention=0.2, idle_timeout=0.05)
+    service.create_session(user_id="u", app_name="A", session_id="old")
+    time.sleep(0.3)
+    service.create_session(user_id="u", app_name="A", session_id="new")
+    fresh = _service(tmp_path, retention=None)
+    assert fresh.get_session("u", "old", "A") is None
+    assert fresh.get_session("u", "new", "A") is not None
+
+
+def test_delete_session(tmp_path):
+    service = _service(tmp_path)
+    service.create_session(user_id="u", app_name="A", session_id="s1")
+    service.delete_session("u", "s1", "A")
+    assert service.get_session("u", "s1") is None
+    assert service.active_session_count() == 0
@@ -0,0 +1,58 @@
+"""crawl_websites: seeds answered from the lead store do not wait for crawls."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents.lead_agent.tools import web_prospector
+from agents.lead_agent.tools.crawler import CrawlConfig, CrawlEngine
+from agents.lead_agent.tools.lead_store import LeadStore
+
+PAGE = b"<html><head><title>Slow Co</title></head><body>sales@slow.test</body></html>"
+
+
+@pytest.fixture
+def slow_site():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(1.0)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+@pytest.fixture
+def prospector(tmp_path, monkeypatch):
+    store = LeadStore(str(tmp_path / "leads.db"), window=3600)
+    engine = CrawlEngine(CrawlConfig(max_depth=0, respect_robots=False, host_rate=0))
+    monkeypatch.setattr(web_prospector, "get_default_lead_store", lambda: store)
+    monkeypatch.setattr(web_prospector, "get_default_engine", lambda: engine)
+    yield store
+    engine.close()
+
+
+def test_stored_seeds_are_yielded_before_slow_crawls_finish(prospector, slow_site):
+    prospect = {"title": "Known Co", "emails": ["hi@known.example"], "status": "success"}
+    prospector.record(urls=["https://known.example"], company="Known Co", data={"prospect": prospect})
+
+    started = time.monotonic()
+    results = web_prospector.crawl_websites([slow_site, "known.example", "www.known.example"])
+    first = next(results)
+    assert time.monotonic() - started < 0.5
+    assert first["deduplicated"] and first["emails"] == ["hi@known.example"]
+
+    rest = list(results)
+    assert [result["url"] for result in rest] == [slow_site]
+    assert rest[0]["emails"] == ["sales@slow.test"] and "deduplicated" not in rest[0]